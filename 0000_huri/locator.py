@@ -5,6 +5,8 @@ import utiltools.robotmath as rm
 import utiltools.thirdparty.p3dhelper as p3dh
 import numpy as np
 import environment.collisionmodel as cm
+import vision.depth_camera.registration_service as rs
+import tubeoccupancy as to
 
 class Locator(object):
 
@@ -40,6 +42,7 @@ class Locator(object):
             self.tubeholesize = np.array([17, 16.5])
             self.tubestandsize = np.array([97, 191])
         self.__directory = directory
+        self.tubeoccupancydetector = to.TubeOccupancyDetector(self.tubeholecenters, self.tubeholesize)
 
         if directory is None:
             self.bgdepth = pickle.load(open("./databackground/bgdepth.pkl", "rb"))
@@ -120,6 +123,35 @@ class Locator(object):
 
         return copy.deepcopy(homomat)
 
+    def findtubestand_matchmulti(self, tgtpcdnp, service=None, n_global=2):
+        """
+        match self.tstpcd from tgtpcdnp, trying global registration and the obb initialization (and its flipped
+        version) in parallel instead of calling icp serially per hypothesis
+        NOTE: tgtpcdnp must be in global frame, use getglobalpcd to convert if local
+
+        :param tgtpcdnp:
+        :param service: a RegistrationService that already has the template "tubestand", created if None
+        :param n_global: number of global registration hypotheses
+        :return:
+        """
+
+        if service is None:
+            service = rs.RegistrationService(rs.ppl.PointCloudPipeline(voxel_size=5))
+        if not service.has_template("tubestand"):
+            service.add_template("tubestand", self.tstpcdnp)
+        inithomomat = self.findtubestand_obb(tgtpcdnp)
+        inithomomatflipped = copy.deepcopy(inithomomat)
+        inithomomatflipped[:3,0] = -inithomomatflipped[:3,0]
+        inithomomatflipped[:3,1] = -inithomomatflipped[:3,1]
+        results = service.register(tgtpcdnp, template_ids=["tubestand"], n_global=n_global,
+                                   init_homomats={"tubestand": [inithomomat, inithomomatflipped]})
+        homomat = results[0].homomat
+
+        # for compatibility with locactorfixed
+        self.tubestandhomomat = homomat
+
+        return copy.deepcopy(homomat)
+
     def findtubestand_obb(self, tgtpcdnp, toggledebug = False):
         """
         match self.tstpcd from tgtpcdnp
@@ -212,9 +244,6 @@ class Locator(object):
         date: 20200317
         """
 
-        elearray = np.zeros((5, 10))
-        eleconfidencearray = np.zeros((5, 10))
-
         tgtpcdnp = o3dh.remove_outlier(tgtpcdnp, downsampling_voxelsize=None, nb_points=90, radius=5)
         # transform back to the local frame of the tubestand
         tgtpcdnp_normalized = rm.homotransformpointarray(rm.homoinverse(tubestand_homomat), tgtpcdnp)
@@ -222,94 +251,23 @@ class Locator(object):
             cm.CollisionModel(tgtpcdnp_normalized).reparentTo(base.render)
             tscm2 = copy.deepcopy(self.tubestandcm)
             tscm2.reparentTo(base.render)
-        for i in range(5):
-            for j in range(10):
+        elearray, eleconfidencearray = self.tubeoccupancydetector.detect(tgtpcdnp_normalized,
+                                                                         rotation_axis=tubestand_homomat[:3, 2])
+        if toggledebug:
+            labels = self.tubeoccupancydetector.label_points(tgtpcdnp_normalized)
+            for i, j in zip(*np.nonzero(elearray)):
+                print("ACCEPTED! ID: ", i, j)
+                tmppcd = tgtpcdnp_normalized[labels == i * elearray.shape[1] + j]
+                tmppcd = tmppcd[tmppcd[:, 2] > 100] if elearray[i][j] == 1 else tmppcd[tmppcd[:, 2] < 90]
                 holepos = self.tubeholecenters[i][j]
-                tmppcd = self._crop_pcd_overahole(tgtpcdnp_normalized, holepos[0], holepos[1])
-                if len(tmppcd) > 50:
-                    if toggledebug:
-                        print("------more than 50 raw points, start a new test------")
-                    tmppcdover100 = tmppcd[tmppcd[:, 2] > 100]
-                    tmppcdbelow90 = tmppcd[tmppcd[:, 2] < 90]
-                    tmppcdlist = [tmppcdover100, tmppcdbelow90]
-                    if toggledebug:
-                        print("rotate around...")
-                    rejflaglist = [False, False]
-                    allminstdlist = [[], []]
-                    newtmppcdlist = [None, None]
-                    minstdlist = [None, None]
-                    for k in range(2):
-                        if toggledebug:
-                            print("checking over 100 and below 90, now: ", j)
-                        if len(tmppcdlist[k]) < 10:
-                            rejflaglist[k] = True
-                            continue
-                        for angle in np.linspace(0, 180, 10):
-                            tmphomomat = np.eye(4)
-                            tmphomomat[:3, :3] = rm.rodrigues(tubestand_homomat[:3, 2], angle)
-                            newtmppcdlist[k] = rm.homotransformpointarray(tmphomomat, tmppcdlist[k])
-                            minstdlist[k] = np.min(np.std(newtmppcdlist[k][:, :2], axis=0))
-                            if toggledebug:
-                                print(minstdlist[k])
-                            allminstdlist[k].append(minstdlist[k])
-                            if minstdlist[k] < 1.5:
-                                rejflaglist[k] = True
-                        if toggledebug:
-                            print("rotate round done")
-                            print("minstd ", np.min(np.asarray(allminstdlist[k])))
-                    if all(item for item in rejflaglist):
-                        continue
-                    elif all(not item for item in rejflaglist):
-                        print("CANNOT tell if the tube is big or small")
-                        raise ValueError()
-                    else:
-                        tmppcd = tmppcdbelow90 if rejflaglist[0] else tmppcdover100
-                        candidatetype = 2 if rejflaglist[0] else 1
-                        tmpangles = np.arctan2(tmppcd[:, 1], tmppcd[:, 0])
-                        tmpangles[tmpangles < 0] = 360 + tmpangles[tmpangles < 0]
-                        if toggledebug:
-                            print(np.std(tmpangles))
-                            print("ACCEPTED! ID: ", i, j)
-                        elearray[i][j] = candidatetype
-                        eleconfidencearray[i][j] = 1
-                        if toggledebug:
-                            # normalized
-                            objnp = p3dh.genpointcloudnodepath(tmppcd, pntsize=5)
-                            rgb = np.random.rand(3)
-                            objnp.setColor(rgb[0], rgb[1], rgb[2], 1)
-                            objnp.reparentTo(base.render)
-                            stick = p3dh.gendumbbell(spos=np.array([holepos[0], holepos[1], 10]),
-                                                     epos=np.array([holepos[0], holepos[1], 60]))
-                            stick.setColor(rgb[0], rgb[1], rgb[2], 1)
-                            stick.reparentTo(base.render)
-                            # original
-                            tmppcd_tr = rm.homotransformpointarray(tubestand_homomat, tmppcd)
-                            objnp_tr = p3dh.genpointcloudnodepath(tmppcd_tr, pntsize=5)
-                            objnp_tr.setColor(rgb[0], rgb[1], rgb[2], 1)
-                            objnp_tr.reparentTo(base.render)
-                            spos_tr = rm.homotransformpoint(tubestand_homomat, np.array([holepos[0], holepos[1], 0]))
-                            stick_tr = p3dh.gendumbbell(spos=np.array([spos_tr[0], spos_tr[1], 10]),
-                                                        epos=np.array([spos_tr[0], spos_tr[1], 60]))
-                            stick_tr.setColor(rgb[0], rgb[1], rgb[2], 1)
-                            stick_tr.reparentTo(base.render)
-                            # box normalized
-                            center, bounds = rm.get_aabb(tmppcd)
-                            boxextent = np.array(
-                                [bounds[0, 1] - bounds[0, 0], bounds[1, 1] - bounds[1, 0], bounds[2, 1] - bounds[2, 0]])
-                            boxhomomat = np.eye(4)
-                            boxhomomat[:3, 3] = center
-                            box = p3dh.genbox(extent=boxextent, homomat=boxhomomat,
-                                              rgba=np.array([rgb[0], rgb[1], rgb[2], .3]))
-                            box.reparentTo(base.render)
-                            # box original
-                            center_r = rm.homotransformpoint(tubestand_homomat, center)
-                            boxhomomat_tr = copy.deepcopy(tubestand_homomat)
-                            boxhomomat_tr[:3, 3] = center_r
-                            box_tr = p3dh.genbox(extent=boxextent, homomat=boxhomomat_tr,
-                                                 rgba=np.array([rgb[0], rgb[1], rgb[2], .3]))
-                            box_tr.reparentTo(base.render)
-                    if toggledebug:
-                        print("------the new test is done------")
+                rgb = np.random.rand(3)
+                objnp = p3dh.genpointcloudnodepath(tmppcd, pntsize=5)
+                objnp.setColor(rgb[0], rgb[1], rgb[2], 1)
+                objnp.reparentTo(base.render)
+                stick = p3dh.gendumbbell(spos=np.array([holepos[0], holepos[1], 10]),
+                                         epos=np.array([holepos[0], holepos[1], 60]))
+                stick.setColor(rgb[0], rgb[1], rgb[2], 1)
+                stick.reparentTo(base.render)
         return elearray, eleconfidencearray
 
     def capturecorrectedpcd(self, pxc, ncapturetimes = 1):
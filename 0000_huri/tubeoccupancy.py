@@ -0,0 +1,209 @@
+"""
+batched tube detection over the holes of a rack
+the point cloud is binned into hole cells once, and the per-hole statistics used by Locator.findtubes
+(number of points, height bands, minimum standard deviation over rotations) are computed with segmented
+reductions (np.bincount) instead of cropping and rotating every hole separately.
+the standard deviation along a rotated axis r is sqrt(r^T C r), where C is the covariance of the points in a cell,
+so the rotations are applied to 3x3 covariances instead of to the points.
+"""
+
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+def _rotmats(axis, angles):
+    """
+    :param axis: 1x3 nparray
+    :param angles: 1xk nparray, radians
+    :return: kx3x3 nparray
+    """
+    axis = np.asarray(axis, dtype=np.float64)
+    axis = axis / np.linalg.norm(axis)
+    k = np.array([[0, -axis[2], axis[1]], [axis[2], 0, -axis[0]], [-axis[1], axis[0], 0]])
+    sin, cos = np.sin(angles)[:, None, None], np.cos(angles)[:, None, None]
+    return np.eye(3) + sin * k + (1 - cos) * (k @ k)
+
+
+class TubeOccupancyDetector(object):
+
+    def __init__(self,
+                 holecenters,
+                 holesize,
+                 crop_ratio=.9,
+                 crop_height=70,
+                 min_npoints=50,
+                 band_heights=(100, 90),
+                 min_band_npoints=10,
+                 n_angles=10,
+                 min_std=1.5):
+        """
+        the defaults are the thresholds of Locator.findtubes
+        :param holecenters: rows x cols x 2 nparray for a grid, or nx2 for an arbitrary layout, in the rack frame
+        :param holesize: 1x2 nparray, or one per hole (same leading shape as holecenters)
+        :param crop_ratio: the points within crop_ratio * holesize around a center belong to the hole
+        :param crop_height: the points below it are ignored
+        :param min_npoints: holes with at most this number of points are empty
+        :param band_heights: (over, below), the points over band_heights[0] are tested for big tubes,
+                             the ones below band_heights[1] for small tubes
+        :param min_band_npoints: a band with fewer points is rejected
+        :param n_angles: number of rotations in [0, 180] degrees
+        :param min_std: a band is rejected if its min xy standard deviation under any rotation is below it
+        """
+        self.holecenters = np.asarray(holecenters, dtype=np.float64)
+        self.shape = self.holecenters.shape[:-1]
+        self._centers = self.holecenters.reshape((-1, 2))
+        self._halfsizes = np.broadcast_to(np.asarray(holesize, dtype=np.float64).reshape((-1, 2)) * crop_ratio / 2,
+                                          self._centers.shape)
+        self.crop_height = crop_height
+        self.min_npoints = min_npoints
+        self.band_heights = band_heights
+        self.min_band_npoints = min_band_npoints
+        self.angles = np.radians(np.linspace(0, 180, n_angles))
+        self.min_std = min_std
+        # a grid whose rows share x and whose columns share y is binned by searchsorted, other layouts by a kd-tree
+        self._rows_x = self._cols_y = None
+        if len(self.shape) == 2 and np.allclose(self.holecenters[:, :, 0], self.holecenters[:, :1, 0]) and \
+                np.allclose(self.holecenters[:, :, 1], self.holecenters[:1, :, 1]):
+            self._rows_x, self._cols_y = self.holecenters[:, 0, 0], self.holecenters[0, :, 1]
+            self._row_order, self._col_order = np.argsort(self._rows_x), np.argsort(self._cols_y)
+            self._row_edges = self._midpoints(self._rows_x[self._row_order])
+            self._col_edges = self._midpoints(self._cols_y[self._col_order])
+        else:
+            self._kdtree = cKDTree(self._centers / self._halfsizes.min(axis=0))
+
+    @staticmethod
+    def _midpoints(sorted_values):
+        return (sorted_values[1:] + sorted_values[:-1]) / 2
+
+    def label_points(self, points):
+        """
+        :param points: nx3 nparray in the rack frame
+        :return: 1xn int nparray, the flat hole index of each point, -1 if it is in no hole
+        """
+        points = np.asarray(points, dtype=np.float64).reshape((-1, 3))
+        if self._rows_x is not None:
+            rows = self._row_order[np.searchsorted(self._row_edges, points[:, 0])]
+            cols = self._col_order[np.searchsorted(self._col_edges, points[:, 1])]
+            labels = rows * len(self._cols_y) + cols
+        else:
+            scale = self._halfsizes.min(axis=0)
+            _, labels = self._kdtree.query(points[:, :2] / scale, k=1, p=np.inf)
+        offsets = np.abs(points[:, :2] - self._centers[labels])
+        inside = np.all(offsets < self._halfsizes[labels], axis=1) & (points[:, 2] > self.crop_height)
+        return np.where(inside, labels, -1)
+
+    def _band_min_stds(self, points, labels, band_mask, rotmats):
+        """
+        :return: n_holes nparray of band point counts, n_holes nparray of the min xy std over all rotations
+        """
+        n_holes = len(self._centers)
+        seg = labels[band_mask]
+        # centered per hole for numerical stability, the standard deviation does not depend on it
+        local = points[band_mask] - np.column_stack([self._centers[seg], np.zeros(len(seg))])
+        counts = np.bincount(seg, minlength=n_holes)
+        safe_counts = np.maximum(counts, 1)
+        means = np.column_stack([np.bincount(seg, weights=local[:, a], minlength=n_holes) for a in range(3)])
+        means /= safe_counts[:, None]
+        covs = np.empty((n_holes, 3, 3))
+        for a in range(3):
+            for b in range(a, 3):
+                covs[:, a, b] = covs[:, b, a] = np.bincount(seg, weights=local[:, a] * local[:, b],
+                                                            minlength=n_holes) / safe_counts
+        covs -= means[:, :, None] * means[:, None, :]
+        # variances along the rotated x and y axes, holes x angles x 2
+        axes = rotmats[:, :2, :]
+        variances = np.einsum('kri,hij,krj->hkr', axes, covs, axes)
+        return counts, np.sqrt(np.maximum(variances, 0).min(axis=(1, 2)))
+
+    def detect(self, points, rotation_axis=(0, 0, 1)):
+        """
+        :param points: nx3 nparray in the rack frame
+        :param rotation_axis: axis of the rotations used by the std test, Locator.findtubes uses the rack z in the
+                              sensor frame
+        :return: elearray (0 empty, 1 big tube, 2 small tube), eleconfidencearray, both shaped like the hole grid
+        """
+        points = np.asarray(points, dtype=np.float64).reshape((-1, 3))
+        labels = self.label_points(points)
+        valid = labels >= 0
+        points, labels = points[valid], labels[valid]
+        n_holes = len(self._centers)
+        occupied = np.bincount(labels, minlength=n_holes) > self.min_npoints
+        rotmats = _rotmats(rotation_axis, self.angles)
+        rejected = []
+        for band_mask in [points[:, 2] > self.band_heights[0], points[:, 2] < self.band_heights[1]]:
+            counts, min_stds = self._band_min_stds(points, labels, band_mask, rotmats)
+            rejected.append((counts < self.min_band_npoints) | (min_stds < self.min_std))
+        over_rejected, below_rejected = rejected
+        ambiguous = occupied & ~over_rejected & ~below_rejected
+        if np.any(ambiguous):
+            raise ValueError("CANNOT tell if the tube is big or small at holes {}".format(
+                [tuple(int(i) for i in np.unravel_index(hole, self.shape)) for hole in np.flatnonzero(ambiguous)]))
+        accepted = occupied & (over_rejected != below_rejected)
+        elearray = np.where(accepted, np.where(over_rejected, 2, 1), 0).astype(np.float64)
+        return elearray.reshape(self.shape), accepted.astype(np.float64).reshape(self.shape)
+
+
+if __name__ == '__main__':
+    import time
+
+    def findtubes_loop(detector, points, rotation_axis):
+        """
+        per-hole reference, the loop of Locator.findtubes
+        """
+        elearray = np.zeros(detector.shape)
+        confidencearray = np.zeros(detector.shape)
+        for hole, (center, halfsize) in enumerate(zip(detector._centers, detector._halfsizes)):
+            tmppcd = points[(points[:, 0] < center[0] + halfsize[0]) & (points[:, 0] > center[0] - halfsize[0]) &
+                            (points[:, 1] < center[1] + halfsize[1]) & (points[:, 1] > center[1] - halfsize[1]) &
+                            (points[:, 2] > detector.crop_height)]
+            if len(tmppcd) <= detector.min_npoints:
+                continue
+            rejflaglist = [False, False]
+            for k, band in enumerate([tmppcd[tmppcd[:, 2] > 100], tmppcd[tmppcd[:, 2] < 90]]):
+                if len(band) < 10:
+                    rejflaglist[k] = True
+                    continue
+                for rotmat in _rotmats(rotation_axis, detector.angles):
+                    if np.min(np.std((band @ rotmat.T)[:, :2], axis=0)) < 1.5:
+                        rejflaglist[k] = True
+            if all(rejflaglist):
+                continue
+            elif not any(rejflaglist):
+                raise ValueError()
+            index = np.unravel_index(hole, detector.shape)
+            elearray[index] = 2 if rejflaglist[0] else 1
+            confidencearray[index] = 1
+        return elearray, confidencearray
+
+    rng = np.random.default_rng(0)
+    # the light tube stand of Locator
+    holecenters = np.stack(np.meshgrid([-36, -18, 0, 18, 36],
+                                       [-83.25, -64.75, -46.25, -27.75, -9.25, 9.25, 27.75, 46.25, 64.75, 83.25],
+                                       indexing='ij'), axis=-1).astype(np.float64)
+    detector = TubeOccupancyDetector(holecenters, np.array([17, 16.5]))
+    gt = rng.integers(0, 3, size=(5, 10))
+    pcd = [rng.uniform([-50, -100, 0], [50, 100, 70], size=(20000, 3))]
+    for (i, j), tubetype in np.ndenumerate(gt):
+        if tubetype == 0:
+            continue
+        # tube rims seen from above: a ring at 105 for big tubes, 85 for small ones, plus points of the tube wall
+        angles = rng.uniform(0, 2 * np.pi, 300)
+        radius, height = (6, 105) if tubetype == 1 else (5, 85)
+        ring = np.column_stack([holecenters[i, j, 0] + radius * np.cos(angles),
+                                holecenters[i, j, 1] + radius * np.sin(angles),
+                                height + rng.normal(0, .5, 300)])
+        pcd.append(ring)
+    pcd = np.vstack(pcd)
+    rotation_axis = np.array([.01, -.02, 1])
+    for name, function in [("loop", lambda: findtubes_loop(detector, pcd, rotation_axis)),
+                           ("batched", lambda: detector.detect(pcd, rotation_axis))]:
+        tic = time.perf_counter()
+        for _ in range(20):
+            elearray, confidencearray = function()
+        print("{}: {:.2f}ms per frame, correct: {}".format(name, (time.perf_counter() - tic) / 20 * 1000,
+                                                           np.array_equal(elearray, gt)))
+    # an arbitrary layout, the same holes shuffled and given as a flat list
+    order = rng.permutation(50)
+    detector_flat = TubeOccupancyDetector(holecenters.reshape((-1, 2))[order], np.array([17, 16.5]))
+    elearray_flat, _ = detector_flat.detect(pcd, rotation_axis)
+    print("arbitrary layout correct:", np.array_equal(elearray_flat, gt.ravel()[order]))
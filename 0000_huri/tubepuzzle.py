@@ -1,6 +1,7 @@
 import numpy as np
 import copy
 import math
+import neuro.rl.env_meta.astar as astar
 
 class Node(object):
 
@@ -181,8 +182,7 @@ class TubePuzzle(object):
         self._nrow = elearray.shape[0]
         self._ncolumn = elearray.shape[1]
         self.elearray = np.zeros((self._nrow, self._ncolumn), dtype="int")
-        self.openlist = []
-        self.closelist = []
+        self.nexpansions = 0
         self._setValues(elearray)
         self.tubes = np.unique(self.elearray)[1:]
         self.ntubes = self.tubes.shape[0]
@@ -227,7 +227,7 @@ class TubePuzzle(object):
         date: 20190828
         """
 
-        return [np.int(np.floor(i/self._ncolumn)), i%self._ncolumn]
+        return [int(np.floor(i/self._ncolumn)), i%self._ncolumn]
 
     def _eleexist(self, i, j):
         """
@@ -430,75 +430,52 @@ class TubePuzzle(object):
                             returnlist.append(((i,j), grid))
         return returnlist
 
-    def _reorderopenlist(self):
-        self.openlist.sort(key=lambda x: (x.fcost()[0], x.fcost()[1]))
+    def _cellcosts(self):
+        """
+        cellcosts[tubeid, listindex] = 1 if the tube is out of its boundids, see Node._hs
 
-    def atarSearch(self):
+        :return:
+        """
+
+        cellcosts = np.zeros((np.max(self.tubes)+1, self._nrow*self._ncolumn), dtype=int)
+        for i, tubeid in enumerate(self.tubes):
+            cellcosts[tubeid] = 1
+            cellcosts[tubeid][self.boundids[i]] = 0
+        return cellcosts
+
+    def atarSearch(self, maxexpansions=None):
         """
 
         build a graph considering the movable and fillable ids
+        the number of expanded nodes is saved in self.nexpansions
 
-        :return:
+        :param maxexpansions: None means no limit, [] is returned if it is exceeded
+        :return: list of Node from elearray to the goal, [] if no path is found
 
         author: weiwei
         date: 20191003
         """
 
-        startnode = Node(self.elearray)
-        self.openlist = [startnode]
-        while True:
-            # if len(self.openlist)>=2:
-            #     for eachnode in self.openlist:
-            #         print(eachnode)
-            #         print(eachnode.fcost())
-            #     print("\n")
-            print(self.openlist[0])
-            print(self.openlist[0].fcost())
-            print("\n")
-            self.closelist.append(self.openlist.pop(0))
-            # movableids = self.getMovableIds(self.closelist[-1])
-            # fillableids = self.getFillableIds(self.closelist[-1])
-            # if len(movableids) == 0 or len(fillableids) == 0:
-            #     print("No path found!")
-            #     return []
-            # for mid in movableids:
-            #     for fid in fillableids:
-
-            mfpairs = self.getMovableFillablePair(self.closelist[-1])
+        def getmoves(grid):
+            mfpairs = self.getMovableFillablePair(grid)
             if len(mfpairs) == 0:
-                print("No path found!")
-                return []
-            for mfp in mfpairs:
-                mi, mj = mfp[0]
-                fi, fj = mfp[1]
-                tmpelearray = copy.deepcopy(self.closelist[-1])
-                tmpelearray.parent = self.closelist[-1]
-                tmpelearray[fi][fj] = tmpelearray[mi][mj]
-                tmpelearray[mi][mj] = 0
-                #  check if path is found
-                if tmpelearray.isdone():
-                    path = [tmpelearray]
-                    parent = tmpelearray.parent
-                    while parent is not None:
-                        path.append(parent)
-                        parent = parent.parent
-                    print("Path found!")
-                    # for eachnode in path:
-                    #     print(eachnode)
-                    return path[::-1]
-                # check if in openlist
-                for eachnode in self.openlist:
-                    if eachnode == tmpelearray:
-                        if eachnode.fcost()[0] <= tmpelearray.fcost()[0]:
-                            pass
-                            # no need to update position
-                        else:
-                            eachnode.parent = tmpelearray.parent
-                            self._reorderopenlist()
-                        continue
-                # not in openlist append and sort openlist
-                self.openlist.append(tmpelearray)
-                self._reorderopenlist()
+                return np.zeros((0, 2), dtype=int), np.zeros((0, 2), dtype=int)
+            mfpairs = np.asarray(mfpairs, dtype=int)
+            return mfpairs[:, 0], mfpairs[:, 1]
+
+        grids, self.nexpansions = astar.astar(self.elearray, self._cellcosts(), getmoves,
+                                              max_expansions=maxexpansions)
+        if len(grids) == 0:
+            print("No path found!")
+            return []
+        path = []
+        for grid in grids:
+            node = Node(grid)
+            if len(path) > 0:
+                node.parent = path[-1]
+            path.append(node)
+        print("Path found!")
+        return path
 
 
 if __name__=="__main__":
@@ -0,0 +1,57 @@
+"""
+closest hits of many segments against several posed models
+"loop": CollisionModel.ray_hit(option="closest") per segment and per model, the nearest hit is kept
+"batch": CollisionModel.ray_hit_batch with 1 and with os.cpu_count() threads
+"""
+import os
+import time
+import numpy as np
+import basis.robot_math as rm
+import modeling.constant as mc
+import modeling.collision_model as mcm
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def closest_by_loop(segments, cmodel_list):
+    hit_points = np.full((len(segments), 3), np.nan)
+    cmodel_ids = np.full(len(segments), -1)
+    for i, (spos, epos) in enumerate(segments):
+        min_dist = np.inf
+        for j, cmodel in enumerate(cmodel_list):
+            try:
+                hit_point, _ = cmodel.ray_hit(spos, epos, option="closest")
+            except ValueError:  # the ODE helper fails when the segment misses the mesh
+                hit_point = None
+            if hit_point is not None and np.linalg.norm(hit_point - spos) < min_dist:
+                min_dist = np.linalg.norm(hit_point - spos)
+                hit_points[i], cmodel_ids[i] = hit_point, j
+    return hit_points, cmodel_ids
+
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+    cmodel_list = []
+    for cdm_type in (mc.CDMType.DEFAULT, mc.CDMType.DEFAULT, mc.CDMType.AABB, mc.CDMType.CONVEX_HULL):
+        cmodel = mcm.CollisionModel(os.path.join(ROOT, "basis", "objects", "bunnysim.stl"), cdm_type=cdm_type)
+        cmodel.pos = rng.uniform(-.1, .1, 3)
+        cmodel.rotmat = rm.rotmat_from_axangle(rng.normal(size=3), rng.uniform(0, np.pi))
+        cmodel_list.append(cmodel)
+    segments = rng.uniform(-.25, .25, (20000, 2, 3))
+    # the first query builds the BVHs
+    mcm.CollisionModel.ray_hit_batch(segments[:1], cmodel_list)
+    for n_threads in (1, os.cpu_count()):
+        tic = time.perf_counter()
+        hit_points, hit_normals, cmodel_ids = mcm.CollisionModel.ray_hit_batch(segments, cmodel_list,
+                                                                               n_threads=n_threads)
+        toc = time.perf_counter()
+        print(f"batch, {n_threads} threads: {(toc - tic) * 1e6 / len(segments):.1f} us/segment, "
+              f"{(cmodel_ids >= 0).sum()} hits")
+    n_loop = 2000
+    tic = time.perf_counter()
+    loop_points, loop_ids = closest_by_loop(segments[:n_loop], cmodel_list)
+    toc = time.perf_counter()
+    print(f"loop: {(toc - tic) * 1e6 / n_loop:.1f} us/segment")
+    is_hit = loop_ids >= 0
+    assert np.array_equal(loop_ids, cmodel_ids[:n_loop])
+    assert np.allclose(loop_points[is_hit], hit_points[:n_loop][is_hit], atol=1e-5)
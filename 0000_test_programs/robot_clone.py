@@ -0,0 +1,104 @@
+"""
+clone time and memory of robots, the meshes of yumi and nextage are assembled into kinematic chains
+"shared": copy.deepcopy, the clones share the trimesh (until it is scaled or accessed through trm_mesh), the cdmesh data and the pdndp source with the original
+"materialized": the geometry of every clone is copied afterwards, which is what the deep copies used to cost
+"""
+import os
+import copy
+import time
+import tracemalloc
+import numpy as np
+import robot_sim._kinematics.jlchain as rskj
+import modeling.collision_model as mcm
+
+try:
+    import resource
+except ImportError:  # windows
+    resource = None
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+YUMI_MESHES = [[os.path.join(ROOT, "robot_sim", "robots", "yumi", "meshes", f) for f in
+                ("yumi_tablenotop.stl", "body.stl", "yumi_column60602100.stl", "yumi_column6060540.stl")]] + \
+              [[os.path.join(ROOT, "robot_sim", "manipulators", "irb14050", "meshes", f"link_{i}.stl") for i in
+                range(1, 8)] + [os.path.join(ROOT, "robot_sim", "end_effectors", "gripper", "yumi_gripper", "meshes",
+                                             f) for f in ("base.stl", "finger.stl", "finger.stl")]] * 2
+NEXTAGE_MESHES = [[os.path.join(ROOT, "robot_sim", "robots", "nextage", "meshes", f) for f in
+                   ("base.stl", "body.stl", "pcbox.stl", "ny.stl", "np.stl")],
+                  [os.path.join(ROOT, "robot_sim", "robots", "nextage", "meshes", f) for f in
+                   ("lsy.stl", "lsp.stl", "lep.stl", "lwy.stl", "lwp.stl", "wr.stl", "toolchanger.stl")],
+                  [os.path.join(ROOT, "robot_sim", "robots", "nextage", "meshes", f) for f in
+                   ("rsy.stl", "rsp.stl", "rep.stl", "rwy.stl", "rwp.stl", "wr.stl", "toolchanger.stl")]]
+
+
+def build_robot(mesh_groups):
+    """
+    one chain per mesh group, the first mesh is the anchor link
+    the kinematics does not matter for cloning
+    """
+    robot = []
+    for mesh_files in mesh_groups:
+        jlc = rskj.JLChain(n_dof=len(mesh_files) - 1)
+        jlc.anchor.lnk.cmodel = mcm.CollisionModel(mesh_files[0])
+        for jnt, mesh_file in zip(jlc.jnts, mesh_files[1:]):
+            jnt.loc_pos = np.array([0, 0, .05])
+            jnt.loc_motion_ax = np.array([0, 1, 0])
+            jnt.lnk.cmodel = mcm.CollisionModel(mesh_file)
+        jlc.finalize()
+        robot.append(jlc)
+    return robot
+
+
+def cmodels(robot):
+    return [jnt.lnk.cmodel for jlc in robot for jnt in [jlc.anchor] + jlc.jnts]
+
+
+def materialize(robot):
+    for cmodel in cmodels(robot):
+        cmodel._own_trm_mesh()
+        cmodel.change_cdmesh_type(cmodel.cdmesh_type)
+        cmodel.cdmesh
+
+
+def bench(name, robot, n_clones=50):
+    # build the cd structures once, clones are made of complete robots
+    for cmodel in cmodels(robot):
+        cmodel.cdmesh
+        cmodel.cdprimitive
+    for mode in ("shared", "materialized"):
+        clones = []
+        tracemalloc.start()
+        rss0 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else 0
+        tic = time.perf_counter()
+        for _ in range(n_clones):
+            clone = copy.deepcopy(robot)
+            if mode == "materialized":
+                materialize(clone)
+            clones.append(clone)
+        toc = time.perf_counter()
+        traced = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        rss1 = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss if resource else 0
+        print(f"{name:<8}{mode:<14}{(toc - tic) / n_clones * 1e3:>10.2f} ms/clone"
+              f"{traced / n_clones / 1024:>12.1f} KiB/clone (numpy+python)"
+              f"{(rss1 - rss0) / n_clones:>10.1f} KiB/clone (max rss)")
+        del clones
+
+
+if __name__ == '__main__':
+    for name, mesh_groups in (("yumi", YUMI_MESHES), ("nextage", NEXTAGE_MESHES)):
+        robot = build_robot(mesh_groups)
+        # a clone moves and rescales without touching the original
+        clone = copy.deepcopy(robot)
+        clone[0].go_given_conf(np.ones(clone[0].n_dof) * .3)
+        cmodel, clone_cmodel = cmodels(robot)[1], cmodels(clone)[1]
+        assert cmodel._trm_mesh is clone_cmodel._trm_mesh
+        clone_cmodel.cdmesh  # read-only paths keep sharing
+        assert cmodel._trm_mesh is clone_cmodel._trm_mesh
+        vertices = cmodel._trm_mesh.vertices.copy()
+        clone_cmodel.trm_mesh.apply_translation([0, 0, .1])  # in-place edits through the property are private
+        assert np.allclose(cmodel._trm_mesh.vertices, vertices)
+        other_clone_cmodel = cmodels(copy.deepcopy(robot))[2]
+        other_clone_cmodel.set_scale(np.array([2, 2, 2]))
+        assert cmodels(robot)[2]._trm_mesh is not other_clone_cmodel._trm_mesh
+        assert not np.allclose(cmodel.rotmat, clone_cmodel.rotmat)
+        bench(name, robot)
@@ -0,0 +1,84 @@
+"""
+checks of the rviz server registry without a window or a client
+a registered robot is not drawn until it is shown or receives its first joint update, joint updates only move the
+link meshes copied at registration, and bad updates are rejected by push
+the robot is a SystemInterface around a JLChain built from the bunny mesh
+"""
+import os
+import types
+import numpy as np
+# rviz_pb2.py was generated by an old protoc
+os.environ.setdefault("PROTOCOL_BUFFERS_PYTHON_IMPLEMENTATION", "python")
+from direct.showbase.ShowBase import ShowBase
+import basis.robot_math as rm
+import modeling.collision_model as mcm
+import robot_sim._kinematics.jlchain as rkjlc
+import robot_sim.robots.system_interface as ri
+import visualization.panda.rpc.rviz_server as rvs
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BUNNY = os.path.join(ROOT, "basis", "objects", "bunnysim.stl")
+
+
+class ChainRobot(ri.SystemInterface):
+
+    def __init__(self):
+        self.jlc = rkjlc.JLChain(n_dof=2)
+        self.jlc.anchor.lnk.cmodel = mcm.CollisionModel(BUNNY)
+        for jnt in self.jlc.jnts:
+            jnt.loc_pos = np.array([0, 0, .1])
+            jnt.loc_motion_ax = np.array([0, 1, 0])
+            jnt.lnk.cmodel = mcm.CollisionModel(BUNNY)
+        self.jlc.finalize()
+
+    def get_jnt_values(self, component_name):
+        if component_name != "arm":
+            raise KeyError(component_name)
+        return np.zeros(self.jlc.n_dof)
+
+    def fk(self, component_name, jnt_values):
+        self.jlc.go_given_conf(jnt_values)
+
+
+def update_batch(jnt_values=(), poses=(), rgbas=()):
+    return types.SimpleNamespace(jnt_values=list(jnt_values), poses=list(poses), rgbas=list(rgbas))
+
+
+if __name__ == '__main__':
+    base = ShowBase(windowType='none')
+    registry = rvs.InstanceRegistry(base, namespace={})
+    n_render_children = base.render.getNumChildren()
+    robot = ChainRobot()
+    registry.register("robot", robot)
+    bunny = mcm.CollisionModel(BUNNY)
+    registry.register("bunny", bunny)
+    # registering does not draw
+    assert base.render.getNumChildren() == n_render_children
+    assert base.render.find("robot").isEmpty()
+    # bad updates are rejected as a whole
+    jnt_msg = lambda name, component_name, jnt_values: types.SimpleNamespace(
+        name=name, component_name=component_name, jnt_values=jnt_values)
+    pose_msg = lambda name: types.SimpleNamespace(name=name, pos=[0, 0, .5], rotmat=list(np.eye(3).ravel()))
+    assert len(registry.push(update_batch(jnt_values=[jnt_msg("bunny", "arm", [0, 0])]))) == 1
+    assert len(registry.push(update_batch(jnt_values=[jnt_msg("robot", "leg", [0, 0])]))) == 1
+    assert len(registry.push(update_batch(jnt_values=[jnt_msg("robot", "arm", [0])]))) == 1
+    assert len(registry.push(update_batch(poses=[pose_msg("robot")]))) == 1
+    assert base.render.find("robot").isEmpty()
+    # the first joint update draws the robot at the new configuration
+    jnt_values = np.array([.5, .5])
+    assert registry.push(update_batch(jnt_values=[jnt_msg("robot", "arm", jnt_values)],
+                                      poses=[pose_msg("bunny")])) == []
+    base.taskMgr.step()
+    robot_nodepath = base.render.find("robot")
+    assert not robot_nodepath.isEmpty()
+    lnk = robot.jlc.jnts[1].lnk
+    lnk_mesh_homomat = np.array(robot_nodepath.getChild(2).getChild(0).getMat(base.render).getRows()).T
+    assert np.allclose(lnk_mesh_homomat, rm.homomat_from_posrot(lnk.gl_pos, lnk.gl_rotmat), atol=1e-5)
+    assert np.allclose(bunny.pos, [0, 0, .5])
+    # an explicitly hidden robot stays hidden while it is updated
+    registry.unshow("robot")
+    registry.push(update_batch(jnt_values=[jnt_msg("robot", "arm", np.zeros(2))]))
+    base.taskMgr.step()
+    assert base.render.find("robot").isEmpty()
+    registry.unregister("robot")
+    print("rviz registry checks passed")
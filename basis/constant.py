@@ -1,5 +1,4 @@
 import numpy as np
-import matplotlib.colors as mcolors
 
 eps = 1e-6
 
@@ -57,6 +56,8 @@ y_ax = np.array([0, 1, 0])
 z_ax = np.array([0, 0, 1])
 
 if __name__ == '__main__':
+    import matplotlib.colors as mcolors
+
     def convert_mcolor_to_rgba(mcolor_name):
         print(f"np.array({mcolors.to_rgba(mcolor_name)})")
 
@@ -224,18 +224,28 @@ def pdgeom_from_vfnf(vertices: np.ndarray,
     """
     # expand vertices to let each triangle refer to a different vert+normal
     # vertices and normals
-    vertex_format = GeomVertexFormat.getV3n3()
-    vertex_data = GeomVertexData(name, vertex_format, Geom.UHStatic)
     vertex_ids = triangles.flatten()
     multiplied_vertices = np.empty((len(vertex_ids), 3), dtype=np.float32)
     multiplied_vertices[:] = vertices[vertex_ids]
     vertex_normals = np.repeat(face_normals.astype(np.float32), repeats=3, axis=0)
-    np_bytes = np.hstack((multiplied_vertices, vertex_normals)).tobytes()
-    vertex_data.modifyArrayHandle(0).setData(np_bytes)
+    return pdgeom_from_v3n3(np.hstack((multiplied_vertices, vertex_normals)), name=name)
+
+
+def pdgeom_from_v3n3(v3n3: np.ndarray, name: str = 'auto') -> Geom:
+    """
+    :param v3n3: (3m)x6 float32 nparray, the expanded vertices and normals of m triangles, each row is a vertex
+                 followed by the normal of its face, every three rows are a triangle
+                 (the layout made by pdgeom_from_vfnf, modeling/mesh_cache.py stores it on disk)
+    :param name:
+    :return: a geom model that is ready to be used to define a pdndp
+    """
+    vertex_format = GeomVertexFormat.getV3n3()
+    vertex_data = GeomVertexData(name, vertex_format, Geom.UHStatic)
+    vertex_data.modifyArrayHandle(0).setData(np.ascontiguousarray(v3n3, dtype=np.float32).tobytes())
     # triangles
     primitive = GeomTriangles(Geom.UHStatic)
     primitive.setIndexType(GeomEnums.NTUint32)
-    multiplied_triangles = np.arange(len(vertex_ids), dtype=np.uint32).reshape(-1, 3)
+    multiplied_triangles = np.arange(len(v3n3), dtype=np.uint32).reshape(-1, 3)
     primitive.modifyVertices(-1).modifyHandle().setData(multiplied_triangles.tobytes())
     # make geom
     pedgeom = Geom(vertex_data)
@@ -243,6 +253,17 @@ def pdgeom_from_vfnf(vertices: np.ndarray,
     return pedgeom
 
 
+def pdgeomndp_from_v3n3(v3n3: np.ndarray, name: str = 'auto') -> NodePath:
+    """
+    :param v3n3: see pdgeom_from_v3n3
+    :param name:
+    :return: pdndp
+    """
+    pdgeom_nd = GeomNode(name + '_pdgeom_node')
+    pdgeom_nd.addGeom(pdgeom_from_v3n3(v3n3, name + '_pdgeom'))
+    return NodePath(pdgeom_nd)
+
+
 def pdgeomndp_from_vfnf(vertices: np.ndarray,
                         face_normals: np.ndarray,
                         triangles: np.ndarray,
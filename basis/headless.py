@@ -0,0 +1,119 @@
+"""
+Headless mode and lazy imports
+Panda3D, open3d, sklearn, matplotlib, etc. are only needed for rendering or for a few helpers, importing them at module
+load makes every planning worker pay their import time and memory even if it never renders
+the modules in basis/modeling/robot_sim therefore import them with lazy_import, the real module is loaded the first
+time one of its attributes is accessed
+set WRS_HEADLESS=1 to also keep the collision models away from Panda3D: the mesh collisions and ray hits are computed
+with numpy (see modeling/_bvh_cdhelper.py), the NodePaths are built only when a model is attached or rendered
+"""
+import os
+import sys
+import types
+import importlib
+
+HEADLESS = os.environ.get('WRS_HEADLESS', '0') == '1'
+
+
+class LazyModule(types.ModuleType):
+    """
+    a placeholder that imports the named module at the first attribute access and forwards to it afterwards
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+
+    def _load(self):
+        module = sys.modules.get(self.__name__)
+        if module is None or module is self:
+            module = importlib.import_module(self.__name__)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    def __repr__(self):
+        return f"<lazy module '{self.__name__}'>"
+
+
+def lazy_import(name):
+    """
+    :param name: dotted module name, e.g. 'panda3d.core'
+    :return: the module if it is already imported, a LazyModule otherwise
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
+
+
+def is_loaded(name):
+    return name in sys.modules
+
+
+def is_instance(obj, module_name, class_name):
+    """
+    isinstance without importing the module, obj cannot be an instance of a class whose module was never imported
+    :param obj:
+    :param module_name: e.g. 'panda3d.core'
+    :param class_name: e.g. 'NodePath', dotted names like 'geometry.PointCloud' are resolved from the module
+    :return:
+    """
+    module = sys.modules.get(module_name)
+    if module is None:
+        return False
+    cls = module
+    for attr in class_name.split('.'):
+        cls = getattr(cls, attr)
+    return isinstance(obj, cls)
+
+
+def is_showbase(obj):
+    return is_instance(obj, 'direct.showbase.ShowBase', 'ShowBase')
+
+
+def is_nodepath(obj):
+    return is_instance(obj, 'panda3d.core', 'NodePath')
+
+
+if __name__ == '__main__':
+    import json
+    import subprocess
+
+    # import time of each top-level package, every import runs in a fresh interpreter
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    probes = {'basis': ['basis.robot_math', 'basis.robot_math_batch', 'basis.trimesh'],
+              'modeling': ['modeling.geometric_model', 'modeling.collision_model'],
+              'robot_sim': ['robot_sim._kinematics.jlchain', 'robot_sim.robots.yumi.yumi'],
+              'motion': ['motion.probabilistic.rrt_connect'],
+              'grasping': ['grasping.planning.antipodal'],
+              'visualization': ['visualization.panda.world']}
+    code = ("import sys, time, json, resource\n"
+            "tic = time.perf_counter()\n"
+            "try:\n"
+            "    __import__(sys.argv[1])\n"
+            "    err = None\n"
+            "except Exception as e:\n"
+            "    err = f'{type(e).__name__}: {e}'\n"
+            "toc = time.perf_counter()\n"
+            "print(json.dumps({'time': toc - tic, 'panda3d': 'panda3d.core' in sys.modules, 'err': err,\n"
+            "                  'rss': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024}))\n")
+    print(f"{'module':<36}{'mode':<10}{'time [ms]':>10}{'max rss [MB]':>14}{'panda3d':>9}")
+    for package, module_names in probes.items():
+        for module_name in module_names:
+            for headless in ('0', '1'):
+                env = dict(os.environ, WRS_HEADLESS=headless, PYTHONPATH=root)
+                out = subprocess.run([sys.executable, '-c', code, module_name], cwd=root, env=env,
+                                     capture_output=True, text=True).stdout.strip().splitlines()
+                if not out:
+                    print(f"{module_name:<36}failed to start")
+                    continue
+                result = json.loads(out[-1])
+                if result['err'] is not None:
+                    print(f"{module_name:<36}{'headless' if headless == '1' else 'default':<10}{result['err']}")
+                    continue
+                print(f"{module_name:<36}{'headless' if headless == '1' else 'default':<10}"
+                      f"{result['time'] * 1e3:>10.1f}{result['rss']:>14.1f}{str(result['panda3d']):>9}")
@@ -5,13 +5,16 @@ import warnings
 import functools
 import numpy as np
 import numpy.typing as npt
-from sklearn import cluster
 import basis.trimesh as trm
 import basis.constant as bc
-import matplotlib.pyplot as plt
+import basis.headless as bhl
 from scipy.spatial.transform import Slerp
 from scipy.spatial.transform import Rotation as R
 
+# only a few helpers need them, see basis/headless.py
+cluster = bhl.lazy_import("sklearn.cluster")
+plt = bhl.lazy_import("matplotlib.pyplot")
+
 # epsilon for testing whether a number is close to zero
 _EPS = np.finfo(float).eps * 4.0
 # axis sequences for Euler angles
@@ -0,0 +1,500 @@
+"""
+batched counterparts of the pose functions in basis/robot_math.py
+every function takes stacks of poses, e.g. nx3 positions, nx3x3 rotmats, nx4 quaternions ([w, x, y, z], the convention
+of robot_math), nx4x4 homomats; any number of leading dimensions is accepted and they broadcast against each other
+the module only depends on numpy so that planners and workers can import it without the rest of basis
+the __main__ block checks the results against the single-pose versions and benchmarks both
+"""
+import numpy as np
+
+# epsilon for testing whether a number is close to zero
+_EPS = np.finfo(float).eps * 4.0
+# the axis sequences of Euler angles, same as robot_math
+_NEXT_AXIS = [1, 2, 0, 1]
+_AXES2TUPLE = {
+    'sxyz': (0, 0, 0, 0), 'sxyx': (0, 0, 1, 0), 'sxzy': (0, 1, 0, 0),
+    'sxzx': (0, 1, 1, 0), 'syzx': (1, 0, 0, 0), 'syzy': (1, 0, 1, 0),
+    'syxz': (1, 1, 0, 0), 'syxy': (1, 1, 1, 0), 'szxy': (2, 0, 0, 0),
+    'szxz': (2, 0, 1, 0), 'szyx': (2, 1, 0, 0), 'szyz': (2, 1, 1, 0),
+    'rzyx': (0, 0, 0, 1), 'rxyx': (0, 0, 1, 1), 'ryzx': (0, 1, 0, 1),
+    'rxzx': (0, 1, 1, 1), 'rxzy': (1, 0, 0, 1), 'ryzy': (1, 0, 1, 1),
+    'rzxy': (1, 1, 0, 1), 'ryxy': (1, 1, 1, 1), 'ryxz': (2, 0, 0, 1),
+    'rzxz': (2, 0, 1, 1), 'rxyz': (2, 1, 0, 1), 'rzyz': (2, 1, 1, 1)}
+_TUPLE2AXES = dict((v, k) for k, v in _AXES2TUPLE.items())
+
+
+def _axes_tuple(axes):
+    try:
+        return _AXES2TUPLE[axes.lower()]
+    except (AttributeError, KeyError):
+        _TUPLE2AXES[axes]  # validation
+        return axes
+
+
+## vectors
+def unit_vectors(vectors, toggle_length=False):
+    """
+    :param vectors: nx3 nparray
+    :param toggle_length:
+    :return: the unit vectors (zero vectors stay zero), and their lengths (n,) if toggle_length is True
+    """
+    vectors = np.asarray(vectors, dtype=np.float64)
+    lengths = np.linalg.norm(vectors, axis=-1)
+    units = vectors / np.where(lengths > _EPS, lengths, 1)[..., None]
+    units[lengths <= _EPS] = 0
+    if toggle_length:
+        return lengths, units
+    return units
+
+
+## rotmats
+def rotmats_from_axangles(axes, angles):
+    """
+    batched rm.rotmat_from_axangle (Rodrigues)
+    :param axes: nx3 nparray, need not be normalized
+    :param angles: (n,) nparray, radian
+    :return: nx3x3 nparray
+    """
+    axes = unit_vectors(axes)
+    angles = np.asarray(angles, dtype=np.float64)
+    x, y, z = axes[..., 0], axes[..., 1], axes[..., 2]
+    c, s = np.cos(angles), np.sin(angles)
+    t = 1 - c
+    rotmats = np.empty(np.broadcast_shapes(x.shape, angles.shape) + (3, 3))
+    rotmats[..., 0, 0] = t * x * x + c
+    rotmats[..., 0, 1] = t * x * y - s * z
+    rotmats[..., 0, 2] = t * x * z + s * y
+    rotmats[..., 1, 0] = t * x * y + s * z
+    rotmats[..., 1, 1] = t * y * y + c
+    rotmats[..., 1, 2] = t * y * z - s * x
+    rotmats[..., 2, 0] = t * x * z - s * y
+    rotmats[..., 2, 1] = t * y * z + s * x
+    rotmats[..., 2, 2] = t * z * z + c
+    return rotmats
+
+
+def rotmats_from_axanglevecs(axanglevecs):
+    """
+    :param axanglevecs: nx3 nparray, the directions are the axes and the lengths are the angles
+    :return: nx3x3 nparray
+    """
+    angles, axes = unit_vectors(axanglevecs, toggle_length=True)
+    return rotmats_from_axangles(axes, angles)
+
+
+def rotmats_from_quaternions(quaternions):
+    """
+    batched rm.rotmat_from_quaternion
+    :param quaternions: nx4 nparray, need not be normalized
+    :return: nx3x3 nparray
+    """
+    q = np.asarray(quaternions, dtype=np.float64)
+    n = np.sum(q * q, axis=-1)
+    q = q * np.sqrt(2.0 / np.where(n < _EPS, 1, n))[..., None]
+    w, x, y, z = q[..., 0], q[..., 1], q[..., 2], q[..., 3]
+    rotmats = np.empty(q.shape[:-1] + (3, 3))
+    rotmats[..., 0, 0] = 1.0 - y * y - z * z
+    rotmats[..., 0, 1] = x * y - z * w
+    rotmats[..., 0, 2] = x * z + y * w
+    rotmats[..., 1, 0] = x * y + z * w
+    rotmats[..., 1, 1] = 1.0 - x * x - z * z
+    rotmats[..., 1, 2] = y * z - x * w
+    rotmats[..., 2, 0] = x * z - y * w
+    rotmats[..., 2, 1] = y * z + x * w
+    rotmats[..., 2, 2] = 1.0 - x * x - y * y
+    rotmats[n < _EPS] = np.eye(3)
+    return rotmats
+
+
+def rotmats_from_euler(angles, axes='sxyz'):
+    """
+    batched rm.rotmat_from_euler
+    :param angles: nx3 nparray, radian
+    :param axes: one of the 24 axis sequences of robot_math
+    :return: nx3x3 nparray
+    """
+    firstaxis, parity, repetition, frame = _axes_tuple(axes)
+    i = firstaxis
+    j = _NEXT_AXIS[i + parity]
+    k = _NEXT_AXIS[i - parity + 1]
+    angles = np.asarray(angles, dtype=np.float64)
+    ai, aj, ak = angles[..., 0], angles[..., 1], angles[..., 2]
+    if frame:
+        ai, ak = ak, ai
+    if parity:
+        ai, aj, ak = -ai, -aj, -ak
+    si, sj, sk = np.sin(ai), np.sin(aj), np.sin(ak)
+    ci, cj, ck = np.cos(ai), np.cos(aj), np.cos(ak)
+    cc, cs = ci * ck, ci * sk
+    sc, ss = si * ck, si * sk
+    rotmats = np.empty(angles.shape[:-1] + (3, 3))
+    if repetition:
+        rotmats[..., i, i] = cj
+        rotmats[..., i, j] = sj * si
+        rotmats[..., i, k] = sj * ci
+        rotmats[..., j, i] = sj * sk
+        rotmats[..., j, j] = -cj * ss + cc
+        rotmats[..., j, k] = -cj * cs - sc
+        rotmats[..., k, i] = -sj * ck
+        rotmats[..., k, j] = cj * sc + cs
+        rotmats[..., k, k] = cj * cc - ss
+    else:
+        rotmats[..., i, i] = cj * ck
+        rotmats[..., i, j] = sj * sc - cs
+        rotmats[..., i, k] = sj * cc + ss
+        rotmats[..., j, i] = cj * sk
+        rotmats[..., j, j] = sj * ss + cc
+        rotmats[..., j, k] = sj * cs - sc
+        rotmats[..., k, i] = -sj
+        rotmats[..., k, j] = cj * si
+        rotmats[..., k, k] = cj * ci
+    return rotmats
+
+
+def rotmats_to_euler(rotmats, axes='sxyz'):
+    """
+    batched rm.rotmat_to_euler, gimbal locked rotmats get a zero third angle as in robot_math
+    :param rotmats: nx3x3 nparray
+    :param axes: one of the 24 axis sequences of robot_math
+    :return: nx3 nparray, radian
+    """
+    firstaxis, parity, repetition, frame = _axes_tuple(axes)
+    i = firstaxis
+    j = _NEXT_AXIS[i + parity]
+    k = _NEXT_AXIS[i - parity + 1]
+    m = np.asarray(rotmats, dtype=np.float64)
+    if repetition:
+        sy = np.sqrt(m[..., i, j] ** 2 + m[..., i, k] ** 2)
+        regular = sy > _EPS
+        ax = np.where(regular, np.arctan2(m[..., i, j], m[..., i, k]), np.arctan2(-m[..., j, k], m[..., j, j]))
+        ay = np.arctan2(sy, m[..., i, i])
+        az = np.where(regular, np.arctan2(m[..., j, i], -m[..., k, i]), 0.0)
+    else:
+        cy = np.sqrt(m[..., i, i] ** 2 + m[..., j, i] ** 2)
+        regular = cy > _EPS
+        ax = np.where(regular, np.arctan2(m[..., k, j], m[..., k, k]), np.arctan2(-m[..., j, k], m[..., j, j]))
+        ay = np.arctan2(-m[..., k, i], cy)
+        az = np.where(regular, np.arctan2(m[..., j, i], m[..., i, i]), 0.0)
+    if parity:
+        ax, ay, az = -ax, -ay, -az
+    if frame:
+        ax, az = az, ax
+    return np.stack((ax, ay, az), axis=-1)
+
+
+def rotmats_slerp(rotmat0, rotmat1, fractions):
+    """
+    :param rotmat0: nx3x3 nparray
+    :param rotmat1: nx3x3 nparray
+    :param fractions: (m,) nparray in [0, 1]
+    :return: nxmx3x3 nparray, the interpolations of every pair at every fraction
+    """
+    quaternions = quaternions_slerp(quaternions_from_rotmats(rotmat0)[..., None, :],
+                                    quaternions_from_rotmats(rotmat1)[..., None, :],
+                                    np.asarray(fractions, dtype=np.float64))
+    return rotmats_from_quaternions(quaternions)
+
+
+def delta_ws_between_rotmats(src_rotmats, tgt_rotmats):
+    """
+    batched rm.delta_w_between_rotmat, angle*ax from src_rotmats to tgt_rotmats
+    :param src_rotmats: nx3x3 nparray
+    :param tgt_rotmats: nx3x3 nparray
+    :return: nx3 nparray
+    """
+    delta_rotmats = tgt_rotmats @ np.swapaxes(src_rotmats, -1, -2)
+    tmp_vecs = np.stack((delta_rotmats[..., 2, 1] - delta_rotmats[..., 1, 2],
+                         delta_rotmats[..., 0, 2] - delta_rotmats[..., 2, 0],
+                         delta_rotmats[..., 1, 0] - delta_rotmats[..., 0, 1]), axis=-1)
+    tmp_vec_norms = np.linalg.norm(tmp_vecs, axis=-1)
+    traces = np.trace(delta_rotmats, axis1=-2, axis2=-1)
+    regular = tmp_vec_norms > 1e-6
+    delta_ws = (np.arctan2(tmp_vec_norms, traces - 1.0) / np.where(regular, tmp_vec_norms, 1))[..., None] * tmp_vecs
+    # no rotation, or a half turn whose axis is read from the diagonal as in robot_math
+    diagonals = np.diagonal(delta_rotmats, axis1=-2, axis2=-1)
+    identities = np.all(diagonals > 0, axis=-1)
+    delta_ws = np.where(regular[..., None], delta_ws,
+                        np.where(identities[..., None], 0.0, np.pi / 2 * (diagonals + 1)))
+    return delta_ws
+
+
+## positions and rotmats
+def diff_between_posrots(src_pos, src_rotmat, tgt_pos, tgt_rotmat):
+    """
+    batched rm.diff_between_posrot
+    :param src_pos: nx3 nparray
+    :param src_rotmat: nx3x3 nparray
+    :param tgt_pos: nx3 nparray
+    :param tgt_rotmat: nx3x3 nparray
+    :return: pos_errs (n,), rot_errs (n,), deltas (nx6, displacements in pos followed by the ones in rotmat)
+    """
+    delta_pos = np.asarray(tgt_pos, dtype=np.float64) - src_pos
+    delta_w = delta_ws_between_rotmats(src_rotmat, tgt_rotmat)
+    delta_pos, delta_w = np.broadcast_arrays(delta_pos, delta_w)
+    deltas = np.concatenate((delta_pos, delta_w), axis=-1)
+    return np.linalg.norm(delta_pos, axis=-1), np.linalg.norm(delta_w, axis=-1), deltas
+
+
+def rel_poses(pos0, rotmat0, pos1, rotmat1):
+    """
+    batched rm.rel_pose, pose1 in the frame of pose0
+    :return: nx3 positions, nx3x3 rotmats
+    """
+    rotmat0_t = np.swapaxes(rotmat0, -1, -2)
+    rel_pos = (rotmat0_t @ (np.asarray(pos1) - pos0)[..., None])[..., 0]
+    return rel_pos, rotmat0_t @ rotmat1
+
+
+def interplate_posrots(start_pos, start_rotmat, goal_pos, goal_rotmat, fractions):
+    """
+    batched rm.interplate_pos_rotmat, with the fractions given instead of the granularity so that all pairs have
+    the same number of interpolations
+    :param start_pos: nx3 nparray
+    :param start_rotmat: nx3x3 nparray
+    :param goal_pos: nx3 nparray
+    :param goal_rotmat: nx3x3 nparray
+    :param fractions: (m,) nparray in [0, 1]
+    :return: nxmx3 positions, nxmx3x3 rotmats
+    """
+    fractions = np.asarray(fractions, dtype=np.float64)
+    start_pos = np.asarray(start_pos, dtype=np.float64)[..., None, :]
+    pos = start_pos + fractions[:, None] * (np.asarray(goal_pos)[..., None, :] - start_pos)
+    return pos, rotmats_slerp(start_rotmat, goal_rotmat, fractions)
+
+
+## homogeneous matrices
+def homomats_from_posrots(pos, rotmats):
+    """
+    :param pos: nx3 nparray
+    :param rotmats: nx3x3 nparray
+    :return: nx4x4 nparray
+    """
+    pos = np.asarray(pos, dtype=np.float64)
+    rotmats = np.asarray(rotmats, dtype=np.float64)
+    homomats = np.zeros(np.broadcast_shapes(pos.shape[:-1], rotmats.shape[:-2]) + (4, 4))
+    homomats[..., :3, :3] = rotmats
+    homomats[..., :3, 3] = pos
+    homomats[..., 3, 3] = 1
+    return homomats
+
+
+def homomats_inverse(homomats):
+    """
+    batched rm.homomat_inverse
+    :param homomats: nx4x4 nparray
+    :return: nx4x4 nparray
+    """
+    rotmats_t = np.swapaxes(homomats[..., :3, :3], -1, -2)
+    return homomats_from_posrots(-(rotmats_t @ homomats[..., :3, 3:])[..., 0], rotmats_t)
+
+
+def homomats_multiply(homomats0, homomats1):
+    """
+    composition homomats0 @ homomats1 using the rotation and translation blocks only
+    :param homomats0: nx4x4 nparray
+    :param homomats1: nx4x4 nparray
+    :return: nx4x4 nparray
+    """
+    rotmats0 = homomats0[..., :3, :3]
+    return homomats_from_posrots((rotmats0 @ homomats1[..., :3, 3:])[..., 0] + homomats0[..., :3, 3],
+                                 rotmats0 @ homomats1[..., :3, :3])
+
+
+def transform_points_by_homomats(homomats, points):
+    """
+    :param homomats: nx4x4 nparray
+    :param points: nx3 nparray (one point per homomat) or nxmx3 nparray (m points per homomat)
+    :return: the transformed points, in the shape of points
+    """
+    points = np.asarray(points, dtype=np.float64)
+    if points.ndim == homomats.ndim - 1:
+        return (homomats[..., :3, :3] @ points[..., None])[..., 0] + homomats[..., :3, 3]
+    return points @ np.swapaxes(homomats[..., :3, :3], -1, -2) + homomats[..., None, :3, 3]
+
+
+## quaternions
+def quaternions_from_axangles(angles, axes):
+    """
+    batched rm.quaternion_from_axangle
+    :param angles: (n,) nparray, radian
+    :param axes: nx3 nparray
+    :return: nx4 nparray
+    """
+    half_angles = np.asarray(angles, dtype=np.float64) / 2
+    axes = unit_vectors(axes)
+    return np.concatenate((np.cos(half_angles)[..., None], np.sin(half_angles)[..., None] * axes), axis=-1)
+
+
+def quaternions_to_axangles(quaternions):
+    """
+    batched rm.quaternion_to_axangle
+    :param quaternions: nx4 nparray, unit quaternions
+    :return: angles (n,), axes (nx3, zero for the identity)
+    """
+    quaternions = np.asarray(quaternions, dtype=np.float64)
+    angles = 2 * np.arccos(np.clip(quaternions[..., 0], -1, 1))
+    return angles, unit_vectors(quaternions[..., 1:])
+
+
+def quaternions_from_rotmats(rotmats):
+    """
+    batched rm.quaternion_from_matrix, Shepperd's method branching on the largest of the trace and the diagonal
+    :param rotmats: nx3x3 nparray
+    :return: nx4 nparray with nonnegative w
+    """
+    m = np.asarray(rotmats, dtype=np.float64)
+    m00, m01, m02 = m[..., 0, 0], m[..., 0, 1], m[..., 0, 2]
+    m10, m11, m12 = m[..., 1, 0], m[..., 1, 1], m[..., 1, 2]
+    m20, m21, m22 = m[..., 2, 0], m[..., 2, 1], m[..., 2, 2]
+    # 4*w*q, 4*x*q, 4*y*q, 4*z*q for q = w, x, y, z
+    candidates = np.stack((np.stack((1 + m00 + m11 + m22, m21 - m12, m02 - m20, m10 - m01), axis=-1),
+                           np.stack((m21 - m12, 1 + m00 - m11 - m22, m01 + m10, m02 + m20), axis=-1),
+                           np.stack((m02 - m20, m01 + m10, 1 - m00 + m11 - m22, m12 + m21), axis=-1),
+                           np.stack((m10 - m01, m02 + m20, m12 + m21, 1 - m00 - m11 + m22), axis=-1)), axis=-2)
+    choice = np.argmax(np.stack((m00 + m11 + m22, m00, m11, m22), axis=-1), axis=-1)
+    quaternions = np.take_along_axis(candidates, choice[..., None, None], axis=-2)[..., 0, :]
+    quaternions /= np.linalg.norm(quaternions, axis=-1, keepdims=True)
+    return np.where(quaternions[..., :1] < 0, -quaternions, quaternions)
+
+
+def quaternions_multiply(quaternions1, quaternions0):
+    """
+    batched rm.quaternion_multiply, quaternions1*quaternions0
+    :return: nx4 nparray
+    """
+    w0, x0, y0, z0 = np.moveaxis(np.asarray(quaternions0, dtype=np.float64), -1, 0)
+    w1, x1, y1, z1 = np.moveaxis(np.asarray(quaternions1, dtype=np.float64), -1, 0)
+    return np.stack((-x1 * x0 - y1 * y0 - z1 * z0 + w1 * w0,
+                     x1 * w0 + y1 * z0 - z1 * y0 + w1 * x0,
+                     -x1 * z0 + y1 * w0 + z1 * x0 + w1 * y0,
+                     x1 * y0 - y1 * x0 + z1 * w0 + w1 * z0), axis=-1)
+
+
+def quaternions_slerp(quaternions0, quaternions1, fractions, shortestpath=True):
+    """
+    batched rm.quaternion_slerp
+    :param quaternions0: nx4 nparray
+    :param quaternions1: nx4 nparray
+    :param fractions: (n,) nparray in [0, 1]
+    :param shortestpath:
+    :return: nx4 nparray
+    """
+    q0 = unit_vectors(quaternions0)
+    q1 = unit_vectors(quaternions1)
+    fractions = np.asarray(fractions, dtype=np.float64)
+    d = np.sum(q0 * q1, axis=-1)
+    if shortestpath:
+        q1 = np.where(d[..., None] < 0, -q1, q1)
+        d = np.abs(d)
+    angles = np.arccos(np.clip(d, -1, 1))
+    sin_angles = np.sin(angles)
+    # nearly identical quaternions are interpolated linearly, robot_math returns q0 for them
+    regular = sin_angles > 1e-9
+    safe_sin = np.where(regular, sin_angles, 1)
+    w0 = np.where(regular, np.sin((1 - fractions) * angles) / safe_sin, 1 - fractions)
+    w1 = np.where(regular, np.sin(fractions * angles) / safe_sin, fractions)
+    return unit_vectors(w0[..., None] * q0 + w1[..., None] * q1)
+
+
+## random rotations
+def random_quaternions(n, rng=None, rand=None):
+    """
+    uniformly distributed unit quaternions (Shoemake), rm.random_quaternion for n at once
+    :param n:
+    :param rng: numpy Generator, None means np.random.default_rng()
+    :param rand: nx3 nparray of uniform numbers in [0, 1), replaces rng
+    :return: nx4 nparray
+    """
+    if rand is None:
+        rand = (np.random.default_rng() if rng is None else rng).random((n, 3))
+    r1 = np.sqrt(1.0 - rand[:, 0])
+    r2 = np.sqrt(rand[:, 0])
+    t1 = 2 * np.pi * rand[:, 1]
+    t2 = 2 * np.pi * rand[:, 2]
+    return np.column_stack((np.cos(t2) * r2, np.sin(t1) * r1, np.cos(t1) * r1, np.sin(t2) * r2))
+
+
+def random_rotmats(n, rng=None, rand=None):
+    """
+    uniformly distributed rotmats
+    :return: nx3x3 nparray
+    """
+    return rotmats_from_quaternions(random_quaternions(n, rng=rng, rand=rand))
+
+
+if __name__ == '__main__':
+    import time
+    import basis.robot_math as rm
+
+    rng = np.random.default_rng(0)
+    n = 10000
+    rand = rng.random((n, 3))
+    axes = rng.normal(size=(n, 3))
+    angles = rng.uniform(-np.pi, np.pi, n)
+    pos0, pos1 = rng.normal(size=(n, 3)), rng.normal(size=(n, 3))
+    quats0 = random_quaternions(n, rand=rand)
+    quats1 = random_quaternions(n, rng=rng)
+    rotmats0 = rotmats_from_quaternions(quats0)
+    rotmats1 = rotmats_from_quaternions(quats1)
+    homomats0 = homomats_from_posrots(pos0, rotmats0)
+    homomats1 = homomats_from_posrots(pos1, rotmats1)
+    # half turns and identities exercise the special cases of delta_w
+    rotmats1[:10] = rotmats0[:10]
+    rotmats1[10:20] = rotmats_from_axangles(axes[10:20], np.pi) @ rotmats0[10:20]
+    euler = rotmats_to_euler(rotmats0, axes='rzxz')
+
+
+    def same_quaternions(q0, q1):
+        return np.allclose(q0, q1) or np.allclose(q0, -q1)
+
+
+    # name, batched call, single-pose call per index, comparison
+    checks = [('rotmat_from_axangle', lambda: rotmats_from_axangles(axes, angles),
+               lambda i: rm.rotmat_from_axangle(axes[i], angles[i]), np.allclose),
+              ('rotmat_from_quaternion', lambda: rotmats_from_quaternions(quats0),
+               lambda i: rm.rotmat_from_quaternion(quats0[i]), np.allclose),
+              ('quaternion_from_matrix', lambda: quaternions_from_rotmats(rotmats0),
+               lambda i: rm.quaternion_from_matrix(rotmats0[i]), same_quaternions),
+              ('quaternion_from_axangle', lambda: quaternions_from_axangles(angles, axes),
+               lambda i: rm.quaternion_from_axangle(angles[i], axes[i]), np.allclose),
+              ('quaternion_to_axangle', lambda: np.column_stack((quaternions_to_axangles(quats0)[0][:, None],
+                                                                  quaternions_to_axangles(quats0)[1])),
+               lambda i: np.hstack(rm.quaternion_to_axangle(quats0[i])), np.allclose),
+              ('quaternion_multiply', lambda: quaternions_multiply(quats1, quats0),
+               lambda i: rm.quaternion_multiply(quats1[i], quats0[i]), np.allclose),
+              ('quaternion_slerp', lambda: quaternions_slerp(quats0, quats1, rand[:, 0]),
+               lambda i: rm.quaternion_slerp(quats0[i], quats1[i], rand[i, 0]), same_quaternions),
+              ('rotmat_from_euler', lambda: rotmats_from_euler(euler, axes='rzxz'),
+               lambda i: rm.rotmat_from_euler(*euler[i], axes='rzxz'), np.allclose),
+              ('rotmat_to_euler', lambda: rotmats_to_euler(rotmats0, axes='sxyz'),
+               lambda i: rm.rotmat_to_euler(rotmats0[i], axes='sxyz'), np.allclose),
+              ('diff_between_posrot', lambda: diff_between_posrots(pos0, rotmats0, pos1, rotmats1)[2],
+               lambda i: rm.diff_between_posrot(pos0[i], rotmats0[i], pos1[i], rotmats1[i])[2], np.allclose),
+              ('rel_pose', lambda: homomats_from_posrots(*rel_poses(pos0, rotmats0, pos1, rotmats1)),
+               lambda i: rm.homomat_from_posrot(*rm.rel_pose(pos0[i], rotmats0[i], pos1[i], rotmats1[i])),
+               np.allclose),
+              ('homomat_from_posrot', lambda: homomats_from_posrots(pos0, rotmats0),
+               lambda i: rm.homomat_from_posrot(pos0[i], rotmats0[i]), np.allclose),
+              ('homomat_inverse', lambda: homomats_inverse(homomats0),
+               lambda i: rm.homomat_inverse(homomats0[i]), np.allclose),
+              ('homomat multiply', lambda: homomats_multiply(homomats0, homomats1),
+               lambda i: homomats0[i] @ homomats1[i], np.allclose),
+              ('transform_points_by_homomat', lambda: transform_points_by_homomats(homomats0, pos1),
+               lambda i: rm.transform_points_by_homomat(homomats0[i], pos1[i]), np.allclose)]
+    print(f"{'function':<30}{'single (ms)':>14}{'batched (ms)':>14}{'speedup':>10}")
+    for name, batched, single, same in checks:
+        tic = time.perf_counter()
+        single_results = [single(i) for i in range(n)]
+        single_time = time.perf_counter() - tic
+        tic = time.perf_counter()
+        batched_results = batched()
+        batched_time = time.perf_counter() - tic
+        assert all(same(batched_results[i], single_results[i]) for i in range(n)), name
+        print(f"{name:<30}{single_time * 1e3:>14.2f}{batched_time * 1e3:>14.2f}{single_time / batched_time:>10.0f}")
+    # the slerped rotmats against scipy's, used by rm.rotmat_slerp, the half turns have no unique path
+    fractions = np.linspace(0, 1, 7)
+    slerped = rotmats_slerp(rotmats0, rotmats1, fractions)
+    for i in range(20, 120):
+        assert np.allclose(slerped[i], rm.rotmat_slerp(rotmats0[i], rotmats1[i], len(fractions)))
+    # uniformity of the random rotations, the mean of a uniform rotmat is zero
+    assert np.abs(random_rotmats(100000, rng=rng).mean(axis=0)).max() < .01
@@ -23,9 +23,11 @@ from . import convex
 from . import remesh
 from . import bounds
 from . import units
+from . import sdf
 
 from .io.export import export_mesh
 from .ray.ray_mesh import RayMeshIntersector, contains_points
+from .ray.ray_bvh import BVHRayIntersector
 from .voxel import Voxel
 from .points import transform_points
 from .constants import log, _log_time, tol
@@ -87,6 +89,8 @@ class Trimesh(object):
         # On first query expensive bookkeeping is done (creation of r-tree),
         # and is cached for subsequent queries
         self.ray = RayMeshIntersector(self)
+        # the same queries answered in batch through a flat-array bvh, preferred for large numbers of rays
+        self.ray_bvh = BVHRayIntersector(self)
         # store metadata about the mesh in a dictionary
         self.metadata = dict()
         # update the mesh metadata with passed metadata
@@ -950,20 +954,36 @@ class Trimesh(object):
         return self._cache.set(key='convex_hull',
                                value=hull)
 
-    def sample_surface(self, count, radius=None, toggle_faceid=False):
+    @property
+    def surface_sampler(self):
+        '''
+        Surface sampler with the area CDF and the face normals of the current mesh, cached until the mesh changes
+
+        Returns
+        ----------
+        sampler: sample.SurfaceSampler
+        '''
+        cached = self._cache['surface_sampler']
+        if cached is not None:
+            return cached
+        return self._cache.set(key='surface_sampler',
+                               value=sample.SurfaceSampler(self))
+
+    def sample_surface(self, count, radius=None, toggle_faceid=False, seed=None):
         """
         Return random samples distributed normally across the 
         surface of the mesh
         :param: n_sec_minor: int, number of points to sample
         :param: toggle_faceid: bool, if the afflicated face id will bereturned or not
+        :param: seed: None uses the global numpy random state, otherwise the samples are reproducible
         :return: samples: countx3 float, points on surface of mesh, faceids: 1xcount list
         author: revised by weiwei
         date: 20201202toyonaka
         """
         if radius is not None:
-            points, index = sample.sample_surface_even(mesh=self, count=count, radius=radius)
+            points, index = sample.sample_surface_even(mesh=self, count=count, radius=radius, seed=seed)
         else:
-            points, index = sample.sample_surface(mesh=self, count=count)
+            points, index = sample.sample_surface(mesh=self, count=count, seed=seed)
         if toggle_faceid:
             return points, index
         return points
@@ -1061,6 +1081,21 @@ class Trimesh(object):
         voxelized = Voxel(self, pitch)
         return voxelized
 
+    def sdf(self, pitch, pad=2):
+        '''
+        Signed distance field of the current mesh, cached until the mesh changes
+
+        Arguments
+        ----------
+        pitch: float, the edge length of a single voxel
+        pad: int, voxels added around the bounds
+
+        Returns
+        ----------
+        sdf: sdf.SDF, batch distance/gradient queries by trilinear interpolation
+        '''
+        return sdf.mesh_sdf(self, pitch, pad=pad)
+
     def outline(self, face_ids=None):
         '''
         Given a set of face ids, find the outline of the faces,
@@ -0,0 +1,400 @@
+'''
+Ray queries accelerated by a flat-array bounding volume hierarchy.
+
+The hierarchy is stored in a handful of numpy arrays (node bounds, first child,
+leaf ranges) and is traversed by all the rays of a batch together: every
+iteration tests the current (ray, node) pairs against the node boxes,
+replaces the surviving inner nodes by their children and expands the surviving
+leaves into (ray, triangle) pairs that go through a vectorized Moller-Trumbore
+kernel. There is no per-ray python loop.
+
+Rays use the convention of ray_mesh.py: (n, 2, 3) arrays of origins and
+directions, a hit at t is at origin + t * direction with t > tol.zero.
+'''
+import numpy as np
+
+from ..util import Cache
+from ..constants import tol
+
+
+def _dot(a, b):
+    return a[:, 0] * b[:, 0] + a[:, 1] * b[:, 1] + a[:, 2] * b[:, 2]
+
+
+def _cross(a, b):
+    # np.cross is several times slower on (n, 3) arrays
+    return np.column_stack((a[:, 1] * b[:, 2] - a[:, 2] * b[:, 1],
+                            a[:, 2] * b[:, 0] - a[:, 0] * b[:, 2],
+                            a[:, 0] * b[:, 1] - a[:, 1] * b[:, 0]))
+
+
+class BVH:
+    '''
+    Flat-array bounding volume hierarchy over the triangles of a mesh.
+
+    Node i is a leaf if child[i] < 0, its triangles are
+    leaf_start[i]:leaf_start[i] + leaf_count[i] in the reordered triangle arrays,
+    otherwise its children are child[i] and child[i] + 1.
+    '''
+
+    def __init__(self, triangles, leaf_size=4):
+        '''
+        Arguments
+        ---------
+        triangles: (n, 3, 3) float array of triangle vertices
+        leaf_size: int, max number of triangles in a leaf
+        '''
+        triangles = np.asanyarray(triangles, dtype=np.float64)
+        tri_min = triangles.min(axis=1)
+        tri_max = triangles.max(axis=1)
+        centroids = triangles.mean(axis=1)
+        order = np.arange(len(triangles))
+        bounds = []
+        child = []
+        leaf_start = []
+        leaf_count = []
+        # (node index, start, end) of the nodes waiting to be split
+        stack = [(0, 0, len(triangles))]
+        bounds.append(None)
+        child.append(-1)
+        leaf_start.append(0)
+        leaf_count.append(0)
+        while stack:
+            node, start, end = stack.pop()
+            ids = order[start:end]
+            bounds[node] = (tri_min[ids].min(axis=0), tri_max[ids].max(axis=0))
+            if end - start <= leaf_size:
+                leaf_start[node] = start
+                leaf_count[node] = end - start
+                continue
+            # median split along the axis where the centroids spread the most
+            node_centroids = centroids[ids]
+            axis = np.ptp(node_centroids, axis=0).argmax()
+            mid = (end - start) // 2
+            order[start:end] = ids[np.argpartition(node_centroids[:, axis], mid)]
+            child[node] = len(child)
+            for child_start, child_end in [(start, start + mid), (start + mid, end)]:
+                stack.append((len(child), child_start, child_end))
+                bounds.append(None)
+                child.append(-1)
+                leaf_start.append(0)
+                leaf_count.append(0)
+        # pad the boxes so that the tolerances of the triangle test are never cut by the box test
+        pad = (tri_max.max(axis=0) - tri_min.min(axis=0)).max() * 1e-9 if len(triangles) > 0 else 0
+        self.node_bounds = np.array([np.vstack(b) for b in bounds]).reshape((-1, 2, 3))
+        self.node_bounds += np.array([[-pad], [pad]])
+        self.child = np.array(child, dtype=np.int64)
+        self.leaf_start = np.array(leaf_start, dtype=np.int64)
+        self.leaf_count = np.array(leaf_count, dtype=np.int64)
+        # triangle data in leaf order, precomputed for the intersection kernel
+        self.tri_order = order
+        self.vert0 = triangles[order, 0]
+        self.edge0 = triangles[order, 1] - self.vert0
+        self.edge1 = triangles[order, 2] - self.vert0
+
+    @property
+    def n_nodes(self):
+        return len(self.child)
+
+    def _expand_leaves(self, ray_ids, leaf_ids):
+        '''
+        (ray, leaf) pairs -> (ray, triangle) pairs, triangle in leaf order
+        '''
+        counts = self.leaf_count[leaf_ids]
+        pair_rays = np.repeat(ray_ids, counts)
+        offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        pair_tris = np.repeat(self.leaf_start[leaf_ids], counts) + offsets
+        return pair_rays, pair_tris
+
+    def _intersect(self, origins, directions, ray_ids, tri_ids):
+        '''
+        Vectorized Moller-Trumbore over (ray, triangle) pairs,
+        with the tolerances of ray_triangle_cpu.ray_triangles.
+
+        Returns
+        ---------
+        t: (m) float, np.inf where the pair does not intersect
+        '''
+        direction = directions[ray_ids]
+        edge0 = self.edge0[tri_ids]
+        edge1 = self.edge1[tri_ids]
+        p = _cross(direction, edge1)
+        det = _dot(edge0, p)
+        valid = np.abs(det) >= tol.zero
+        inv_det = 1.0 / np.where(valid, det, 1.0)
+        s = origins[ray_ids] - self.vert0[tri_ids]
+        u = _dot(s, p) * inv_det
+        q = _cross(s, edge0)
+        v = _dot(direction, q) * inv_det
+        t = _dot(edge1, q) * inv_det
+        valid &= (u >= -tol.zero) & (u <= 1 + tol.zero)
+        valid &= (v >= -tol.zero) & (u + v <= 1 + tol.zero)
+        valid &= t > tol.zero
+        return np.where(valid, t, np.inf)
+
+    def traverse(self, origins, directions, mode='first', max_t=np.inf):
+        '''
+        Trace a batch of rays through the hierarchy.
+
+        Arguments
+        ---------
+        origins: (n, 3) float
+        directions: (n, 3) float, not necessarily unit length
+        mode: 'first', 'any' or 'all'
+        max_t: float or (n) float, hits beyond max_t are ignored (1.0 for segments)
+
+        Returns
+        ---------
+        'first': (n) int triangle index (-1 if missed), (n) float t (np.inf if missed)
+        'any': (n) bool
+        'all': (m) int ray index, (m) int triangle index, (m) float t, sorted by ray then t
+        '''
+        n_rays = len(origins)
+        best_t = np.broadcast_to(np.asarray(max_t, dtype=np.float64), (n_rays,)).copy()
+        best_tri = np.full(n_rays, -1, dtype=np.int64)
+        is_hit = np.zeros(n_rays, dtype=np.bool_)
+        all_rays, all_tris, all_t = [], [], []
+        # a tiny direction component instead of zero keeps the slab test free of nan
+        safe_directions = np.where(np.abs(directions) < 1e-300, 1e-300, directions)
+        inv_directions = 1.0 / safe_directions
+        ray_ids = np.arange(n_rays)
+        node_ids = np.zeros(n_rays, dtype=np.int64)
+        if self.n_nodes == 0 or len(self.tri_order) == 0:
+            ray_ids = ray_ids[:0]
+        while len(ray_ids) > 0:
+            # slab test of the (ray, node) pairs
+            ray_origins = origins[ray_ids]
+            ray_inv_directions = inv_directions[ray_ids]
+            node_bounds = self.node_bounds[node_ids]
+            with np.errstate(over='ignore', invalid='ignore'):
+                t0 = (node_bounds[:, 0] - ray_origins) * ray_inv_directions
+                t1 = (node_bounds[:, 1] - ray_origins) * ray_inv_directions
+            t_min = np.minimum(t0, t1)
+            t_max = np.maximum(t0, t1)
+            t_near = np.maximum(np.maximum(t_min[:, 0], t_min[:, 1]), t_min[:, 2])
+            t_far = np.minimum(np.minimum(t_max[:, 0], t_max[:, 1]), t_max[:, 2])
+            keep = (t_near <= t_far) & (t_far >= 0) & (t_near <= best_t[ray_ids])
+            if mode == 'any':
+                keep &= ~is_hit[ray_ids]
+            ray_ids = ray_ids[keep]
+            node_ids = node_ids[keep]
+            is_leaf = self.child[node_ids] < 0
+            # leaves
+            pair_rays, pair_tris = self._expand_leaves(ray_ids[is_leaf], node_ids[is_leaf])
+            t = self._intersect(origins, directions, pair_rays, pair_tris)
+            hit = np.isfinite(t) & (t <= best_t[pair_rays])
+            pair_rays, pair_tris, t = pair_rays[hit], pair_tris[hit], t[hit]
+            if mode == 'first':
+                np.minimum.at(best_t, pair_rays, t)
+                closest = t == best_t[pair_rays]
+                best_tri[pair_rays[closest]] = pair_tris[closest]
+            elif mode == 'any':
+                is_hit[pair_rays] = True
+            else:
+                all_rays.append(pair_rays)
+                all_tris.append(pair_tris)
+                all_t.append(t)
+            # inner nodes are replaced by their two children
+            inner_rays = ray_ids[~is_leaf]
+            first_child = self.child[node_ids[~is_leaf]]
+            ray_ids = np.concatenate((inner_rays, inner_rays))
+            node_ids = np.concatenate((first_child, first_child + 1))
+        if mode == 'first':
+            missed = best_tri < 0
+            best_t[missed] = np.inf
+            best_tri[~missed] = self.tri_order[best_tri[~missed]]
+            return best_tri, best_t
+        if mode == 'any':
+            return is_hit
+        ray_ids = np.concatenate(all_rays) if all_rays else np.zeros(0, dtype=np.int64)
+        tri_ids = np.concatenate(all_tris) if all_tris else np.zeros(0, dtype=np.int64)
+        t = np.concatenate(all_t) if all_t else np.zeros(0)
+        order = np.lexsort((t, ray_ids))
+        return ray_ids[order], self.tri_order[tri_ids[order]], t[order]
+
+
+class BVHRayIntersector:
+    '''
+    Drop-in counterpart of RayMeshIntersector that answers batches of rays
+    through a BVH instead of per-ray r-tree queries.
+    The BVH is built on the first query and kept until mesh.md5() changes.
+    '''
+
+    def __init__(self, mesh, leaf_size=4, chunk_size=65536):
+        '''
+        Arguments
+        ---------
+        mesh: Trimesh
+        leaf_size: int, max number of triangles in a leaf
+        chunk_size: int, rays traced together, bounds the memory of the (ray, node) pairs
+        '''
+        self.mesh = mesh
+        self.leaf_size = leaf_size
+        self.chunk_size = chunk_size
+        self._cache = Cache(self.mesh.md5)
+
+    @property
+    def bvh(self):
+        if 'bvh' in self._cache:
+            return self._cache.get('bvh')
+        else:
+            return self._cache.set('bvh',
+                                   BVH(self.mesh.triangles, leaf_size=self.leaf_size))
+
+    def _traverse(self, rays, mode, max_t=np.inf):
+        rays = np.asanyarray(rays, dtype=np.float64).reshape((-1, 2, 3))
+        max_t = np.broadcast_to(np.asarray(max_t, dtype=np.float64), (len(rays),))
+        bvh = self.bvh
+        results = []
+        for start in range(0, max(len(rays), 1), self.chunk_size):
+            chunk = rays[start:start + self.chunk_size]
+            result = bvh.traverse(chunk[:, 0], chunk[:, 1], mode=mode, max_t=max_t[start:start + self.chunk_size])
+            if mode == 'all':
+                result = (result[0] + start,) + result[1:]
+            results.append(result)
+        if mode == 'any':
+            return np.concatenate(results)
+        return tuple(np.concatenate(r) for r in zip(*results))
+
+    def intersects_first(self, rays, max_t=np.inf):
+        '''
+        Find the closest triangle hit by every ray.
+
+        Arguments
+        ---------
+        rays: (n, 2, 3) array of ray origins and directions
+        max_t: float or (n) float, 1.0 treats the rays as segments origin -> origin + direction
+
+        Returns
+        ---------
+        tri_ids: (n) int, -1 where the ray misses the mesh
+        locations: (n, 3) float, nan where the ray misses the mesh
+        t: (n) float, np.inf where the ray misses the mesh
+        '''
+        rays = np.asanyarray(rays, dtype=np.float64).reshape((-1, 2, 3))
+        tri_ids, t = self._traverse(rays, 'first', max_t=max_t)
+        with np.errstate(invalid='ignore'):
+            locations = rays[:, 0] + rays[:, 1] * t[:, None]
+        locations[tri_ids < 0] = np.nan
+        return tri_ids, locations, t
+
+    def intersects_all(self, rays, max_t=np.inf):
+        '''
+        Every (ray, triangle) intersection as flat arrays.
+
+        Arguments
+        ---------
+        rays: (n, 2, 3) array of ray origins and directions
+        max_t: float or (n) float
+
+        Returns
+        ---------
+        ray_ids: (m) int, sorted
+        tri_ids: (m) int
+        t: (m) float, sorted within every ray
+        '''
+        return self._traverse(rays, 'all', max_t=max_t)
+
+    def intersects_any_triangle(self, rays, max_t=np.inf):
+        '''
+        Arguments
+        ---------
+        rays: (n, 2, 3) array of ray origins and directions
+
+        Returns
+        ---------
+        hits_any: (n) boolean array of whether or not each ray hit any triangle
+        '''
+        return self._traverse(rays, 'any', max_t=max_t)
+
+    def intersects_any(self, rays, max_t=np.inf):
+        '''
+        Returns
+        ---------
+        hit: boolean, whether any ray hit any triangle on the mesh
+        '''
+        return bool(self.intersects_any_triangle(rays, max_t=max_t).any())
+
+    def intersects_id(self, rays, return_any=False):
+        '''
+        Same output as RayMeshIntersector.intersects_id
+
+        Returns
+        ---------
+        hits: (n) object array of triangle indexes hit by every ray
+        '''
+        if return_any:
+            return self.intersects_any(rays)
+        rays = np.asanyarray(rays).reshape((-1, 2, 3))
+        ray_ids, tri_ids, _ = self.intersects_all(rays)
+        return _split_by_ray(tri_ids, ray_ids, len(rays))
+
+    def intersects_location(self, rays, return_id=False):
+        '''
+        Same output as RayMeshIntersector.intersects_location,
+        hits closer than tol.merge along a ray (edges, vertices) are returned once.
+
+        Returns
+        ---------
+        locations: (n) object array of (m, 3) hit points, sorted along every ray
+        hits: (n) object array of triangle indexes, if return_id
+        '''
+        rays = np.asanyarray(rays, dtype=np.float64).reshape((-1, 2, 3))
+        ray_ids, tri_ids, t = self.intersects_all(rays)
+        locations = rays[ray_ids, 0] + rays[ray_ids, 1] * t[:, None]
+        duplicate = np.zeros(len(ray_ids), dtype=np.bool_)
+        if len(ray_ids) > 1:
+            step = np.linalg.norm(np.diff(locations, axis=0), axis=1)
+            duplicate[1:] = (ray_ids[1:] == ray_ids[:-1]) & (step < tol.merge)
+        ray_ids, tri_ids, locations = ray_ids[~duplicate], tri_ids[~duplicate], locations[~duplicate]
+        locations = _split_by_ray(locations, ray_ids, len(rays))
+        if return_id:
+            return locations, _split_by_ray(tri_ids, ray_ids, len(rays))
+        return locations
+
+
+def _split_by_ray(values, ray_ids, n_rays):
+    '''
+    Group values by their sorted ray ids into an (n_rays) object array
+    '''
+    result = np.empty(n_rays, dtype=object)
+    splits = np.split(values, np.searchsorted(ray_ids, np.arange(1, n_rays)))
+    for i, split in enumerate(splits):
+        result[i] = split
+    return result
+
+
+if __name__ == '__main__':
+    # run as python -m basis.trimesh.ray.ray_bvh
+    import os
+    import time
+    import basis
+    import basis.trimesh as trm
+
+    mesh = trm.load(os.path.join(os.path.dirname(basis.__file__), 'objects', 'bunnysim.stl'))
+    rng = np.random.default_rng(0)
+    n_rays = 100000
+    center = mesh.bounds.mean(axis=0)
+    radius = np.linalg.norm(mesh.extents)
+    origins = center + rng.normal(size=(n_rays, 3)) * radius
+    targets = rng.uniform(mesh.bounds[0], mesh.bounds[1], (n_rays, 3))
+    rays = np.stack((origins, targets - origins), axis=1)
+    intersector = BVHRayIntersector(mesh)
+    tic = time.time()
+    intersector.bvh
+    print(f"{len(mesh.faces)} triangles, bvh with {intersector.bvh.n_nodes} nodes built in {time.time() - tic:.3f}s")
+    for name, query in [('first', intersector.intersects_first),
+                        ('any', intersector.intersects_any_triangle),
+                        ('all', intersector.intersects_id)]:
+        tic = time.time()
+        query(rays)
+        print(f"bvh {name} hit: {n_rays} rays in {time.time() - tic:.3f}s")
+    # the r-tree path has a python loop per ray, a subset is enough to estimate it
+    n_subset = 2000
+    tic = time.time()
+    rtree_hits = mesh.ray.intersects_id(rays[:n_subset])
+    toc = time.time() - tic
+    print(f"rtree all hit: {n_subset} rays in {toc:.3f}s, about {toc * n_rays / n_subset:.1f}s for {n_rays} rays")
+    bvh_hits = intersector.intersects_id(rays[:n_subset])
+    n_same = sum(set(a) == set(b) for a, b in zip(rtree_hits, bvh_hits))
+    print(f"same triangles hit as the rtree path: {n_same}/{n_subset} rays")
@@ -205,7 +205,7 @@ def ray_triangle_locations(triangles,
     ray_vector = rays[:, 1, :]
     ray_segments = np.array([ray_origin,
                              ray_origin + ray_vector])
-    locations = [[]] * len(rays)
+    locations = np.empty(len(rays), dtype=object)
 
     for r, tri_group in enumerate(intersections):
         group_locations = np.zeros((len(tri_group), 3))
@@ -224,7 +224,7 @@ def ray_triangle_locations(triangles,
         group_locations = group_locations[valid]
         unique = unique_rows(group_locations)[0]
         locations[r] = group_locations[unique]
-    return np.array(locations)
+    return locations
 
 
 def contains_points(mesh, points):
@@ -246,7 +246,7 @@ def contains_points(mesh, points):
     vector = unitize([0, 0, 1])
     rays = np.column_stack((points,
                             np.tile(vector, (len(points), 1)))).reshape((-1, 2, 3))
-    hits = mesh.ray.intersects_location(rays)
+    hits = mesh.ray_bvh.intersects_location(rays)
     hits_count = np.array([len(i) for i in hits])
     contains = np.mod(hits_count, 2) == 1
 
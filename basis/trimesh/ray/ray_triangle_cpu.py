@@ -34,7 +34,8 @@ def rays_triangles_id(triangles,
     # default set of candidate triangles to be queried 
     # is every triangle. this is very slow
     candidates = np.ones(len(triangles), dtype=np.bool_)
-    hits = [None] * len(rays)
+    # object array, the rays hit different numbers of triangles
+    hits = np.empty(len(rays), dtype=object)
 
     for ray_index, ray in enumerate(rays):
         if not (ray_candidates is None):
@@ -47,7 +48,7 @@ def rays_triangles_id(triangles,
             hits[ray_index] = np.array(candidates)[hit]
 
     if return_any: return False
-    return np.array(hits)
+    return hits
 
 
 def ray_triangles(triangles,
@@ -1,48 +1,188 @@
 import numpy as np
+from collections import OrderedDict
 from . import util
 from . import transformations
 
 
-def sample_surface(mesh, count):
+def _random_state(seed):
+    """
+    :param seed: None means the global numpy random state (np.random.seed applies), otherwise a new Generator
+    :return: an object with random(size)
+    """
+    if seed is None:
+        return np.random
+    return np.random.default_rng(seed)
+
+
+class _LRUCache(object):
+    """
+    a dict that keeps only the maxsize most recently used entries
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        if key not in self._data:
+            return default
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def __setitem__(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+
+class SurfaceSampler(object):
+    """
+    Area weighted surface sampling with the face CDF, the triangle edge vectors, and the face normals of a mesh
+    computed once, get it with Trimesh.surface_sampler so that it is cached until the mesh changes
+    the seeded candidate pools of the poisson disk sampling, their KD-trees, and the accepted candidates are cached
+    as well, each cache keeps the CACHE_SIZE most recently used entries
+    """
+    CHUNK_SIZE = 4096
+    CACHE_SIZE = 8
+
+    def __init__(self, mesh):
+        area_faces = np.asarray(mesh.area_faces, dtype=np.float64)
+        self.area = area_faces.sum()
+        self.area_cdf = np.cumsum(area_faces) / self.area
+        self.area_cdf[-1] = 1.0
+        triangles = np.asarray(mesh.triangles, dtype=np.float64)
+        self.tri_origins = triangles[:, 0]
+        self.tri_vectors = triangles[:, 1:] - triangles[:, :1]
+        self.face_normals = np.asarray(mesh.face_normals, dtype=np.float64)
+        # seed: (points, face_ids), grown chunk by chunk
+        self._pools = _LRUCache(self.CACHE_SIZE)
+        # (seed, n_candidates): KD-tree of the first n_candidates of the pool
+        self._trees = _LRUCache(self.CACHE_SIZE)
+        # (seed, n_candidates, radius): ids of the accepted candidates
+        self._accepted = _LRUCache(self.CACHE_SIZE)
+
+    def _locate(self, face_u, uv):
+        """
+        :param face_u: (n,) in [0, 1), picks the faces by the area CDF
+        :param uv: nx2 in [0, 1), folded into the triangles
+        :return: points, face_ids
+        """
+        # side='right' never picks zero area faces
+        face_ids = np.minimum(np.searchsorted(self.area_cdf, face_u, side='right'), len(self.area_cdf) - 1)
+        flipped = uv.sum(axis=1) > 1.0
+        uv[flipped] = 1.0 - uv[flipped]
+        points = self.tri_origins[face_ids] + np.einsum('ij,ijk->ik', uv, self.tri_vectors[face_ids])
+        return points, face_ids
+
+    def sample(self, count, seed=None):
+        """
+        independent area weighted samples
+        :param count:
+        :param seed: None uses the global numpy random state
+        :return: points (countx3), face_ids (count,), normals (countx3)
+        """
+        random_state = _random_state(seed)
+        points, face_ids = self._locate(random_state.random(count), random_state.random((count, 2)))
+        return points, face_ids, self.face_normals[face_ids]
+
+    def sample_stratified(self, count, seed=None):
+        """
+        jittered samples, one per equal area stratum of the area CDF, they cover the surface more uniformly than
+        independent samples of the same count
+        :param count:
+        :param seed: None uses the global numpy random state
+        :return: points (countx3), face_ids (count,), normals (countx3)
+        """
+        random_state = _random_state(seed)
+        face_u = (np.arange(count) + random_state.random(count)) / count
+        points, face_ids = self._locate(face_u, random_state.random((count, 2)))
+        return points, face_ids, self.face_normals[face_ids]
+
+    def _candidates(self, n_candidates, seed):
+        """
+        the first n_candidates of the pool of seed, chunk i of a pool is drawn with the seed [seed, i] so that the
+        prefixes of a pool do not depend on how far it has grown
+        :return: points, face_ids
+        """
+        if seed is None:
+            points, face_ids, _ = self.sample(n_candidates)
+            return points, face_ids
+        points, face_ids = self._pools.get(seed, (np.zeros((0, 3)), np.zeros(0, dtype=np.int64)))
+        if len(points) < n_candidates:
+            new_points, new_face_ids = [points], [face_ids]
+            for chunk_id in range(len(points) // self.CHUNK_SIZE, -(-n_candidates // self.CHUNK_SIZE)):
+                chunk_points, chunk_face_ids, _ = self.sample(self.CHUNK_SIZE, seed=[seed, chunk_id])
+                new_points.append(chunk_points)
+                new_face_ids.append(chunk_face_ids)
+            points, face_ids = np.vstack(new_points), np.concatenate(new_face_ids)
+            self._pools[seed] = (points, face_ids)
+        return points[:n_candidates], face_ids[:n_candidates]
+
+    def sample_poisson(self, radius, n_candidates=None, seed=None):
+        """
+        blue noise samples no closer than radius (poisson disk), by dart throwing with the candidates in their order
+        :param radius: minimum distance between the samples
+        :param n_candidates: None means 10*area/radius**2, denser pools leave smaller gaps
+        :param seed: None draws fresh candidates from the global numpy random state, otherwise the candidate pool,
+                     its KD-tree, and the accepted candidates are cached and the result is reproducible
+        :return: points (nx3), face_ids (n,), normals (nx3)
+        """
+        from scipy.spatial import cKDTree
+        if n_candidates is None:
+            n_candidates = max(self.CHUNK_SIZE, int(np.ceil(10.0 * self.area / radius ** 2)))
+        points, face_ids = self._candidates(n_candidates, seed)
+        key = (seed, n_candidates, float(radius))
+        accepted = self._accepted.get(key)
+        if accepted is None:
+            tree = self._trees.get((seed, n_candidates)) if seed is not None else None
+            if tree is None:
+                tree = cKDTree(points)
+                if seed is not None:
+                    self._trees[(seed, n_candidates)] = tree
+            # only the accepted candidates are queried, the rejected ones are skipped
+            consumed = np.zeros(n_candidates, dtype=bool)
+            accepted = []
+            for i in range(n_candidates):
+                if consumed[i]:
+                    continue
+                consumed[tree.query_ball_point(points[i], r=radius)] = True
+                accepted.append(i)
+            accepted = np.asarray(accepted, dtype=np.int64)
+            if seed is not None:
+                self._accepted[key] = accepted
+        return points[accepted], face_ids[accepted], self.face_normals[face_ids[accepted]]
+
+    def sample_even(self, count, radius=None, seed=None):
+        """
+        approximately evenly spaced samples, at most count of them, see sample_surface_even
+        :param count:
+        :param radius: None means a guess from the area
+        :param seed:
+        :return: points (nx3), face_ids (n,), normals (nx3)
+        """
+        if radius is None:
+            radius = np.sqrt(self.area / (3 * count))
+        points, face_ids, normals = self.sample_poisson(radius, n_candidates=count * 3, seed=seed)
+        return points[:count], face_ids[:count], normals[:count]
+
+
+def sample_surface(mesh, count, seed=None):
     """
     Sample the surface of a mesh, returning the specified number of points
     For individual triangle sampling uses this method:
     http://mathworld.wolfram.com/TrianglePointPicking.html
     :param mesh: a Trimesh instance
     :param count: number of points to return
+    :param seed: None uses the global numpy random state
     :return:
     author: revised by weiwei
     date: 20200120
     """
-    # len(mesh.faces) float array of the areas of each face of the mesh
-    area = mesh.area_faces
-    # total area (float)
-    area_sum = np.sum(area)
-    # cumulative area (len(mesh.faces)) 
-    area_cum = np.cumsum(area)
-    face_pick = np.random.random(count) * area_sum
-    face_index = np.searchsorted(area_cum, face_pick)
-    # pull triangles into the form of an origin + 2 vectors
-    tri_origins = mesh.triangles[:, 0]
-    tri_vectors = mesh.triangles[:, 1:].copy()
-    tri_vectors -= np.tile(tri_origins, (1, 2)).reshape((-1, 2, 3))
-    # pull the vectors for the faces we are going to sample from
-    tri_origins = tri_origins[face_index]
-    tri_vectors = tri_vectors[face_index]
-    # randomly generate two 0-1 scalar components to multiply edge vectors by
-    random_lengths = np.random.random((len(tri_vectors), 2, 1))
-    # points will be distributed on a quadrilateral if we use 2 0-1 samples
-    # if the two scalar components sum less than 1.0 the point will be
-    # inside the triangle, so we find vectors longer than 1.0 and
-    # transform them to be inside the triangle
-    random_test = random_lengths.sum(axis=1).reshape(-1) > 1.0
-    random_lengths[random_test] -= 1.0
-    random_lengths = np.abs(random_lengths)
-    # multiply triangle edge vectors by the random lengths and sum
-    points_vector = (tri_vectors * random_lengths).sum(axis=1)
-    # finally, offset by the origin to generate
-    # (n,3) points in space on the triangle
-    points = points_vector + tri_origins
+    points, face_index, _ = mesh.surface_sampler.sample(count, seed=seed)
     return points, face_index
 
 
@@ -140,7 +280,7 @@ def sample_box_volume(extents,
     return samples
 
 
-def sample_surface_even(mesh, count, radius=None):
+def sample_surface_even(mesh, count, radius=None, seed=None):
     """
     Sample the surface of a mesh, returning samples which are
     approximately evenly spaced.
@@ -150,21 +290,12 @@ def sample_surface_even(mesh, count, radius=None):
     :param mesh:
     :param count:
     :param radius:
+    :param seed: None uses the global numpy random state
     :return:
     author: revised by weiwei
     date: 20210120
     """
-    from .points import remove_close_withfaceid
-    # guess major_radius from area
-    if radius is None:
-        radius = np.sqrt(mesh.area / (3 * count))
-    # get points on the surface
-    points, index = sample_surface(mesh, count * 3)
-    # remove the points closer than major_radius
-    points, index = remove_close_withfaceid(points, index, radius)
-    # we got all the samples we expect
-    if len(points) >= count:
-        return points[:count], index[:count]
+    points, index, _ = mesh.surface_sampler.sample_even(count, radius=radius, seed=seed)
     # warn if we didn't get all the samples we expect
     # util.log.warning('only got {}/{} samples!'.format(len(points), n_sec_minor)) TODO
     return points, index
@@ -186,3 +317,57 @@ def sample_surface_sphere(count):
     # convert spherical coordinates to cartesian
     points = util.spherical_to_vector(np.column_stack((theta, phi)))
     return points
+
+
+if __name__ == '__main__':
+    # run as python -m basis.trimesh.sample
+    import os
+    import time
+    import basis
+    import basis.trimesh as trm
+    from scipy.spatial import cKDTree
+    from .points import remove_close_withfaceid
+
+    mesh = trm.load(os.path.join(os.path.dirname(basis.__file__), 'objects', 'bunnysim.stl'))
+    radius = .002
+    n_calls = 20
+    sampler = mesh.surface_sampler
+    # repeated calls as in grasp planning, fresh candidates every call against a cached seeded pool
+    n_samples = int(round(mesh.area / ((radius * .3) ** 2)))
+    for seed in [None, 0]:
+        tic = time.time()
+        for _ in range(n_calls):
+            mesh.sample_surface(n_samples, radius=radius, seed=seed)
+        print(f"sample_surface(radius={radius}, seed={seed}): {(time.time() - tic) / n_calls * 1e3:.2f}ms per call")
+    # the poisson disk samples equal the greedy rejection of remove_close_withfaceid on the same candidates
+    n_candidates = int(10 * mesh.area / radius ** 2)
+    candidates, candidate_face_ids = sampler._candidates(n_candidates, seed=0)
+    tic = time.time()
+    reference, reference_face_ids = remove_close_withfaceid(candidates, candidate_face_ids, radius)
+    print(f"remove_close_withfaceid of {n_candidates} candidates: {time.time() - tic:.3f}s, {len(reference)} samples")
+    tic = time.time()
+    points, face_ids, normals = sampler.sample_poisson(radius, n_candidates=n_candidates, seed=0)
+    print(f"sample_poisson: {time.time() - tic:.3f}s (first call), ", end='')
+    tic = time.time()
+    sampler.sample_poisson(radius, n_candidates=n_candidates, seed=0)
+    print(f"{time.time() - tic:.3f}s (cached)")
+    assert np.array_equal(points, reference) and np.array_equal(face_ids, reference_face_ids)
+    assert cKDTree(points).query(points, k=2)[0][:, 1].min() >= radius
+    # reproducible with a seed, independent from the global state
+    np.random.seed(1)
+    again = mesh.sample_surface(500, radius=radius, seed=7)
+    np.random.seed(2)
+    assert np.array_equal(again, mesh.sample_surface(500, radius=radius, seed=7))
+    # stratified samples cover the surface better than independent ones of the same count
+    n_samples = 2000
+    for name, method in [('independent', sampler.sample), ('stratified', sampler.sample_stratified),
+                         ('poisson', lambda count, seed: sampler.sample_poisson(
+                             np.sqrt(mesh.area / count / 1.2), seed=seed))]:
+        samples = method(n_samples, seed=3)[0]
+        gap = cKDTree(samples).query(reference)[0].max()
+        print(f"{name}: {len(samples)} samples, largest gap to the dense reference {gap * 1e3:.2f}mm")
+    # the caches of the seeded pools stay bounded however many seeds are used
+    for seed in range(100, 100 + 2 * sampler.CACHE_SIZE):
+        sampler.sample_poisson(.01, seed=seed)
+    assert max(len(sampler._pools), len(sampler._trees), len(sampler._accepted)) <= sampler.CACHE_SIZE
+    assert np.array_equal(sampler.sample_poisson(radius, n_candidates=n_candidates, seed=0)[0], points)
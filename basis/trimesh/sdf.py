@@ -0,0 +1,333 @@
+'''
+Voxel occupancy and signed distance fields of meshes.
+
+The occupancy is found by casting one ray along +z per (x, y) column of the
+grid through the BVH of the mesh and filling between the crossings by parity,
+for all columns at once. The signed distance field is the Euclidean distance
+transform (scipy.ndimage, separable) of the occupancy and of its complement,
+its error is within about a voxel.
+
+Grids sample voxel centers, voxel (i, j, k) is centered at
+origin + (i, j, k) * pitch. Distances are positive outside the mesh.
+Queries interpolate trilinearly and return analytic gradients, in batch.
+'''
+import numpy as np
+
+from scipy import ndimage
+
+from .constants import tol
+
+
+def voxelize(mesh, pitch, pad=2):
+    '''
+    Occupancy of the voxel centers by a watertight mesh.
+
+    Arguments
+    ---------
+    mesh: Trimesh
+    pitch: float, edge length of a voxel
+    pad: int, empty voxels added around the bounds of the mesh
+
+    Returns
+    ---------
+    occupancy: (nx, ny, nz) bool
+    origin: (3) float, center of voxel (0, 0, 0)
+    '''
+    origin = np.floor(mesh.bounds[0] / pitch) * pitch - pad * pitch
+    shape = np.ceil((mesh.bounds[1] - origin) / pitch).astype(int) + pad + 1
+    x, y = np.meshgrid(np.arange(shape[0]), np.arange(shape[1]), indexing='ij')
+    column_xy = np.column_stack((x.ravel(), y.ravel())) * pitch + origin[:2]
+    ray_origins = np.column_stack((column_xy, np.full(len(column_xy), origin[2] - pitch)))
+    ray_directions = np.tile([0.0, 0.0, 1.0], (len(column_xy), 1))
+    ray_ids, _, t = mesh.ray_bvh.intersects_all(np.stack((ray_origins, ray_directions), axis=1))
+    # hits on shared edges or vertices are returned for every triangle, count them once
+    duplicate = np.zeros(len(ray_ids), dtype=np.bool_)
+    duplicate[1:] = (ray_ids[1:] == ray_ids[:-1]) & (np.diff(t) < tol.merge)
+    ray_ids, t = ray_ids[~duplicate], t[~duplicate]
+    # an odd number of crossings (open mesh, grazing ray) leaves the last one unpaired, drop it
+    first = np.searchsorted(ray_ids, ray_ids, side='left')
+    counts = np.bincount(ray_ids, minlength=len(column_xy))
+    paired = ((np.arange(len(ray_ids)) - first) < counts[ray_ids] // 2 * 2)
+    ray_ids, t = ray_ids[paired], t[paired]
+    # every crossing toggles the voxels whose centers are above it
+    # the rays start one voxel below the grid, along unit directions
+    z_index = np.clip(np.ceil(t / pitch - 1), 0, shape[2]).astype(int)
+    toggles = np.zeros((len(column_xy), shape[2] + 1), dtype=np.int32)
+    np.add.at(toggles, (ray_ids, z_index), 1)
+    occupancy = (np.cumsum(toggles, axis=1)[:, :shape[2]] & 1).astype(np.bool_)
+    return occupancy.reshape(shape), origin
+
+
+def _trilinear(corners, frac, pitch):
+    '''
+    Trilinear interpolation and its gradient.
+
+    Arguments
+    ---------
+    corners: (n, 2, 2, 2) float, values at the 8 corners of the cells
+    frac: (n, 3) float in [0, 1], position in the cells
+    pitch: float
+
+    Returns
+    ---------
+    values: (n) float
+    gradients: (n, 3) float
+    '''
+    fx, fy, fz = frac[:, 0], frac[:, 1:2], frac[:, 2:3, None]
+    # reduce along z, then y, then x, carrying the differences for the gradient
+    c_z = corners[..., 0] * (1 - fz) + corners[..., 1] * fz
+    d_z = corners[..., 1] - corners[..., 0]
+    c_yz = c_z[:, :, 0] * (1 - fy) + c_z[:, :, 1] * fy
+    d_y = c_z[:, :, 1] - c_z[:, :, 0]
+    d_zy = d_z[:, :, 0] * (1 - fy) + d_z[:, :, 1] * fy
+    values = c_yz[:, 0] * (1 - fx) + c_yz[:, 1] * fx
+    gradients = np.column_stack((c_yz[:, 1] - c_yz[:, 0],
+                                 d_y[:, 0] * (1 - fx) + d_y[:, 1] * fx,
+                                 d_zy[:, 0] * (1 - fx) + d_zy[:, 1] * fx)) / pitch
+    return values, gradients
+
+
+class SDF:
+    '''
+    Dense signed distance field sampled at voxel centers.
+    '''
+
+    def __init__(self, values, origin, pitch):
+        '''
+        Arguments
+        ---------
+        values: (nx, ny, nz) float, signed distances at the voxel centers
+        origin: (3) float, center of voxel (0, 0, 0)
+        pitch: float
+        '''
+        self.values = np.asanyarray(values, dtype=np.float32)
+        self.origin = np.asanyarray(origin, dtype=np.float64)
+        self.pitch = float(pitch)
+
+    @classmethod
+    def from_occupancy(cls, occupancy, origin, pitch):
+        # distances between voxel centers, the surface is half a voxel closer
+        outside = ndimage.distance_transform_edt(~occupancy)
+        inside = ndimage.distance_transform_edt(occupancy)
+        values = np.where(occupancy, .5 - inside, outside - .5) * pitch
+        return cls(values, origin, pitch)
+
+    @classmethod
+    def from_mesh(cls, mesh, pitch, pad=2):
+        return cls.from_occupancy(*voxelize(mesh, pitch, pad=pad), pitch)
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    @property
+    def occupancy(self):
+        return self.values < 0
+
+    @property
+    def bounds(self):
+        '''
+        (2, 3) float, box of the voxel centers, queries outside of it are extrapolated
+        '''
+        return np.vstack((self.origin, self.origin + (np.array(self.shape) - 1) * self.pitch))
+
+    def _locate(self, points):
+        '''
+        Clamp the points into the grid and split them into cell indices and in-cell positions.
+
+        Returns
+        ---------
+        cells: (n, 3) int
+        frac: (n, 3) float
+        outside: (n, 3) float, offsets of the points from the clamped points
+        '''
+        points = np.asanyarray(points, dtype=np.float64).reshape((-1, 3))
+        clamped = np.clip(points, *self.bounds)
+        index = (clamped - self.origin) / self.pitch
+        cells = np.clip(np.floor(index).astype(np.int64), 0, np.array(self.shape) - 2)
+        return cells, index - cells, points - clamped
+
+    def _corners(self, cells):
+        offsets = np.array([[i, j, k] for i in (0, 1) for j in (0, 1) for k in (0, 1)])
+        idx = cells[:, None, :] + offsets
+        return self.values[idx[..., 0], idx[..., 1], idx[..., 2]].reshape((-1, 2, 2, 2)).astype(np.float64)
+
+    def distance_gradient(self, points):
+        '''
+        Arguments
+        ---------
+        points: (n, 3) float
+
+        Returns
+        ---------
+        distances: (n) float, signed, outside the bounds the distance to the bounds is added
+        gradients: (n, 3) float, d distance / d point
+        '''
+        cells, frac, outside = self._locate(points)
+        values, gradients = _trilinear(self._corners(cells), frac, self.pitch)
+        return _extrapolate(values, gradients, outside)
+
+    def distance(self, points):
+        return self.distance_gradient(points)[0]
+
+    def gradient(self, points):
+        return self.distance_gradient(points)[1]
+
+    def to_sparse(self, block_size=8, band=None):
+        '''
+        Keep only the blocks that get closer to the surface than band.
+
+        Arguments
+        ---------
+        block_size: int, voxels per block edge
+        band: float, None means block_size * pitch
+
+        Returns
+        ---------
+        SparseSDF
+        '''
+        return SparseSDF.from_dense(self, block_size=block_size, band=band)
+
+
+class SparseSDF:
+    '''
+    Signed distance field stored in blocks of voxels, only the blocks in a narrow band
+    around the surface are kept, they are found through a sorted (hashed) key array.
+    Every stored block has one extra layer of voxels on its upper faces so that
+    interpolation never crosses blocks. The other blocks answer the signed distance of
+    their closest voxel to the surface, a conservative clearance with zero gradient.
+    '''
+
+    def __init__(self, keys, blocks, coarse, origin, pitch, shape):
+        '''
+        Arguments
+        ---------
+        keys: (m) int, sorted linear indices of the stored blocks in the block grid
+        blocks: (m, b + 1, b + 1, b + 1) float, voxel values of the stored blocks
+        coarse: (bx, by, bz) float, value of every block when it is not stored
+        origin: (3) float, center of voxel (0, 0, 0)
+        pitch: float
+        shape: (3) int, shape of the dense grid
+        '''
+        self.keys = keys
+        self.blocks = blocks
+        self.coarse = coarse
+        self.origin = np.asanyarray(origin, dtype=np.float64)
+        self.pitch = float(pitch)
+        self.shape = tuple(shape)
+        self.block_size = blocks.shape[1] - 1
+
+    @classmethod
+    def from_dense(cls, sdf, block_size=8, band=None):
+        band = block_size * sdf.pitch if band is None else band
+        n_blocks = -(-(np.array(sdf.shape) - 1) // block_size)
+        # pad to whole blocks plus the shared upper layer, with the edge values
+        padded_shape = n_blocks * block_size + 1
+        values = np.pad(sdf.values, [(0, p - s) for p, s in zip(padded_shape, sdf.shape)], mode='edge')
+        windows = np.lib.stride_tricks.sliding_window_view(values, (block_size + 1,) * 3)
+        windows = windows[::block_size, ::block_size, ::block_size]
+        magnitude = np.abs(windows).min(axis=(3, 4, 5))
+        # the value of the voxel closest to the surface keeps the sign
+        closest = np.abs(windows).reshape(tuple(n_blocks) + (-1,)).argmin(axis=-1)
+        coarse = np.take_along_axis(windows.reshape(tuple(n_blocks) + (-1,)), closest[..., None], axis=-1)[..., 0]
+        keep = magnitude < band
+        keys = np.flatnonzero(keep)
+        blocks = windows[keep].copy()
+        return cls(keys, blocks, coarse.astype(np.float32), sdf.origin, sdf.pitch, sdf.shape)
+
+    @property
+    def nbytes(self):
+        return self.keys.nbytes + self.blocks.nbytes + self.coarse.nbytes
+
+    @property
+    def bounds(self):
+        return np.vstack((self.origin, self.origin + (np.array(self.shape) - 1) * self.pitch))
+
+    def distance_gradient(self, points):
+        '''
+        Same as SDF.distance_gradient
+        '''
+        points = np.asanyarray(points, dtype=np.float64).reshape((-1, 3))
+        clamped = np.clip(points, *self.bounds)
+        index = (clamped - self.origin) / self.pitch
+        cells = np.clip(np.floor(index).astype(np.int64), 0, np.array(self.shape) - 2)
+        frac = index - cells
+        block_xyz = cells // self.block_size
+        local = cells - block_xyz * self.block_size
+        block_keys = np.ravel_multi_index(block_xyz.T, self.coarse.shape)
+        slots = np.clip(np.searchsorted(self.keys, block_keys), 0, max(len(self.keys) - 1, 0))
+        stored = (self.keys[slots] == block_keys) if len(self.keys) > 0 else np.zeros(len(points), dtype=np.bool_)
+        values = self.coarse.ravel()[block_keys].astype(np.float64)
+        gradients = np.zeros((len(points), 3))
+        if stored.any():
+            offsets = np.array([[i, j, k] for i in (0, 1) for j in (0, 1) for k in (0, 1)])
+            idx = local[stored][:, None, :] + offsets
+            corners = self.blocks[slots[stored][:, None], idx[..., 0], idx[..., 1], idx[..., 2]]
+            values[stored], gradients[stored] = _trilinear(corners.reshape((-1, 2, 2, 2)).astype(np.float64),
+                                                           frac[stored], self.pitch)
+        return _extrapolate(values, gradients, points - clamped)
+
+    def distance(self, points):
+        return self.distance_gradient(points)[0]
+
+    def gradient(self, points):
+        return self.distance_gradient(points)[1]
+
+
+def _extrapolate(values, gradients, outside):
+    '''
+    Points outside the grid: add the distance to the grid, the interpolated gradient
+    only varies along the axes that are not clamped
+    '''
+    outside_distance = np.linalg.norm(outside, axis=1)
+    is_outside = outside_distance > 0
+    values = values + outside_distance
+    gradients[is_outside] = gradients[is_outside] * (outside[is_outside] == 0) + \
+                            outside[is_outside] / outside_distance[is_outside, None]
+    return values, gradients
+
+
+def mesh_sdf(mesh, pitch, pad=2):
+    '''
+    Dense SDF of a mesh, cached in the mesh until mesh.md5() changes.
+
+    Arguments
+    ---------
+    mesh: Trimesh
+    pitch: float, edge length of a voxel
+    pad: int, voxels around the bounds of the mesh
+
+    Returns
+    ---------
+    SDF
+    '''
+    key = 'sdf_' + str(float(pitch)) + '_' + str(int(pad))
+    cached = mesh._cache[key]
+    if cached is not None:
+        return cached
+    return mesh._cache.set(key, SDF.from_mesh(mesh, pitch, pad=pad))
+
+
+if __name__ == '__main__':
+    # run as python -m basis.trimesh.sdf
+    import os
+    import time
+    import basis
+    import basis.trimesh as trm
+
+    mesh = trm.load(os.path.join(os.path.dirname(basis.__file__), 'objects', 'bunnysim.stl'))
+    tic = time.time()
+    sdf = mesh_sdf(mesh, pitch=.0005)
+    print(f"{sdf.shape} sdf in {time.time() - tic:.3f}s, cached: {mesh_sdf(mesh, pitch=.0005) is sdf}")
+    sparse_sdf = sdf.to_sparse()
+    print(f"dense {sdf.values.nbytes / 1e6:.2f}MB, sparse {sparse_sdf.nbytes / 1e6:.2f}MB")
+    points = np.random.default_rng(0).uniform(*mesh.bounds, (100000, 3))
+    for field in [sdf, sparse_sdf]:
+        tic = time.time()
+        distances, gradients = field.distance_gradient(points)
+        print(f"{type(field).__name__}: {len(points)} distance + gradient queries in {time.time() - tic:.3f}s")
+    n_check = 5000
+    tic = time.time()
+    contains = mesh.contains(points[:n_check])
+    print(f"mesh.contains of {n_check} points in {time.time() - tic:.3f}s, "
+          f"sign agreement with the sdf {np.mean((distances[:n_check] < 0) == contains):.3f}")
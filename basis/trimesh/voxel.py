@@ -39,10 +39,20 @@ class Voxel:
 
 
 def run_to_raw(shape, index_xy, index_z, **kwargs):
-    raw = np.zeros(shape, dtype=np.bool)
-    for xy, z in zip(index_xy, index_z):
-        for z_start, z_end in np.reshape(z, (-1, 2)):
-            raw[xy[0], xy[1]][z_start:z_end] = True
+    '''
+    Fill the runs of all the columns at once: +1 at every run start, -1 at
+    every run end, the cumulative sum along z is positive inside the runs
+    '''
+    raw = np.zeros(shape, dtype=np.bool_)
+    if len(index_xy) == 0:
+        return raw
+    n_bounds = np.array([len(z) // 2 * 2 for z in index_z])
+    bounds_xy = np.repeat(np.asarray(index_xy, dtype=int).reshape((-1, 2)), n_bounds, axis=0)
+    bounds_z = np.clip(np.concatenate([z[:n] for z, n in zip(index_z, n_bounds)]).astype(int), 0, shape[2])
+    steps = np.tile([1, -1], len(bounds_z) // 2)
+    toggles = np.zeros((shape[0], shape[1], shape[2] + 1), dtype=np.int32)
+    np.add.at(toggles, (bounds_xy[:, 0], bounds_xy[:, 1], bounds_z), steps)
+    raw[:] = np.cumsum(toggles, axis=2)[:, :, :shape[2]] > 0
     return raw
 
 
@@ -67,7 +77,7 @@ def mesh_to_run(mesh, pitch):
     rays = np.column_stack((ray_origins,
                             ray_vectors)).reshape((-1, 2, 3))
 
-    hits = mesh.ray.intersects_location(rays)
+    hits = mesh.ray_bvh.intersects_location(rays)
     raw_shape = np.ptp(bounds / pitch, axis=0).astype(int)
     grid_origin = bounds[0]
     grid_index = ((grid / pitch) - (grid_origin[0:2] / pitch)).astype(int)
@@ -95,9 +105,13 @@ def mesh_to_run(mesh, pitch):
         run_z.append(index_z)
         run_xy.append(grid_index[i])
 
+    # the columns have different numbers of runs
+    index_z = np.empty(len(run_z), dtype=object)
+    for i, z in enumerate(run_z):
+        index_z[i] = z
     result = {'shape': raw_shape,
               'index_xy': np.array(run_xy),
-              'index_z': np.array(run_z),
+              'index_z': index_z,
               'origin': grid_origin,
               'pitch': pitch}
     return result
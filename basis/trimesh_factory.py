@@ -7,7 +7,9 @@ import basis.trimesh.primitives as trm_primit
 import basis.trimesh.geometry as trm_geom
 import basis.trimesh as trm
 import basis.robot_math as rm
-import shapely.geometry as shp_geom
+import basis.headless as bhl
+
+shp_geom = bhl.lazy_import("shapely.geometry")
 
 # declare constants
 ARROW_CH_SR = 8  # cone height vs stick radius for arrow
@@ -0,0 +1,181 @@
+"""
+Chunked point cloud encoding for streaming rpcs (e.g. Phoxi.streampcd)
+Points are sent as little-endian float32 or as int16 quantized per chunk, optionally compressed.
+zstd and lz4 are used if the zstandard / lz4 packages are installed, zlib otherwise.
+The constants below equal the enums of StreamRequest in phoxi.proto.
+"""
+
+import zlib
+import numpy as np
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+try:
+    import lz4.frame as lz4frame
+except ImportError:
+    lz4frame = None
+
+FLOAT32 = 0
+INT16 = 1
+NONE = 0
+ZLIB = 1
+LZ4 = 2
+ZSTD = 3
+DEFAULT_CHUNKSIZE = 1 << 18
+
+
+def available_compression(compression):
+    """
+    :param compression: NONE, ZLIB, LZ4, or ZSTD
+    :return: compression if its codec is installed, else ZLIB
+    """
+    if compression == ZSTD and zstandard is None:
+        return ZLIB
+    if compression == LZ4 and lz4frame is None:
+        return ZLIB
+    return compression
+
+
+def compress(data, compression, level=1):
+    if compression == NONE:
+        return data
+    elif compression == ZLIB:
+        return zlib.compress(data, level)
+    elif compression == LZ4:
+        return lz4frame.compress(data)
+    elif compression == ZSTD:
+        return zstandard.ZstdCompressor(level=level).compress(data)
+    raise ValueError("Unknown compression: {}".format(compression))
+
+
+def decompress(data, compression):
+    if compression == NONE:
+        return data
+    elif compression == ZLIB:
+        return zlib.decompress(data)
+    elif compression == LZ4:
+        return lz4frame.decompress(data)
+    elif compression == ZSTD:
+        return zstandard.ZstdDecompressor().decompress(data)
+    raise ValueError("Unknown compression: {}".format(compression))
+
+
+def encode_chunks(points, encoding=FLOAT32, compression=NONE, chunksize=0, quantstep=0):
+    """
+    split an nx3 array into chunks
+    :param points: nx3 array-like, converted to float32 once (no float64 intermediate if it is already float32)
+    :param encoding: FLOAT32 or INT16
+    :param compression: NONE, ZLIB, LZ4, or ZSTD, falls back to ZLIB if unavailable
+    :param chunksize: number of points per chunk, 0 means DEFAULT_CHUNKSIZE
+    :param quantstep: int16 quantization step, 0 means the finest step that covers each chunk
+    :return: generator of dicts with the fields of PointChunk
+    :raise ValueError: if quantstep is too small to cover the extent of a chunk with 65535 levels
+    """
+    points = np.asarray(points, dtype=np.float32).reshape((-1, 3))
+    compression = available_compression(compression)
+    chunksize = DEFAULT_CHUNKSIZE if chunksize <= 0 else chunksize
+    npoints = len(points)
+    for start in range(0, max(npoints, 1), chunksize):
+        chunk = points[start:start + chunksize]
+        scale = 1.0
+        offset = np.zeros(3, dtype='<f4')
+        if encoding == INT16 and len(chunk) > 0:
+            minpos = chunk.min(axis=0)
+            maxpos = chunk.max(axis=0)
+            offset = ((minpos + maxpos) / 2).astype('<f4')
+            extent = float((maxpos - minpos).max())
+            if quantstep > 0 and extent / quantstep > 65534:
+                raise ValueError("quantstep {} cannot cover the extent {} of the chunk starting at point {}, "
+                                 "use a step of at least {} or 0 for the automatic step".format(
+                                     quantstep, extent, start, extent / 65534))
+            scale = quantstep if quantstep > 0 else max(extent / 65534, 1e-12)
+            # the clip only absorbs float32 rounding at the chunk bounds
+            data = np.rint((chunk - offset) / scale).clip(-32767, 32767).astype('<i2').tobytes()
+        elif encoding == INT16:
+            data = b''
+        else:
+            data = chunk.astype('<f4', copy=False).tobytes()
+        yield dict(npoints=npoints,
+                   start=start,
+                   count=len(chunk),
+                   encoding=encoding,
+                   compression=compression,
+                   scale=scale,
+                   offset=offset.tobytes(),
+                   data=compress(data, compression))
+
+
+class PointAssembler(object):
+    """
+    assemble PointChunk messages into one preallocated float32 array
+    each chunk is decoded directly into its slice of the output; no intermediate full-frame buffers are created
+    """
+
+    def __init__(self, out=None):
+        """
+        :param out: optional nx3 float32 array reused across frames, reallocated if the size does not match
+        """
+        self._out = out
+        self._nreceived = 0
+
+    @property
+    def points(self):
+        return self._out
+
+    @property
+    def complete(self):
+        return self._out is not None and self._nreceived == len(self._out)
+
+    def add(self, chunk):
+        if self._out is None or len(self._out) != chunk.npoints or self._out.dtype != np.float32:
+            self._out = np.empty((chunk.npoints, 3), dtype=np.float32)
+        if chunk.count == 0:
+            return
+        raw = decompress(chunk.data, chunk.compression)
+        target = self._out[chunk.start:chunk.start + chunk.count]
+        if chunk.encoding == INT16:
+            q = np.frombuffer(raw, dtype='<i2').reshape((-1, 3))
+            np.multiply(q, np.float32(chunk.scale), out=target, casting='unsafe')
+            target += np.frombuffer(chunk.offset, dtype='<f4')
+        else:
+            target[:] = np.frombuffer(raw, dtype='<f4').reshape((-1, 3))
+        self._nreceived += chunk.count
+
+    def assemble(self, chunks):
+        """
+        :param chunks: iterable of PointChunk, e.g. the response of a streaming rpc
+        :return: nx3 float32 array
+        """
+        self._nreceived = 0
+        for chunk in chunks:
+            self.add(chunk)
+        if self._out is None:
+            self._out = np.empty((0, 3), dtype=np.float32)
+        return self._out
+
+
+if __name__ == '__main__':
+    import time
+    from types import SimpleNamespace
+
+    # a synthetic 2M-point bin scene in mm, 0 marks invalid pixels as phoxi does
+    npoints = 2000000
+    grid = np.mgrid[0:1000, 0:2000].reshape(2, -1).T.astype(np.float64)
+    points = np.column_stack([grid * .5, 1200 + 50 * np.sin(grid[:, 0] / 50) + np.random.rand(npoints)])
+    points[np.random.rand(npoints) < .2] = 0
+    rawsize = points.nbytes
+    assembler = PointAssembler()
+    for encoding, compression in [(FLOAT32, NONE), (FLOAT32, ZLIB), (FLOAT32, ZSTD), (FLOAT32, LZ4),
+                                  (INT16, NONE), (INT16, ZLIB), (INT16, ZSTD), (INT16, LZ4)]:
+        tic = time.time()
+        chunks = [SimpleNamespace(**kw) for kw in encode_chunks(points, encoding, compression, quantstep=.05)]
+        toc = time.time()
+        result = assembler.assemble(chunks)
+        tac = time.time()
+        nbytes = sum(len(chunk.data) for chunk in chunks)
+        print("encoding {}, compression {}->{}: {:.1f}MB ({:.1f}x smaller than float64), "
+              "encode {:.3f}s, decode {:.3f}s, max error {:.4f}mm".format(
+            encoding, compression, chunks[0].compression, nbytes / 1e6, rawsize / nbytes, toc - tic, tac - toc,
+            np.abs(result - points).max()))
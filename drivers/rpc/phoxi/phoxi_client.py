@@ -2,6 +2,7 @@ import grpc
 import numpy as np
 import drivers.rpc.phoxi.phoxi_pb2 as pxmsg
 import drivers.rpc.phoxi.phoxi_pb2_grpc as pxrpc
+import drivers.rpc.pcdstream as pcdstream
 import copy
 import cv2
 
@@ -11,6 +12,8 @@ class PhxClient(object):
         options = [('grpc.max_receive_message_length', 100 * 1024 * 1024)]
         channel = grpc.insecure_channel(host, options=options)
         self.stub = pxrpc.PhoxiStub(channel)
+        self._pcdassembler = pcdstream.PointAssembler()
+        self._nrmlassembler = pcdstream.PointAssembler()
 
     def _unpackarraydata(self, dobj):
         h = dobj.height
@@ -82,6 +85,34 @@ class PhxClient(object):
         nrmls = self.stub.getnormals(pxmsg.Empty())
         return np.frombuffer(nrmls.points).reshape((-1, 3))
 
+    def streampcd(self, encoding=pcdstream.FLOAT32, compression=pcdstream.ZSTD, chunksize=0, quantstep=0):
+        """
+        get the full point cloud of the last triggered frame through the chunked streaming rpc
+        chunks are decoded into a float32 array that is reused across frames,
+        copy the result if it must outlive the next call
+
+        :param encoding: pcdstream.FLOAT32 or pcdstream.INT16
+        :param compression: pcdstream.NONE, ZLIB, LZ4, or ZSTD, the server falls back to ZLIB if unavailable
+        :param chunksize: points per chunk, 0 means the server default
+        :param quantstep: int16 quantization step in mm, 0 means automatic
+        :return: np.array point cloud n-by-3, float32
+        """
+
+        request = pxmsg.StreamRequest(encoding=encoding, compression=compression, chunksize=chunksize,
+                                      quantstep=quantstep)
+        return self._pcdassembler.assemble(self.stub.streampcd(request))
+
+    def streamnormals(self, encoding=pcdstream.FLOAT32, compression=pcdstream.ZSTD, chunksize=0, quantstep=0):
+        """
+        get the normals of the last triggered frame through the chunked streaming rpc, see streampcd
+
+        :return: np.array n-by-3, float32
+        """
+
+        request = pxmsg.StreamRequest(encoding=encoding, compression=compression, chunksize=chunksize,
+                                      quantstep=quantstep)
+        return self._nrmlassembler.assemble(self.stub.streamnormals(request))
+
     def cvtdepth(self, darr_float32):
         """
         convert float32 deptharray to unit8
@@ -1,9 +1,7 @@
 # -*- coding: utf-8 -*-
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
-# source: xarm_shuidi_grpc.proto
-
-import sys
-_b=sys.version_info[0]<3 and (lambda x:x) or (lambda x:x.encode('latin1'))
+# source: phoxi.proto
+"""Generated protocol buffer code."""
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import message as _message
 from google.protobuf import reflection as _reflection
@@ -16,14 +14,76 @@ _sym_db = _symbol_database.Default()
 
 
 DESCRIPTOR = _descriptor.FileDescriptor(
-  name='xarm_shuidi_grpc.proto',
+  name='phoxi.proto',
   package='',
   syntax='proto3',
   serialized_options=None,
-  serialized_pb=_b('\n\x0bphoxi.proto\"\x07\n\x05\x45mpty\"\x15\n\x05MatKW\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\"$\n\x04Pair\x12\r\n\x05\x64\x61ta0\x18\x01 \x01(\x05\x12\r\n\x05\x64\x61ta1\x18\x02 \x01(\x05\"\x1c\n\nPointCloud\x12\x0e\n\x06points\x18\x01 \x01(\x0c\"G\n\x06\x43\x61mImg\x12\r\n\x05width\x18\x01 \x01(\x05\x12\x0e\n\x06height\x18\x02 \x01(\x05\x12\x0f\n\x07\x63hannel\x18\x03 \x01(\x05\x12\r\n\x05image\x18\x04 \x01(\x0c\x32\xb5\x01\n\x05Phoxi\x12 \n\x0ctriggerframe\x12\x06.Empty\x1a\x06.Empty\"\x00\x12\"\n\rgettextureimg\x12\x06.Empty\x1a\x07.CamImg\"\x00\x12 \n\x0bgetdepthimg\x12\x06.Empty\x1a\x07.CamImg\"\x00\x12\x1f\n\x06getpcd\x12\x06.Empty\x1a\x0b.PointCloud\"\x00\x12#\n\ngetnormals\x12\x06.Empty\x1a\x0b.PointCloud\"\x00\x62\x06proto3')
+  create_key=_descriptor._internal_create_key,
+  serialized_pb=b'\n\x0bphoxi.proto\"\x07\n\x05\x45mpty\"\x15\n\x05MatKW\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\"$\n\x04Pair\x12\r\n\x05\x64\x61ta0\x18\x01 \x01(\x05\x12\r\n\x05\x64\x61ta1\x18\x02 \x01(\x05\"\x1c\n\nPointCloud\x12\x0e\n\x06points\x18\x01 \x01(\x0c\"G\n\x06\x43\x61mImg\x12\r\n\x05width\x18\x01 \x01(\x05\x12\x0e\n\x06height\x18\x02 \x01(\x05\x12\x0f\n\x07\x63hannel\x18\x03 \x01(\x05\x12\r\n\x05image\x18\x04 \x01(\x0c\"\xeb\x01\n\rStreamRequest\x12)\n\x08\x65ncoding\x18\x01 \x01(\x0e\x32\x17.StreamRequest.Encoding\x12/\n\x0b\x63ompression\x18\x02 \x01(\x0e\x32\x1a.StreamRequest.Compression\x12\x11\n\tchunksize\x18\x03 \x01(\x05\x12\x11\n\tquantstep\x18\x04 \x01(\x02\"\"\n\x08\x45ncoding\x12\x0b\n\x07\x46LOAT32\x10\x00\x12\t\n\x05INT16\x10\x01\"4\n\x0b\x43ompression\x12\x08\n\x04NONE\x10\x00\x12\x08\n\x04ZLIB\x10\x01\x12\x07\n\x03LZ4\x10\x02\x12\x08\n\x04ZSTD\x10\x03\"\xc4\x01\n\nPointChunk\x12\x0f\n\x07npoints\x18\x01 \x01(\x05\x12\r\n\x05start\x18\x02 \x01(\x05\x12\r\n\x05\x63ount\x18\x03 \x01(\x05\x12)\n\x08\x65ncoding\x18\x04 \x01(\x0e\x32\x17.StreamRequest.Encoding\x12/\n\x0b\x63ompression\x18\x05 \x01(\x0e\x32\x1a.StreamRequest.Compression\x12\r\n\x05scale\x18\x06 \x01(\x02\x12\x0e\n\x06offset\x18\x07 \x01(\x0c\x12\x0c\n\x04\x64\x61ta\x18\x08 \x01(\x0c\x32\xbc\x02\n\x05Phoxi\x12 \n\x0ctriggerframe\x12\x06.Empty\x1a\x06.Empty\"\x00\x12\"\n\rgettextureimg\x12\x06.Empty\x1a\x07.CamImg\"\x00\x12 \n\x0bgetdepthimg\x12\x06.Empty\x1a\x07.CamImg\"\x00\x12\x1f\n\x06getpcd\x12\x06.Empty\x1a\x0b.PointCloud\"\x00\x12#\n\ngetnormals\x12\x06.Empty\x1a\x0b.PointCloud\"\x00\x12%\n\x10getrgbtextureimg\x12\x06.Empty\x1a\x07.CamImg\"\x00\x12,\n\tstreampcd\x12\x0e.StreamRequest\x1a\x0b.PointChunk\"\x00\x30\x01\x12\x30\n\rstreamnormals\x12\x0e.StreamRequest\x1a\x0b.PointChunk\"\x00\x30\x01\x62\x06proto3'
+)
+
+
+
+_STREAMREQUEST_ENCODING = _descriptor.EnumDescriptor(
+  name='Encoding',
+  full_name='StreamRequest.Encoding',
+  filename=None,
+  file=DESCRIPTOR,
+  create_key=_descriptor._internal_create_key,
+  values=[
+    _descriptor.EnumValueDescriptor(
+      name='FLOAT32', index=0, number=0,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='INT16', index=1, number=1,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+  ],
+  containing_type=None,
+  serialized_options=None,
+  serialized_start=336,
+  serialized_end=370,
 )
+_sym_db.RegisterEnumDescriptor(_STREAMREQUEST_ENCODING)
 
 
+_STREAMREQUEST_COMPRESSION = _descriptor.EnumDescriptor(
+  name='Compression',
+  full_name='StreamRequest.Compression',
+  filename=None,
+  file=DESCRIPTOR,
+  create_key=_descriptor._internal_create_key,
+  values=[
+    _descriptor.EnumValueDescriptor(
+      name='NONE', index=0, number=0,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='ZLIB', index=1, number=1,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='LZ4', index=2, number=2,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+    _descriptor.EnumValueDescriptor(
+      name='ZSTD', index=3, number=3,
+      serialized_options=None,
+      type=None,
+      create_key=_descriptor._internal_create_key),
+  ],
+  containing_type=None,
+  serialized_options=None,
+  serialized_start=372,
+  serialized_end=424,
+)
+_sym_db.RegisterEnumDescriptor(_STREAMREQUEST_COMPRESSION)
 
 
 _EMPTY = _descriptor.Descriptor(
@@ -32,6 +92,7 @@ _EMPTY = _descriptor.Descriptor(
   filename=None,
   file=DESCRIPTOR,
   containing_type=None,
+  create_key=_descriptor._internal_create_key,
   fields=[
   ],
   extensions=[
@@ -56,14 +117,15 @@ _MATKW = _descriptor.Descriptor(
   filename=None,
   file=DESCRIPTOR,
   containing_type=None,
+  create_key=_descriptor._internal_create_key,
   fields=[
     _descriptor.FieldDescriptor(
       name='data', full_name='MatKW.data', index=0,
       number=1, type=12, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b(""),
+      has_default_value=False, default_value=b"",
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -87,6 +149,7 @@ _PAIR = _descriptor.Descriptor(
   filename=None,
   file=DESCRIPTOR,
   containing_type=None,
+  create_key=_descriptor._internal_create_key,
   fields=[
     _descriptor.FieldDescriptor(
       name='data0', full_name='Pair.data0', index=0,
@@ -94,14 +157,14 @@ _PAIR = _descriptor.Descriptor(
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
     _descriptor.FieldDescriptor(
       name='data1', full_name='Pair.data1', index=1,
       number=2, type=5, cpp_type=1, label=1,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -125,14 +188,15 @@ _POINTCLOUD = _descriptor.Descriptor(
   filename=None,
   file=DESCRIPTOR,
   containing_type=None,
+  create_key=_descriptor._internal_create_key,
   fields=[
     _descriptor.FieldDescriptor(
       name='points', full_name='PointCloud.points', index=0,
       number=1, type=12, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b(""),
+      has_default_value=False, default_value=b"",
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -156,6 +220,7 @@ _CAMIMG = _descriptor.Descriptor(
   filename=None,
   file=DESCRIPTOR,
   containing_type=None,
+  create_key=_descriptor._internal_create_key,
   fields=[
     _descriptor.FieldDescriptor(
       name='width', full_name='CamImg.width', index=0,
@@ -163,28 +228,28 @@ _CAMIMG = _descriptor.Descriptor(
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
     _descriptor.FieldDescriptor(
       name='height', full_name='CamImg.height', index=1,
       number=2, type=5, cpp_type=1, label=1,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
     _descriptor.FieldDescriptor(
       name='channel', full_name='CamImg.channel', index=2,
       number=3, type=5, cpp_type=1, label=1,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
     _descriptor.FieldDescriptor(
       name='image', full_name='CamImg.image', index=3,
       number=4, type=12, cpp_type=9, label=1,
-      has_default_value=False, default_value=_b(""),
+      has_default_value=False, default_value=b"",
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
-      serialized_options=None, file=DESCRIPTOR),
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
   ],
   extensions=[
   ],
@@ -201,11 +266,155 @@ _CAMIMG = _descriptor.Descriptor(
   serialized_end=186,
 )
 
+
+_STREAMREQUEST = _descriptor.Descriptor(
+  name='StreamRequest',
+  full_name='StreamRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='encoding', full_name='StreamRequest.encoding', index=0,
+      number=1, type=14, cpp_type=8, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='compression', full_name='StreamRequest.compression', index=1,
+      number=2, type=14, cpp_type=8, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='chunksize', full_name='StreamRequest.chunksize', index=2,
+      number=3, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='quantstep', full_name='StreamRequest.quantstep', index=3,
+      number=4, type=2, cpp_type=6, label=1,
+      has_default_value=False, default_value=float(0),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+    _STREAMREQUEST_ENCODING,
+    _STREAMREQUEST_COMPRESSION,
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=189,
+  serialized_end=424,
+)
+
+
+_POINTCHUNK = _descriptor.Descriptor(
+  name='PointChunk',
+  full_name='PointChunk',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='npoints', full_name='PointChunk.npoints', index=0,
+      number=1, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='start', full_name='PointChunk.start', index=1,
+      number=2, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='count', full_name='PointChunk.count', index=2,
+      number=3, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='encoding', full_name='PointChunk.encoding', index=3,
+      number=4, type=14, cpp_type=8, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='compression', full_name='PointChunk.compression', index=4,
+      number=5, type=14, cpp_type=8, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='scale', full_name='PointChunk.scale', index=5,
+      number=6, type=2, cpp_type=6, label=1,
+      has_default_value=False, default_value=float(0),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='offset', full_name='PointChunk.offset', index=6,
+      number=7, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='data', full_name='PointChunk.data', index=7,
+      number=8, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=427,
+  serialized_end=623,
+)
+
+_STREAMREQUEST.fields_by_name['encoding'].enum_type = _STREAMREQUEST_ENCODING
+_STREAMREQUEST.fields_by_name['compression'].enum_type = _STREAMREQUEST_COMPRESSION
+_STREAMREQUEST_ENCODING.containing_type = _STREAMREQUEST
+_STREAMREQUEST_COMPRESSION.containing_type = _STREAMREQUEST
+_POINTCHUNK.fields_by_name['encoding'].enum_type = _STREAMREQUEST_ENCODING
+_POINTCHUNK.fields_by_name['compression'].enum_type = _STREAMREQUEST_COMPRESSION
 DESCRIPTOR.message_types_by_name['Empty'] = _EMPTY
 DESCRIPTOR.message_types_by_name['MatKW'] = _MATKW
 DESCRIPTOR.message_types_by_name['Pair'] = _PAIR
 DESCRIPTOR.message_types_by_name['PointCloud'] = _POINTCLOUD
 DESCRIPTOR.message_types_by_name['CamImg'] = _CAMIMG
+DESCRIPTOR.message_types_by_name['StreamRequest'] = _STREAMREQUEST
+DESCRIPTOR.message_types_by_name['PointChunk'] = _POINTCHUNK
 _sym_db.RegisterFileDescriptor(DESCRIPTOR)
 
 Empty = _reflection.GeneratedProtocolMessageType('Empty', (_message.Message,), {
@@ -243,6 +452,20 @@ CamImg = _reflection.GeneratedProtocolMessageType('CamImg', (_message.Message,),
   })
 _sym_db.RegisterMessage(CamImg)
 
+StreamRequest = _reflection.GeneratedProtocolMessageType('StreamRequest', (_message.Message,), {
+  'DESCRIPTOR' : _STREAMREQUEST,
+  '__module__' : 'phoxi_pb2'
+  # @@protoc_insertion_point(class_scope:StreamRequest)
+  })
+_sym_db.RegisterMessage(StreamRequest)
+
+PointChunk = _reflection.GeneratedProtocolMessageType('PointChunk', (_message.Message,), {
+  'DESCRIPTOR' : _POINTCHUNK,
+  '__module__' : 'phoxi_pb2'
+  # @@protoc_insertion_point(class_scope:PointChunk)
+  })
+_sym_db.RegisterMessage(PointChunk)
+
 
 
 _PHOXI = _descriptor.ServiceDescriptor(
@@ -251,8 +474,9 @@ _PHOXI = _descriptor.ServiceDescriptor(
   file=DESCRIPTOR,
   index=0,
   serialized_options=None,
-  serialized_start=189,
-  serialized_end=370,
+  create_key=_descriptor._internal_create_key,
+  serialized_start=626,
+  serialized_end=942,
   methods=[
   _descriptor.MethodDescriptor(
     name='triggerframe',
@@ -262,6 +486,7 @@ _PHOXI = _descriptor.ServiceDescriptor(
     input_type=_EMPTY,
     output_type=_EMPTY,
     serialized_options=None,
+    create_key=_descriptor._internal_create_key,
   ),
   _descriptor.MethodDescriptor(
     name='gettextureimg',
@@ -271,6 +496,7 @@ _PHOXI = _descriptor.ServiceDescriptor(
     input_type=_EMPTY,
     output_type=_CAMIMG,
     serialized_options=None,
+    create_key=_descriptor._internal_create_key,
   ),
   _descriptor.MethodDescriptor(
     name='getdepthimg',
@@ -280,6 +506,7 @@ _PHOXI = _descriptor.ServiceDescriptor(
     input_type=_EMPTY,
     output_type=_CAMIMG,
     serialized_options=None,
+    create_key=_descriptor._internal_create_key,
   ),
   _descriptor.MethodDescriptor(
     name='getpcd',
@@ -289,6 +516,7 @@ _PHOXI = _descriptor.ServiceDescriptor(
     input_type=_EMPTY,
     output_type=_POINTCLOUD,
     serialized_options=None,
+    create_key=_descriptor._internal_create_key,
   ),
   _descriptor.MethodDescriptor(
     name='getnormals',
@@ -298,6 +526,37 @@ _PHOXI = _descriptor.ServiceDescriptor(
     input_type=_EMPTY,
     output_type=_POINTCLOUD,
     serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='getrgbtextureimg',
+    full_name='Phoxi.getrgbtextureimg',
+    index=5,
+    containing_service=None,
+    input_type=_EMPTY,
+    output_type=_CAMIMG,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='streampcd',
+    full_name='Phoxi.streampcd',
+    index=6,
+    containing_service=None,
+    input_type=_STREAMREQUEST,
+    output_type=_POINTCHUNK,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='streamnormals',
+    full_name='Phoxi.streamnormals',
+    index=7,
+    containing_service=None,
+    input_type=_STREAMREQUEST,
+    output_type=_POINTCHUNK,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
   ),
 ])
 _sym_db.RegisterServiceDescriptor(_PHOXI)
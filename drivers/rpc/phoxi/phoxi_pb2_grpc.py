@@ -39,6 +39,21 @@ class PhoxiStub(object):
         request_serializer=phoxi__pb2.Empty.SerializeToString,
         response_deserializer=phoxi__pb2.PointCloud.FromString,
         )
+    self.getrgbtextureimg = channel.unary_unary(
+        '/Phoxi/getrgbtextureimg',
+        request_serializer=phoxi__pb2.Empty.SerializeToString,
+        response_deserializer=phoxi__pb2.CamImg.FromString,
+        )
+    self.streampcd = channel.unary_stream(
+        '/Phoxi/streampcd',
+        request_serializer=phoxi__pb2.StreamRequest.SerializeToString,
+        response_deserializer=phoxi__pb2.PointChunk.FromString,
+        )
+    self.streamnormals = channel.unary_stream(
+        '/Phoxi/streamnormals',
+        request_serializer=phoxi__pb2.StreamRequest.SerializeToString,
+        response_deserializer=phoxi__pb2.PointChunk.FromString,
+        )
 
 
 class PhoxiServicer(object):
@@ -81,6 +96,28 @@ class PhoxiServicer(object):
     raise NotImplementedError('Method not implemented!')
 
 
+  def getrgbtextureimg(self, request, context):
+    # missing associated documentation comment in .proto file
+    pass
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
+  def streampcd(self, request, context):
+    """the point cloud or normals of the last triggered frame in chunks, see drivers/rpc/pcdstream.py
+    """
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
+  def streamnormals(self, request, context):
+    # missing associated documentation comment in .proto file
+    pass
+    context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+    context.set_details('Method not implemented!')
+    raise NotImplementedError('Method not implemented!')
+
+
 def add_PhoxiServicer_to_server(servicer, server):
   rpc_method_handlers = {
       'triggerframe': grpc.unary_unary_rpc_method_handler(
@@ -108,6 +145,21 @@ def add_PhoxiServicer_to_server(servicer, server):
           request_deserializer=phoxi__pb2.Empty.FromString,
           response_serializer=phoxi__pb2.PointCloud.SerializeToString,
       ),
+      'getrgbtextureimg': grpc.unary_unary_rpc_method_handler(
+          servicer.getrgbtextureimg,
+          request_deserializer=phoxi__pb2.Empty.FromString,
+          response_serializer=phoxi__pb2.CamImg.SerializeToString,
+      ),
+      'streampcd': grpc.unary_stream_rpc_method_handler(
+          servicer.streampcd,
+          request_deserializer=phoxi__pb2.StreamRequest.FromString,
+          response_serializer=phoxi__pb2.PointChunk.SerializeToString,
+      ),
+      'streamnormals': grpc.unary_stream_rpc_method_handler(
+          servicer.streamnormals,
+          request_deserializer=phoxi__pb2.StreamRequest.FromString,
+          response_serializer=phoxi__pb2.PointChunk.SerializeToString,
+      ),
   }
   generic_handler = grpc.method_handlers_generic_handler(
       'Phoxi', rpc_method_handlers)
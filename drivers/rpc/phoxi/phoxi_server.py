@@ -5,6 +5,7 @@ import drivers.devices.phoxi.phoxicontrol as pctrl
 from concurrent import futures
 import drivers.rpc.phoxi.phoxi_pb2 as pxmsg
 import drivers.rpc.phoxi.phoxi_pb2_grpc as pxrpc
+import drivers.rpc.pcdstream as pcdstream
 
 
 class PhoxiServer(pxrpc.PhoxiServicer):
@@ -92,6 +93,47 @@ class PhoxiServer(pxrpc.PhoxiServicer):
         normalsarray = np.array(normalsraw).reshape((-1, 3))
         return pxmsg.PointCloud(points=np.ndarray.tobytes(normalsarray))
 
+    def streampcd(self, request, context):
+        """
+        stream the point cloud of the last triggered frame in chunks
+        the raw data is converted to float32 once, see drivers/rpc/pcdstream.py for the encodings
+
+        :param request: pxmsg.StreamRequest
+        :param context:
+        :return: generator of pxmsg.PointChunk
+        """
+
+        pointcloudraw = self._pcins.getpointcloud()
+        try:
+            for chunk in pcdstream.encode_chunks(np.asarray(pointcloudraw, dtype=np.float32),
+                                                 encoding=request.encoding,
+                                                 compression=request.compression,
+                                                 chunksize=request.chunksize,
+                                                 quantstep=request.quantstep):
+                yield pxmsg.PointChunk(**chunk)
+        except ValueError as e:  # e.g. a quantstep too small for the point cloud
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
+    def streamnormals(self, request, context):
+        """
+        stream the normals of the last triggered frame in chunks, see streampcd
+
+        :param request: pxmsg.StreamRequest
+        :param context:
+        :return: generator of pxmsg.PointChunk
+        """
+
+        normalsraw = self._pcins.getnormals()
+        try:
+            for chunk in pcdstream.encode_chunks(np.asarray(normalsraw, dtype=np.float32),
+                                                 encoding=request.encoding,
+                                                 compression=request.compression,
+                                                 chunksize=request.chunksize,
+                                                 quantstep=request.quantstep):
+                yield pxmsg.PointChunk(**chunk)
+        except ValueError as e:  # e.g. a quantstep too small for the point cloud
+            context.abort(grpc.StatusCode.INVALID_ARGUMENT, str(e))
+
     def getrgbtextureimg(self, request, context):
         """
         get the rgb texture as an array
@@ -0,0 +1,374 @@
+"""
+asyncio connection layer for the UR realtime (30003) and secondary (30002) interfaces
+A single event loop can multiplex any number of AsyncURRobot instances; see robot_con/async_runtime.py
+The layer does not spawn threads. Use FakeURController to test it without a real controller.
+"""
+
+import re
+import math
+import time
+import struct
+import asyncio
+import logging
+from drivers.urx import ur_realtime_monitor
+from drivers.urx import ur_secondary_monitor
+
+RT_PORT = 30003
+SECONDARY_PORT = 30002
+
+
+class AsyncURRobot(object):
+    """
+    awaitable counterpart of drivers.urx.ur_robot.URRobot
+    joint values are read from the 125Hz realtime stream; programs are sent through the secondary interface
+    """
+
+    def __init__(self, host, rt_port=RT_PORT, secondary_port=SECONDARY_PORT, jnt_epsilon=.01):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.host = host
+        self.rt_port = rt_port
+        self.secondary_port = secondary_port
+        # precision of joint movements used to wait for move completion
+        self.jnt_epsilon = jnt_epsilon
+        # It seems URScript is limited in the character length of floats it accepts
+        self.max_float_length = 6
+        self._rt_reader = None
+        self._rt_writer = None
+        self._sec_reader = None
+        self._sec_writer = None
+        self._tasks = []
+        self._parser = ur_secondary_monitor.ParserUtils()
+        self._sec_dict = {}
+        self._timestamp = None
+        self._ctrl_timestamp = None
+        self._q_actual = None
+        self._qd_actual = None
+        self._q_target = None
+        self._tcp = None
+        self._tcp_force = None
+        self._new_data = None
+        self._rt_error = None
+        self._send_lock = None
+
+    async def connect(self, timeout=5):
+        """
+        open both sockets and wait for the first realtime packet
+        :param timeout: seconds
+        :return:
+        """
+        self._new_data = asyncio.Event()
+        self._rt_error = None
+        self._send_lock = asyncio.Lock()
+        self._rt_reader, self._rt_writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.rt_port), timeout)
+        self._sec_reader, self._sec_writer = await asyncio.wait_for(
+            asyncio.open_connection(self.host, self.secondary_port), timeout)
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._rt_loop()), loop.create_task(self._sec_loop())]
+        await self.wait(timeout=timeout)
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        for writer in [self._rt_writer, self._sec_writer]:
+            if writer is not None:
+                writer.close()
+                try:
+                    await writer.wait_closed()
+                except (ConnectionError, OSError):
+                    pass
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def _rt_loop(self):
+        """
+        if the realtime stream breaks, the error is logged and the waiters of the next packet raise it at once
+        """
+        try:
+            await self._recv_rt()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.logger.error("The realtime interface of %s stopped: %r", self.host, e)
+            self._rt_error = e
+            self._new_data.set()
+
+    async def _recv_rt(self):
+        while True:
+            head = await self._rt_reader.readexactly(4)
+            timestamp = time.time()
+            pkgsize = struct.unpack('>i', head)[0]
+            payload = await self._rt_reader.readexactly(pkgsize - 4)
+            if pkgsize >= 692:
+                unp = ur_realtime_monitor.URRTMonitor.rtstruct692.unpack(
+                    payload[:ur_realtime_monitor.URRTMonitor.rtstruct692.size])
+                self._tcp = list(unp[73:79])
+            elif pkgsize >= 540:
+                unp = ur_realtime_monitor.URRTMonitor.rtstruct540.unpack(
+                    payload[:ur_realtime_monitor.URRTMonitor.rtstruct540.size])
+            else:
+                self.logger.warning('Error, Received packet of length smaller than 540: %s ', pkgsize)
+                continue
+            self._timestamp = timestamp
+            self._ctrl_timestamp = unp[0]
+            self._q_target = list(unp[1:7])
+            self._q_actual = list(unp[31:37])
+            self._qd_actual = list(unp[37:43])
+            self._tcp_force = list(unp[67:73])
+            # wake up all waiters of the current packet and arm a fresh event for the next one
+            new_data, self._new_data = self._new_data, asyncio.Event()
+            new_data.set()
+
+    async def _sec_loop(self):
+        """
+        the secondary interface pushes state packets at 10Hz; they must be drained even if nobody reads them
+        :return:
+        """
+        dataqueue = bytes()
+        while True:
+            tmp = await self._sec_reader.read(4096)
+            if not tmp:
+                return
+            dataqueue += tmp
+            while True:
+                ans = self._parser.find_first_packet(dataqueue)
+                if not ans:
+                    break
+                packet, dataqueue = ans
+                try:
+                    self._sec_dict = self._parser.parse(packet)
+                except ur_secondary_monitor.ParsingException as ex:
+                    self.logger.warning("Error parsing one packet from urrobot: %s", ex)
+
+    async def wait(self, timeout=1):
+        """
+        wait for the next realtime packet
+        """
+        if self._rt_error is None:
+            try:
+                await asyncio.wait_for(self._new_data.wait(), timeout)
+            except asyncio.TimeoutError:
+                raise ur_secondary_monitor.TimeoutException(
+                    "Did not receive a valid data packet from robot_s in {}".format(timeout))
+        if self._rt_error is not None:
+            raise ConnectionError("The realtime interface of {} stopped".format(self.host)) from self._rt_error
+
+    def is_program_running(self):
+        """
+        refreshed at 10Hz by the secondary interface; None if the controller has not reported yet
+        """
+        if "RobotModeData" in self._sec_dict:
+            return self._sec_dict["RobotModeData"]["isProgramRunning"]
+        return None
+
+    async def send_program(self, prog):
+        """
+        send a complete urscript program; any running program is interrupted
+        """
+        if not isinstance(prog, bytes):
+            prog = prog.strip().encode()
+        async with self._send_lock:
+            self._sec_writer.write(prog + b"\n")
+            await self._sec_writer.drain()
+
+    async def get_jnt_values(self, wait=False):
+        """
+        get the joint angles in radian
+        :param wait: wait for a fresh packet before returning
+        :return: 1x6 list
+        """
+        if wait:
+            await self.wait()
+        return list(self._q_actual)
+
+    def _format_move(self, command, jnt_values, acc, vel, radius=0):
+        jnt_values = [round(i, self.max_float_length) for i in jnt_values]
+        return "{}([{},{},{},{},{},{}], a={}, v={}, r={})".format(command, *jnt_values, acc, vel, radius)
+
+    async def _wait_for_jnts(self, target, threshold=None, start_timeout=.5, timeout=30):
+        """
+        a move has ended once the robot_s has started moving (or did not need to within start_timeout)
+        and has come to rest within threshold of target
+        """
+        threshold = self.jnt_epsilon if threshold is None else threshold
+        tic = time.monotonic()
+        while time.monotonic() - tic < start_timeout:
+            await self.wait()
+            if max(abs(qd) for qd in self._qd_actual) > threshold:
+                break
+        while True:
+            dist = math.sqrt(sum((t - q) ** 2 for t, q in zip(target, self._q_actual)))
+            if dist < threshold and max(abs(qd) for qd in self._qd_actual) < threshold:
+                return
+            if time.monotonic() - tic > timeout:
+                raise ur_secondary_monitor.TimeoutException(
+                    "Goal not reached in {} seconds, dist is {}, target is {}".format(timeout, dist, target))
+            await self.wait()
+
+    async def move_jnts(self, jnt_values, acc=1, vel=1, wait=True, threshold=None, timeout=30):
+        """
+        :param jnt_values: a 1-by-6 list in radian
+        :param wait: return after the robot_s reaches jnt_values
+        :return:
+        """
+        await self.send_program(self._format_move("movej", jnt_values[:6], acc, vel))
+        if wait:
+            await self._wait_for_jnts(jnt_values[:6], threshold=threshold, timeout=timeout)
+
+    async def move_jntspace_path(self, path, acc=1, vel=1, radius=.01, wait=True, threshold=None, timeout=60):
+        """
+        concatenate the path into a single program of blended movej commands
+        :param path: a list of 1x6 lists/arrays
+        :param radius: blending radius, the last waypoint is always a stopping point
+        :return:
+        """
+        prog = "def wrs_jntspace_path():\n"
+        for id, jnt_values in enumerate(path):
+            prog += "  " + self._format_move("movej", jnt_values[:6], acc, vel,
+                                             0 if id == len(path) - 1 else radius) + "\n"
+        prog += "end\n"
+        await self.send_program(prog)
+        if wait:
+            await self._wait_for_jnts(path[-1][:6], threshold=threshold, timeout=timeout)
+
+
+class FakeURController(object):
+    """
+    a local stand-in of the UR controller for testing AsyncURRobot without hardware
+    streams 692-byte realtime packets at 125Hz and executes movej commands found in received programs
+    joints move toward their targets at a constant speed
+    """
+
+    _movej_pattern = re.compile(r"movej\(\[([^\]]*)\]")
+
+    def __init__(self, host='127.0.0.1', rt_port=0, secondary_port=0, jnt_values=None, jnt_speed=math.pi,
+                 frequency=125):
+        self.host = host
+        self.rt_port = rt_port
+        self.secondary_port = secondary_port
+        self.jnt_values = [0.0] * 6 if jnt_values is None else list(jnt_values)
+        self.jnt_speed = jnt_speed
+        self.frequency = frequency
+        self.n_programs = 0
+        self._jnt_velocities = [0.0] * 6
+        self._waypoints = []
+        self._servers = []
+        self._handlers = set()
+        self._tasks = []
+
+    async def start(self):
+        rt_server = await asyncio.start_server(self._serve_rt, self.host, self.rt_port)
+        sec_server = await asyncio.start_server(self._serve_secondary, self.host, self.secondary_port)
+        self.rt_port = rt_server.sockets[0].getsockname()[1]
+        self.secondary_port = sec_server.sockets[0].getsockname()[1]
+        self._servers = [rt_server, sec_server]
+        self._tasks = [asyncio.get_running_loop().create_task(self._simulate())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for handler in list(self._handlers):
+            handler.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        for server in self._servers:
+            server.close()
+            await server.wait_closed()
+
+    async def _simulate(self):
+        dt = 1.0 / self.frequency
+        while True:
+            if self._waypoints:
+                target = self._waypoints[0]
+                step = self.jnt_speed * dt
+                self._jnt_velocities = [max(-step, min(step, t - q)) / dt for q, t in zip(self.jnt_values, target)]
+                self.jnt_values = [q + qd * dt for q, qd in zip(self.jnt_values, self._jnt_velocities)]
+                if all(abs(t - q) < 1e-9 for q, t in zip(self.jnt_values, target)):
+                    self._waypoints.pop(0)
+            else:
+                self._jnt_velocities = [0.0] * 6
+            await asyncio.sleep(dt)
+
+    def _pack_rt(self):
+        values = [0.0] * 86
+        values[0] = time.monotonic()
+        values[1:7] = self._waypoints[0] if self._waypoints else self.jnt_values
+        values[31:37] = self.jnt_values
+        values[37:43] = self._jnt_velocities
+        values[85] = 0
+        payload = ur_realtime_monitor.URRTMonitor.rtstruct692.pack(*values)
+        return struct.pack('>i', len(payload) + 4) + payload
+
+    async def _serve_rt(self, reader, writer):
+        self._handlers.add(asyncio.current_task())
+        try:
+            while True:
+                writer.write(self._pack_rt())
+                await writer.drain()
+                await asyncio.sleep(1.0 / self.frequency)
+        except (ConnectionError, OSError, asyncio.CancelledError):
+            pass
+        finally:
+            self._handlers.discard(asyncio.current_task())
+            writer.close()
+
+    async def _serve_secondary(self, reader, writer):
+        self._handlers.add(asyncio.current_task())
+        prog = []
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                line = line.decode().strip()
+                if not line:
+                    continue
+                prog.append(line)
+                # programs are either single commands or def ... end blocks
+                if prog[0].startswith("def ") and line != "end":
+                    continue
+                self._execute(prog)
+                prog = []
+        except (ConnectionError, OSError, asyncio.CancelledError):
+            pass
+        finally:
+            self._handlers.discard(asyncio.current_task())
+            writer.close()
+
+    def _execute(self, prog):
+        self.n_programs += 1
+        waypoints = []
+        for line in prog:
+            match = self._movej_pattern.search(line)
+            if match is not None:
+                waypoints.append([float(x) for x in match.group(1).split(",")])
+        if waypoints:
+            # a new program interrupts the running one
+            self._waypoints = waypoints
+
+
+if __name__ == '__main__':
+    async def main():
+        fake = FakeURController(jnt_speed=1)
+        await fake.start()
+        async with AsyncURRobot('127.0.0.1', rt_port=fake.rt_port, secondary_port=fake.secondary_port) as robot:
+            print(await robot.get_jnt_values())
+            tic = time.time()
+            await robot.move_jntspace_path([[.1] * 6, [.2] * 6, [0] * 6])
+            print(await robot.get_jnt_values(), time.time() - tic)
+            # a broken connection fails the motions at once instead of after their timeouts
+            await fake.stop()
+            tic = time.time()
+            try:
+                await robot.move_jnts([.1] * 6)
+            except (ConnectionError, OSError) as e:
+                print(repr(e), time.time() - tic)
+
+    asyncio.run(main())
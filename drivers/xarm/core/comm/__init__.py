@@ -5,3 +5,4 @@ except:
     warnings.warn('serial module is not found, if you want to connect to xArm with serial, please `pip install pyserial==3.4`')
     SerialPort = object
 from .socket_port import SocketPort
+from .async_socket_port import AsyncSocketPort
@@ -0,0 +1,346 @@
+"""
+asyncio counterpart of SocketPort + UxbusCmdTcp for the xArm control port (502)
+Requests are tagged with the transaction number of the xbus header, so several coroutines may
+have requests in flight on the same connection without a lock around request/response pairs.
+A single event loop can multiplex any number of AsyncSocketPort instances; see robot_con/async_runtime.py
+The low-level requests return [code, ...] like UxbusCmd; the motions (move_jnts, move_jntspace_path) raise XBusError.
+Use FakeXArmController to test it without a real controller.
+"""
+
+import math
+import struct
+import asyncio
+from ..utils import convert
+from ..utils.log import logger
+from ..config.x_config import XCONF
+
+TX2_PROT_CON = 2  # tcp cmd prot
+TX2_PROT_HEAT = 1  # tcp heat prot
+TX2_BUS_FLAG_MIN = 1
+TX2_BUS_FLAG_MAX = 5000
+STATE_MOVING = 1
+STATE_READY = 2
+
+
+class XBusError(Exception):
+    """
+    a motion request was rejected or did not finish, code is one of XCONF.UxbusState
+    """
+
+    def __init__(self, code, message):
+        super().__init__("{} (code {})".format(message, code))
+        self.code = code
+
+
+class AsyncSocketPort(object):
+
+    def __init__(self, server_ip, server_port=XCONF.SocketConf.TCP_CONTROL_PORT, heartbeat=True,
+                 timeout=XCONF.UxbusConf.SET_TIMEOUT / 1000):
+        self.server_ip = server_ip
+        self.server_port = server_port
+        self.heartbeat = heartbeat
+        self.timeout = timeout
+        self.port_type = 'async-main-socket'
+        self.bus_flag = TX2_BUS_FLAG_MIN
+        self._reader = None
+        self._writer = None
+        self._pending = {}
+        self._tasks = []
+        self._recv_error = None
+
+    @property
+    def connected(self):
+        return self._writer is not None and not self._writer.is_closing() and self._recv_error is None
+
+    async def connect(self):
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self.server_ip, self.server_port), self.timeout)
+        logger.info('{} connect {} success'.format(self.port_type, self.server_ip))
+        self._recv_error = None
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._recv_loop())]
+        if self.heartbeat:
+            self._tasks.append(loop.create_task(self._heartbeat_loop()))
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._fail_pending()
+        if self._writer is not None:
+            self._writer.close()
+            try:
+                await self._writer.wait_closed()
+            except (ConnectionError, OSError):
+                pass
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def _fail_pending(self):
+        for future in self._pending.values():
+            if not future.done():
+                future.set_result([XCONF.UxbusState.ERR_NOTTCP])
+        self._pending = {}
+
+    async def _heartbeat_loop(self):
+        heat_data = bytes([0, 0, 0, 1, 0, 2, 0, 0])
+        try:
+            while self.connected:
+                self._writer.write(heat_data)
+                await self._writer.drain()
+                await asyncio.sleep(1)
+        except (ConnectionError, OSError) as e:
+            logger.error('{} heartbeat to {} failed: {}'.format(self.port_type, self.server_ip, e))
+
+    async def _recv_loop(self):
+        """
+        if the connection breaks, the error is logged and the pending and later requests get ERR_NOTTCP at once
+        instead of waiting for their timeouts
+        """
+        try:
+            await self._recv_responses()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error('{} receiver of {} stopped: {!r}'.format(self.port_type, self.server_ip, e))
+            self._recv_error = e
+            self._fail_pending()
+
+    async def _recv_responses(self):
+        while True:
+            head = await self._reader.readexactly(6)
+            num = convert.bytes_to_u16(head[0:2])
+            prot = convert.bytes_to_u16(head[2:4])
+            length = convert.bytes_to_u16(head[4:6])
+            body = await self._reader.readexactly(length)
+            if prot != TX2_PROT_CON:
+                continue
+            future = self._pending.pop(num, None)
+            if future is None or future.done() or len(body) < 2:
+                continue
+            state = body[1]
+            if state & 0x08:
+                code = XCONF.UxbusState.INVALID
+            elif state & 0x40:
+                code = XCONF.UxbusState.ERR_CODE
+            elif state & 0x20:
+                code = XCONF.UxbusState.WAR_CODE
+            else:
+                code = 0
+            future.set_result([code] + list(body[2:]))
+
+    async def send_xbus(self, funcode, datas=b'', timeout=None):
+        """
+        send one request and await its response
+        :param funcode: XCONF.UxbusReg
+        :param datas: bytes
+        :return: [code, byte0, byte1, ...], see XCONF.UxbusState for code
+        """
+        if not self.connected:
+            return [XCONF.UxbusState.ERR_NOTTCP]
+        num = self.bus_flag
+        self.bus_flag = TX2_BUS_FLAG_MIN if self.bus_flag >= TX2_BUS_FLAG_MAX else self.bus_flag + 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[num] = future
+        send_data = convert.u16_to_bytes(num)
+        send_data += convert.u16_to_bytes(TX2_PROT_CON)
+        send_data += convert.u16_to_bytes(len(datas) + 1)
+        send_data += bytes([funcode])
+        send_data += datas
+        self._writer.write(send_data)
+        await self._writer.drain()
+        try:
+            return await asyncio.wait_for(future, self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            self._pending.pop(num, None)
+            return [XCONF.UxbusState.ERR_TOUT]
+
+    async def get_joint_pos(self):
+        ret = await self.send_xbus(XCONF.UxbusReg.GET_JOINT_POS)
+        if ret[0] not in [0, XCONF.UxbusState.ERR_CODE, XCONF.UxbusState.WAR_CODE] or len(ret) < 29:
+            return [ret[0]] + [0] * 7
+        return [ret[0]] + convert.bytes_to_fp32s(ret[1:29], 7)
+
+    async def get_state(self):
+        ret = await self.send_xbus(XCONF.UxbusReg.GET_STATE)
+        return ret[:2] if len(ret) >= 2 else [ret[0], 0]
+
+    async def get_cmdnum(self):
+        ret = await self.send_xbus(XCONF.UxbusReg.GET_CMDNUM)
+        return [ret[0], convert.bytes_to_u16(ret[1:3])] if len(ret) >= 3 else [ret[0], 0]
+
+    async def move_joint(self, mvjoint, mvvelo, mvacc, mvtime=0):
+        txdata = list(mvjoint[:7]) + [0] * (7 - len(mvjoint[:7]))
+        txdata += [mvvelo, mvacc, mvtime]
+        ret = await self.send_xbus(XCONF.UxbusReg.MOVE_JOINT, convert.fp32s_to_bytes(txdata, 10))
+        return ret[:1]
+
+    async def get_jnt_values(self):
+        """
+        :return: 1x7 list in radian
+        """
+        ret = await self.get_joint_pos()
+        return ret[1:]
+
+    async def wait_until_motion_done(self, timeout=30, interval=.01):
+        """
+        the motion is done when the controller leaves the moving state and its command cache is empty
+        :return: True if done, False if timed out
+        """
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while loop.time() < deadline:
+            code, state = await self.get_state()
+            if code == 0 and state != STATE_MOVING:
+                code, cmdnum = await self.get_cmdnum()
+                if code == 0 and cmdnum == 0:
+                    return True
+            await asyncio.sleep(interval)
+        return False
+
+    async def _move_joint_or_raise(self, jnt_values, speed, mvacc):
+        code = (await self.move_joint(jnt_values, speed, mvacc))[0]
+        if code not in [0, XCONF.UxbusState.WAR_CODE]:
+            raise XBusError(code, "move_joint to {} failed".format(list(jnt_values)))
+
+    async def _wait_or_raise(self, timeout):
+        if not await self.wait_until_motion_done(timeout=timeout):
+            raise XBusError(XCONF.UxbusState.ERR_TOUT, "Motion not done in {} seconds".format(timeout))
+
+    async def move_jnts(self, jnt_values, speed=math.pi / 6, mvacc=20, wait=True, timeout=30):
+        """
+        :param jnt_values: 1xn list in radian, n <= 7
+        :param speed: rad/s
+        :param mvacc: rad/s^2
+        :param wait: return after the motion is done
+        :return:
+        """
+        await self._move_joint_or_raise(jnt_values, speed, mvacc)
+        if wait:
+            await self._wait_or_raise(timeout)
+
+    async def move_jntspace_path(self, path, speed=math.pi / 6, mvacc=20, max_cmdnum=256, wait=True, timeout=60):
+        """
+        stream the waypoints into the controller command cache
+        the sender stops as long as max_cmdnum commands are queued in the controller, which
+        bounds the amount of data in flight per robot_s
+        :param path: a list of 1xn lists/arrays
+        :return:
+        """
+        n_ahead = 0
+        for jnt_values in path:
+            if n_ahead >= max_cmdnum:
+                while True:
+                    code, n_ahead = await self.get_cmdnum()
+                    if code != 0:
+                        raise XBusError(code, "get_cmdnum failed")
+                    if n_ahead < max_cmdnum:
+                        break
+                    await asyncio.sleep(.01)
+            await self._move_joint_or_raise(jnt_values, speed, mvacc)
+            n_ahead += 1
+        if wait:
+            await self._wait_or_raise(timeout)
+
+
+class FakeXArmController(object):
+    """
+    a local stand-in of the xArm control port for testing AsyncSocketPort without hardware
+    answers GET_JOINT_POS, GET_STATE, GET_CMDNUM and queues MOVE_JOINT targets
+    joints move toward their targets at a constant speed
+    """
+
+    def __init__(self, host='127.0.0.1', port=0, jnt_values=None, jnt_speed=math.pi, frequency=250):
+        self.host = host
+        self.port = port
+        self.jnt_values = [0.0] * 7 if jnt_values is None else list(jnt_values) + [0.0] * (7 - len(jnt_values))
+        self.jnt_speed = jnt_speed
+        self.frequency = frequency
+        self.n_requests = 0
+        self._waypoints = []
+        self._server = None
+        self._tasks = []
+        self._handlers = set()
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._tasks = [asyncio.get_running_loop().create_task(self._simulate())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        for handler in list(self._handlers):
+            handler.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        self._server.close()
+        await self._server.wait_closed()
+
+    async def _simulate(self):
+        dt = 1.0 / self.frequency
+        step = self.jnt_speed * dt
+        while True:
+            if self._waypoints:
+                target = self._waypoints[0]
+                self.jnt_values = [q + max(-step, min(step, t - q)) for q, t in zip(self.jnt_values, target)]
+                if all(abs(t - q) < 1e-6 for q, t in zip(self.jnt_values, target)):
+                    self._waypoints.pop(0)
+            await asyncio.sleep(dt)
+
+    def _respond(self, funcode, params):
+        if funcode == XCONF.UxbusReg.GET_JOINT_POS:
+            return convert.fp32s_to_bytes(self.jnt_values, 7)
+        elif funcode == XCONF.UxbusReg.GET_STATE:
+            return bytes([STATE_MOVING if self._waypoints else STATE_READY])
+        elif funcode == XCONF.UxbusReg.GET_CMDNUM:
+            return convert.u16_to_bytes(max(len(self._waypoints) - 1, 0))
+        elif funcode == XCONF.UxbusReg.MOVE_JOINT:
+            self._waypoints.append(list(struct.unpack('<7f', params[:28])))
+        return b''
+
+    async def _serve(self, reader, writer):
+        self._handlers.add(asyncio.current_task())
+        try:
+            while True:
+                head = await reader.readexactly(6)
+                body = await reader.readexactly(convert.bytes_to_u16(head[4:6]))
+                if convert.bytes_to_u16(head[2:4]) != TX2_PROT_CON:
+                    continue
+                self.n_requests += 1
+                params = self._respond(body[0], body[1:])
+                writer.write(head[0:4] + convert.u16_to_bytes(len(params) + 2) + bytes([body[0], 0]) + params)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError, OSError, asyncio.CancelledError):
+            pass
+        finally:
+            self._handlers.discard(asyncio.current_task())
+            writer.close()
+
+
+if __name__ == '__main__':
+    import time
+
+    async def main():
+        fake = FakeXArmController(jnt_speed=1)
+        await fake.start()
+        async with AsyncSocketPort('127.0.0.1', fake.port) as arm:
+            print(await arm.get_jnt_values())
+            tic = time.time()
+            await arm.move_jntspace_path([[.1] * 6, [.2] * 6, [0] * 6], max_cmdnum=2)
+            print(await arm.get_jnt_values(), time.time() - tic, fake.n_requests)
+            # a broken connection fails the motions at once instead of after their timeouts
+            await fake.stop()
+            tic = time.time()
+            try:
+                await arm.move_jnts([.1] * 6)
+            except XBusError as e:
+                print(e, time.time() - tic)
+
+    asyncio.run(main())
@@ -9,19 +9,22 @@ def plan_contact_pairs(objcm,
                        max_samples=100,
                        min_dist_between_sampled_contact_points=.005,
                        angle_between_contact_normals=math.radians(160),
-                       toggle_sampled_points=False):
+                       toggle_sampled_points=False,
+                       seed=None):
     """
     find the contact pairs using rayshooting
     the finally returned number of contact pairs may be smaller than the given max_samples due to the min_dist constraint
     :param angle_between_contact_normals:
     :param toggle_sampled_points
+    :param seed: fixes the sampled contact points for reproducible grasp datasets
     :return: [[contact_p0, contact_p1], ...]
     author: weiwei
     date: 20190805, 20210504
     """
     contact_points, contact_normals = objcm.sample_surface(n_samples=max_samples,
                                                            radius=min_dist_between_sampled_contact_points / 2,
-                                                           toggle_option='normals')
+                                                           toggle_option='normals',
+                                                           seed=seed)
     contact_pairs = []
     tree = cKDTree(contact_points)
     near_history = np.array([0] * len(contact_points), dtype=bool)
@@ -51,7 +54,8 @@ def plan_grasps(hnd_s,
                 rotation_interval=math.radians(22.5),
                 max_samples=100,
                 min_dist_between_sampled_contact_points=.005,
-                contact_offset=.002):
+                contact_offset=.002,
+                seed=None):
     """
 
     :param objcm:
@@ -62,12 +66,14 @@ def plan_grasps(hnd_s,
     :param max_samples:
     :param min_dist_between_sampled_contact_points:
     :param contact_offset: offset at the cotnact to avoid being closely in touch with object surfaces
+    :param seed: see plan_contact_pairs
     :return: a list [[jaw_width, gl_action_center_pos, pos, rotmat], ...]
     """
     contact_pairs = plan_contact_pairs(objcm,
                                        max_samples=max_samples,
                                        min_dist_between_sampled_contact_points=min_dist_between_sampled_contact_points,
-                                       angle_between_contact_normals=angle_between_contact_normals)
+                                       angle_between_contact_normals=angle_between_contact_normals,
+                                       seed=seed)
     grasp_info_list = []
     import modeling.geometric_model as gm
     for i, cp in enumerate(contact_pairs):
@@ -3,7 +3,6 @@ import math
 import copy
 import pickle
 import numpy as np
-import basis.data_adapter as da
 import modeling.collision_model as cm
 import motion.optimization_based.incremental_nik as inik
 import motion.probabilistic.rrt_connect as rrtc
@@ -0,0 +1,203 @@
+"""
+NumPy counterpart of _ode_cdhelper.py, used by collision_model.py in headless mode (WRS_HEADLESS=1)
+a cdmesh is the Trimesh of the selected CDMType kept in its local frame together with the pose of its owner
+mesh-mesh collisions are found by tracing the edges of each mesh against the ray BVH of the other one, like the ODE
+trimesh collider, a mesh completely inside another one is not reported
+rayhit_closest_batch only needs the trimeshes and is used by CollisionModel.ray_hit_batch in both modes
+"""
+import os
+import numpy as np
+from concurrent import futures
+
+
+class CDMesh(object):
+
+    def __init__(self, trm_mesh):
+        self.trm_mesh = trm_mesh
+        self.pos = np.zeros(3)
+        self.rotmat = np.eye(3)
+
+    def world_bounds(self):
+        corners = np.array(np.meshgrid(*self.trm_mesh.bounds.T)).reshape(3, -1).T
+        corners = corners @ self.rotmat.T + self.pos
+        return np.array([corners.min(axis=0), corners.max(axis=0)])
+
+
+def gen_cdmesh(trm_mesh):
+    """
+    :param trm_mesh: basis.trimesh.Trimesh
+    :return: CDMesh
+    """
+    return CDMesh(trm_mesh)
+
+
+def clone_cdmesh(cdmesh):
+    """
+    a new CDMesh sharing the trimesh (and its ray BVH) of cdmesh, the pose is not copied
+    :param cdmesh:
+    :return:
+    """
+    return CDMesh(cdmesh.trm_mesh)
+
+
+def set_pose(cdmesh, pos, rotmat):
+    """
+    :param cdmesh: CDMesh
+    :param pos: npvec3
+    :param rotmat: npmat3
+    :return:
+    """
+    cdmesh.pos = np.asarray(pos, dtype=np.float64)
+    cdmesh.rotmat = np.asarray(rotmat, dtype=np.float64)
+
+
+def _edge_rays(cdmesh0, cdmesh1):
+    """
+    the edges of cdmesh0 as segments (origin, direction, max_t=1) in the local frame of cdmesh1
+    """
+    edges = cdmesh0.trm_mesh.vertices[cdmesh0.trm_mesh.edges_unique]
+    rotmat = cdmesh1.rotmat.T @ cdmesh0.rotmat
+    pos = cdmesh1.rotmat.T @ (cdmesh0.pos - cdmesh1.pos)
+    edges = edges @ rotmat.T + pos
+    return np.stack((edges[:, 0], edges[:, 1] - edges[:, 0]), axis=1)
+
+
+def _is_collided(cdmesh0, cdmesh1, toggle_contacts):
+    bounds0 = cdmesh0.world_bounds()
+    bounds1 = cdmesh1.world_bounds()
+    if np.any(bounds0[1] < bounds1[0]) or np.any(bounds1[1] < bounds0[0]):
+        return False, np.zeros((0, 3))
+    contact_points = []
+    for cdm_a, cdm_b in ((cdmesh0, cdmesh1), (cdmesh1, cdmesh0)):
+        rays = _edge_rays(cdm_a, cdm_b)
+        if not toggle_contacts:
+            if cdm_b.trm_mesh.ray_bvh.intersects_any(rays, max_t=1.0):
+                return True, None
+            continue
+        tri_ids, locations, _ = cdm_b.trm_mesh.ray_bvh.intersects_first(rays, max_t=1.0)
+        contact_points.append(locations[tri_ids >= 0] @ cdm_b.rotmat.T + cdm_b.pos)
+    if not toggle_contacts:
+        return False, None
+    contact_points = np.vstack(contact_points)
+    return len(contact_points) > 0, contact_points
+
+
+def is_collided(cmodel_list0, cmodel_list1, toggle_contacts=True):
+    """
+    check if two cmodel lists are collided, the first collided pair is reported
+    :param cmodel_list0: a CollisionModel or a list of them
+    :param cmodel_list1: a CollisionModel or a list of them
+    :param toggle_contacts: return the contact points (nx3 nparray) as the second element if True
+    :return:
+    """
+    if not isinstance(cmodel_list0, list):
+        cmodel_list0 = [cmodel_list0]
+    if not isinstance(cmodel_list1, list):
+        cmodel_list1 = [cmodel_list1]
+    for cmodel0 in cmodel_list0:
+        for cmodel1 in cmodel_list1:
+            result, contact_points = _is_collided(cmodel0.cdmesh, cmodel1.cdmesh, toggle_contacts)
+            if result:
+                return (True, contact_points) if toggle_contacts else True
+    return (False, np.zeros((0, 3))) if toggle_contacts else False
+
+
+def _segment_in_local(spos, epos, cdmesh):
+    spos_local = cdmesh.rotmat.T @ (np.asarray(spos) - cdmesh.pos)
+    epos_local = cdmesh.rotmat.T @ (np.asarray(epos) - cdmesh.pos)
+    return np.array([[spos_local, epos_local - spos_local]])
+
+
+def rayhit_closet(spos, epos, objcm):
+    """
+    :param spos:
+    :param epos:
+    :param objcm:
+    :return: the closest hit point and the normal of the hit face, (None, None) if the segment misses the mesh
+    """
+    cdmesh = objcm.cdmesh
+    tri_ids, locations, _ = cdmesh.trm_mesh.ray_bvh.intersects_first(_segment_in_local(spos, epos, cdmesh),
+                                                                       max_t=1.0)
+    if tri_ids[0] < 0:
+        return None, None
+    return (cdmesh.rotmat @ locations[0] + cdmesh.pos,
+            cdmesh.rotmat @ cdmesh.trm_mesh.face_normals[tri_ids[0]])
+
+
+def rayhit_all(spos, epos, objcm):
+    """
+    :param spos:
+    :param epos:
+    :param objcm:
+    :return: lists of hit points and face normals, sorted from spos to epos
+    """
+    cdmesh = objcm.cdmesh
+    rays = _segment_in_local(spos, epos, cdmesh)
+    _, tri_ids, t = cdmesh.trm_mesh.ray_bvh.intersects_all(rays, max_t=1.0)
+    hit_points = (rays[0, 0] + t[:, None] * rays[0, 1]) @ cdmesh.rotmat.T + cdmesh.pos
+    hit_normals = cdmesh.trm_mesh.face_normals[tri_ids] @ cdmesh.rotmat.T
+    return list(hit_points), list(hit_normals)
+
+
+def _rayhit_closest_chunk(spos, epos, trm_meshes, poses, world_bounds):
+    n_segs = len(spos)
+    best_t = np.full(n_segs, np.inf)
+    hit_points = np.full((n_segs, 3), np.nan)
+    hit_normals = np.full((n_segs, 3), np.nan)
+    model_ids = np.full(n_segs, -1, dtype=int)
+    seg_min = np.minimum(spos, epos)
+    seg_max = np.maximum(spos, epos)
+    for model_id, (trm_mesh, (pos, rotmat), bounds) in enumerate(zip(trm_meshes, poses, world_bounds)):
+        # broad phase, the box of every segment against the world box of the mesh
+        candidates = np.flatnonzero(np.all(seg_max >= bounds[0], axis=1) & np.all(seg_min <= bounds[1], axis=1))
+        if len(candidates) == 0:
+            continue
+        # row vectors, (p - pos) @ rotmat is rotmat.T @ (p - pos)
+        rays = np.stack(((spos[candidates] - pos) @ rotmat, (epos[candidates] - spos[candidates]) @ rotmat), axis=1)
+        # a rigid transform keeps the segment parameter, hits beyond the closest one found so far are pruned
+        max_t = np.minimum(best_t[candidates], 1.0)
+        tri_ids, _, t = trm_mesh.ray_bvh.intersects_first(rays, max_t=max_t)
+        is_hit = tri_ids >= 0
+        hit_ids = candidates[is_hit]
+        best_t[hit_ids] = t[is_hit]
+        model_ids[hit_ids] = model_id
+        hit_normals[hit_ids] = trm_mesh.face_normals[tri_ids[is_hit]] @ rotmat.T
+    is_hit = model_ids >= 0
+    hit_points[is_hit] = spos[is_hit] + best_t[is_hit, None] * (epos[is_hit] - spos[is_hit])
+    return hit_points, hit_normals, model_ids
+
+
+def rayhit_closest_batch(segments, trm_meshes, poses, n_threads=None, chunk_size=4096):
+    """
+    the closest hit of every segment among several posed meshes
+    the ray BVH of every mesh is built at its first query and cached by the trimesh, see basis/trimesh/ray/ray_bvh.py
+    :param segments: nx2x3 nparray, the start and end points of the segments in the world frame
+    :param trm_meshes: list of basis.trimesh.Trimesh, in their local frames
+    :param poses: list of (pos, rotmat), one per mesh
+    :param n_threads: None means os.cpu_count(), the chunks are traced in parallel (numpy releases the GIL)
+    :param chunk_size: number of segments traced together by a thread
+    :return: hit_points (nx3, nan if missed), hit_normals (nx3, nan if missed), model_ids (n, -1 if missed)
+    """
+    segments = np.asarray(segments, dtype=np.float64).reshape((-1, 2, 3))
+    spos, epos = segments[:, 0], segments[:, 1]
+    poses = [(np.asarray(pos, dtype=np.float64), np.asarray(rotmat, dtype=np.float64)) for pos, rotmat in poses]
+    world_bounds = []
+    for trm_mesh, (pos, rotmat) in zip(trm_meshes, poses):
+        corners = np.array(np.meshgrid(*trm_mesh.bounds.T)).reshape(3, -1).T @ rotmat.T + pos
+        world_bounds.append(np.array([corners.min(axis=0), corners.max(axis=0)]))
+        # build the BVHs before the threads share them
+        trm_mesh.ray_bvh.bvh
+    starts = range(0, len(segments), chunk_size)
+    if n_threads is None:
+        n_threads = os.cpu_count() or 1
+    n_threads = max(1, min(n_threads, len(starts)))
+    chunk_fn = lambda start: _rayhit_closest_chunk(spos[start:start + chunk_size], epos[start:start + chunk_size],
+                                                   trm_meshes, poses, world_bounds)
+    if n_threads == 1:
+        results = [chunk_fn(start) for start in starts]
+    else:
+        with futures.ThreadPoolExecutor(max_workers=n_threads) as executor:
+            results = list(executor.map(chunk_fn, starts))
+    if len(results) == 0:
+        return np.zeros((0, 3)), np.zeros((0, 3)), np.zeros(0, dtype=int)
+    return tuple(np.concatenate(result) for result in zip(*results))
@@ -32,6 +32,15 @@ def gen_cdmesh(trm_model):
     return pdotrmgeom
 
 
+def clone_cdmesh(pdotrmgeom):
+    """
+    a new geom sharing the OdeTriMeshData of pdotrmgeom, the pose is not copied
+    :param pdotrmgeom:
+    :return:
+    """
+    return OdeTriMeshGeom(pdotrmgeom.getTriMeshData())
+
+
 def update_pose(pdotrmgeom, objcm):
     """
     update obj_ode_trimesh using the transformation matrix of objcm.pdndp
@@ -45,6 +54,18 @@ def update_pose(pdotrmgeom, objcm):
     pdotrmgeom.setQuaternion(objcm.pdndp.getQuat())
 
 
+def set_pose(pdotrmgeom, pos, rotmat):
+    """
+    update obj_ode_trimesh using a pose, the counterpart of _bvh_cdhelper.set_pose
+    :param pdotrmgeom:
+    :param pos: npvec3
+    :param rotmat: npmat3
+    :return:
+    """
+    pdotrmgeom.setPosition(da.npvec3_to_pdvec3(pos))
+    pdotrmgeom.setQuaternion(da.npmat3_to_pdquat(rotmat))
+
+
 # def gen_plane_cdmesh(updirection=np.array([0, 0, 1]), offset=0, name='autogen'):
 #     """
 #     generate a plane bulletrigidbody node
@@ -225,6 +225,26 @@ def gen_pointcloud_pdcndp(trm_mesh, radius=0.02):
     return cdprimitive
 
 
+def gen_capsules_pdcndp(ends, radii, ex_radius=0.0, name="capsules"):
+    """
+    one CollisionNode holding a CollisionSphere or a CollisionCapsule per proxy
+    :param ends: nx2x3 nparray, coincident ends make spheres
+    :param radii: n nparray
+    :param ex_radius:
+    :param name:
+    :return:
+    """
+    pdcnd = CollisionNode(name + "_cnode")
+    for (end_a, end_b), radius in zip(ends, radii):
+        if np.allclose(end_a, end_b):
+            pdcnd.addSolid(CollisionSphere(cx=end_a[0], cy=end_a[1], cz=end_a[2], radius=radius + ex_radius))
+        else:
+            pdcnd.addSolid(CollisionCapsule(a=LPoint3(*end_a), db=LPoint3(*end_b), radius=radius + ex_radius))
+    cdprimitive = NodePath(name)
+    cdprimitive.attachNewNode(pdcnd)
+    return cdprimitive
+
+
 # ========================================
 # generate wireframe NodePath from trimesh
 # ========================================
@@ -303,7 +323,7 @@ def is_collided(cmodel_list0, cmodel_list1, toggle_contacts=False):
         else:
             return True
     else:
-        return False, np.asarray([]) if toggle_contacts else False
+        return (False, np.asarray([])) if toggle_contacts else False
 
 
 # *** deprecated ***
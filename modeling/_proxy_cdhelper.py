@@ -0,0 +1,360 @@
+# sphere/capsule proxies of meshes for cheap collision detection
+# a mesh is covered by a small set of capsules (spheres are capsules with coincident ends), found by divisive
+# clustering of its surface samples: the proxy that sticks out of the mesh the most (measured against the signed
+# distance field of the mesh) is split until all of them are within the tolerance
+# the proxies of a mesh file are cached next to the file, see get_proxies
+# the cover is exact for the surface samples, between them gaps of a fraction of a millimeter may remain
+import os
+import json
+import warnings
+import numpy as np
+import basis.trimesh.sample as trm_sample
+import modeling.mesh_cache as mch
+
+SPHERES = "spheres"
+CAPSULES = "capsules"
+TOLERANCE = .003  # how far the proxies may stick out of the mesh, in meter
+MAX_N_PROXIES = 32
+N_SAMPLES = 3000
+
+
+def _fibonacci_sphere(n_points):
+    indices = np.arange(n_points) + .5
+    polar = np.arccos(1 - 2 * indices / n_points)
+    azimuth = np.pi * (1 + 5 ** .5) * indices
+    return np.column_stack((np.cos(azimuth) * np.sin(polar), np.sin(azimuth) * np.sin(polar), np.cos(polar)))
+
+
+def point_segment_distance(points, ends):
+    """
+    :param points: nx3 nparray
+    :param ends: nx2x3 or 2x3 nparray, segments (a, b), a == b for spheres
+    :return: n distances
+    """
+    a, b = ends[..., 0, :], ends[..., 1, :]
+    ab = b - a
+    ab_len2 = np.sum(ab * ab, axis=-1)
+    t = np.sum((points - a) * ab, axis=-1) / np.where(ab_len2 > 0, ab_len2, 1)
+    t = np.clip(t, 0, 1)
+    return np.linalg.norm(points - (a + t[..., None] * ab), axis=-1)
+
+
+def segment_segment_distance(ends0, ends1):
+    """
+    closest distances between segments (Ericson, Real-Time Collision Detection, 5.1.9), broadcast over the
+    leading dimensions, degenerated segments (spheres) are supported
+    :param ends0: ...x2x3 nparray
+    :param ends1: ...x2x3 nparray
+    :return: ... distances
+    """
+    p1, q1 = ends0[..., 0, :], ends0[..., 1, :]
+    p2, q2 = ends1[..., 0, :], ends1[..., 1, :]
+    d1, d2, r = q1 - p1, q2 - p2, p1 - p2
+    a = np.sum(d1 * d1, axis=-1)
+    e = np.sum(d2 * d2, axis=-1)
+    f = np.sum(d2 * r, axis=-1)
+    c = np.sum(d1 * r, axis=-1)
+    b = np.sum(d1 * d2, axis=-1)
+    eps = 1e-12
+    safe_a = np.where(a > eps, a, 1)
+    safe_e = np.where(e > eps, e, 1)
+    denom = a * e - b * b
+    # general case, then the clamped cases
+    s = np.where(denom > eps, np.clip((b * f - c * e) / np.where(denom > eps, denom, 1), 0, 1), 0)
+    t = (b * s + f) / safe_e
+    s = np.where(t < 0, np.clip(-c / safe_a, 0, 1), np.where(t > 1, np.clip((b - c) / safe_a, 0, 1), s))
+    t = np.clip(t, 0, 1)
+    # degenerated segments
+    s_e0 = np.clip(-c / safe_a, 0, 1)  # the second one is a point
+    t_a0 = np.clip(f / safe_e, 0, 1)  # the first one is a point
+    s = np.where(e <= eps, s_e0, s)
+    t = np.where(e <= eps, 0, t)
+    s = np.where(a <= eps, 0, s)
+    t = np.where(a <= eps, t_a0, t)
+    closest0 = p1 + s[..., None] * d1
+    closest1 = p2 + t[..., None] * d2
+    return np.linalg.norm(closest0 - closest1, axis=-1)
+
+
+def _fit_sphere(points, n_iter=64):
+    """
+    approximate minimum enclosing ball (Badoiu-Clarkson), the radius always encloses all points
+    :return: ends (2x3, coincident), radius
+    """
+    center = points.mean(axis=0)
+    for i in range(n_iter):
+        farthest = points[np.argmax(np.linalg.norm(points - center, axis=1))]
+        center = center + (farthest - center) / (i + 2)
+    return np.vstack((center, center)), np.linalg.norm(points - center, axis=1).max()
+
+
+def _fit_capsule(points):
+    """
+    capsule along the principal axis of the points, with the smallest radius around that axis and the shortest
+    segment that keeps all points inside
+    :return: ends (2x3), radius
+    """
+    center = points.mean(axis=0)
+    if len(points) < 3:
+        return _fit_sphere(points)
+    axis = np.linalg.svd(points - center, full_matrices=False)[2][0]
+    proj = (points - center) @ axis
+    radial = np.linalg.norm((points - center) - proj[:, None] * axis, axis=1)
+    radius = radial.max()
+    # the segment [low, high] covers a point if it reaches proj - reach or proj + reach
+    reach = np.sqrt(np.maximum(radius ** 2 - radial ** 2, 0))
+    low = np.min(proj + reach)
+    high = np.max(proj - reach)
+    if low > high:
+        # a single center covers all points, it is a sphere
+        low = high = (low + high) / 2
+    ends = center + np.outer([low, high], axis)
+    return ends, max(radius, point_segment_distance(points, np.broadcast_to(ends, (len(points), 2, 3))).max())
+
+
+def _proxy_surface(ends, radius, n_dirs=128, n_steps=5):
+    """
+    points on the surface of a capsule
+    """
+    dirs = _fibonacci_sphere(n_dirs)
+    steps = np.linspace(0, 1, n_steps if np.any(ends[0] != ends[1]) else 1)
+    candidates = (ends[0] + np.outer(steps, ends[1] - ends[0]))[:, None, :] + radius * dirs[None, :, :]
+    candidates = candidates.reshape((-1, 3))
+    on_surface = point_segment_distance(candidates, np.broadcast_to(ends, (len(candidates), 2, 3))) > radius - 1e-9
+    return candidates[on_surface]
+
+
+def _bulges(sdf, all_ends, all_radii):
+    """
+    how far every proxy sticks out of the mesh, the parts inside the other proxies are ignored
+    """
+    bulges = np.zeros(len(all_radii))
+    for i, (ends, radius) in enumerate(zip(all_ends, all_radii)):
+        surface = _proxy_surface(ends, radius)
+        exposed = np.ones(len(surface), dtype=bool)
+        for j, (other_ends, other_radius) in enumerate(zip(all_ends, all_radii)):
+            if j != i:
+                exposed &= point_segment_distance(surface, np.broadcast_to(other_ends, (len(surface), 2, 3))) >= \
+                           other_radius
+        bulges[i] = max(sdf.distance(surface[exposed]).max(), 0) if exposed.any() else 0
+    return bulges
+
+
+def _split(points):
+    """
+    two-means along the principal axis
+    :return: boolean mask of one half
+    """
+    center = points.mean(axis=0)
+    axis = np.linalg.svd(points - center, full_matrices=False)[2][0]
+    mask = (points - center) @ axis > 0
+    for _ in range(8):
+        if mask.all() or not mask.any():
+            break
+        c0, c1 = points[mask].mean(axis=0), points[~mask].mean(axis=0)
+        new_mask = np.linalg.norm(points - c0, axis=1) < np.linalg.norm(points - c1, axis=1)
+        if np.array_equal(new_mask, mask):
+            break
+        mask = new_mask
+    return mask
+
+
+def decompose(trm_mesh, kind=SPHERES, tolerance=TOLERANCE, max_n_proxies=MAX_N_PROXIES, n_samples=N_SAMPLES,
+              seed=0):
+    """
+    cover the surface of a mesh by spheres or capsules
+    :param trm_mesh: basis.trimesh.Trimesh
+    :param kind: SPHERES or CAPSULES
+    :param tolerance: the proxies are split until none sticks out of the mesh by more than this
+    :param max_n_proxies:
+    :param n_samples:
+    :param seed:
+    :return: ends (nx2x3 nparray, coincident for spheres), radii (n,)
+    """
+    fit = _fit_sphere if kind == SPHERES else _fit_capsule
+    # the vertices are added so that sharp corners are covered
+    points = np.vstack((trm_sample.sample_surface(trm_mesh, n_samples, seed=seed)[0], trm_mesh.vertices))
+    # the field is at least a third of the tolerance fine, and no larger than 128 voxels along the longest axis
+    sdf = trm_mesh.sdf(pitch=max(tolerance / 3, trm_mesh.extents.max() / 128))
+    clusters = [np.arange(len(points))]
+    fitted = [fit(points)]
+    while True:
+        bulges = _bulges(sdf, [f[0] for f in fitted], [f[1] for f in fitted])
+        bulges[[len(cluster) < 2 for cluster in clusters]] = -np.inf
+        worst = int(np.argmax(bulges))
+        if bulges[worst] <= tolerance or len(clusters) >= max_n_proxies:
+            break
+        cluster = clusters.pop(worst)
+        fitted.pop(worst)
+        mask = _split(points[cluster])
+        for half in [cluster[mask], cluster[~mask]]:
+            if len(half) > 0:
+                clusters.append(half)
+                fitted.append(fit(points[half]))
+    ends, radii = np.array([f[0] for f in fitted]), np.array([f[1] for f in fitted])
+    # close the gaps between the clusters: denser fresh samples are covered by growing their closest proxies
+    check_points, _ = trm_sample.sample_surface(trm_mesh, 4 * n_samples, seed=seed + 1)
+    check_points = np.vstack((check_points, trm_mesh.vertices))
+    excess = point_segment_distance(check_points[:, None, :], ends[None, :, :]) - radii
+    closest = np.argmin(excess, axis=1)
+    uncovered = excess[np.arange(len(check_points)), closest] > 0
+    np.maximum.at(radii, closest[uncovered], (excess[uncovered, closest[uncovered]] + radii[closest[uncovered]]))
+    return ends, radii
+
+
+def _cache_file(file_path, kind, tolerance):
+    return f"{file_path}.{kind}_{tolerance * 1e3:g}mm.json"
+
+
+def get_proxies(trm_mesh, kind=SPHERES, tolerance=TOLERANCE, file_path=None):
+    """
+    decompose with caches, in the mesh (until it changes) and next to its file when file_path is given
+    :param trm_mesh:
+    :param kind: SPHERES or CAPSULES
+    :param tolerance:
+    :param file_path: the mesh file trm_mesh was loaded from
+    :return: ends (nx2x3, local frame of the mesh), radii (n,)
+    """
+    key = f"proxies_{kind}_{tolerance}"
+    cached = trm_mesh._cache[key]
+    if cached is not None:
+        return cached
+    proxies = None
+    sha1 = None
+    if file_path is not None and os.path.isfile(file_path):
+        sha1 = mch.content_hash(file_path)
+        try:
+            with open(_cache_file(file_path, kind, tolerance)) as f:
+                data = json.load(f)
+            if data['sha1'] == sha1:
+                proxies = (np.array(data['ends']).reshape((-1, 2, 3)), np.array(data['radii']))
+        except (OSError, ValueError, KeyError):
+            pass
+    if proxies is None:
+        proxies = decompose(trm_mesh, kind=kind, tolerance=tolerance)
+        if sha1 is not None:
+            try:
+                mch._atomic_dump_json(_cache_file(file_path, kind, tolerance),
+                                      {'sha1': sha1, 'kind': kind, 'tolerance': tolerance,
+                                       'ends': proxies[0].tolist(), 'radii': proxies[1].tolist()})
+            except OSError as e:
+                warnings.warn(f"The proxies of {file_path} are not cached: {e}")
+    return trm_mesh._cache.set(key, proxies)
+
+
+def gl_proxies(cmodel, kind=SPHERES, tolerance=TOLERANCE):
+    """
+    :param cmodel: CollisionModel
+    :return: ends (nx2x3) and radii (n,) in the world frame
+    """
+    # read only, _trm_mesh keeps the trimesh shared with the copies of cmodel
+    ends, radii = get_proxies(cmodel._trm_mesh, kind=kind, tolerance=tolerance, file_path=cmodel.file_path)
+    return ends @ cmodel.rotmat.T + cmodel.pos, radii
+
+
+def _bounding_sphere(ends, radii):
+    """
+    a sphere enclosing all proxies, used to reject far apart models before the proxy-proxy tests
+    :return: center (1x3), radius
+    """
+    center = ends.reshape((-1, 3)).mean(axis=0)
+    return center, np.max(np.linalg.norm(ends - center, axis=-1).max(axis=1) + radii)
+
+
+def is_collided(cmodel_list0, cmodel_list1, kind=SPHERES, tolerance=TOLERANCE, toggle_mesh_confirm=True):
+    """
+    vectorized proxy-proxy tests between two lists of collision models, the model pairs whose proxies overlap are
+    confirmed by mesh collision checks if toggle_mesh_confirm is True
+    :param cmodel_list0:
+    :param cmodel_list1:
+    :param kind: SPHERES or CAPSULES
+    :param tolerance:
+    :param toggle_mesh_confirm:
+    :return: True or False
+    """
+    proxies0 = [gl_proxies(cmodel, kind, tolerance) for cmodel in cmodel_list0]
+    proxies1 = [gl_proxies(cmodel, kind, tolerance) for cmodel in cmodel_list1]
+    bounds0 = [_bounding_sphere(*proxies) for proxies in proxies0]
+    bounds1 = [_bounding_sphere(*proxies) for proxies in proxies1]
+    centers0, bound_radii0 = np.array([b[0] for b in bounds0]), np.array([b[1] for b in bounds0])
+    centers1, bound_radii1 = np.array([b[0] for b in bounds1]), np.array([b[1] for b in bounds1])
+    near = (np.linalg.norm(centers0[:, None] - centers1[None, :], axis=-1) <
+            bound_radii0[:, None] + bound_radii1[None, :])
+    if not near.any():
+        return False
+    ends0, radii0 = np.concatenate([p[0] for p in proxies0]), np.concatenate([p[1] for p in proxies0])
+    ends1, radii1 = np.concatenate([p[0] for p in proxies1]), np.concatenate([p[1] for p in proxies1])
+    owners0 = np.repeat(np.arange(len(proxies0)), [len(p[1]) for p in proxies0])
+    owners1 = np.repeat(np.arange(len(proxies1)), [len(p[1]) for p in proxies1])
+    # only the proxy pairs of near models, and of those only the proxies reaching into the other bounding sphere
+    ids0, ids1 = np.nonzero(near[owners0[:, None], owners1[None, :]])
+    reach = (segment_segment_distance(ends0[ids0], np.repeat(centers1[owners1[ids1], None], 2, axis=1)) <
+             radii0[ids0] + bound_radii1[owners1[ids1]])
+    ids0, ids1 = ids0[reach], ids1[reach]
+    overlaps = segment_segment_distance(ends0[ids0], ends1[ids1]) < radii0[ids0] + radii1[ids1]
+    if not overlaps.any():
+        return False
+    if not toggle_mesh_confirm:
+        return True
+    model_pairs = set(zip(owners0[ids0[overlaps]], owners1[ids1[overlaps]]))
+    return any(cmodel_list0[i].is_mcdwith([cmodel_list1[j]]) for i, j in model_pairs)
+
+
+if __name__ == '__main__':
+    import sys
+    import time
+    import glob
+    import itertools
+    import robot_sim
+    import basis.robot_math as rm
+    import modeling.collision_model as mcm
+
+    # offline decomposition: python _proxy_cdhelper.py [mesh_dir] [tolerance]
+    mesh_dir = sys.argv[1] if len(sys.argv) > 1 else os.path.join(os.path.dirname(robot_sim.__file__), 'manipulators',
+                                                                  'irb14050', 'meshes')
+    tolerance = float(sys.argv[2]) if len(sys.argv) > 2 else TOLERANCE
+    cmodels = []
+    for file_path in sorted(glob.glob(os.path.join(mesh_dir, '*.stl'))):
+        cmodel = mcm.CollisionModel(file_path)
+        for kind in [SPHERES, CAPSULES]:
+            tic = time.time()
+            ends, radii = get_proxies(cmodel.trm_mesh, kind=kind, tolerance=tolerance, file_path=file_path)
+            print(f"{os.path.basename(file_path)}: {len(radii)} {kind} in {time.time() - tic:.2f}s")
+        cmodels.append(cmodel)
+    # random pairwise placements, proxy tests with mesh confirmation against mesh tests only
+    rng = np.random.default_rng(0)
+    spread = 2 * max(cmodel.trm_mesh.extents.max() for cmodel in cmodels)
+    n_trials = 200
+    placements = []
+    for _ in range(n_trials):
+        placements.append([(rng.uniform(-spread, spread, 3), rm.rotmat_from_axangle(rm.unit_vector(rng.normal(size=3)),
+                                                                                     rng.uniform(0, 2 * np.pi)))
+                           for _ in cmodels])
+    pairs = list(itertools.combinations(cmodels, 2))
+    for name, check in [('mesh', lambda cm0, cm1: cm0.is_mcdwith([cm1])),
+                        (SPHERES, lambda cm0, cm1: is_collided([cm0], [cm1], kind=SPHERES, tolerance=tolerance)),
+                        (CAPSULES, lambda cm0, cm1: is_collided([cm0], [cm1], kind=CAPSULES, tolerance=tolerance))]:
+        results = []
+        tic = time.time()
+        for placement in placements:
+            for cmodel, (pos, rotmat) in zip(cmodels, placement):
+                cmodel.pose = (pos, rotmat)
+            results.append([check(cm0, cm1) for cm0, cm1 in pairs])
+        results = np.asarray(results)
+        print(f"{name}: {results.size} pairs in {time.time() - tic:.3f}s, {results.sum()} in collision")
+        if name == 'mesh':
+            reference = results
+        else:
+            assert np.array_equal(results, reference)
+    # one batched call for all pairs of two groups, against the pairwise mesh tests
+    group0, group1 = cmodels[:len(cmodels) // 2], cmodels[len(cmodels) // 2:]
+    for name, check in [('mesh', lambda: any(cm0.is_mcdwith([cm1]) for cm0 in group0 for cm1 in group1)),
+                        (SPHERES, lambda: is_collided(group0, group1, kind=SPHERES, tolerance=tolerance)),
+                        (CAPSULES, lambda: is_collided(group0, group1, kind=CAPSULES, tolerance=tolerance))]:
+        results = []
+        tic = time.time()
+        for placement in placements:
+            for cmodel, (pos, rotmat) in zip(cmodels, placement):
+                cmodel.pose = (pos, rotmat)
+            results.append(check())
+        print(f"{name} (batched groups): {n_trials} scenes in {time.time() - tic:.3f}s, {sum(results)} in collision")
@@ -1,18 +1,26 @@
 import copy
 import math
+import functools
 import numpy as np
-from visualization.panda.world import ShowBase
-from panda3d.core import NodePath, CollisionNode, CollisionTraverser, CollisionHandlerQueue, BitMask32
-import basis.data_adapter as da
+import basis.headless as bhl
 import basis.constant as bc
 import modeling.geometric_model as mgm
 import modeling.model_collection as mmc
-import modeling._panda_cdhelper as mph
-import modeling._ode_cdhelper as moh
+import modeling._proxy_cdhelper as mpc
 # import modeling._bullet_cdhelper as mbh
 import modeling.constant as mc
 import uuid
 
+# Panda3D is only loaded when a cdprimitive is used or something is rendered, see basis/headless.py
+da = bhl.lazy_import("basis.data_adapter")
+mph = bhl.lazy_import("modeling._panda_cdhelper")
+# cdmesh: OdeTriMeshGeom by default, numpy in headless mode; batched ray hits always use numpy
+import modeling._bvh_cdhelper as mbvh
+if bhl.HEADLESS:
+    moh = mbvh
+else:
+    moh = bhl.lazy_import("modeling._ode_cdhelper")
+
 
 # the following two helpers cannot correcty find collision positions, 20211216
 # TODO check if it is caused by the bad bullet transformation in moh.update_pose
@@ -34,7 +42,8 @@ def delay_cdprimitive_decorator(method):
 def update_cdprimitive_decorator(method):
     def wrapper(self, *args, **kwargs):
         if self._is_cdp_delayed:
-            self._cdp.setPosQuat(da.npvec3_to_pdvec3(self.pos), da.npmat3_to_pdquat(self.rotmat))
+            if "_cdp" in self.__dict__:
+                self._cdp.setPosQuat(da.npvec3_to_pdvec3(self.pos), da.npmat3_to_pdquat(self.rotmat))
             self._is_cdp_delayed = False
         return method(self, *args, **kwargs)
 
@@ -55,10 +64,11 @@ def delay_cdmesh_decorator(method):
 
 def update_cdmesh_decorator(method):
     def wrapper(self, *args, **kwargs):
-        if self._is_cdp_delayed:
-            self._cdm.setPosition(da.npvec3_to_pdvec3(self.pos))
-            self._cdm.setQuaternion(da.npmat3_to_pdquat(self.rotmat))
-            self._is_cdp_delayed = False
+        if self._is_cdm_delayed:
+            # a cdmesh that is not built yet gets the current pose in its builder
+            if "_cdm" in self.__dict__:
+                moh.set_pose(self._cdm, self.pos, self.rotmat)
+            self._is_cdm_delayed = False
         return method(self, *args, **kwargs)
 
     return wrapper
@@ -72,7 +82,8 @@ class CollisionModel(mgm.GeometricModel):
     """
     Load an object as a collision model
     Both collison primitives will be generated automatically
-    Note: This class heaviliy depends on Panda3D
+    Note: This class heaviliy depends on Panda3D, the cdprimitive and the cdmesh are built at their first use
+    Note: copies share the trimesh and the cdmesh data, see StaticGeometricModel
     Note: Scaling is no longer supported due to complication 20230815
     author: weiwei
     date: 20190312, 20230815
@@ -103,12 +114,18 @@ class CollisionModel(mgm.GeometricModel):
         if isinstance(initor, CollisionModel):
             self._name = copy.deepcopy(initor.name)
             self._file_path = copy.deepcopy(initor.file_path)
-            self._trm_mesh = copy.deepcopy(initor.trm_mesh)
-            self._pdndp = copy.deepcopy(initor.pdndp)
+            self._share_trm_mesh_from(initor)
+            self._copy_pdndp_from(initor)
+            self._pos = copy.deepcopy(initor._pos)
+            self._rotmat = copy.deepcopy(initor._rotmat)
+            self._exp_radius = initor._exp_radius
+            self._userdef_cdp_fn = initor._userdef_cdp_fn
             self._cdm_type = copy.deepcopy(initor.cdmesh_type)
-            self._cdm = copy.deepcopy(initor.cdmesh)
+            if "_cdm" in initor.__dict__:
+                self._cdm = self._deepcopy_attr("_cdm", initor._cdm, {})
             self._cdp_type = copy.deepcopy(initor.cdprimitive_type)
-            self._cdp = copy.deepcopy(initor.cdprimitive)
+            if "_cdp" in initor.__dict__:
+                self._cdp = copy.deepcopy(initor.cdprimitive)
             self._cache_for_show = copy.deepcopy(initor._cache_for_show)
             self._local_frame = copy.deepcopy(initor.local_frame)
             self._is_geometry_delayed = copy.deepcopy(initor._is_geometry_delayed)
@@ -120,14 +137,10 @@ class CollisionModel(mgm.GeometricModel):
                              toggle_transparency=toggle_transparency,
                              toggle_twosided=toggle_twosided)
             self._exp_radius = expand_radius
-            # cd primitive
+            self._userdef_cdp_fn = userdef_cdp_fn
+            # cd primitive and cd mesh, see the _cdp and _cdm builders
             self._cdp_type = cdp_type
-            self._cdp = self._acquire_cdp(cdp_type,
-                                          expand_radius,
-                                          userdef_cdp_fn)
-            # cd mesh
             self._cdm_type = cdm_type
-            self._cdm = self._acquire_cdm(cdm_type)
             # delays
             self._is_cdp_delayed = False
             self._is_cdm_delayed = False
@@ -136,30 +149,39 @@ class CollisionModel(mgm.GeometricModel):
             # others
             self._local_frame = None
 
-    def _acquire_cdm(self, cdmesh_type=None, toggle_trm=False):
+    def _acquire_cdm_trm(self, cdmesh_type=None):
         """
-        step 1: extract vvnf following the specified cdm_type
-        step 2: pack the vvnf to cdmesh
+        extract the Trimesh following the specified cdm_type
+        the bounds are cached by self._trm_mesh, the returned Trimesh is the same object at every call
         :param cdmesh_type:
-        :param toggle_trm: return the cdmesh's Trimesh format or not
         :return:
-        author: weiwei
-        date: 20211215, 20230814
         """
         if cdmesh_type is None:
             cdmesh_type = self.cdmesh_type
         if cdmesh_type == mc.CDMType.AABB:
-            trm_mesh = self.trm_mesh.aabb_bound
+            return self._trm_mesh.aabb_bound
         elif cdmesh_type == mc.CDMType.OBB:
-            trm_mesh = self.trm_mesh.obb_bound
+            return self._trm_mesh.obb_bound
         elif cdmesh_type == mc.CDMType.CONVEX_HULL:
-            trm_mesh = self.trm_mesh.convex_hull
+            return self._trm_mesh.convex_hull
         elif cdmesh_type == mc.CDMType.CYLINDER:
-            trm_mesh = self.trm_mesh.cyl_bound
+            return self._trm_mesh.cyl_bound
         elif cdmesh_type == mc.CDMType.DEFAULT:
-            trm_mesh = self.trm_mesh
+            return self._trm_mesh
         else:
             raise ValueError("Wrong mesh collision model end_type name!")
+
+    def _acquire_cdm(self, cdmesh_type=None, toggle_trm=False):
+        """
+        step 1: extract vvnf following the specified cdm_type
+        step 2: pack the vvnf to cdmesh
+        :param cdmesh_type:
+        :param toggle_trm: return the cdmesh's Trimesh format or not
+        :return:
+        author: weiwei
+        date: 20211215, 20230814
+        """
+        trm_mesh = self._acquire_cdm_trm(cdmesh_type)
         cdmesh = moh.gen_cdmesh(trm_mesh)
         if toggle_trm:
             return cdmesh, trm_mesh
@@ -172,15 +194,21 @@ class CollisionModel(mgm.GeometricModel):
         if thickness is None:
             thickness = 0.002
         if cdprimitive_type == mc.CDPType.BOX:
-            pdcndp = mph.gen_box_pdcndp(self.trm_mesh, ex_radius=thickness)
+            pdcndp = mph.gen_box_pdcndp(self._trm_mesh, ex_radius=thickness)
         elif cdprimitive_type == mc.CDPType.CAPSULE:
-            pdcndp = mph.gen_capsule_pdcndp(self.trm_mesh, ex_radius=thickness)
+            pdcndp = mph.gen_capsule_pdcndp(self._trm_mesh, ex_radius=thickness)
         elif cdprimitive_type == mc.CDPType.CYLINDER:
-            pdcndp = mph.gen_cylinder_pdcndp(self.trm_mesh, ex_radius=thickness)
+            pdcndp = mph.gen_cylinder_pdcndp(self._trm_mesh, ex_radius=thickness)
         elif cdprimitive_type == mc.CDPType.SURFACE_BALLS:
-            pdcndp = mph.gen_surfaceballs_pdcnd(self.trm_mesh, radius=thickness)
+            pdcndp = mph.gen_surfaceballs_pdcnd(self._trm_mesh, radius=thickness)
         elif cdprimitive_type == mc.CDPType.POINT_CLOUD:
-            pdcndp = mph.gen_pointcloud_pdcndp(self.trm_mesh, radius=thickness)
+            pdcndp = mph.gen_pointcloud_pdcndp(self._trm_mesh, radius=thickness)
+        elif cdprimitive_type in (mc.CDPType.SPHERES, mc.CDPType.CAPSULES):
+            # the fitted proxies already enclose the mesh, the thickness is only added when explicitly given
+            kind = mpc.SPHERES if cdprimitive_type == mc.CDPType.SPHERES else mpc.CAPSULES
+            ends, radii = mpc.get_proxies(self._trm_mesh, kind=kind, file_path=self.file_path)
+            pdcndp = mph.gen_capsules_pdcndp(ends, radii, ex_radius=0 if self._exp_radius is None else thickness,
+                                             name=kind)
         elif cdprimitive_type == mc.CDPType.USER_DEFINED:
             if userdefined_cdprimitive_fn is None:
                 raise ValueError("User defined functions must provided for user_defined cdprimitive!")
@@ -190,6 +218,26 @@ class CollisionModel(mgm.GeometricModel):
         mph.change_cdmask(pdcndp, mph.BITMASK_EXT, action="new", type="both")
         return pdcndp
 
+    @functools.cached_property
+    def _cdp(self):
+        cdprimitive = self._acquire_cdp(self._cdp_type, self._exp_radius, self._userdef_cdp_fn)
+        cdprimitive.setPosQuat(da.npvec3_to_pdvec3(self._pos), da.npmat3_to_pdquat(self._rotmat))
+        return cdprimitive
+
+    @functools.cached_property
+    def _cdm(self):
+        cdmesh = self._acquire_cdm(self._cdm_type)
+        moh.set_pose(cdmesh, self._pos, self._rotmat)
+        return cdmesh
+
+    def _deepcopy_attr(self, key, value, memo):
+        if key == "_cdm":
+            # a new geom on the shared mesh data, posed at the current pose
+            cdmesh = moh.clone_cdmesh(value)
+            moh.set_pose(cdmesh, self._pos, self._rotmat)
+            return cdmesh
+        return super()._deepcopy_attr(key, value, memo)
+
     @mgm.GeometricModel.pos.setter
     @mgm.delay_geometry_decorator
     @delay_cdprimitive_decorator
@@ -244,8 +292,8 @@ class CollisionModel(mgm.GeometricModel):
 
     @delay_cdmesh_decorator
     def change_cdmesh_type(self, cdmesh_type):
-        self._cdm = self._acquire_cdm(cdmesh_type)
         self._cdm_type = cdmesh_type
+        self.__dict__.pop("_cdm", None)
         # update if show_cdmesh is toggled on
         if "cdmesh" in self._cache_for_show:
             self._cache_for_show["cdmesh"].removeNode()
@@ -258,10 +306,10 @@ class CollisionModel(mgm.GeometricModel):
     def change_cdprimitive_type(self, cdprimitive_type, expand_radius=None, userdefined_cdprimitive_fn=None):
         if expand_radius is not None:
             self._exp_radius = expand_radius
-        self._cdp = self._acquire_cdp(cdprimitive_type=cdprimitive_type,
-                                      thickness=expand_radius,
-                                      userdefined_cdprimitive_fn=userdefined_cdprimitive_fn)
+        if userdefined_cdprimitive_fn is not None:
+            self._userdef_cdp_fn = userdefined_cdprimitive_fn
         self._cdp_type = cdprimitive_type
+        self.__dict__.pop("_cdp", None)
         # update if show_primitive is toggled on
         if "cdprimitive" in self._cache_for_show:
             self._cache_for_show["cdprimitive"].removeNode()
@@ -271,19 +319,20 @@ class CollisionModel(mgm.GeometricModel):
 
     @update_cdprimitive_decorator
     def attach_cdprimitive_to(self, target):
-        if isinstance(target, ShowBase):
+        if bhl.is_showbase(target):
             # for rendering to base.render
             self._cdp.reparentTo(target.render)
         elif isinstance(target, mgm.StaticGeometricModel):  # prepared for decorations like local frames
             self._cdp.reparentTo(target.pdndp)
-        elif isinstance(target, NodePath):
+        elif bhl.is_nodepath(target):
             self._cdp.reparentTo(target)
         else:
             raise ValueError("Acceptable: ShowBase, StaticGeometricModel, NodePath!")
         return self._cdp
 
     def detach_cdprimitive(self):
-        self._cdp.detachNode()
+        if "_cdp" in self.__dict__:
+            self._cdp.detachNode()
 
     def copy_reference_cdmesh(self):
         """
@@ -295,8 +344,7 @@ class CollisionModel(mgm.GeometricModel):
         """
         return_cdmesh = copy.deepcopy(self._cdm)
         # clear rotmat
-        return_cdmesh.setPosition(da.npvec3_to_pdvec3(np.zeros(3)))
-        return_cdmesh.setRotation(da.npmat3_to_pdmat3(np.eye(3)))
+        moh.set_pose(return_cdmesh, np.zeros(3), np.eye(3))
         return return_cdmesh
 
     @update_cdmesh_decorator
@@ -397,14 +445,27 @@ class CollisionModel(mgm.GeometricModel):
             contact_point, contact_normal = moh.rayhit_closet(spos, epos, self)
             return contact_point, contact_normal
 
-    def copy(self):
-        return CollisionModel(self)
-
-    def __deepcopy__(self):
+    @staticmethod
+    def ray_hit_batch(segments, cmodel_list, n_threads=None, chunk_size=4096):
         """
-        this function helps make sure the uuid is unique
-        :return:
+        the closest hit of every segment among the cdmeshes of cmodel_list
+        the segments are traced against the ray BVH of each cdmesh in its local frame, the BVHs are cached by the
+        trimeshes and shared by the copies of a model, the segments are split into chunks traced by a thread pool
+        :param segments: nx2x3 nparray, [[spos, epos], ...]
+        :param cmodel_list: one or a list of CollisionModel
+        :param n_threads: None means os.cpu_count()
+        :param chunk_size:
+        :return: hit_points (nx3), hit_normals (nx3), cmodel_ids (n), nan and -1 for the segments that hit nothing
         """
+        if not isinstance(cmodel_list, list):
+            cmodel_list = [cmodel_list]
+        return mbvh.rayhit_closest_batch(segments,
+                                         [cmodel._acquire_cdm_trm() for cmodel in cmodel_list],
+                                         [(cmodel.pos, cmodel.rotmat) for cmodel in cmodel_list],
+                                         n_threads=n_threads,
+                                         chunk_size=chunk_size)
+
+    def copy(self):
         return CollisionModel(self)
 
 
@@ -1,5 +1,4 @@
 from enum import Enum
-from panda3d.core import BitMask32
 
 
 class CDMType(Enum):
@@ -16,4 +15,6 @@ class CDPType(Enum):
     CYLINDER = 3
     SURFACE_BALLS = 4
     POINT_CLOUD = 5
-    USER_DEFINED = 6
\ No newline at end of file
+    USER_DEFINED = 6
+    SPHERES = 7  # sphere proxies fitted to the mesh, see _proxy_cdhelper.py
+    CAPSULES = 8  # capsule proxies fitted to the mesh
\ No newline at end of file
@@ -9,6 +9,19 @@ import basis.data_adapter as dh
 import basis.robot_math as rm
 import numpy as np
 
+# meters are scaled to millimeters for bullet, World.physics_scale is used instead when a World exists
+PHYSICS_SCALE = 1e3
+
+
+def get_physics_scale():
+    """
+    the scale of the running World, or PHYSICS_SCALE for headless physics (see bdrunner.py)
+    """
+    try:
+        return base.physics_scale
+    except NameError:
+        return PHYSICS_SCALE
+
 
 class BDBody(BulletRigidBodyNode):
 
@@ -39,7 +52,7 @@ class BDBody(BulletRigidBodyNode):
         if isinstance(initor, gm.GeometricModel):
             if initor._trm_mesh is None:
                 raise ValueError("Only applicable to models with a trimesh!")
-            self.com = initor.trm_mesh.center_mass * base.physics_scale
+            self.com = initor.trm_mesh.center_mass * get_physics_scale()
             self.setMass(mass)
             self.setRestitution(restitution)
             self.setFriction(friction)
@@ -47,22 +60,22 @@ class BDBody(BulletRigidBodyNode):
             self.setAngularDamping(.3)
             if allow_deactivation:
                 self.setDeactivationEnabled(True)
-                self.setLinearSleepThreshold(.01*base.physics_scale)
-                self.setAngularSleepThreshold(.01*base.physics_scale)
+                self.setLinearSleepThreshold(.01*get_physics_scale())
+                self.setAngularSleepThreshold(.01*get_physics_scale())
             else:
                 self.setDeactivationEnabled(False)
             if allow_ccd:  # continuous collision detection
                 self.setCcdMotionThreshold(1e-7)
-                self.setCcdSweptSphereRadius(0.0005*base.physics_scale)
-            geom_np = initor.pdndp.getChild(0).find("+GeomNode")
+                self.setCcdSweptSphereRadius(0.0005*get_physics_scale())
+            geom_np = initor.pdndp.find("**/+GeomNode")
             geom = copy.deepcopy(geom_np.node().getGeom(0))
             vdata = geom.modifyVertexData()
             vertices = copy.deepcopy(np.frombuffer(vdata.modifyArrayHandle(0).getData(), dtype=np.float32))
             vertices.shape=(-1,6)
-            vertices[:, :3]=vertices[:, :3]*base.physics_scale-self.com
+            vertices[:, :3]=vertices[:, :3]*get_physics_scale()-self.com
             vdata.modifyArrayHandle(0).setData(vertices.astype(np.float32).tobytes())
             geomtf = geom_np.getTransform()
-            geomtf = geomtf.setPos(geomtf.getPos()*base.physics_scale)
+            geomtf = geomtf.setPos(geomtf.getPos()*get_physics_scale())
             if cdtype == "triangles":
                 geombmesh = BulletTriangleMesh()
                 geombmesh.addGeom(geom)
@@ -102,26 +115,26 @@ class BDBody(BulletRigidBodyNode):
             self.setAngularDamping(.3)
             if allow_deactivation:
                 self.setDeactivationEnabled(True)
-                self.setLinearSleepThreshold(.01*base.physics_scale)
-                self.setAngularSleepThreshold(.01*base.physics_scale)
+                self.setLinearSleepThreshold(.01*get_physics_scale())
+                self.setAngularSleepThreshold(.01*get_physics_scale())
             else:
                 self.setDeactivationEnabled(False)
             if allow_ccd:
                 self.setCcdMotionThreshold(1e-7)
-                self.setCcdSweptSphereRadius(0.0005*base.physics_scale)
+                self.setCcdSweptSphereRadius(0.0005*get_physics_scale())
             np_homomat = copy.deepcopy(initor.get_homomat())
-            np_homomat[:3,3] = np_homomat[:3,3]*base.physics_scale
+            np_homomat[:3,3] = np_homomat[:3,3]*get_physics_scale()
             self.setTransform(TransformState.makeMat(dh.npmat4_to_pdmat4(np_homomat)))
             self.addShape(initor.getShape(0), initor.getShapeTransform(0))
 
     def get_pos(self):
         pdmat4 = self.getTransform().getMat()
         pdv3 = pdmat4.xformPoint(Vec3(-self.com[0], -self.com[1], -self.com[2]))
-        pos = dh.pdvec3_to_npvec3(pdv3) / base.physics_scale
+        pos = dh.pdvec3_to_npvec3(pdv3) / get_physics_scale()
         return pos
 
     def set_pos(self, npvec3):
-        self.setPos(dh.pdvec3_to_npvec3(npvec3) * base.physics_scale)
+        self.setPos(dh.pdvec3_to_npvec3(npvec3) * get_physics_scale())
 
     def get_homomat(self):
         """
@@ -137,7 +150,7 @@ class BDBody(BulletRigidBodyNode):
         pd_com_pos = pd_homomat.xformPoint(Vec3(-self.com[0], -self.com[1], -self.com[2]))
         np_homomat = dh.pdmat4_to_npmat4(pd_homomat)
         np_com_pos = dh.pdvec3_to_npvec3(pd_com_pos)
-        np_homomat[:3, 3] = np_com_pos/base.physics_scale
+        np_homomat[:3, 3] = np_com_pos/get_physics_scale()
         return np_homomat
 
     def set_homomat(self, homomat):
@@ -149,7 +162,7 @@ class BDBody(BulletRigidBodyNode):
         date: 2019?, 20201119
         """
         tmp_homomat = copy.deepcopy(homomat)
-        tmp_homomat[:3, 3] = tmp_homomat[:3,3]*base.physics_scale
+        tmp_homomat[:3, 3] = tmp_homomat[:3,3]*get_physics_scale()
         pos = rm.transform_points_by_homomat(tmp_homomat, self.com)
         rotmat = tmp_homomat[:3, :3]
         self.setTransform(TransformState.makeMat(dh.npv3mat3_to_pdmat4(pos, rotmat)))
@@ -100,11 +100,18 @@ class BDModel(object):
     def detach(self):
         self._gm.detach()
 
-    def start_physics(self):
-        base.physicsworld.attach(self._bdb)
-
-    def end_physics(self):
-        base.physicsworld.remove(self._bdb)
+    def start_physics(self, physicsworld=None):
+        """
+        :param physicsworld: None means base.physicsworld, use BDRunner.attach for headless physics
+        """
+        if physicsworld is None:
+            physicsworld = base.physicsworld
+        physicsworld.attach(self._bdb)
+
+    def end_physics(self, physicsworld=None):
+        if physicsworld is None:
+            physicsworld = base.physicsworld
+        physicsworld.remove(self._bdb)
 
     def show_loc_frame(self):
         self._gm.showlocalframe()
@@ -0,0 +1,227 @@
+"""
+headless bullet physics
+BDRunner owns a BulletWorld and steps it at a fixed dt as fast as possible, without World or the task manager
+of visualization/panda/world.py, the states of all its bodies can be snapshot and restored
+run_scenes runs many independent scenes in a process pool for monte-carlo drop and placement-stability tests
+"""
+import numpy as np
+from concurrent import futures
+from panda3d.bullet import BulletWorld
+from panda3d.core import TransformState
+import basis.data_adapter as da
+import basis.robot_math as rm
+import modeling.dynamics.bullet.bdbody as bdb
+
+
+def _get_bdb(obj):
+    """
+    :param obj: BDModel or BDBody
+    :return: BDBody
+    """
+    return obj.bdb if hasattr(obj, 'bdb') else obj
+
+
+class BDRunner(object):
+
+    def __init__(self, dt=1 / 120, gravity=np.array([0, 0, -9.81]), physics_scale=None):
+        """
+        :param dt: fixed time step, the same internal step as World._physics_update
+        :param gravity: m/s^2
+        :param physics_scale: None means bdbody.get_physics_scale()
+        """
+        self.dt = dt
+        self.physics_scale = bdb.get_physics_scale() if physics_scale is None else physics_scale
+        self.physicsworld = BulletWorld()
+        self.physicsworld.setGravity(da.npvec3_to_pdvec3(np.asarray(gravity) * self.physics_scale))
+        self.objs = []
+        self.n_steps = 0
+
+    @property
+    def time(self):
+        return self.n_steps * self.dt
+
+    def attach(self, obj):
+        """
+        :param obj: BDModel or BDBody
+        """
+        self.physicsworld.attach(_get_bdb(obj))
+        self.objs.append(obj)
+
+    def remove(self, obj):
+        self.physicsworld.remove(_get_bdb(obj))
+        self.objs.remove(obj)
+
+    def step(self, n_steps=1):
+        for _ in range(n_steps):
+            self.physicsworld.doPhysics(self.dt, 1, self.dt)
+        self.n_steps += n_steps
+
+    def is_at_rest(self, lin_threshold=.001, ang_threshold=.01):
+        """
+        :param lin_threshold: m/s
+        :param ang_threshold: rad/s
+        :return: True if all the dynamic bodies are slower than the thresholds
+        """
+        for obj in self.objs:
+            body = _get_bdb(obj)
+            if body.isStatic() or body.getMass() == 0:
+                continue
+            if body.getLinearVelocity().length() > lin_threshold * self.physics_scale or \
+                    body.getAngularVelocity().length() > ang_threshold:
+                return False
+        return True
+
+    def run(self, duration, until_rest=False, check_interval=12, lin_threshold=.001, ang_threshold=.01):
+        """
+        :param duration: max simulated seconds
+        :param until_rest: stop early once is_at_rest holds, checked every check_interval steps
+        :return: simulated seconds
+        """
+        n_steps = int(round(duration / self.dt))
+        n_done = 0
+        while n_done < n_steps:
+            n_chunk = min(check_interval, n_steps - n_done) if until_rest else n_steps - n_done
+            self.step(n_chunk)
+            n_done += n_chunk
+            if until_rest and self.is_at_rest(lin_threshold=lin_threshold, ang_threshold=ang_threshold):
+                break
+        return n_done * self.dt
+
+    def snapshot(self):
+        """
+        :return: the states of all bodies (bullet transform, velocities, activation) and the step counter
+        """
+        states = []
+        for obj in self.objs:
+            body = _get_bdb(obj)
+            lin_vel = da.pdvec3_to_npvec3(body.getLinearVelocity())
+            ang_vel = da.pdvec3_to_npvec3(body.getAngularVelocity())
+            # the node transform is interpolated one fixed step behind the bullet state (latency motion state
+            # interpolation), it is integrated forward so that restore sets the transform bullet continues from
+            transform = da.pdmat4_to_npmat4(body.getTransform().getMat())
+            transform[:3, 3] += lin_vel * self.dt
+            ang_speed = np.linalg.norm(ang_vel)
+            if ang_speed > 1e-12:
+                transform[:3, :3] = rm.rotmat_from_axangle(ang_vel / ang_speed, ang_speed * self.dt) @ transform[:3, :3]
+            states.append({'transform': transform,
+                           'lin_vel': lin_vel,
+                           'ang_vel': ang_vel,
+                           'active': body.isActive()})
+        return {'n_steps': self.n_steps, 'states': states}
+
+    def restore(self, snapshot):
+        """
+        the contact caches of bullet are not part of a snapshot, a replay is exact in free flight and close otherwise
+        :param snapshot: returned by snapshot, the bodies must be the same as when it was taken
+        """
+        if len(snapshot['states']) != len(self.objs):
+            raise ValueError("The snapshot was taken with a different set of bodies!")
+        for obj, state in zip(self.objs, snapshot['states']):
+            body = _get_bdb(obj)
+            body.setTransform(TransformState.makeMat(da.npmat4_to_pdmat4(state['transform'])))
+            body.setLinearVelocity(da.npvec3_to_pdvec3(state['lin_vel']))
+            body.setAngularVelocity(da.npvec3_to_pdvec3(state['ang_vel']))
+            body.clearForces()
+            body.setActive(state['active'], True)
+        self.n_steps = snapshot['n_steps']
+
+    def get_homomats(self):
+        """
+        :return: list of the homomats of the original local frames (see BDBody.get_homomat)
+        """
+        return [_get_bdb(obj).get_homomat() for obj in self.objs]
+
+
+def _run_scene(job):
+    runner = BDRunner(**job['runner_kwargs'])
+    job['build_scene'](runner, *job['args'])
+    runner.run(job['duration'], until_rest=job['until_rest'])
+    if job['evaluate'] is None:
+        return runner.get_homomats()
+    return job['evaluate'](runner)
+
+
+def run_scenes(build_scene, scene_args, duration, evaluate=None, until_rest=True, runner_kwargs=None,
+               max_workers=None):
+    """
+    run independent scenes in a process pool, every scene gets its own BDRunner
+    :param build_scene: function(runner, *args), attaches the bodies of a scene, it must be picklable
+                        (a module-level function)
+    :param scene_args: list of argument tuples, one scene per tuple
+    :param duration: simulated seconds, see BDRunner.run
+    :param evaluate: function(runner) -> result, None returns runner.get_homomats()
+    :param until_rest:
+    :param runner_kwargs: keyword arguments of BDRunner
+    :param max_workers: None means os.cpu_count(), 0 runs the scenes in this process
+    :return: list of results in the order of scene_args
+    """
+    jobs = [{'build_scene': build_scene,
+             'args': args,
+             'duration': duration,
+             'evaluate': evaluate,
+             'until_rest': until_rest,
+             'runner_kwargs': {} if runner_kwargs is None else runner_kwargs} for args in scene_args]
+    if max_workers == 0:
+        return [_run_scene(job) for job in jobs]
+    with futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(_run_scene, jobs))
+
+
+if __name__ == '__main__':
+    import time
+    import basis.trimesh_factory as trf
+    import modeling.geometric_model as mgm
+
+    plane_gm = mgm.GeometricModel(trf.gen_box(xyz_lengths=np.array([1, 1, .1])))
+    box_gm = mgm.GeometricModel(trf.gen_box(xyz_lengths=np.array([.02, .04, .08])))
+
+
+    def build_drop_scene(runner, rotmat, height):
+        plane = bdb.BDBody(plane_gm, cdtype='convex', mass=0, dynamic=False)
+        plane.set_homomat(rm.homomat_from_posrot(np.array([0, 0, -.05]), np.eye(3)))
+        plane.setFriction(1)
+        runner.attach(plane)
+        box = bdb.BDBody(box_gm, cdtype='convex', mass=.1)
+        box.set_homomat(rm.homomat_from_posrot(np.array([0, 0, height]), rotmat))
+        runner.attach(box)
+
+
+    def resting_axis(runner):
+        """
+        the axis of the box that ends up vertical: 0 x, 1 y, 2 z
+        """
+        rotmat = runner.get_homomats()[1][:3, :3]
+        return int(np.argmax(np.abs(rotmat[2, :])))
+
+
+    rng = np.random.default_rng(0)
+    n_scenes = 200
+    scene_args = [(rm.rotmat_from_axangle(rng.normal(size=3), rng.uniform(0, np.pi)), .2) for _ in
+                  range(n_scenes)]
+    # the same scenes stepped by the render-rate loop of World would take duration seconds each
+    for max_workers in [0, None]:
+        tic = time.time()
+        axes = run_scenes(build_drop_scene, scene_args, duration=3, evaluate=resting_axis, max_workers=max_workers)
+        toc = time.time()
+        print(f"max_workers={max_workers}: {n_scenes} drops in {toc - tic:.2f}s, "
+              f"resting axis histogram (x, y, z): {np.bincount(axes, minlength=3)}")
+    # snapshot a settled placement, then probe its stability with random pushes restored from the snapshot
+    runner = BDRunner()
+    build_drop_scene(runner, *scene_args[0])
+    runner.run(3, until_rest=True)
+    snapshot = runner.snapshot()
+    runner.step(120)
+    first = runner.get_homomats()[1]
+    runner.restore(snapshot)
+    runner.step(120)
+    second = runner.get_homomats()[1]
+    print(f"replay after restore, position difference: {np.linalg.norm(first[:3, 3] - second[:3, 3]):.2e}m")
+    box = runner.objs[1]
+    axis = resting_axis(runner)
+    n_kept = 0
+    for _ in range(50):
+        runner.restore(snapshot)
+        box.setLinearVelocity(da.npvec3_to_pdvec3(rng.normal(0, .3, 3) * runner.physics_scale))
+        runner.run(3, until_rest=True)
+        n_kept += resting_axis(runner) == axis
+    print(f"the placement survived {n_kept}/50 random pushes of about .3m/s")
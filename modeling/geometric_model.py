@@ -1,15 +1,19 @@
 import os, copy
-import basis.data_adapter as da
+import functools
+import basis.headless as bhl
+import basis.trimesh as trm
 import basis.trimesh_factory as trm_factory
 import basis.robot_math as rm
 import basis.constant as cst
 import modeling.model_collection as mc
+import modeling.mesh_cache as mch
 import numpy as np
-import open3d as o3d
-from panda3d.core import NodePath, LineSegs, GeomNode, TransparencyAttrib, RenderModeAttrib
-from visualization.panda.world import ShowBase
 import warnings as wrn
 
+# Panda3D is only loaded when a NodePath is built, i.e. when a model is rendered, see basis/headless.py
+da = bhl.lazy_import('basis.data_adapter')
+pdc = bhl.lazy_import('panda3d.core')
+
 
 # ==================================
 # definition of StaticGeometricModel
@@ -19,6 +23,8 @@ class StaticGeometricModel(object):
     """
     load an object as a static geometric model -> changing pos, rotmat, color, etc. are not allowed
     there is no extra elements for this model, thus is much faster
+    the Panda3D NodePath (self._pdndp) is built from the kept source data at its first access
+    copies share the trimesh and the source data by reference (copy-on-write, see _own_trm_mesh)
     author: weiwei
     date: 20190312, 20230812
     """
@@ -35,67 +41,134 @@ class StaticGeometricModel(object):
         """
         if isinstance(initor, StaticGeometricModel):
             self._file_path = copy.deepcopy(initor.file_path)
-            self._trm_mesh = copy.deepcopy(initor.trm_mesh)
-            self._pdndp = copy.deepcopy(initor.pdndp)
+            self._share_trm_mesh_from(initor)
+            self._copy_pdndp_from(initor)
             self._name = copy.deepcopy(initor.name)
             self._local_frame = copy.deepcopy(initor.local_frame)
         else:
-            # make a grandma pdndp to separate decorations (-autoshader) and raw pdndp (+autoshader)
             self._name = name
-            self._pdndp = NodePath(name)
+            self._file_path = None
+            self._trm_mesh = None
+            # the source of pdndp_core: (kind, data), see _build_pdndp
             if isinstance(initor, str):
                 self._file_path = initor
-                self._trm_mesh = da.trm.load(self._file_path)
-                pdndp_core = da.trimesh_to_nodepath(self._trm_mesh, name='pdndp_core')
-                pdndp_core.reparentTo(self._pdndp)
-            elif isinstance(initor, da.trm.Trimesh):
-                self._file_path = None
+                self._trm_mesh, v3n3 = mch.load(self._file_path)
+                self._pdndp_src = ("trimesh", None) if v3n3 is None else ("v3n3", v3n3)
+            elif isinstance(initor, trm.Trimesh):
                 self._trm_mesh = initor
-                pdndp_core = da.trimesh_to_nodepath(self._trm_mesh)
-                pdndp_core.reparentTo(self._pdndp)
-            elif isinstance(initor, o3d.geometry.PointCloud):  # TODO should pointcloud be pdndp or pdnp_raw
-                self._file_path = None
-                self._trm_mesh = da.trm.Trimesh(np.asarray(initor.points))
-                pdndp_core = da.pdgeomndp_from_v(self._trm_mesh.vertices, name='pdndp_core')
-                pdndp_core.reparentTo(self._pdndp)
+                self._pdndp_src = ("trimesh", None)
+            elif bhl.is_instance(initor, "open3d", "geometry.PointCloud"):  # TODO should pointcloud be pdndp or pdnp_raw
+                self._trm_mesh = trm.Trimesh(np.asarray(initor.points))
+                self._pdndp_src = ("points", (None, None))
             elif isinstance(initor, np.ndarray):  # TODO should pointcloud be pdndp or pdnp_raw
-                self._file_path = None
                 if initor.ndim == 2:
                     if initor.shape[1] == 3:
-                        self._trm_mesh = da.trm.Trimesh(initor)
-                        pdndp_core = da.pdgeomndp_from_v(self._trm_mesh.vertices)
-                        pdndp_core.setRenderModeThickness(.001 * da.M_TO_PIXEL)
+                        self._trm_mesh = trm.Trimesh(initor)
+                        self._pdndp_src = ("points", (None, .001))
                     elif initor.shape[1] == 7:
-                        self._trm_mesh = da.trm.Trimesh(initor[:, :3])
-                        pdndp_core = da.pdgeomndp_from_v(self._trm_mesh.vertices, initor[:, 3:])
-                        pdndp_core.setRenderModeThickness(.001 * da.M_TO_PIXEL)
+                        self._trm_mesh = trm.Trimesh(initor[:, :3])
+                        self._pdndp_src = ("points", (initor[:, 3:], .001))
                     else:
                         # TODO depth UV?
                         raise NotImplementedError
                 else:
                     raise NotImplementedError
-                pdndp_core.reparentTo(self._pdndp)
-            elif isinstance(initor, o3d.geometry.TriangleMesh):
-                self._file_path = None
-                self._trm_mesh = da.trm.Trimesh(vertices=initor.vertices, faces=initor.triangles,
-                                                face_normals=initor.triangle_normals)
-                pdndp_core = da.trimesh_to_nodepath(self._trm_mesh, name='pdndp_core')
-                pdndp_core.reparentTo(self._pdndp)
-            elif isinstance(initor, NodePath):  # TODO: deprecate 20230815
-                self._file_path = None
-                self._trm_mesh = None
-                pdndp_core = initor
-                pdndp_core.reparentTo(self._pdndp)
+            elif bhl.is_instance(initor, "open3d", "geometry.TriangleMesh"):
+                self._trm_mesh = trm.Trimesh(vertices=initor.vertices, faces=initor.triangles,
+                                             face_normals=initor.triangle_normals)
+                self._pdndp_src = ("trimesh", None)
+            elif bhl.is_nodepath(initor):  # TODO: deprecate 20230815
+                self._pdndp_src = ("nodepath", initor)
             else:  # empty model
-                self._file_path = None
-                self._trm_mesh = None
-                pdndp_core = NodePath("pdndp_core")
-                pdndp_core.reparentTo(self._pdndp)
-            if toggle_transparency:
-                self._pdndp.setTransparency(TransparencyAttrib.MDual)
-            if toggle_twosided:
-                self._pdndp.getChild(0).setTwoSided(True)
+                self._pdndp_src = ("empty", None)
+            self._toggle_transparency = toggle_transparency
+            self._toggle_twosided = toggle_twosided
+            self._rgba = None
             self._local_frame = None
+            self._is_trm_shared = False
+
+    def _share_trm_mesh_from(self, initor):
+        self._trm_mesh = initor._trm_mesh
+        self._is_trm_shared = initor._is_trm_shared = initor._trm_mesh is not None
+
+    def _own_trm_mesh(self):
+        """
+        copy-on-write: the trimesh is shared with copies and is copied before it is modified in place
+        :return:
+        """
+        if self._is_trm_shared:
+            self._trm_mesh = self._trm_mesh.copy()
+            self._is_trm_shared = False
+
+    def _deepcopy_attr(self, key, value, memo):
+        """
+        the geometry is immutable unless _own_trm_mesh is called, thus shared by the copies
+        a NodePath initor is reparented by the builder and cannot be shared
+        """
+        if key == "_trm_mesh" or (key == "_pdndp_src" and value[0] != "nodepath"):
+            return value
+        return copy.deepcopy(value, memo)
+
+    def __deepcopy__(self, memo):
+        clone = self.__class__.__new__(self.__class__)
+        memo[id(self)] = clone
+        for key, value in self.__dict__.items():
+            clone.__dict__[key] = self._deepcopy_attr(key, value, memo)
+        self._is_trm_shared = clone._is_trm_shared = self._trm_mesh is not None
+        return clone
+
+    def _copy_pdndp_from(self, initor):
+        """
+        copy the built pdndp of initor, or only its source if it is not built yet
+        :param initor: StaticGeometricModel
+        :return:
+        """
+        self._pdndp_src = self._deepcopy_attr("_pdndp_src", initor._pdndp_src, {})
+        self._toggle_transparency = initor._toggle_transparency
+        self._toggle_twosided = initor._toggle_twosided
+        self._rgba = copy.deepcopy(initor._rgba)
+        if initor.is_pdndp_built:
+            self._pdndp = copy.deepcopy(initor._pdndp)
+
+    def _build_pdndp(self):
+        """
+        make a grandma pdndp to separate decorations (-autoshader) and raw pdndp (+autoshader)
+        :return:
+        """
+        pdndp = pdc.NodePath(self._name)
+        kind, data = self._pdndp_src
+        if kind == "v3n3":
+            pdndp_core = da.pdgeomndp_from_v3n3(data, name='pdndp_core')
+        elif kind == "trimesh":
+            pdndp_core = da.trimesh_to_nodepath(self._trm_mesh, name='pdndp_core')
+        elif kind == "points":
+            rgbas, point_size = data
+            if rgbas is None:
+                pdndp_core = da.pdgeomndp_from_v(self._trm_mesh.vertices, name='pdndp_core')
+            else:
+                pdndp_core = da.pdgeomndp_from_v(self._trm_mesh.vertices, rgbas, name='pdndp_core')
+            if point_size is not None:
+                pdndp_core.setRenderModeThickness(point_size * da.M_TO_PIXEL)
+        elif kind == "nodepath":
+            pdndp_core = data
+        else:
+            pdndp_core = pdc.NodePath("pdndp_core")
+        pdndp_core.reparentTo(pdndp)
+        if self._toggle_transparency:
+            pdndp.setTransparency(pdc.TransparencyAttrib.MDual)
+        if self._toggle_twosided:
+            pdndp.getChild(0).setTwoSided(True)
+        if self._rgba is not None:
+            pdndp.setColor(*self._rgba)
+        return pdndp
+
+    @functools.cached_property
+    def _pdndp(self):
+        return self._build_pdndp()
+
+    @property
+    def is_pdndp_built(self):
+        return "_pdndp" in self.__dict__
 
     @property
     def name(self):
@@ -128,6 +201,9 @@ class StaticGeometricModel(object):
         # 20210328 comment out, allow None
         # if self._trm_mesh is None:
         #     raise ValueError("Only applicable to models with a trimesh!")
+        # the returned trimesh may be edited in place, thus it is no longer shared with the copies (see _own_trm_mesh)
+        # read-only paths inside modeling use self._trm_mesh to keep sharing it
+        self._own_trm_mesh()
         return self._trm_mesh
 
     @property
@@ -144,10 +220,15 @@ class StaticGeometricModel(object):
 
     @property
     def rgba(self):
-        return da.pdvec4_to_npvec4(self._pdndp.getColor())
+        if self.is_pdndp_built:
+            return da.pdvec4_to_npvec4(self._pdndp.getColor())
+        return np.ones(4) if self._rgba is None else np.asarray(self._rgba)
 
     @rgba.setter
     def rgba(self, rgba):
+        self._rgba = None if rgba is None else tuple(rgba)
+        if not self.is_pdndp_built:
+            return
         if rgba is None:
             self._pdndp.clearColor()
         else:
@@ -155,12 +236,12 @@ class StaticGeometricModel(object):
 
     @property
     def alpha(self):
-        return self._pdndp.getColor()[3]
+        return self.rgba[3]
 
     @alpha.setter
     def alpha(self, alpha):
-        rgba = self._pdndp.getColor()
-        self._pdndp.setColor(rgba[0], rgba[1], rgba[2], alpha)
+        rgba = self.rgba
+        self.rgba = (rgba[0], rgba[1], rgba[2], alpha)
 
     def set_scale(self, scale=np.array([1, 1, 1])):
         """
@@ -168,6 +249,7 @@ class StaticGeometricModel(object):
         :return:
         """
         self._pdndp.setScale(*scale)
+        self._own_trm_mesh()
         self._trm_mesh.apply_scale(scale)
 
     def set_point_size(self, size=.001):
@@ -175,7 +257,7 @@ class StaticGeometricModel(object):
         self.pdndp_core.setRenderModeThickness(size * da.M_TO_PIXEL)
 
     def attach_to(self, target):
-        if isinstance(target, ShowBase):
+        if bhl.is_showbase(target):
             # for rendering to base.render
             self._pdndp.reparentTo(target.render)
         elif isinstance(target, StaticGeometricModel):  # prepared for decorations like local frames
@@ -186,10 +268,12 @@ class StaticGeometricModel(object):
             raise ValueError("Acceptable: ShowBase, StaticGeometricModel, ModelCollection!")
 
     def detach(self):
-        self._pdndp.detachNode()
+        if self.is_pdndp_built:
+            self._pdndp.detachNode()
 
     def remove(self):
-        self._pdndp.removeNode()
+        if self.is_pdndp_built:
+            self._pdndp.removeNode()
 
     def show_local_frame(self):
         self._local_frame = gen_frame()
@@ -213,10 +297,14 @@ class WireFrameModel(StaticGeometricModel):
         :param initor: path end_type defined by os.path or trimesh or pdndp
         """
         super().__init__(initor=initor, toggle_transparency=False, name=name)
+
+    def _build_pdndp(self):
+        pdndp = super()._build_pdndp()
         # apply rendering effects to pdndp_core
         # frames will be attached to pdndp and will not be influenced by changes made to pdndp_core
-        self.pdndp_core.setRenderModeWireframe()
-        self.pdndp_core.setLightOff()
+        pdndp.getChild(0).setRenderModeWireframe()
+        pdndp.getChild(0).setLightOff()
+        return pdndp
 
 
 # ==============================================
@@ -235,7 +323,9 @@ def update_geometry_decorator(method):
     def wrapper(self, *args, **kwargs):
         # print(self._is_geometry_delayed)
         if self._is_geometry_delayed:
-            self._pdndp.setPosQuat(da.npvec3_to_pdvec3(self.pos), da.npmat3_to_pdquat(self.rotmat))
+            # a pdndp that is not built yet gets the current pose in _build_pdndp
+            if self.is_pdndp_built:
+                self._pdndp.setPosQuat(da.npvec3_to_pdvec3(self.pos), da.npmat3_to_pdquat(self.rotmat))
             self._is_geometry_delayed = False
         return method(self, *args, **kwargs)
 
@@ -264,8 +354,8 @@ class GeometricModel(StaticGeometricModel):
         """
         if isinstance(initor, GeometricModel):
             self._file_path = copy.deepcopy(initor.file_path)
-            self._trm_mesh = copy.deepcopy(initor.trm_mesh)
-            self._pdndp = copy.deepcopy(initor.pdndp)
+            self._share_trm_mesh_from(initor)
+            self._copy_pdndp_from(initor)
             self._name = copy.deepcopy(initor.name)
             self._local_frame = copy.deepcopy(initor.local_frame)
             self._pos = copy.deepcopy(initor._pos)
@@ -279,7 +369,12 @@ class GeometricModel(StaticGeometricModel):
             self._pos = np.zeros(3)
             self._rotmat = np.eye(3)
             self._is_geometry_delayed = False
-        self.pdndp_core.setShaderAuto()
+
+    def _build_pdndp(self):
+        pdndp = super()._build_pdndp()
+        pdndp.getChild(0).setShaderAuto()
+        pdndp.setPosQuat(da.npvec3_to_pdvec3(self._pos), da.npmat3_to_pdquat(self._rotmat))
+        return pdndp
 
     @property
     @update_geometry_decorator
@@ -342,7 +437,7 @@ class GeometricModel(StaticGeometricModel):
 
     @update_geometry_decorator
     def attach_to(self, target):
-        if isinstance(target, ShowBase):
+        if bhl.is_showbase(target):
             # for rendering to base.render
             self._pdndp.reparentTo(target.render)
         elif isinstance(target, StaticGeometricModel):  # prepared for decorations like local frames
@@ -360,23 +455,25 @@ class GeometricModel(StaticGeometricModel):
         :return:
         """
         pdndp = copy.deepcopy(self._pdndp)
-        if isinstance(target, ShowBase):
+        if bhl.is_showbase(target):
             pdndp.reparentTo(target.render)
         elif isinstance(target, StaticGeometricModel):  # prepared for decorations like local frames
             pdndp.reparentTo(target.pdndp)
-        elif isinstance(target, NodePath):
+        elif bhl.is_nodepath(target):
             pdndp.reparentTo(target)
         else:
             raise ValueError("Acceptable: ShowBase, StaticGeometricModel, NodePath!")
         return pdndp
 
     def detach(self):  # TODO detach from?
-        self._pdndp.detachNode()
+        if self.is_pdndp_built:
+            self._pdndp.detachNode()
 
-    def sample_surface(self, radius=0.005, n_samples=None, toggle_option=None):
+    def sample_surface(self, radius=0.005, n_samples=None, toggle_option=None, seed=None):
         """
         :param raidus:
         :param toggle_option; 'face_ids', 'normals', None
+        :param seed: None uses the global numpy random state, otherwise the samples are reproducible
         :return:
         author: weiwei
         date: 20191228
@@ -384,8 +481,8 @@ class GeometricModel(StaticGeometricModel):
         if self._trm_mesh is None:
             raise ValueError("Only applicable to models with a trimesh!")
         if n_samples is None:
-            n_samples = int(round(self.trm_mesh.area / ((radius * 0.3) ** 2)))
-        points, face_ids = self.trm_mesh.sample_surface(n_samples, radius=radius, toggle_faceid=True)
+            n_samples = int(round(self._trm_mesh.area / ((radius * 0.3) ** 2)))
+        points, face_ids = self._trm_mesh.sample_surface(n_samples, radius=radius, toggle_faceid=True, seed=seed)
         # transform
         points = rm.transform_points_by_homomat(self.homomat, points)
         if toggle_option is None:
@@ -393,8 +490,8 @@ class GeometricModel(StaticGeometricModel):
         elif toggle_option == 'face_ids':
             return np.array(points), np.array(face_ids)
         elif toggle_option == 'normals':
-            return np.array(points), rm.transform_points_by_homomat(self.homomat,
-                                                                    self.trm_mesh.face_normals[face_ids])
+            # normals are rotated only
+            return np.array(points), self._trm_mesh.face_normals[face_ids] @ self.rotmat.T
         else:
             print("The toggle_option parameter must be \"None\", \"point_face_ids\", or \"point_nromals\"!")
 
@@ -420,15 +517,15 @@ def gen_linesegs(linesegs,
     date: 20161216, 20201116, 20230812
     """
     # Create a set of line segments
-    ls = LineSegs()
+    ls = pdc.LineSegs()
     ls.setThickness(thickness * da.M_TO_PIXEL)
     ls.setColor(*rgba)
     for p0_p1_tuple in linesegs:
         ls.moveTo(*p0_p1_tuple[0])
         ls.drawTo(*p0_p1_tuple[1])
     # Create and return a node with the segments
-    ls_pdndp = NodePath(ls.create())
-    ls_pdndp.setTransparency(TransparencyAttrib.MDual)
+    ls_pdndp = pdc.NodePath(ls.create())
+    ls_pdndp.setTransparency(pdc.TransparencyAttrib.MDual)
     ls_pdndp.setLightOff()
     ls_sgm = StaticGeometricModel(initor=ls_pdndp)
     return ls_sgm
@@ -678,18 +775,18 @@ def gen_frame(pos=np.array([0, 0, 0]),
         alphax = alphay = alphaz = alpha
     # - 20201202 change it to ModelCollection
     # + 20230813 changing to ModelCollection seems unnecessary
-    frame_nodepath = NodePath("frame")
+    frame_nodepath = pdc.NodePath("frame")
     arrowx_trm = trm_factory.gen_arrow(spos=pos, epos=endx, stick_radius=ax_radius)
     arrowx_nodepath = da.trimesh_to_nodepath(arrowx_trm)
-    arrowx_nodepath.setTransparency(TransparencyAttrib.MAlpha)
+    arrowx_nodepath.setTransparency(pdc.TransparencyAttrib.MAlpha)
     arrowx_nodepath.setColor(rgbx[0], rgbx[1], rgbx[2], alphax)
     arrowy_trm = trm_factory.gen_arrow(spos=pos, epos=endy, stick_radius=ax_radius)
     arrowy_nodepath = da.trimesh_to_nodepath(arrowy_trm)
-    arrowy_nodepath.setTransparency(TransparencyAttrib.MAlpha)
+    arrowy_nodepath.setTransparency(pdc.TransparencyAttrib.MAlpha)
     arrowy_nodepath.setColor(rgby[0], rgby[1], rgby[2], alphay)
     arrowz_trm = trm_factory.gen_arrow(spos=pos, epos=endz, stick_radius=ax_radius)
     arrowz_nodepath = da.trimesh_to_nodepath(arrowz_trm)
-    arrowz_nodepath.setTransparency(TransparencyAttrib.MAlpha)
+    arrowz_nodepath.setTransparency(pdc.TransparencyAttrib.MAlpha)
     arrowz_nodepath.setColor(rgbz[0], rgbz[1], rgbz[2], alphaz)
     arrowx_nodepath.reparentTo(frame_nodepath)
     arrowy_nodepath.reparentTo(frame_nodepath)
@@ -733,14 +830,14 @@ def gen_2d_frame(pos=np.array([0, 0, 0]),
         alphax = alphay = alpha
     # - 20201202 change it to ModelCollection
     # + 20230813 changing to ModelCollection seems unnecessary
-    frame_nodepath = NodePath("frame")
+    frame_nodepath = pdc.NodePath("frame")
     arrowx_trm = trm_factory.gen_arrow(spos=pos, epos=endx, stick_radius=ax_radius)
     arrowx_nodepath = da.trimesh_to_nodepath(arrowx_trm)
-    arrowx_nodepath.setTransparency(TransparencyAttrib.MAlpha)
+    arrowx_nodepath.setTransparency(pdc.TransparencyAttrib.MAlpha)
     arrowx_nodepath.setColor(rgbx[0], rgbx[1], rgbx[2], alphax)
     arrowy_trm = trm_factory.gen_arrow(spos=pos, epos=endy, stick_radius=ax_radius)
     arrowy_nodepath = da.trimesh_to_nodepath(arrowy_trm)
-    arrowy_nodepath.setTransparency(TransparencyAttrib.MAlpha)
+    arrowy_nodepath.setTransparency(pdc.TransparencyAttrib.MAlpha)
     arrowy_nodepath.setColor(rgby[0], rgby[1], rgby[2], alphay)
     arrowx_nodepath.reparentTo(frame_nodepath)
     arrowy_nodepath.reparentTo(frame_nodepath)
@@ -763,15 +860,15 @@ def gen_wireframe(vertices,
     date: 20230815
     """
     # Create a set of line segments
-    ls = LineSegs()
+    ls = pdc.LineSegs()
     ls.setThickness(thickness * da.M_TO_PIXEL)
     ls.setColor(*rgba)
     for line_seg in edges:
         ls.moveTo(*vertices(line_seg[0]))
         ls.drawTo(*vertices(line_seg[1]))
     # Create and return a node with the segments
-    ls_pdndp = NodePath(ls.create())
-    ls_pdndp.setTransparency(TransparencyAttrib.MDual)
+    ls_pdndp = pdc.NodePath(ls.create())
+    ls_pdndp.setTransparency(pdc.TransparencyAttrib.MDual)
     ls_pdndp.setLightOff()
     ls_sgm = StaticGeometricModel(initor=ls_pdndp)
     return ls_sgm
@@ -869,21 +966,21 @@ def gen_dashed_frame(pos=np.array([0, 0, 0]),
         alphax = alphay = alphaz = alpha
     # - 20201202 change it toModelCollection
     # + 20230813 changing to ModelCollection seems unnecessary
-    frame_nodepath = NodePath("dash_frame")
+    frame_nodepath = pdc.NodePath("dash_frame")
     arrowx_trm = trm_factory.gen_dasharrow(spos=pos, epos=endx, stick_radius=ax_radius, len_solid=len_solid,
                                            len_interval=len_interval)
     arrowx_nodepath = da.trimesh_to_nodepath(arrowx_trm)
-    arrowx_nodepath.setTransparency(TransparencyAttrib.MDual)
+    arrowx_nodepath.setTransparency(pdc.TransparencyAttrib.MDual)
     arrowx_nodepath.setColor(rgbx[0], rgbx[1], rgbx[2], alphax)
     arrowy_trm = trm_factory.gen_dasharrow(spos=pos, epos=endy, stick_radius=ax_radius, len_solid=len_solid,
                                            len_interval=len_interval)
     arrowy_nodepath = da.trimesh_to_nodepath(arrowy_trm)
-    arrowy_nodepath.setTransparency(TransparencyAttrib.MDual)
+    arrowy_nodepath.setTransparency(pdc.TransparencyAttrib.MDual)
     arrowy_nodepath.setColor(rgby[0], rgby[1], rgby[2], alphay)
     arrowz_trm = trm_factory.gen_dasharrow(spos=pos, epos=endz, stick_radius=ax_radius, len_solid=len_solid,
                                            len_interval=len_interval)
     arrowz_nodepath = da.trimesh_to_nodepath(arrowz_trm)
-    arrowz_nodepath.setTransparency(TransparencyAttrib.MDual)
+    arrowz_nodepath.setTransparency(pdc.TransparencyAttrib.MDual)
     arrowz_nodepath.setColor(rgbz[0], rgbz[1], rgbz[2], alphaz)
     arrowx_nodepath.reparentTo(frame_nodepath)
     arrowy_nodepath.reparentTo(frame_nodepath)
@@ -930,16 +1027,16 @@ def gen_2d_dashed_frame(pos=np.array([0, 0, 0]),
         alphax = alphay = alpha
     # - 20201202 change it toModelCollection
     # + 20230813 changing to ModelCollection seems unnecessary
-    frame_nodepath = NodePath("dash_frame")
+    frame_nodepath = pdc.NodePath("dash_frame")
     arrowx_trm = trm_factory.gen_dasharrow(spos=pos, epos=endx, stick_radius=ax_radius, len_solid=len_solid,
                                            len_interval=len_interval)
     arrowx_nodepath = da.trimesh_to_nodepath(arrowx_trm)
-    arrowx_nodepath.setTransparency(TransparencyAttrib.MDual)
+    arrowx_nodepath.setTransparency(pdc.TransparencyAttrib.MDual)
     arrowx_nodepath.setColor(rgbx[0], rgbx[1], rgbx[2], alphax)
     arrowy_trm = trm_factory.gen_dasharrow(spos=pos, epos=endy, stick_radius=ax_radius, len_solid=len_solid,
                                            len_interval=len_interval)
     arrowy_nodepath = da.trimesh_to_nodepath(arrowy_trm)
-    arrowy_nodepath.setTransparency(TransparencyAttrib.MDual)
+    arrowy_nodepath.setTransparency(pdc.TransparencyAttrib.MDual)
     arrowy_nodepath.setColor(rgby[0], rgby[1], rgby[2], alphay)
     arrowx_nodepath.reparentTo(frame_nodepath)
     arrowy_nodepath.reparentTo(frame_nodepath)
@@ -1101,15 +1198,15 @@ def gen_polygon(verts, thickness=0.002, rgba=np.array([0, 0, 0, .7])):
     author: weiwei
     date: 20201115
     """
-    segs = LineSegs()
+    segs = pdc.LineSegs()
     segs.setThickness(thickness)
     segs.setColor(rgba[0], rgba[1], rgba[2], rgba[3])
     for i in range(len(verts) - 1):
         segs.moveTo(verts[i][0], verts[i][1], verts[i][2])
         segs.drawTo(verts[i + 1][0], verts[i + 1][1], verts[i + 1][2])
-    polygon_nodepath = NodePath('polygons')
+    polygon_nodepath = pdc.NodePath('polygons')
     polygon_nodepath.attachNewNode(segs.create())
-    polygon_nodepath.setTransparency(TransparencyAttrib.MDual)
+    polygon_nodepath.setTransparency(pdc.TransparencyAttrib.MDual)
     polygon_sgm = StaticGeometricModel(polygon_nodepath)
     return polygon_sgm
 
@@ -1125,7 +1222,7 @@ def gen_frame_box(extent=np.array([.02, .02, .02]),
     :return:
     """
     # Create a set of line segments
-    ls = LineSegs()
+    ls = pdc.LineSegs()
     ls.setThickness(thickness * da.M_TO_PIXEL)
     ls.setColor(rgba[0], rgba[1], rgba[2], rgba[3])
     center_pos = homomat[:3, 3]
@@ -1154,8 +1251,8 @@ def gen_frame_box(extent=np.array([.02, .02, .02]),
     ls.moveTo(da.npvec3_to_pdvec3(center_pos + x_max + y_min + z_max))
     ls.drawTo(da.npvec3_to_pdvec3(center_pos + x_min + y_min + z_max))
     # Create and return a node with the segments
-    lsnp = NodePath(ls.create())
-    lsnp.setTransparency(TransparencyAttrib.MDual)
+    lsnp = pdc.NodePath(ls.create())
+    lsnp.setTransparency(pdc.TransparencyAttrib.MDual)
     lsnp.setLightOff()
     ls_sgm = StaticGeometricModel(lsnp)
     return ls_sgm
@@ -1199,6 +1296,16 @@ if __name__ == "__main__":
     bunnygm2.rotmat = rotmat
     bunnygm2.set_scale([2, 1, 3])
 
+    # models built from a NodePath (e.g. frames) keep their geometry when they are copied
+    frame = gen_frame()
+    frame_copies = [GeometricModel(frame), copy.deepcopy(frame)]
+    for frame_model in [frame] + frame_copies:
+        assert frame_model.pdndp_core.getNumChildren() == 3
+    frame_copies[0].pos = np.array([.1, 0, 0])
+    frame_copies[1].pos = np.array([.2, 0, 0])
+    for frame_model in [frame] + frame_copies:
+        frame_model.attach_to(base)
+
     bunnygmpoints = bunnygm.sample_surface()
     bunnygm1points = bunnygm1.sample_surface()
     bunnygm2points = bunnygm2.sample_surface()
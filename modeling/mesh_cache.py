@@ -0,0 +1,228 @@
+"""
+Persistent on-disk mesh asset cache
+the decoded vertices/faces/normals of a mesh file, the per-face expanded vertex buffer used by Panda3D (see
+basis/data_adapter.py::pdgeom_from_vfnf), and the derived convex hull/AABB/OBB are stored as .npy files in a
+directory named by the sha1 of the file content, they are loaded with memory mapping so that the pages are shared by
+all the processes that load the same mesh (worker pools do not pay the parsing again)
+a small index keyed by the source path keeps (mtime, size, sha1), the content is only rehashed when they change
+set WRS_MESH_CACHE=0 to disable the cache and WRS_MESH_CACHE_DIR to move it (default: ~/.cache/wrs/mesh)
+"""
+import os
+import json
+import uuid
+import hashlib
+import warnings
+import numpy as np
+import basis.trimesh as trm
+import basis.trimesh.primitives as trm_primitives
+
+CACHE_VERSION = 1
+ENABLED = os.environ.get('WRS_MESH_CACHE', '1') != '0'
+CACHE_DIR = os.environ.get('WRS_MESH_CACHE_DIR', os.path.join(os.path.expanduser('~'), '.cache', 'wrs', 'mesh'))
+
+
+def _file_sha1(file_path):
+    sha1 = hashlib.sha1(f"wrs_mesh_cache_v{CACHE_VERSION}".encode())
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def _atomic_save(file_path, array):
+    tmp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'wb') as f:
+        np.save(f, np.ascontiguousarray(array))
+    os.replace(tmp_path, file_path)
+
+
+def _atomic_dump_json(file_path, data):
+    tmp_path = f"{file_path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, file_path)
+
+
+def content_hash(file_path, cache_dir=None):
+    """
+    sha1 of the content of file_path, validated against the mtime and size recorded in the path index
+    :param file_path:
+    :param cache_dir: None means CACHE_DIR
+    :return: hex string
+    """
+    cache_dir = CACHE_DIR if cache_dir is None else cache_dir
+    abs_path = os.path.abspath(file_path)
+    stat = os.stat(abs_path)
+    index_file = os.path.join(cache_dir, 'paths', hashlib.sha1(abs_path.encode()).hexdigest() + '.json')
+    try:
+        with open(index_file) as f:
+            entry = json.load(f)
+        if entry['path'] == abs_path and entry['mtime_ns'] == stat.st_mtime_ns and entry['size'] == stat.st_size:
+            return entry['sha1']
+    except (OSError, ValueError, KeyError):
+        pass
+    sha1 = _file_sha1(abs_path)
+    os.makedirs(os.path.dirname(index_file), exist_ok=True)
+    _atomic_dump_json(index_file,
+                      {'path': abs_path, 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'sha1': sha1})
+    return sha1
+
+
+def _build_entry(file_path):
+    """
+    decode the mesh file and derive the cached arrays
+    :return: dict of nparrays
+    """
+    trm_mesh = trm.load(file_path)
+    vertices = np.asarray(trm_mesh.vertices, dtype=np.float64)
+    faces = np.asarray(trm_mesh.faces, dtype=np.int64)
+    face_normals = np.asarray(trm_mesh.face_normals, dtype=np.float64)
+    entry = {'vertices': vertices,
+             'faces': faces,
+             'face_normals': face_normals,
+             'vertex_normals': np.asarray(trm_mesh.vertex_normals, dtype=np.float64),
+             # the per-face expanded vertex+normal buffer of pdgeom_from_vfnf
+             'v3n3': np.hstack((vertices[faces.ravel()], np.repeat(face_normals, 3, axis=0))).astype(np.float32),
+             'aabb': np.vstack((trm_mesh.bounds, trm_mesh.extents)),
+             'obb_homomat': trm_mesh.obb_bound.homomat,
+             'obb_extents': trm_mesh.obb_bound.extents}
+    try:
+        hull = trm_mesh.convex_hull
+        entry['hull_vertices'] = np.asarray(hull.vertices, dtype=np.float64)
+        entry['hull_faces'] = np.asarray(hull.faces, dtype=np.int64)
+        entry['hull_face_normals'] = np.asarray(hull.face_normals, dtype=np.float64)
+    except Exception as e:
+        # degenerated meshes (e.g. planar ones) have no hull, it is computed on demand as without the cache
+        warnings.warn(f"No convex hull cached for {file_path}: {e}")
+    return entry
+
+
+def _load_entry(sha1, cache_dir, mmap_mode='c'):
+    entry_dir = os.path.join(cache_dir, sha1)
+    if not os.path.exists(os.path.join(entry_dir, 'done')):
+        return None
+    entry = {}
+    for file_name in os.listdir(entry_dir):
+        if file_name.endswith('.npy'):
+            entry[file_name[:-4]] = np.load(os.path.join(entry_dir, file_name), mmap_mode=mmap_mode)
+    return entry
+
+
+def _save_entry(sha1, entry, cache_dir):
+    entry_dir = os.path.join(cache_dir, sha1)
+    os.makedirs(entry_dir, exist_ok=True)
+    for key, array in entry.items():
+        _atomic_save(os.path.join(entry_dir, key + '.npy'), array)
+    # written last, a partially written entry is never loaded
+    with open(os.path.join(entry_dir, 'done'), 'w') as f:
+        f.write(str(CACHE_VERSION))
+
+
+def load_entry(file_path, cache_dir=None):
+    """
+    :param file_path:
+    :param cache_dir: None means CACHE_DIR
+    :return: dict of memory mapped nparrays, the mappings are copy-on-write and private to every call, so that
+             modifying a loaded mesh changes neither the cache nor the other models
+    """
+    cache_dir = CACHE_DIR if cache_dir is None else cache_dir
+    sha1 = content_hash(file_path, cache_dir=cache_dir)
+    entry = _load_entry(sha1, cache_dir)
+    if entry is None:
+        _save_entry(sha1, _build_entry(file_path), cache_dir)
+        entry = _load_entry(sha1, cache_dir)
+    return entry
+
+
+def trimesh_from_entry(entry):
+    """
+    a Trimesh whose normals, bounds, AABB, OBB, and convex hull are prefilled from the cache entry
+    :param entry: see load_entry
+    :return: basis.trimesh.Trimesh
+    """
+    trm_mesh = trm.Trimesh(vertices=entry['vertices'],
+                           faces=entry['faces'],
+                           face_normals=entry['face_normals'],
+                           vertex_normals=entry['vertex_normals'],
+                           process=False)
+    trm_mesh.metadata['processed'] = True
+    aabb = entry['aabb']
+    trm_mesh._cache['bounds'] = np.array(aabb[:2])
+    trm_mesh._cache['aabb'] = trm_primitives.Box(center=aabb[:2].mean(axis=0), extents=np.array(aabb[2]))
+    trm_mesh._cache['obb'] = trm_primitives.Box(homomat=np.array(entry['obb_homomat']),
+                                                extents=np.array(entry['obb_extents']))
+    if 'hull_vertices' in entry:
+        trm_mesh._cache['convex_hull'] = trm.Trimesh(vertices=entry['hull_vertices'],
+                                                     faces=entry['hull_faces'],
+                                                     face_normals=entry['hull_face_normals'],
+                                                     process=False)
+    return trm_mesh
+
+
+def load(file_path, cache_dir=None):
+    """
+    cached replacement of da.trm.load + da.trimesh_to_nodepath
+    :param file_path:
+    :param cache_dir: None means CACHE_DIR
+    :return: Trimesh, the per-face expanded vertex+normal buffer (None if the cache is disabled or unavailable)
+    """
+    if ENABLED:
+        try:
+            entry = load_entry(file_path, cache_dir=cache_dir)
+            return trimesh_from_entry(entry), entry['v3n3']
+        except OSError as e:
+            warnings.warn(f"Mesh cache unavailable ({e}), loading {file_path} without it.")
+    return trm.load(file_path), None
+
+
+def clear(cache_dir=None):
+    """
+    remove all cached entries
+    """
+    import shutil
+    cache_dir = CACHE_DIR if cache_dir is None else cache_dir
+    shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    import time
+    import glob
+    import basis
+    import robot_sim
+    import basis.data_adapter as da
+    import modeling.mesh_cache as mch
+    import modeling.collision_model as mcm
+
+    file_paths = sorted(glob.glob(os.path.join(os.path.dirname(basis.__file__), 'objects', '*.stl')) +
+                        glob.glob(os.path.join(os.path.dirname(robot_sim.__file__), 'robots', 'yumi', 'meshes', '*.stl')))
+    cache_dir = os.path.join(CACHE_DIR, '..', 'mesh_benchmark')
+    clear(cache_dir)
+    tic = time.time()
+    for file_path in file_paths:
+        trm_mesh = trm.load(file_path)
+        da.trimesh_to_nodepath(trm_mesh)
+        trm_mesh.convex_hull, trm_mesh.obb_bound
+    print(f"parse + derive: {time.time() - tic:.3f}s for {len(file_paths)} files")
+    tic = time.time()
+    for file_path in file_paths:
+        load(file_path, cache_dir=cache_dir)
+    print(f"first load (builds the cache): {time.time() - tic:.3f}s")
+    tic = time.time()
+    for file_path in file_paths:
+        trm_mesh, v3n3 = load(file_path, cache_dir=cache_dir)
+        da.pdgeomndp_from_v3n3(v3n3)
+        trm_mesh.convex_hull, trm_mesh.obb_bound
+    print(f"cached load (memory mapped): {time.time() - tic:.3f}s")
+    # the models use the imported module, not this __main__ one
+    mch.CACHE_DIR = cache_dir
+    for enabled in [False, True]:
+        mch.ENABLED = enabled
+        tic = time.time()
+        for file_path in file_paths:
+            mcm.CollisionModel(file_path)
+        print(f"CollisionModel with ENABLED={enabled}: {time.time() - tic:.3f}s")
+    for file_path in file_paths:
+        reference = trm.load(file_path)
+        cached, _ = load(file_path, cache_dir=cache_dir)
+        assert np.allclose(reference.vertices, cached.vertices) and np.array_equal(reference.faces, cached.faces)
+    clear(cache_dir)
@@ -1,6 +1,6 @@
 import numpy as np
 import basis.robot_math as rm
-from visualization.panda.world import ShowBase
+import basis.headless as bhl
 
 
 class ModelCollection(object):
@@ -54,7 +54,7 @@ class ModelCollection(object):
         self._gm_list.remove(objcm)
 
     def attach_to(self, target):
-        if isinstance(target, ShowBase):
+        if bhl.is_showbase(target):
             for cm in self._cm_list:
                 cm.attach_to(target)
             for gm in self._gm_list:
@@ -4,9 +4,11 @@ import random
 import numpy as np
 import basis.robot_math as rm
 import networkx as nx
-import matplotlib.pyplot as plt
+import basis.headless as bhl
 from operator import itemgetter
 
+plt = bhl.lazy_import("matplotlib.pyplot")
+
 
 class RRT(object):
 
@@ -5,6 +5,8 @@ import torch.nn as nn
 import torch.nn.functional as F
 from torch.utils.data import Dataset, DataLoader
 from torch.utils.tensorboard import SummaryWriter
+import robot_sim._kinematics.ik_learned as rkl
+from neuro.ik.data_gen.sharded import ShardReader
 
 class IKDataSet(Dataset):
     def __init__(self, file, transform=None):
@@ -29,6 +31,31 @@ class IKDataSet(Dataset):
         return torch.Tensor(xyzrpy), torch.Tensor(jnt_values)
 
 
+class ShardedIKDataSet(Dataset):
+    """
+    IKDataSet over the shards of data_gen/sharded.py::gen_shards, the shards are memory mapped
+    transform, if given, is applied to the normalized xyzrpy of every sample
+    """
+
+    def __init__(self, out_dir, transform=None):
+        self.reader = ShardReader(out_dir)
+        self.transform = transform
+        self.min = self.reader.tcp_min
+        self.max = self.reader.tcp_max
+
+    def __len__(self):
+        return len(self.reader)
+
+    def __getitem__(self, idx):
+        if torch.is_tensor(idx):
+            idx = idx.tolist()
+        xyzrpy, jnt_values = self.reader[idx]
+        xyzrpy = (xyzrpy-self.min)/(self.max-self.min) #normalize
+        if self.transform is not None:
+            xyzrpy = self.transform(xyzrpy)
+        return torch.Tensor(xyzrpy), torch.Tensor(jnt_values)
+
+
 class Net(nn.Module):
     def __init__(self, n_hidden, n_jnts):
         super().__init__()
@@ -68,6 +95,24 @@ class Net(nn.Module):
         return out
 
 
+def export_mlp(model, min_max_file, path):
+    """
+    export a trained Net to the npz format of robot_sim._kinematics.ik_learned.MLPSeedModel,
+    so that it can be used as the seed model of JLChain.finalize(ik_solver='l')
+    :param model: Net
+    :param min_max_file: the _min_max.npy file used by IKDataSet
+    :param path: the .npz file to save
+    """
+    _min_max = np.load(min_max_file)
+    layers = [model.fc1, model.fc2, model.fc3]
+    rkl.MLPSeedModel(weights=[layer.weight.detach().cpu().numpy().T for layer in layers],
+                     biases=[layer.bias.detach().cpu().numpy() for layer in layers],
+                     in_min=_min_max[0],
+                     in_max=_min_max[1],
+                     input_type='xyzrpy',
+                     leaky_slope=0.01).save(path)
+
+
 def train_loop(dataloader, model, loss_fn, optimizer, device, writer, global_step):
     size = len(dataloader.dataset)
     for batch, (X, y) in enumerate(dataloader):
@@ -130,6 +175,7 @@ if __name__ == '__main__':
         train_loop(train_dataloader, model, loss_fn, optimizer, device, writer, global_step)
     model_path = 'tester/cobotta_model.pth'
     torch.save(model.state_dict(), model_path)
+    export_mlp(model, 'data_gen/cobotta_ik_min_max.npy', 'tester/' + rkl.DEFAULT_MODEL_FILE)
     print("Done!")
     writer.close()
     test_loop(test_dataloader, model, loss_fn, device)
@@ -0,0 +1,255 @@
+"""
+ik dataset generation over a joint-space grid with batched fk in a process pool
+the rows are streamed into chunked binary shards (prefix_xxxxx_tcp.npy / prefix_xxxxx_jnts.npy, or one .npz per shard)
+that are described by a json manifest, ShardReader reads them back with memory maps
+"""
+import os
+import json
+import numpy as np
+from concurrent import futures
+from numpy.lib.format import open_memmap
+import robot_sim._kinematics.ik_learned as rkl
+
+MANIFEST_FILE = 'manifest.json'
+
+# the chain of the worker processes, set by _init_worker
+_jlc = None
+
+
+def grid_axes(jnt_rngs, granularity):
+    """
+    the same grid as gen_data in cobotta.py
+    :param jnt_rngs: n_dof x 2 nparray
+    :param granularity: a float or a list of n_dof floats
+    :return: list of n_dof 1d nparrays
+    """
+    granularity = np.broadcast_to(np.asarray(granularity, dtype=np.float64), (len(jnt_rngs),))
+    return [np.arange(r0, r1, step) for (r0, r1), step in zip(jnt_rngs, granularity)]
+
+
+def grid_rows(axes, start, stop):
+    """
+    rows [start, stop) of itertools.product(*axes) without enumerating the rows before start
+    :return: (stop-start) x n_dof nparray
+    """
+    indices = np.unravel_index(np.arange(start, stop), [len(axis) for axis in axes])
+    return np.column_stack([axis[index] for axis, index in zip(axes, indices)])
+
+
+def _init_worker(jlc):
+    global _jlc
+    _jlc = jlc
+
+
+def _gen_shard(job):
+    """
+    computes and writes one shard
+    :param job: dict with the keys of the shard (see gen_shards)
+    :return: manifest entry of the shard
+    """
+    axes, start, stop = job['axes'], job['start'], job['stop']
+    n_rows = stop - start
+    dtype = np.dtype(job['dtype'])
+    if job['fmt'] == 'npy':
+        tcp_file, jnts_file = job['name'] + '_tcp.npy', job['name'] + '_jnts.npy'
+        tcp_out = open_memmap(os.path.join(job['out_dir'], tcp_file), mode='w+', dtype=dtype,
+                              shape=(n_rows, job['tcp_dim']))
+        jnts_out = open_memmap(os.path.join(job['out_dir'], jnts_file), mode='w+', dtype=dtype,
+                               shape=(n_rows, len(axes)))
+    else:
+        tcp_out = np.empty((n_rows, job['tcp_dim']), dtype=dtype)
+        jnts_out = np.empty((n_rows, len(axes)), dtype=dtype)
+    tcp_min = np.full(job['tcp_dim'], np.inf)
+    tcp_max = np.full(job['tcp_dim'], -np.inf)
+    for batch_start in range(0, n_rows, job['batch_size']):
+        batch_stop = min(batch_start + job['batch_size'], n_rows)
+        jnt_vals = grid_rows(axes, start + batch_start, start + batch_stop)
+        tcp = rkl.encode_tcp(*_jlc.batch_forward_kinematics(jnt_vals), input_type=job['input_type'])
+        tcp_out[batch_start:batch_stop] = tcp
+        jnts_out[batch_start:batch_stop] = jnt_vals
+        tcp_min = np.minimum(tcp_min, tcp.min(axis=0))
+        tcp_max = np.maximum(tcp_max, tcp.max(axis=0))
+    if job['fmt'] == 'npy':
+        tcp_out.flush()
+        jnts_out.flush()
+        del tcp_out, jnts_out
+        files = {'tcp': tcp_file, 'jnts': jnts_file}
+    else:
+        files = {'npz': job['name'] + '.npz'}
+        np.savez(os.path.join(job['out_dir'], files['npz']), tcp=tcp_out, jnts=jnts_out)
+    return {'start': start, 'n_rows': n_rows, 'tcp_min': tcp_min.tolist(), 'tcp_max': tcp_max.tolist(), **files}
+
+
+def gen_shards(jlc,
+               granularity,
+               out_dir,
+               prefix='ik',
+               shard_size=1000000,
+               batch_size=65536,
+               input_type='xyzrpy',
+               fmt='npy',
+               dtype='float32',
+               max_workers=None):
+    """
+    :param jlc: a JLChain, its batch_forward_kinematics is used
+    :param granularity: grid step of each joint, see grid_axes
+    :param out_dir:
+    :param prefix: the shards are named prefix_00000, prefix_00001, ...
+    :param shard_size: rows per shard
+    :param batch_size: rows per batched fk, bounds the memory of a worker
+    :param input_type: 'xyzrpy' or 'xyz6d', see robot_sim._kinematics.ik_learned.encode_tcp
+    :param fmt: 'npy' (memory mappable) or 'npz' (one uncompressed archive per shard)
+    :param dtype:
+    :param max_workers: None means os.cpu_count(), 0 generates in this process
+    :return: the manifest, also saved to out_dir/manifest.json together with prefix_min_max.npy
+    """
+    if fmt not in ('npy', 'npz'):
+        raise ValueError(f"Unknown fmt {fmt}.")
+    os.makedirs(out_dir, exist_ok=True)
+    axes = grid_axes(jlc.jnt_rngs, granularity)
+    n_rows = int(np.prod([len(axis) for axis in axes]))
+    tcp_dim = 6 if input_type == 'xyzrpy' else 9
+    jobs = [{'axes': axes,
+             'start': start,
+             'stop': min(start + shard_size, n_rows),
+             'name': f"{prefix}_{shard_id:05d}",
+             'out_dir': out_dir,
+             'tcp_dim': tcp_dim,
+             'batch_size': batch_size,
+             'input_type': input_type,
+             'fmt': fmt,
+             'dtype': dtype} for shard_id, start in enumerate(range(0, n_rows, shard_size))]
+    if max_workers == 0:
+        _init_worker(jlc)
+        shards = [_gen_shard(job) for job in jobs]
+    else:
+        with futures.ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                         initargs=(jlc,)) as executor:
+            shards = list(executor.map(_gen_shard, jobs))
+    tcp_min = np.min([shard['tcp_min'] for shard in shards], axis=0)
+    tcp_max = np.max([shard['tcp_max'] for shard in shards], axis=0)
+    manifest = {'prefix': prefix,
+                'n_rows': n_rows,
+                'tcp_dim': tcp_dim,
+                'n_jnts': len(axes),
+                'input_type': input_type,
+                'fmt': fmt,
+                'dtype': dtype,
+                'tcp_min': tcp_min.tolist(),
+                'tcp_max': tcp_max.tolist(),
+                'shards': shards}
+    # the normalization file of IKDataSet
+    np.save(os.path.join(out_dir, prefix + "_min_max"), np.array([tcp_min, tcp_max]))
+    with open(os.path.join(out_dir, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=1)
+    return manifest
+
+
+class ShardReader(object):
+    """
+    random access to the rows of sharded ik data
+    npy shards are memory mapped, npz shards are loaded on first access and the last one is kept
+    """
+
+    def __init__(self, out_dir, mmap_mode='r'):
+        self.out_dir = out_dir
+        with open(os.path.join(out_dir, MANIFEST_FILE)) as f:
+            self.manifest = json.load(f)
+        self.mmap_mode = mmap_mode
+        self.tcp_min = np.asarray(self.manifest['tcp_min'])
+        self.tcp_max = np.asarray(self.manifest['tcp_max'])
+        self._starts = np.array([shard['start'] for shard in self.manifest['shards']], dtype=np.int64)
+        self._shards = [None] * len(self._starts)
+        self._last_npz = None
+
+    def __len__(self):
+        return self.manifest['n_rows']
+
+    def _get_shard(self, shard_id):
+        if self._shards[shard_id] is not None:
+            return self._shards[shard_id]
+        shard = self.manifest['shards'][shard_id]
+        if 'npz' in shard:
+            if self._last_npz is not None:
+                self._shards[self._last_npz] = None
+            with np.load(os.path.join(self.out_dir, shard['npz'])) as data:
+                self._shards[shard_id] = (data['tcp'], data['jnts'])
+            self._last_npz = shard_id
+        else:
+            self._shards[shard_id] = (np.load(os.path.join(self.out_dir, shard['tcp']), mmap_mode=self.mmap_mode),
+                                      np.load(os.path.join(self.out_dir, shard['jnts']), mmap_mode=self.mmap_mode))
+        return self._shards[shard_id]
+
+    def __getitem__(self, idx):
+        """
+        :param idx: an int or a 1d array of ints
+        :return: tcp, jnts
+        """
+        idx = np.asarray(idx, dtype=np.int64)
+        idx = np.where(idx < 0, idx + len(self), idx)
+        if idx.ndim == 0:
+            shard_id = int(np.searchsorted(self._starts, idx, side='right') - 1)
+            tcp, jnts = self._get_shard(shard_id)
+            return tcp[idx - self._starts[shard_id]], jnts[idx - self._starts[shard_id]]
+        shard_ids = np.searchsorted(self._starts, idx, side='right') - 1
+        tcp = np.empty((len(idx), self.manifest['tcp_dim']), dtype=self.manifest['dtype'])
+        jnts = np.empty((len(idx), self.manifest['n_jnts']), dtype=self.manifest['dtype'])
+        for shard_id in np.unique(shard_ids):
+            selected = shard_ids == shard_id
+            shard_tcp, shard_jnts = self._get_shard(shard_id)
+            local = idx[selected] - self._starts[shard_id]
+            tcp[selected] = shard_tcp[local]
+            jnts[selected] = shard_jnts[local]
+        return tcp, jnts
+
+
+if __name__ == '__main__':
+    import time
+    import shutil
+    import tempfile
+    import itertools
+    import basis.robot_math as rm
+    import robot_sim._kinematics.jlchain as rskj
+
+    # a 6-dof chain, the chain of a robot is rbt_s.manipulator_dict[component_name].jlc
+    jlc = rskj.JLChain(n_dof=6)
+    jlc.jnts[0].loc_pos = np.array([0, 0, 0])
+    jlc.jnts[0].loc_motion_ax = np.array([0, 0, 1])
+    jlc.jnts[0].motion_rng = np.array([-np.pi / 2, np.pi / 2])
+    jlc.jnts[1].loc_pos = np.array([0, 0, .05])
+    jlc.jnts[1].loc_motion_ax = np.array([0, 1, 0])
+    jlc.jnts[1].motion_rng = np.array([-np.pi / 2, np.pi / 2])
+    jlc.jnts[2].loc_pos = np.array([0, 0, .2])
+    jlc.jnts[2].loc_motion_ax = np.array([0, 1, 0])
+    jlc.jnts[2].motion_rng = np.array([-np.pi, np.pi])
+    jlc.jnts[3].loc_pos = np.array([0, 0, .2])
+    jlc.jnts[3].loc_motion_ax = np.array([0, 0, 1])
+    jlc.jnts[3].motion_rng = np.array([-np.pi / 2, np.pi / 2])
+    jlc.jnts[4].loc_pos = np.array([0, 0, .1])
+    jlc.jnts[4].loc_motion_ax = np.array([0, 1, 0])
+    jlc.jnts[4].motion_rng = np.array([-np.pi / 2, np.pi / 2])
+    jlc.jnts[5].loc_pos = np.array([0, 0, .05])
+    jlc.jnts[5].loc_motion_ax = np.array([0, 0, 1])
+    jlc.jnts[5].motion_rng = np.array([-np.pi / 2, np.pi / 2])
+    jlc.tcp_loc_pos = np.array([0, 0, .01])
+    jlc.finalize()
+    granularity = [np.radians(6), np.radians(6), np.radians(12), np.radians(20), np.radians(20), np.radians(30)]
+    out_dir = tempfile.mkdtemp()
+    tic = time.time()
+    manifest = gen_shards(jlc, granularity, out_dir, prefix='cobotta_ik', shard_size=500000)
+    toc = time.time()
+    print(f"{manifest['n_rows']} rows in {len(manifest['shards'])} shards, {toc - tic:.2f}s")
+    # the per-sample loop of gen_data on the first rows
+    axes = grid_axes(jlc.jnt_rngs, granularity)
+    reader = ShardReader(out_dir)
+    n_check = 1000
+    tic = time.time()
+    for i, data in enumerate(itertools.islice(itertools.product(*axes), n_check)):
+        tcp_pos, tcp_rotmat = jlc.forward_kinematics(jnt_vals=np.array(data), update=False, toggle_jac=False)
+        tcp, jnts = reader[i]
+        assert np.allclose(tcp[:3], tcp_pos, atol=1e-6)
+        assert np.allclose(rm.rotmat_from_euler(*tcp[3:].astype(np.float64)), tcp_rotmat, atol=1e-5)
+        assert np.allclose(jnts, data, atol=1e-6)
+    toc = time.time()
+    print(f"per-sample fk: {(toc - tic) / n_check * manifest['n_rows']:.2f}s estimated for all the rows")
+    shutil.rmtree(out_dir)
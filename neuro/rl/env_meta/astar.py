@@ -0,0 +1,78 @@
+"""
+A* over rack states where a move takes the tube in one cell to an empty cell
+states are packed into bytes for O(1) visited-set lookups, the open list is a heap,
+and the heuristic (number of misplaced tubes) is updated incrementally from the two changed cells
+"""
+
+import heapq
+import itertools
+import numpy as np
+
+
+def astar(init_state, cell_costs, get_moves, max_expansions=None):
+    """
+    :param init_state: nrow*ncolumn int array, 0 means empty
+    :param cell_costs: (max tube id + 1)*(nrow*ncolumn) array, cell_costs[t, c] = 1 if a tube of type t is misplaced
+                       at the flattened cell c, the heuristic is the sum over the tubes; row 0 must be zeros
+    :param get_moves: function(state) -> (movable, fillable), two kx2 int arrays of (i, j),
+                      the tube at movable[x] can be moved to fillable[x]
+    :param max_expansions: None means no limit
+    :return: [list of states from init_state to the goal ([] if not found), number of expansions]
+    """
+    init_state = np.asarray(init_state)
+    shape = init_state.shape
+    ncolumn = shape[1]
+    cell_costs = np.asarray(cell_costs, dtype=np.int64)
+    dtype = np.int8 if cell_costs.shape[0] <= 127 else np.int32
+    flat_init = init_state.astype(dtype).ravel()
+    init_key = flat_init.tobytes()
+    init_h = int(cell_costs[flat_init, np.arange(len(flat_init))].sum())
+    if init_h == 0:
+        return [[init_state.copy()], 0]
+    parents = {init_key: None}
+    best_g = {init_key: 0}
+    closed = set()
+    counter = itertools.count()
+    # (f, h, insertion order, g, key), ties are broken by h and then fifo, as the former sorted open lists
+    open_heap = [(init_h, init_h, next(counter), 0, init_key)]
+    n_expansions = 0
+    while open_heap:
+        _, h, _, g, key = heapq.heappop(open_heap)
+        if key in closed or g > best_g[key]:
+            # stale entry of a state that was reached later with a lower cost
+            continue
+        closed.add(key)
+        n_expansions += 1
+        if max_expansions is not None and n_expansions > max_expansions:
+            break
+        flat = np.frombuffer(key, dtype=dtype)
+        movable, fillable = get_moves(flat.reshape(shape))
+        if len(movable) == 0:
+            continue
+        m_cells = movable[:, 0] * ncolumn + movable[:, 1]
+        f_cells = fillable[:, 0] * ncolumn + fillable[:, 1]
+        tubes = flat[m_cells]
+        child_hs = h - cell_costs[tubes, m_cells] + cell_costs[tubes, f_cells]
+        child_g = g + 1
+        for m_cell, f_cell, tube, child_h in zip(m_cells.tolist(), f_cells.tolist(), tubes.tolist(),
+                                                  child_hs.tolist()):
+            child = flat.copy()
+            child[f_cell] = tube
+            child[m_cell] = 0
+            child_key = child.tobytes()
+            if child_key in closed or best_g.get(child_key, child_g + 1) <= child_g:
+                continue
+            best_g[child_key] = child_g
+            parents[child_key] = key
+            if child_h == 0:
+                return [_backtrack(parents, child_key, dtype, shape), n_expansions]
+            heapq.heappush(open_heap, (child_g + child_h, child_h, next(counter), child_g, child_key))
+    return [[], n_expansions]
+
+
+def _backtrack(parents, key, dtype, shape):
+    path = []
+    while key is not None:
+        path.append(np.frombuffer(key, dtype=dtype).reshape(shape).astype(int))
+        key = parents[key]
+    return path[::-1]
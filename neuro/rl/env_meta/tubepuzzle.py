@@ -1,6 +1,94 @@
 import numpy as np
 import copy
-import scipy.signal as ss
+import neuro.rl.env_meta.astar as astar
+
+# a tube can be grasped, or an empty cell filled, if all the cells marked in any one of the masks are empty
+NEIGHBOR_MASKS = np.array([[[0,1,0],
+                            [0,0,0],
+                            [0,1,0]],
+                           [[0,0,0],
+                            [1,0,1],
+                            [0,0,0]],
+                           [[1,1,1],
+                            [1,0,0],
+                            [1,0,0]],
+                           [[1,1,1],
+                            [0,0,1],
+                            [0,0,1]],
+                           [[1,0,0],
+                            [1,0,0],
+                            [1,1,1]],
+                           [[0,0,1],
+                            [0,0,1],
+                            [1,1,1]]])
+_MASK_OFFSETS = [list(zip(*np.nonzero(mask))) for mask in NEIGHBOR_MASKS]
+
+
+def get_fillable_movable_batch(states):
+    """
+    fillable and movable masks of a stack of racks in one pass: the occupancy of the whole stack is padded once,
+    the eight neighbors are strided views of it, and every neighbor mask is an or over its views
+    :param states: B*nrow*ncolumn int array (or nrow*ncolumn), 0 means empty
+    :return: fillable, movable, bool arrays of the same shape as states
+    """
+    states = np.asarray(states)
+    nrow, ncolumn = states.shape[-2:]
+    occupied = states > 0
+    padded = np.zeros(states.shape[:-2]+(nrow+2, ncolumn+2), dtype=bool)
+    padded[..., 1:-1, 1:-1] = occupied
+    clear = np.zeros(states.shape, dtype=bool)
+    for offsets in _MASK_OFFSETS:
+        blocked = np.zeros(states.shape, dtype=bool)
+        for i, j in offsets:
+            blocked |= padded[..., i:i+nrow, j:j+ncolumn]
+        clear |= ~blocked
+    return clear & ~occupied, clear & occupied
+
+
+def get_feasible_action_masks(states):
+    """
+    feasible actions of a stack of racks, action = fillable cell id * ncells + movable cell id as in env_r2
+    :param states: B*nrow*ncolumn int array
+    :return: B*(ncells*ncells) bool array
+    """
+    states = np.asarray(states)
+    fillable, movable = get_fillable_movable_batch(states)
+    n_cells = states.shape[-1]*states.shape[-2]
+    fillable = fillable.reshape((-1, n_cells))
+    movable = movable.reshape((-1, n_cells))
+    return (fillable[:, :, None] & movable[:, None, :]).reshape((-1, n_cells*n_cells))
+
+
+def isdone(states, goal_pattern):
+    """
+    the done check of TubePuzzle for one rack or a stack of racks: tubes 1 and 2 are only in their goal cells
+    :param states: nrow*ncolumn or B*nrow*ncolumn int array
+    :param goal_pattern: nrow*ncolumn or B*nrow*ncolumn int array
+    :return: bool or B bool array
+    """
+    states = np.asarray(states)
+    goal_pattern = np.asarray(goal_pattern)
+    misplaced = ((goal_pattern != 1) & (states == 1)) | ((goal_pattern != 2) & (states == 2))
+    return ~misplaced.any(axis=(-2, -1))
+
+
+def get_random_states(rack_size, goal_pattern, rng=None):
+    """
+    the tubes of goal_pattern shuffled over the rack, until the rack is not done and something can be moved and filled
+    :param rack_size: (nrow, ncolumn)
+    :param goal_pattern: nrow*ncolumn int array
+    :param rng: np.random.Generator, None means the global numpy random state
+    :return: nrow*ncolumn int array
+    """
+    shuffle = np.random.permutation if rng is None else rng.permutation
+    cells = np.asarray(goal_pattern).ravel()
+    while True:
+        state = shuffle(cells).reshape(rack_size)
+        fillable, movable = get_fillable_movable_batch(state)
+        if fillable.any() and movable.any() and not isdone(state, goal_pattern):
+            return state
+
+
 
 class Node(object):
 
@@ -83,8 +171,7 @@ class TubePuzzle(object):
         self._nrow = init_state.shape[0]
         self._ncolumn = init_state.shape[1]
         self.init_state = np.zeros((self._nrow, self._ncolumn), dtype="int")
-        self.open_list = []
-        self.close_list = []
+        self.n_expansions = 0
         self._set_init_state(init_state)
         if goal_pattern is None:
             self.goal_pattern = np.array([[1,1,1,1,0,0,2,2,2,2],
@@ -123,9 +210,7 @@ class TubePuzzle(object):
         author: weiwei
         date: 20190828
         """
-        if np.any((self.goal_pattern != 1)*(node.state==1)) or np.any((self.goal_pattern != 2)*(node.state==2)):
-            return False
-        return True
+        return bool(isdone(node.state, self.goal_pattern))
 
     def f_cost(self, node):
         hs = self._heuristics(node)
@@ -135,190 +220,76 @@ class TubePuzzle(object):
     def get_movable_fillable_pair(self, node):
         """
         get a list of movable and fillable pairs
+        every movable tube is paired with the first fillable cell of its goal region
         :param node see Node
-        :return: [[(i,j), (k,l)], ...]
+        :return: movable_elements, fillable_elements, kx2 arrays of (i,j)
         author: weiwei
         date: 20191003osaka, 20200104osaka
         """
-        # filtering
-        # mask_ulbr = np.array([[1,0,0],[0,0,0],[0,0,1]])
-        # mask_urbl = np.array([[0,0,1],[0,0,0],[1,0,0]])
-        # mask_ulbr2 = np.array([[1,0,0],[1,0,0],[0,1,1]])
-        # mask_urbl2 = np.array([[0,1,1],[1,0,0],[1,0,0]])
-        # mask_ulbr2_flp = np.array([[1,1,0],[0,0,1],[0,0,1]])
-        # mask_urbl2_flp = np.array([[0,0,1],[0,0,1],[1,1,0]])
-        mask_ucbc = np.array([[0,1,0],
-                              [0,0,0],
-                              [0,1,0]])
-        mask_crcl = np.array([[0,0,0],
-                              [1,0,1],
-                              [0,0,0]])
-        mask_ul = np.array([[1,1,1],
-                            [1,0,0],
-                            [1,0,0]])
-        mask_ur = np.array([[1,1,1],
-                            [0,0,1],
-                            [0,0,1]])
-        mask_bl = np.array([[1,0,0],
-                            [1,0,0],
-                            [1,1,1]])
-        mask_br = np.array([[0,0,1],
-                            [0,0,1],
-                            [1,1,1]])
-        # cg_ulbr = ss.correlate2d(node.state, mask_ulbr)[1:-1,1:-1]
-        # cg_urbl = ss.correlate2d(node.state, mask_urbl)[1:-1,1:-1]
-        # cg_ulbr2_flp = ss.correlate2d(node.state, mask_ulbr2_flp)[1:-1,1:-1]
-        # cg_urbl2_flp = ss.correlate2d(node.state, mask_urbl2_flp)[1:-1,1:-1]
-        # cg_ulbr2_flp = ss.correlate2d(node.state, mask_ulbr2_flp)[1:-1,1:-1]
-        # cg_urbl2_flp = ss.correlate2d(node.state, mask_urbl2_flp)[1:-1,1:-1]
-        cg_ucbc = ss.correlate2d(node.state, mask_ucbc)[1:-1,1:-1]
-        cg_crcl = ss.correlate2d(node.state, mask_crcl)[1:-1,1:-1]
-        cg_ul = ss.correlate2d(node.state, mask_ul)[1:-1,1:-1]
-        cg_ur = ss.correlate2d(node.state, mask_ur)[1:-1,1:-1]
-        cg_bl = ss.correlate2d(node.state, mask_bl)[1:-1,1:-1]
-        cg_br = ss.correlate2d(node.state, mask_br)[1:-1,1:-1]
-        ## fillable
-        # cf = ((cg_ulbr==0)+(cg_urbl==0)+(cg_ulbr_flp==0)+(cg_urbl_flp==0)+(cg_ucbc==0)+(cg_crcl==0))*(state.grid==0)
-        # cf = ((cg_ulbr==0)+(cg_urbl==0)+(cg_ucbc==0)+(cg_crcl==0))*(state.grid==0)
-        # cf = ((cg_ucbc==0)+(cg_crcl==0))*(state.grid==0)
-        cf = ((cg_ucbc==0)+(cg_crcl==0)+(cg_ul==0)+(cg_ur==0)+(cg_bl==0)+(cg_br==0))*(node.state==0)
-        ## always fill the first element
-        # # fillable 1
-        # for i in range(np.asarray(np.where((self.goal_pattern==1)*cf)).T.shape[0]):
-        #     fillable_type1 = [np.asarray(np.where((self.goal_pattern==1)*cf)).T[i]]
-        #     if weight_array[fillable_type1[0][0], fillable_type1[0][1]] !=0:
-        #         continue
-        # # fillable 2
-        # for i in range(np.asarray(np.where((self.goal_pattern==2)*cf)).T.shape[0]):
-        #     fillable_type2 = [np.asarray(np.where((self.goal_pattern==2)*cf)).T[i]]
-        #     if weight_array[fillable_type2[0][0], fillable_type2[0][1]] !=0:
-        #         continue
-        fillable_type1 = [np.asarray(np.where((self.goal_pattern==1)*cf)).T[0]]
-        fillable_type2 = [np.asarray(np.where((self.goal_pattern==2)*cf)).T[0]]
-        # # fillable 1
-        # fillable_type1 = np.asarray(np.where((self.goal_pattern==1)*cf)).T
-        # # fillable 2
-        # fillable_type2 = np.asarray(np.where((self.goal_pattern==2)*cf)).T
-        ## graspable
-        # cg_ulbr[state.grid==0]=-1
-        # cg_urbl[state.grid==0]=-1
-        # cg_ulbr_flp[state.grid==0]=-1
-        # cg_urbl_flp[state.grid==0]=-1
-        cg_ucbc[node.state==0]=-1
-        cg_crcl[node.state==0]=-1
-        cg_ul[node.state==0]=-1
-        cg_ur[node.state==0]=-1
-        cg_bl[node.state==0]=-1
-        cg_br[node.state==0]=-1
-        # cg = (cg_ulbr==0)+(cg_urbl==0)+(cg_ulbr_flp==0)+(cg_urbl_flp==0)+(cg_ucbc==0)+(cg_crcl==0)
-        # cg = (cg_ulbr==0)+(cg_urbl==0)+(cg_ucbc==0)+(cg_crcl==0)
-        # cg = (cg_ucbc==0)+(cg_crcl==0)
-        cg = (cg_ucbc==0)+(cg_crcl==0)+(cg_ul==0)+(cg_ur==0)+(cg_bl==0)+(cg_br==0)
-        # movable 1
-        movable_type1 = np.asarray(np.where(cg*(node.state==1))).T
-        # movable 2
-        movable_type2 = np.asarray(np.where(cg*(node.state==2))).T
-        movable_expanded_type1 = np.repeat(movable_type1, len(fillable_type1), axis=0)
-        movable_expanded_type2 = np.repeat(movable_type2, len(fillable_type2), axis=0)
-        if len(movable_expanded_type1)==0:
-            movable_elements = movable_expanded_type2
-        elif len(movable_expanded_type2)==0:
-            movable_elements = movable_expanded_type1
-        else:
-            movable_elements = np.concatenate((movable_expanded_type1, movable_expanded_type2), axis=0)
-        fillable_expanded_type1 = np.tile(fillable_type1, (len(movable_type1),1))
-        fillable_expanded_type2 = np.tile(fillable_type2, (len(movable_type2),1))
-        if len(fillable_expanded_type1)==0:
-            fillable_elements = fillable_expanded_type2
-        elif len(fillable_expanded_type2)==0:
-            fillable_elements = fillable_expanded_type1
-        else:
-            fillable_elements = np.concatenate((fillable_expanded_type1, fillable_expanded_type2), axis=0)
-        return movable_elements, fillable_elements
+        return self._movable_fillable_pair(node.state)
+
+    def _movable_fillable_pair(self, state):
+        fillable, movable = get_fillable_movable_batch(state)
+        movable_elements = []
+        fillable_elements = []
+        for tube_id in [1, 2]:
+            fillable_cells = np.argwhere((self.goal_pattern == tube_id) & fillable)[:1]
+            movable_cells = np.argwhere(movable & (state == tube_id))
+            if len(fillable_cells) == 0 or len(movable_cells) == 0:
+                continue
+            movable_elements.append(movable_cells)
+            fillable_elements.append(np.repeat(fillable_cells, len(movable_cells), axis=0))
+        if len(movable_elements) == 0:
+            return np.zeros((0, 2), dtype=int), np.zeros((0, 2), dtype=int)
+        return np.concatenate(movable_elements, axis=0), np.concatenate(fillable_elements, axis=0)
 
-    def _reorder_open_list(self):
-        self.open_list.sort(key=lambda x: (self.f_cost(x)[0], self.f_cost(x)[1]))
+    def _cell_costs(self, max_tube_id):
+        """
+        cell_costs[t, c] = 1 if tube type t at the flattened cell c counts in _heuristics
+        :return:
+        """
+        cell_costs = np.zeros((max(max_tube_id, 2)+1, self._nrow*self._ncolumn), dtype=int)
+        for tube_id in [1, 2]:
+            cell_costs[tube_id] = (self.goal_pattern != tube_id).ravel()
+        return cell_costs
 
-    def astar_search(self, weight_array=None):
+    def astar_search(self, weight_array=None, max_expansions=None):
         """
         build a graph considering the movable and fillable ids
+        the number of expanded nodes is saved in self.n_expansions
         :param weight_array
-        :return:
+        :param max_expansions: None means no limit, [] is returned if it is exceeded
+        :return: list of Node from the init state to the goal, [] if no path is found
         author: weiwei
         date: 20191003
         """
         if weight_array is None:
             weight_array = np.zeros_like(self.init_state)
-        start_node = Node(self.init_state)
-        self.open_list = [start_node]
-        while True:
-            # if len(self.openlist)>=2:
-            #     for eachnode in self.openlist:
-            #         print(eachnode)
-            #         print(eachnode.fcost())
-            #     print("\n")
-            self._reorder_open_list()
-            # for opennode in self.openlist:
-            #     print(opennode)
-            #     print(self.fcost(opennode))
-            #     print("\n")
-            self.close_list.append(self.open_list.pop(0))
-            # movableids = self.getMovableIds(self.closelist[-1])
-            # fillableids = self.getFillableIds(self.closelist[-1])
-            # if len(movableids) == 0 or len(fillableids) == 0:
-            #     print("No path found!")
-            #     return []
-            # for mid in movableids:
-            #     for fid in fillableids:
+        weight_array = np.asarray(weight_array)
+
+        def get_moves(state):
+            movable_elements, fillable_elements = self._movable_fillable_pair(state)
+            if len(movable_elements) == 0:
+                return movable_elements, fillable_elements
             # todo consider weight array when get movable fillable pair
-            movable_elements, fillable_elements = self.get_movable_fillable_pair(self.close_list[-1])
-            print(movable_elements)
-            print(fillable_elements)
-            if movable_elements.shape[0] == 0:
-                print("No path found!")
-                # return []
-            for i in range(movable_elements.shape[0]):
-                mi, mj = movable_elements[i]
-                fi, fj = fillable_elements[i]
-                if weight_array[mi, mj] != 0 and weight_array[fi, fj] != 0:
-                    continue
-                tmp_node = copy.deepcopy(self.close_list[-1])
-                tmp_node.parent = self.close_list[-1]
-                tmp_node.past_cost = self.close_list[-1].past_cost+1
-                tmp_node[fi][fj] = tmp_node[mi][mj]
-                tmp_node[mi][mj] = 0
-                #  check if path is found
-                if self.isdone(tmp_node):
-                    path = [tmp_node]
-                    parent = tmp_node.parent
-                    while parent is not None:
-                        path.append(parent)
-                        parent = parent.parent
-                    print("Path found!")
-                    # print(tmpelearray)
-                    # print(self.fcost(tmpelearray))
-                    # for eachnode in path:
-                    #     print(eachnode)
-                    return path[::-1]
-                # check if in openlist
-                flag_in_openlist = False
-                for each_node in self.open_list:
-                    if each_node == tmp_node:
-                        flag_in_openlist = True
-                        if self.f_cost(each_node)[0] <= self.f_cost(tmp_node)[0]:
-                            pass
-                            # no need to update position
-                        else:
-                            each_node.parent = tmp_node.parent
-                            each_node.gs = tmp_node.gs
-                            # self._reorderopenlist()
-                        # continue
-                        break
-                if flag_in_openlist:
-                    continue
-                else:
-                    # not in openlist append and sort openlist
-                    self.open_list.append(tmp_node)
+            keep = (weight_array[movable_elements[:, 0], movable_elements[:, 1]] == 0) | \
+                   (weight_array[fillable_elements[:, 0], fillable_elements[:, 1]] == 0)
+            return movable_elements[keep], fillable_elements[keep]
+
+        states, self.n_expansions = astar.astar(self.init_state, self._cell_costs(int(np.max(self.init_state))),
+                                                get_moves, max_expansions=max_expansions)
+        if len(states) == 0:
+            print("No path found!")
+            return []
+        path = []
+        for state in states:
+            node = Node(state)
+            if len(path) > 0:
+                node.parent = path[-1]
+                node.past_cost = path[-1].past_cost+1
+            path.append(node)
+        print("Path found!")
+        return path
 
 if __name__=="__main__":
     # down x, right y
@@ -338,9 +309,71 @@ if __name__=="__main__":
                          [0,0,2,1,2,2,0,0,0,0],
                          [0,0,0,0,2,0,0,0,0,0]])
     tp = TubePuzzle(elearray)
-    # trm_primit.getMovableIds(Node(state))
-    # print(Node(state).fcost())
-    # print(trm_primit.fcost(Node(state)))
     path = tp.astar_search()
-    # for state in path:////////////
-    #     print(state)
+    for node in path:
+        print(node)
+
+    # benchmark over randomized racks
+    import time
+
+    def sorted_list_astar(tp, time_limit):
+        """
+        the former search: the open list is re-sorted after every expansion and searched linearly,
+        :return: number of expansions, True if solved
+        """
+        open_list = [Node(tp.init_state)]
+        close_list = []
+        tic = time.time()
+        while len(open_list) > 0 and time.time() - tic < time_limit:
+            open_list.sort(key=lambda x: (tp.f_cost(x)[0], tp.f_cost(x)[1]))
+            close_list.append(open_list.pop(0))
+            movable_elements, fillable_elements = tp.get_movable_fillable_pair(close_list[-1])
+            for (mi, mj), (fi, fj) in zip(movable_elements, fillable_elements):
+                tmp_node = copy.deepcopy(close_list[-1])
+                tmp_node.past_cost = close_list[-1].past_cost+1
+                tmp_node[fi][fj] = tmp_node[mi][mj]
+                tmp_node[mi][mj] = 0
+                if tp.isdone(tmp_node):
+                    return len(close_list), True
+                if any(each_node == tmp_node for each_node in open_list):
+                    continue
+                open_list.append(tmp_node)
+        return len(close_list), False
+
+    # the batched masks against the former per-state correlate2d
+    import scipy.signal as ss
+    rng = np.random.default_rng(0)
+    states = rng.integers(0, 3, size=(4096, 5, 10))*(rng.random((4096, 5, 10)) < .5)
+    tic = time.time()
+    references = []
+    for state in states:
+        clear = np.any([ss.correlate2d(state, mask)[1:-1,1:-1] == 0 for mask in NEIGHBOR_MASKS], axis=0)
+        references.append((clear*(state == 0) > 0, clear*(state > 0) > 0))
+    toc = time.time()
+    fillable, movable = get_fillable_movable_batch(states)
+    action_masks = get_feasible_action_masks(states)
+    tac = time.time()
+    assert all(np.array_equal(fillable[b], references[b][0]) and np.array_equal(movable[b], references[b][1])
+               for b in range(len(states)))
+    print("correlate2d {:.1f}us per state, batched masks and action masks {:.1f}us per state".format(
+        (toc-tic)/len(states)*1e6, (tac-toc)/len(states)*1e6))
+    n_racks, time_limit = 20, 10
+    results = {"heapq": [0, 0, 0], "sorted list": [0, 0, 0]}
+    for _ in range(n_racks):
+        state = np.zeros(50, dtype=int)
+        n_tubes = rng.integers(8, 20)
+        state[rng.choice(50, n_tubes, replace=False)] = rng.integers(1, 3, n_tubes)
+        tp = TubePuzzle(state.reshape(5, 10))
+        tic = time.time()
+        path = tp.astar_search(max_expansions=100000)
+        results["heapq"][0] += tp.n_expansions
+        results["heapq"][1] += time.time()-tic
+        results["heapq"][2] += len(path) > 0
+        tic = time.time()
+        n_expansions, solved = sorted_list_astar(tp, time_limit)
+        results["sorted list"][0] += n_expansions
+        results["sorted list"][1] += time.time()-tic
+        results["sorted list"][2] += solved
+    for name, (n_expansions, seconds, n_solved) in results.items():
+        print("{}: solved {}/{} (time limit {}s), {} expansions, {:.1f} expansions/s".format(
+            name, n_solved, n_racks, time_limit, n_expansions, n_expansions/seconds))
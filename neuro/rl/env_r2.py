@@ -1,21 +1,27 @@
+import pickle
 import numpy as np
-from file_sys import load_pickle
 from pathlib import Path
-from env_meta.env_meta import (get_fillable_movable,
-                               isdone,
-                               get_random_states,
-                               get_random_goal_pattern)
+from neuro.rl.env_meta.tubepuzzle import (TubePuzzle,
+                                          isdone,
+                                          get_random_states,
+                                          get_fillable_movable_batch,
+                                          get_feasible_action_masks)
 
 
 def get_feasible_action_set(state, rack_size):
-    fillable, movable = get_fillable_movable(state)
-    fillable_idx = np.where(fillable.ravel() == 1)[0]
-    movable_idx = np.where(movable.ravel() == 1)[0]
-    if len(fillable_idx) == 0 or len(movable_idx) == 0:
+    feasible_actions = np.flatnonzero(get_feasible_action_masks(np.reshape(state, (1, *rack_size)))[0])
+    if len(feasible_actions) == 0:
         # raise Exception("ERROR IN GET_FEASIBLE_ACTION_SET")
         return np.array([0])  # must be done
-    fillable_movable_idx_comb = np.array(np.meshgrid(fillable_idx, movable_idx)).T.reshape(-1, 2)
-    return fillable_movable_idx_comb[:, 0] * np.prod(rack_size) + fillable_movable_idx_comb[:, 1]
+    return feasible_actions
+
+
+def get_feasible_action_mask_batch(states, rack_size):
+    """
+    :param states: B x rack_size stack of rack states
+    :return: B x prod(rack_size)**2 bool array, action = fillable id * prod(rack_size) + movable id
+    """
+    return get_feasible_action_masks(np.reshape(states, (-1, *rack_size)))
 
 
 GOAL = np.array([
@@ -99,8 +105,8 @@ class ENV:
         # update new state
         self.state = nxt_state
         ## --------------------
-        # check if the new state is illegal state
-        nxt_fillable, nxt_movable = get_fillable_movable(nxt_state)
+        # check if the new state is illegal state, with the rule of the action masks (get_feasible_action_set)
+        nxt_fillable, nxt_movable = get_fillable_movable_batch(nxt_state)
         if np.sum(nxt_fillable) == 0 or np.sum(nxt_movable) == 0:
             reward = -1
             self.reward_history.append(reward)
@@ -148,6 +154,23 @@ class ENV:
         return action_seq
 
 
+def astar_action_seq(state, goal_pattern, max_iter_cnt=500):
+    """
+    A* demonstration of one rack, module level so that it can run in a process pool
+    :return: list of actions (fillable id * prod(rack_size) + movable id), None if no solution is found
+    """
+    tp = TubePuzzle(state.copy(), goal_pattern=goal_pattern.copy())
+    path = tp.astar_search(max_expansions=max_iter_cnt)
+    if len(path) == 0:
+        return None
+    n_cells = state.size
+    action_seq = []
+    for last_node, node in zip(path[:-1], path[1:]):
+        move_map = (node.state - last_node.state).ravel()
+        action_seq.append(int(np.flatnonzero(move_map > 0)[0] * n_cells + np.flatnonzero(move_map < 0)[0]))
+    return action_seq
+
+
 class ENV_data(ENV):
     def __init__(self, data_path, rack_size=(5, 10), num_classes=4, observation_space_dim=10, action_space_dim=10):
         super(ENV_data, self).__init__(rack_size, num_classes, observation_space_dim, action_space_dim)
@@ -157,7 +180,8 @@ class ENV_data(ENV):
         self.current_eposide = None
         self.action_list = None
         for data_file_name in self.data_path.glob("*"):
-            self.eposide_buffer = self.eposide_buffer + load_pickle(data_file_name)
+            with open(data_file_name, "rb") as f:
+                self.eposide_buffer = self.eposide_buffer + pickle.load(f)
 
     def reset(self):
         self.current_eposide = self.eposide_buffer[self.eposide_buffer_cnt]
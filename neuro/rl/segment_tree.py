@@ -0,0 +1,109 @@
+from typing import Callable
+import numpy as np
+
+
+class SegmentTree:
+    """Array-backed segment tree whose updates and queries are vectorized over batches of indices.
+
+    The root is tree[1], the leaves are tree[capacity:2 * capacity].
+    Updating a batch propagates one tree level at a time for all the changed leaves together.
+
+    Attributes:
+        capacity (int): number of leaves, a power of 2
+        tree (np.ndarray): the nodes
+        operation (np.ufunc): np.add or np.minimum
+        neutral_element (float): value of the empty leaves
+    """
+
+    def __init__(self, capacity: int, operation: Callable, neutral_element: float):
+        assert capacity > 0 and capacity & (capacity - 1) == 0, "capacity must be positive and a power of 2."
+        self.capacity = capacity
+        self.operation = operation
+        self.neutral_element = neutral_element
+        self.tree = np.full(2 * capacity, neutral_element, dtype=np.float64)
+        self._depth = capacity.bit_length() - 1
+
+    def update(self, indices, values):
+        """Set the leaves at indices to values and refresh their ancestors."""
+        nodes = np.asarray(indices, dtype=np.int64).ravel() + self.capacity
+        assert np.all((nodes >= self.capacity) & (nodes < 2 * self.capacity))
+        self.tree[nodes] = values
+        for _ in range(self._depth):
+            nodes = np.unique(nodes >> 1)
+            self.tree[nodes] = self.operation(self.tree[2 * nodes], self.tree[2 * nodes + 1])
+
+    def get(self, indices) -> np.ndarray:
+        """Leaf values at indices."""
+        return self.tree[np.asarray(indices, dtype=np.int64) + self.capacity]
+
+    def operate(self, start: int = 0, end: int = 0) -> float:
+        """Reduce the leaves in [start, end), end <= 0 counts from the capacity."""
+        if end <= 0:
+            end += self.capacity
+        result = self.neutral_element
+        start += self.capacity
+        end += self.capacity
+        while start < end:
+            if start & 1:
+                result = self.operation(result, self.tree[start])
+                start += 1
+            if end & 1:
+                end -= 1
+                result = self.operation(result, self.tree[end])
+            start >>= 1
+            end >>= 1
+        return float(result)
+
+    def __setitem__(self, idx: int, val: float):
+        assert 0 <= idx < self.capacity
+        node = idx + self.capacity
+        self.tree[node] = val
+        node >>= 1
+        while node >= 1:
+            self.tree[node] = self.operation(self.tree[2 * node], self.tree[2 * node + 1])
+            node >>= 1
+
+    def __getitem__(self, idx: int) -> float:
+        assert 0 <= idx < self.capacity
+        return float(self.tree[self.capacity + idx])
+
+
+class SumSegmentTree(SegmentTree):
+
+    def __init__(self, capacity: int):
+        super(SumSegmentTree, self).__init__(capacity=capacity, operation=np.add, neutral_element=0.0)
+
+    def sum(self, start: int = 0, end: int = 0) -> float:
+        """Sum of the leaves in [start, end)."""
+        if start == 0 and end <= 0:
+            return float(self.tree[1])
+        return self.operate(start, end)
+
+    def retrieve(self, upperbound: float) -> int:
+        """Index of the leaf where the prefix sum reaches upperbound."""
+        return int(self.retrieve_batch(np.array([upperbound]))[0])
+
+    def retrieve_batch(self, upperbounds) -> np.ndarray:
+        """Vectorized retrieve, descends all the upperbounds together, one tree level per step."""
+        upperbounds = np.array(upperbounds, dtype=np.float64)
+        assert np.all(upperbounds >= 0) and np.all(upperbounds <= self.tree[1] + 1e-5)
+        nodes = np.ones(len(upperbounds), dtype=np.int64)
+        for _ in range(self._depth):
+            left = 2 * nodes
+            left_sums = self.tree[left]
+            go_right = left_sums <= upperbounds
+            upperbounds -= np.where(go_right, left_sums, 0)
+            nodes = left + go_right
+        return nodes - self.capacity
+
+
+class MinSegmentTree(SegmentTree):
+
+    def __init__(self, capacity: int):
+        super(MinSegmentTree, self).__init__(capacity=capacity, operation=np.minimum, neutral_element=float("inf"))
+
+    def min(self, start: int = 0, end: int = 0) -> float:
+        """Min of the leaves in [start, end)."""
+        if start == 0 and end <= 0:
+            return float(self.tree[1])
+        return self.operate(start, end)
@@ -37,14 +37,34 @@ class ReplayBuffer:
 
 
 class ReplayBuffer2:
-    """A simple numpy replay buffer."""
+    """A simple numpy replay buffer.
 
-    def __init__(self, obs_dim: list, size: int, batch_size: int = 32):
-        self.obs_buf = np.zeros([size, *obs_dim], dtype=np.float32)
-        self.next_obs_buf = np.zeros([size, *obs_dim], dtype=np.float32)
-        self.acts_buf = np.zeros([size], dtype=np.float32)
-        self.rews_buf = np.zeros([size], dtype=np.float32)
-        self.done_buf = np.zeros(size, dtype=np.float32)
+    If buffer_dir is given, the arrays are memory-mapped .npy files in it, so that the buffer can be larger than RAM;
+    save_buffer(buffer_dir) then only flushes them, and load_buffer maps the files instead of reading them.
+    A loaded buffer is copy-on-write by default, store() only changes the saved files after load_buffer(mmap_mode="r+").
+    """
+
+    _buffer_files = {"obs_buf": "obs_buf.npy",
+                     "next_obs_buf": "next_obs_buf.npy",
+                     "acts_buf": "action_buffer.npy",
+                     "rews_buf": "rews_buf.npy",
+                     "done_buf": "done_buf.npy"}
+
+    def __init__(self, obs_dim: list, size: int, batch_size: int = 32, buffer_dir: str = None):
+        self.buffer_dir = buffer_dir
+        shapes = {"obs_buf": [size, *obs_dim],
+                  "next_obs_buf": [size, *obs_dim],
+                  "acts_buf": [size],
+                  "rews_buf": [size],
+                  "done_buf": [size]}
+        if buffer_dir is not None and not os.path.exists(buffer_dir):
+            os.makedirs(buffer_dir)
+        for name, shape in shapes.items():
+            if buffer_dir is None:
+                setattr(self, name, np.zeros(shape, dtype=np.float32))
+            else:
+                setattr(self, name, np.lib.format.open_memmap(os.path.join(buffer_dir, self._buffer_files[name]),
+                                                              mode="w+", dtype=np.float32, shape=tuple(shape)))
         self.max_size, self.batch_size = size, batch_size
         self.ptr, self.size = 0, 0
 
@@ -75,37 +95,53 @@ class ReplayBuffer2:
     def __len__(self) -> int:
         return self.size
 
-    def save_buffer(self, buffer_dir):
+    def save_buffer(self, buffer_dir, chunk_size: int = 65536):
+        """Save the arrays as .npy files, copied chunk by chunk through memory maps (no pickling, no full copy)."""
         if not os.path.exists(buffer_dir):
-            os.mkdir(buffer_dir)
-        np.save(os.path.join(buffer_dir, "obs_buf.npy"), self.obs_buf)
-        np.save(os.path.join(buffer_dir, "next_obs_buf.npy"), self.next_obs_buf)
-        np.save(os.path.join(buffer_dir, "action_buffer.npy"), self.acts_buf)
-        np.save(os.path.join(buffer_dir, "rews_buf.npy"), self.rews_buf)
-        np.save(os.path.join(buffer_dir, "done_buf.npy"), self.done_buf)
+            os.makedirs(buffer_dir)
+        for name, file_name in self._buffer_files.items():
+            array = getattr(self, name)
+            path = os.path.join(buffer_dir, file_name)
+            is_mapped_from_path = isinstance(array, np.memmap) and array.filename is not None and \
+                                  os.path.abspath(array.filename) == os.path.abspath(path)
+            if is_mapped_from_path and array.mode in ("r+", "w+"):
+                array.flush()
+                continue
+            # a copy-on-write or read-only map of path is still reading it, write next to it and swap
+            write_path = path + ".tmp.npy" if is_mapped_from_path else path
+            saved = np.lib.format.open_memmap(write_path, mode="w+", dtype=array.dtype, shape=array.shape)
+            for start in range(0, len(array), chunk_size):
+                saved[start:start + chunk_size] = array[start:start + chunk_size]
+            saved.flush()
+            del saved
+            if is_mapped_from_path:
+                os.replace(write_path, path)
         np.save(os.path.join(buffer_dir, "ms_bs_ptr_sz.npy"), np.array(
             [self.max_size, self.batch_size, self.ptr, self.size]))
 
-    def load_buffer(self, buffer_dir):
+    def load_buffer(self, buffer_dir, mmap_mode: str = "c"):
+        """Map the arrays saved by save_buffer.
+
+        mmap_mode="c" (copy-on-write) keeps store() away from the saved files until the next save_buffer,
+        None reads the arrays into memory, "r+" writes every store() through to the files (the pointers and the
+        priorities saved with them are only updated by save_buffer, a crash in between leaves them stale).
+        """
         if not os.path.exists(buffer_dir):
             print("Load Failed!")
             return False
-        self.obs_buf = np.load(os.path.join(buffer_dir, "obs_buf.npy"))
-        self.next_obs_buf = np.load(os.path.join(buffer_dir, "next_obs_buf.npy"))
-        self.acts_buf = np.load(os.path.join(buffer_dir, "action_buffer.npy"))
-        self.rews_buf = np.load(os.path.join(buffer_dir, "rews_buf.npy"))
-        self.done_buf = np.load(os.path.join(buffer_dir, "done_buf.npy"))
+        for name, file_name in self._buffer_files.items():
+            setattr(self, name, np.load(os.path.join(buffer_dir, file_name), mmap_mode=mmap_mode))
+        self.buffer_dir = buffer_dir if mmap_mode == "r+" else None
         params = np.load(os.path.join(buffer_dir, "ms_bs_ptr_sz.npy"))
-        self.max_size = params[0]
-        self.batch_size = params[1]
-        self.ptr = params[2]
-        self.size = params[3]
+        self.max_size = int(params[0])
+        self.batch_size = int(params[1])
+        self.ptr = int(params[2])
+        self.size = int(params[3])
         print(f"buffer_size: {len(self)}")
         return True
 
 
 from segment_tree import MinSegmentTree, SumSegmentTree
-import random
 
 
 class PrioritizedReplayBuffer2(ReplayBuffer2):
@@ -125,12 +161,13 @@ class PrioritizedReplayBuffer2(ReplayBuffer2):
             obs_dim: list,
             size: int,
             batch_size: int = 32,
-            alpha: float = 0.6
+            alpha: float = 0.6,
+            buffer_dir: str = None
     ):
         """Initialization."""
         assert alpha >= 0
 
-        super(PrioritizedReplayBuffer2, self).__init__(obs_dim, size, batch_size)
+        super(PrioritizedReplayBuffer2, self).__init__(obs_dim, size, batch_size, buffer_dir)
         self.max_priority, self.tree_ptr = 1.0, 0
         self.alpha = alpha
 
@@ -169,7 +206,7 @@ class PrioritizedReplayBuffer2(ReplayBuffer2):
         acts = self.acts_buf[indices]
         rews = self.rews_buf[indices]
         done = self.done_buf[indices]
-        weights = np.array([self._calculate_weight(i, beta) for i in indices])
+        weights = self._calculate_weights(indices, beta)
 
         return dict(
             obs=obs,
@@ -183,41 +220,53 @@ class PrioritizedReplayBuffer2(ReplayBuffer2):
 
     def update_priorities(self, indices: List[int], priorities: np.ndarray):
         """Update priorities of sampled transitions."""
+        indices = np.asarray(indices)
+        priorities = np.asarray(priorities, dtype=np.float64)
         assert len(indices) == len(priorities)
+        assert np.all(priorities > 0)
+        assert np.all((0 <= indices) & (indices < len(self)))
 
-        for idx, priority in zip(indices, priorities):
-            assert priority > 0
-            assert 0 <= idx < len(self)
-
-            self.sum_tree[idx] = priority ** self.alpha
-            self.min_tree[idx] = priority ** self.alpha
-
-            self.max_priority = max(self.max_priority, priority)
+        self.sum_tree.update(indices, priorities ** self.alpha)
+        self.min_tree.update(indices, priorities ** self.alpha)
+        self.max_priority = max(self.max_priority, float(priorities.max(initial=0)))
 
-    def _sample_proportional(self) -> List[int]:
-        """Sample indices based on proportions."""
-        indices = []
-        p_total = self.sum_tree.sum(0, len(self) - 1)
+    def _sample_proportional(self) -> np.ndarray:
+        """Sample indices based on proportions, one uniform sample in each of batch_size equal segments."""
+        p_total = self.sum_tree.sum()
         segment = p_total / self.batch_size
+        upperbounds = segment * (np.arange(self.batch_size) + np.random.uniform(size=self.batch_size))
+        indices = self.sum_tree.retrieve_batch(np.minimum(upperbounds, p_total))
+        return np.minimum(indices, len(self) - 1)
 
-        for i in range(self.batch_size):
-            a = segment * i
-            b = segment * (i + 1)
-            upperbound = random.uniform(a, b)
-            idx = self.sum_tree.retrieve(upperbound)
-            indices.append(idx)
+    def _calculate_weights(self, indices: np.ndarray, beta: float) -> np.ndarray:
+        """Calculate the weights of the experiences at indices, the tree sum and min are read once."""
+        p_total = self.sum_tree.sum()
+        # get max weight
+        p_min = self.min_tree.min() / p_total
+        max_weight = (p_min * len(self)) ** (-beta)
 
-        return indices
+        # calculate weights
+        p_samples = self.sum_tree.get(indices) / p_total
+        weights = (p_samples * len(self)) ** (-beta)
+        return weights / max_weight
 
     def _calculate_weight(self, idx: int, beta: float):
         """Calculate the weight of the experience at idx."""
-        # get max weight
-        p_min = self.min_tree.min() / self.sum_tree.sum()
-        max_weight = (p_min * len(self)) ** (-beta)
+        return float(self._calculate_weights(np.array([idx]), beta)[0])
 
-        # calculate weights
-        p_sample = self.sum_tree[idx] / self.sum_tree.sum()
-        weight = (p_sample * len(self)) ** (-beta)
-        weight = weight / max_weight
+    def save_buffer(self, buffer_dir, chunk_size: int = 65536):
+        """Save the transitions and the priorities."""
+        super().save_buffer(buffer_dir, chunk_size)
+        np.save(os.path.join(buffer_dir, "priorities.npy"), self.sum_tree.get(np.arange(self.max_size)))
+        np.save(os.path.join(buffer_dir, "maxp_treeptr.npy"), np.array([self.max_priority, self.tree_ptr]))
 
-        return weight
+    def load_buffer(self, buffer_dir, mmap_mode: str = "c"):
+        """Load the transitions and rebuild the trees from the saved priorities, see ReplayBuffer2.load_buffer."""
+        if not super().load_buffer(buffer_dir, mmap_mode):
+            return False
+        priorities = np.load(os.path.join(buffer_dir, "priorities.npy"))
+        self.sum_tree.update(np.arange(len(priorities)), priorities)
+        self.min_tree.update(np.arange(len(self)), priorities[:len(self)])
+        self.max_priority, self.tree_ptr = np.load(os.path.join(buffer_dir, "maxp_treeptr.npy"))
+        self.tree_ptr = int(self.tree_ptr)
+        return True
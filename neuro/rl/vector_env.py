@@ -0,0 +1,146 @@
+"""
+N tube racks of env_r2.ENV stepped together with array operations
+the moves, rewards, and terminations follow ENV: the legality and done checks are the ones of env_meta.tubepuzzle
+run as python -m neuro.rl.vector_env to check a vector step against N single-rack steps
+"""
+import numpy as np
+from concurrent import futures
+from neuro.rl.env_r2 import ENV, GOAL, astar_action_seq, get_feasible_action_set
+from neuro.rl.env_meta.tubepuzzle import (isdone,
+                                          get_random_states,
+                                          get_fillable_movable_batch,
+                                          get_feasible_action_masks)
+
+
+class VectorENV:
+    """
+    N racks stepped together: the states are one N x rack_size integer array, and actions, rewards and terminations
+    are computed for all of them in one call with the same rules as ENV
+    a finished rack is reset in step, its final state is returned in info["final_states"]
+    """
+
+    def __init__(self, num_envs, rack_size=(5, 10), num_classes=5, observation_space_dim=10, action_space_dim=10,
+                 auto_reset=True, seed=None):
+        self.num_envs = num_envs
+        self.rack_size = rack_size
+        self.n_cells = int(np.prod(rack_size))
+        self.num_classes = num_classes
+        self.observation_space_dim = observation_space_dim
+        self.action_space_dim = action_space_dim
+        self.auto_reset = auto_reset
+        self.rng = np.random.default_rng(seed)
+        self.states = np.zeros((num_envs, *rack_size), dtype=int)
+        self.goal_patterns = np.zeros((num_envs, *rack_size), dtype=int)
+        self.episode_rewards = np.zeros(num_envs)
+        self.episode_lengths = np.zeros(num_envs, dtype=int)
+
+    def reset_state_goal(self, initstates, goal_patterns, indices=None):
+        indices = np.arange(self.num_envs) if indices is None else np.asarray(indices)
+        self.states[indices] = initstates
+        self.goal_patterns[indices] = goal_patterns
+        self.episode_rewards[indices] = 0
+        self.episode_lengths[indices] = 0
+        return self.states
+
+    def reset(self, indices=None):
+        """
+        a random start state per rack, drawn from self.rng, the goal pattern is GOAL as in ENV.reset
+        :param indices: racks to reset, None means all
+        :return: states
+        """
+        indices = np.arange(self.num_envs) if indices is None else np.asarray(indices)
+        initstates = np.array([get_random_states(self.rack_size, GOAL, rng=self.rng) for _ in indices], dtype=int)
+        return self.reset_state_goal(initstates, GOAL.copy(), indices)
+
+    def feasible_action_masks(self, states=None):
+        """
+        :return: num_envs x prod(rack_size)**2 bool array
+        """
+        return get_feasible_action_masks(self.states if states is None else states)
+
+    def sample_action_space(self, states=None):
+        """
+        one random feasible action per rack, 0 if a rack has none (as get_feasible_action_set)
+        """
+        masks = self.feasible_action_masks(states)
+        scores = np.where(masks, self.rng.random(masks.shape), -1)
+        return np.argmax(scores, axis=1)
+
+    def _expr_actions(self, actions):
+        actions = np.asarray(actions, dtype=int)
+        return actions % self.n_cells, actions // self.n_cells
+
+    def step(self, actions):
+        """
+        :param actions: num_envs int array
+        :return: states, rewards, dones, info
+        """
+        obj_ids, goal_ids = self._expr_actions(actions)
+        envs = np.arange(self.num_envs)
+        curr_states = self.states.reshape((self.num_envs, -1))
+        goal_patterns = self.goal_patterns.reshape((self.num_envs, -1))
+        moved_tubes = curr_states[envs, obj_ids]
+        nxt_states = curr_states.copy()
+        nxt_states[envs, goal_ids] = moved_tubes
+        nxt_states[envs, obj_ids] = 0
+        # illegal states, nothing can be filled or moved
+        nxt_fillable, nxt_movable = get_fillable_movable_batch(nxt_states.reshape(self.states.shape))
+        illegal = ~nxt_fillable.any(axis=(1, 2)) | ~nxt_movable.any(axis=(1, 2))
+        is_finished = isdone(nxt_states.reshape(self.states.shape), self.goal_patterns)
+        is_move_to_pattern = goal_patterns[envs, goal_ids] == moved_tubes
+        is_in_pattern = goal_patterns[envs, obj_ids] == moved_tubes
+        rewards = np.where(is_move_to_pattern & ~is_in_pattern, 1, 0)
+        rewards = np.where(is_finished, 50, rewards)
+        rewards = np.where(illegal, -1, rewards)
+        dones = illegal | is_finished
+        self.states = nxt_states.reshape(self.states.shape)
+        self.episode_rewards += rewards
+        self.episode_lengths += 1
+        info = {"episode_rewards": self.episode_rewards.copy(), "episode_lengths": self.episode_lengths.copy()}
+        if self.auto_reset and np.any(dones):
+            info["final_states"] = self.states.copy()
+            self.reset(np.flatnonzero(dones))
+        return self.states, rewards, dones, info
+
+    def gen_Astar_solutions(self, max_iter_cnt=500, max_workers=None):
+        """
+        A* demonstrations of all the racks
+        :param max_workers: number of processes, None means the number of cpus, 0 solves them in this process
+        :return: list of action sequences, None for the racks that are not solved within max_iter_cnt expansions
+        """
+        args = [(state, goal_pattern, max_iter_cnt) for state, goal_pattern in zip(self.states, self.goal_patterns)]
+        if max_workers == 0:
+            return [astar_action_seq(*arg) for arg in args]
+        with futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(astar_action_seq, *zip(*args)))
+
+
+if __name__ == "__main__":
+    rack_size = (5, 10)
+    num_envs = 16
+    n_steps = 200
+    vec_env = VectorENV(num_envs, rack_size=rack_size, auto_reset=False, seed=0)
+    states = vec_env.reset()
+    # every start state is different and is not a goal
+    assert len({state.tobytes() for state in states}) == num_envs
+    assert not isdone(states, vec_env.goal_patterns).any()
+    envs = [ENV(rack_size=rack_size) for _ in range(num_envs)]
+    for env, state, goal_pattern in zip(envs, states, vec_env.goal_patterns):
+        env.reset_state_goal(state.copy(), goal_pattern.copy())
+    is_running = np.ones(num_envs, dtype=bool)
+    n_checked = 0
+    for _ in range(n_steps):
+        actions = vec_env.sample_action_space()
+        for env, state, action in zip(envs, vec_env.states, actions):
+            assert action in get_feasible_action_set(state, rack_size)
+        states, rewards, dones, _ = vec_env.step(actions)
+        for i, (env, action) in enumerate(zip(envs, actions)):
+            if not is_running[i]:
+                continue
+            state, reward, done, _ = env.step(action)
+            assert np.array_equal(state, states[i]) and reward == rewards[i] and done == dones[i]
+            n_checked += 1
+        is_running &= ~dones
+        if not is_running.any():
+            break
+    print(f"vector steps match {n_checked} single-rack steps")
@@ -0,0 +1,220 @@
+"""
+Multi-robot controller runtime. All robot connections share one asyncio event loop that runs in a daemon thread.
+Supported connections: drivers.urx.ur_async.AsyncURRobot, drivers.xarm.core.comm.async_socket_port.AsyncSocketPort
+Each robot has a bounded queue of motions (joint moves and jointspace paths) executed in order; dispatching to a full
+queue suspends the caller (backpressure) while the other robots keep executing.
+"""
+
+import asyncio
+import threading
+
+
+class AsyncRobotRuntime(object):
+
+    def __init__(self, queue_size=4):
+        """
+        :param queue_size: default maximum number of pending motions per robot_s
+        """
+        self._queue_size = queue_size
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="async_robot_runtime", daemon=True)
+        self._thread.start()
+        self._robots = {}
+        self._queues = {}
+        self._workers = {}
+
+    @property
+    def loop(self):
+        return self._loop
+
+    @property
+    def robot_names(self):
+        return list(self._robots.keys())
+
+    def run(self, coro, timeout=None):
+        """
+        run a coroutine in the runtime loop and block until it finishes
+        must not be called from the runtime loop itself
+        """
+        return asyncio.run_coroutine_threadsafe(coro, self._loop).result(timeout)
+
+    async def _add_robot(self, name, connection, queue_size):
+        await connection.connect()
+        self._robots[name] = connection
+        self._queues[name] = asyncio.Queue(maxsize=queue_size)
+        self._workers[name] = self._loop.create_task(self._worker(name))
+
+    def add_robot(self, name, connection, queue_size=None):
+        """
+        connect and register a robot_s
+        :param name: str
+        :param connection: an unconnected AsyncURRobot or AsyncSocketPort
+        :param queue_size: maximum number of pending motions, None means using the default of the runtime
+        :return: a SyncRobotProxy
+        """
+        if name in self._robots:
+            raise ValueError("Robot {} is already registered!".format(name))
+        self.run(self._add_robot(name, connection, self._queue_size if queue_size is None else queue_size))
+        return SyncRobotProxy(self, name)
+
+    def get_robot(self, name):
+        return self._robots[name]
+
+    def get_proxy(self, name):
+        return SyncRobotProxy(self, name)
+
+    async def _worker(self, name):
+        connection = self._robots[name]
+        queue = self._queues[name]
+        while True:
+            method_name, target, kwargs, future = await queue.get()
+            try:
+                result = await getattr(connection, method_name)(target, wait=True, **kwargs)
+                if not future.done():
+                    future.set_result(result)
+            except Exception as e:
+                if not future.done():
+                    future.set_exception(e)
+            finally:
+                queue.task_done()
+
+    async def _put(self, name, method_name, target, kwargs):
+        future = self._loop.create_future()
+        await self._queues[name].put((method_name, target, kwargs, future))
+        return future
+
+    async def dispatch(self, name, path, **kwargs):
+        """
+        queue a jointspace path for a robot_s
+        suspends while the queue of the robot_s is full
+        :param name:
+        :param path: a list of 1xn lists/arrays
+        :param kwargs: passed to the move_jntspace_path of the connection
+        :return: an asyncio.Future resolved with the result of move_jntspace_path once the path is executed
+        """
+        return await self._put(name, "move_jntspace_path", path, kwargs)
+
+    async def dispatch_jnts(self, name, jnt_values, **kwargs):
+        """
+        queue a joint move for a robot_s, it is executed after the motions queued before it
+        suspends while the queue of the robot_s is full
+        :param name:
+        :param jnt_values: 1xn list/array
+        :param kwargs: passed to the move_jnts of the connection
+        :return: an asyncio.Future resolved with the result of move_jnts once the robot_s reaches jnt_values
+        """
+        return await self._put(name, "move_jnts", jnt_values, kwargs)
+
+    async def execute(self, name, path, **kwargs):
+        return await (await self.dispatch(name, path, **kwargs))
+
+    async def execute_jnts(self, name, jnt_values, **kwargs):
+        return await (await self.dispatch_jnts(name, jnt_values, **kwargs))
+
+    async def execute_all(self, paths, **kwargs):
+        """
+        execute paths of different robots concurrently
+        :param paths: {name: path}
+        :return: {name: result}
+        """
+        names = list(paths.keys())
+        results = await asyncio.gather(*[self.execute(name, paths[name], **kwargs) for name in names])
+        return dict(zip(names, results))
+
+    async def get_all_jnt_values(self):
+        names = self.robot_names
+        results = await asyncio.gather(*[self._robots[name].get_jnt_values() for name in names])
+        return dict(zip(names, results))
+
+    async def _close(self):
+        for worker in self._workers.values():
+            worker.cancel()
+        await asyncio.gather(*self._workers.values(), return_exceptions=True)
+        await asyncio.gather(*[robot.close() for robot in self._robots.values()], return_exceptions=True)
+        self._robots = {}
+        self._queues = {}
+        self._workers = {}
+
+    def close(self):
+        self.run(self._close())
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+class SyncRobotProxy(object):
+    """
+    synchronous facade of a robot_s registered in an AsyncRobotRuntime
+    the methods follow the naming of the synchronous controllers, e.g. robot_con.ur.ur3_rtq85_x.UR3Rtq85X
+    """
+
+    def __init__(self, runtime, name):
+        self._runtime = runtime
+        self._name = name
+
+    @property
+    def name(self):
+        return self._name
+
+    @property
+    def connection(self):
+        return self._runtime.get_robot(self._name)
+
+    def move_jnts(self, jnt_values, wait=True, **kwargs):
+        """
+        :param jnt_values: 1xn list/array
+        :param wait: False returns as soon as the move is queued; the call still blocks while the queue is full
+        :return: result of move_jnts if wait is True, else None
+        """
+        if wait:
+            return self._runtime.run(self._runtime.execute_jnts(self._name, jnt_values, **kwargs))
+        self._runtime.run(self._runtime.dispatch_jnts(self._name, jnt_values, **kwargs))
+
+    def move_jntspace_path(self, path, wait=True, **kwargs):
+        """
+        :param path: a list of 1xn lists/arrays
+        :param wait: False returns as soon as the path is queued; the call still blocks while the queue is full
+        :return: result of move_jntspace_path if wait is True, else None
+        """
+        if wait:
+            return self._runtime.run(self._runtime.execute(self._name, path, **kwargs))
+        self._runtime.run(self._runtime.dispatch(self._name, path, **kwargs))
+
+    def get_jnt_values(self):
+        return self._runtime.run(self.connection.get_jnt_values())
+
+
+if __name__ == '__main__':
+    import time
+    import drivers.urx.ur_async as ura
+    import drivers.xarm.core.comm.async_socket_port as xasp
+
+    runtime = AsyncRobotRuntime(queue_size=2)
+    fakes = [ura.FakeURController(jnt_speed=1) for _ in range(4)] + \
+            [xasp.FakeXArmController(jnt_speed=1) for _ in range(4)]
+    for fake in fakes:
+        runtime.run(fake.start())
+    for i, fake in enumerate(fakes[:4]):
+        runtime.add_robot("ur{}".format(i), ura.AsyncURRobot('127.0.0.1', fake.rt_port, fake.secondary_port))
+    for i, fake in enumerate(fakes[4:]):
+        runtime.add_robot("xarm{}".format(i), xasp.AsyncSocketPort('127.0.0.1', fake.port))
+    path = [[.1] * 6, [.2] * 6, [0] * 6]
+    tic = time.time()
+    runtime.run(runtime.execute_all({name: path for name in runtime.robot_names}))
+    print("8 robots, one path each", time.time() - tic)
+    proxy = runtime.get_proxy("ur0")
+    tic = time.time()
+    for _ in range(3):
+        proxy.move_jntspace_path(path, wait=False)
+    proxy.move_jntspace_path(path)
+    print("ur0, four queued paths", time.time() - tic, proxy.get_jnt_values())
+    # a joint move waits for the path queued before it
+    proxy.move_jntspace_path(path, wait=False)
+    proxy.move_jnts([.3] * 6)
+    print("ur0, path then joint move", proxy.get_jnt_values())
+    # disconnect before the fake controllers stop, otherwise the connections log the broken streams
+    for name in runtime.robot_names:
+        runtime.run(runtime.get_robot(name).close())
+    for fake in fakes:
+        runtime.run(fake.stop())
+    runtime.close()
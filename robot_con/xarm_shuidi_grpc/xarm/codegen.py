@@ -7,6 +7,6 @@ protoc.main(
         '-I.',
         '--python_out=.',
         '--grpc_python_out=.',
-        './xarm_shuidi_grpc.proto',
+        './xarm.proto',
     )
 )
\ No newline at end of file
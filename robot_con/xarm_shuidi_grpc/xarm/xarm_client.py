@@ -64,6 +64,62 @@ class XArm7(object):
         else:
             print("The rbt_s has finished the given motion.")
 
+    def move_jspace_path_stream(self, path, time_interval, chunk_size=100):
+        """
+        same as move_jspace_path, but the interpolated path is uploaded in chunks of little-endian float32
+        the server starts moving once the first chunk arrives
+        :param path: [jnt_values0, jnt_values1, ...], results of motion planning
+        :param chunk_size: number of configurations per message
+        :return:
+        """
+        if not path or path is None:
+            raise ValueError("The given is incorrect!")
+        control_frequency = .005
+        tpply = pwply.PiecewisePoly(method='linear')
+        interpolated_path, _, _ = tpply.interpolate_by_time_interval(path=path,
+                                                                     control_frequency=control_frequency,
+                                                                     time_interval=time_interval)
+        return_value = self.stream_interpolated_path(interpolated_path, chunk_size=chunk_size)
+        if return_value.value == xarm_msg.Status.ERROR:
+            print("Something went wrong with the server!! Try again!")
+            raise Exception()
+        else:
+            print("The rbt_s has finished the given motion.")
+
+    def stream_interpolated_path(self, interpolated_path, chunk_size=100):
+        """
+        :param interpolated_path: nxm array, sent as is
+        :return: xarm_msg.Status
+        """
+        interpolated_path = np.ascontiguousarray(interpolated_path, dtype='<f4')
+
+        def gen_chunks():
+            for i in range(0, len(interpolated_path), chunk_size):
+                chunk = interpolated_path[i:i + chunk_size]
+                yield xarm_msg.PathChunk(length=chunk.shape[0], njnts=chunk.shape[1], data=chunk.tobytes())
+
+        return self.stub.stream_jspace_path(gen_chunks())
+
+    def subscribe_jnt_values(self, rate=100):
+        """
+        iterate over joint values pushed by the server
+        the returned arrays are read-only views of the received messages
+        call .cancel() on the iterator to stop the subscription
+        :param rate: Hz
+        :return: iterator of (seq, timestamp, jnt_values)
+        """
+        responses = self.stub.subscribe_jnt_values(xarm_msg.JntStateRequest(rate=rate))
+
+        class _Subscription(object):
+            def __iter__(self):
+                for msg in responses:
+                    yield msg.seq, msg.timestamp, np.frombuffer(msg.data, dtype='<f4')
+
+            def cancel(self):
+                responses.cancel()
+
+        return _Subscription()
+
     def get_jawwidth(self):
         gripper_msg = self.stub.get_gripper_status(xarm_msg.Empty())
         return (gripper_msg.position+10)/860
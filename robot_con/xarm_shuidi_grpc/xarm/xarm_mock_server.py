@@ -0,0 +1,122 @@
+"""
+XArmServer backed by a simulated arm, for benchmarking the RPCs without hardware
+run this file to compare unary and streaming path upload and to measure the joint-state subscription
+"""
+
+import grpc
+import time
+import threading
+import numpy as np
+from concurrent import futures
+import robot_con.xarm_shuidi_grpc.xarm.xarm_pb2 as xarm_msg
+import robot_con.xarm_shuidi_grpc.xarm.xarm_pb2_grpc as xarm_rpc
+import robot_con.xarm_shuidi_grpc.xarm.xarm_server as xarm_server
+
+
+class FakeXArmAPI(object):
+    """
+    the subset of drivers.xarm.wrapper.xarm_api.XArmAPI used by XArmServer
+    """
+
+    def __init__(self, njnts=7):
+        self._lock = threading.Lock()
+        self._jnt_values = [0.0] * njnts
+        self._gripper_position = 850
+        self.n_servo_cmds = 0
+        self.first_servo_time = None
+
+    def get_servo_angle(self, is_radian=True):
+        with self._lock:
+            return 0, list(self._jnt_values)
+
+    def set_servo_angle_j(self, angles, is_radian=True, **kwargs):
+        with self._lock:
+            if self.first_servo_time is None:
+                self.first_servo_time = time.time()
+            self._jnt_values = list(angles)
+            self.n_servo_cmds += 1
+        return 0
+
+    def set_gripper_speed(self, speed):
+        return 0
+
+    def set_gripper_position(self, position, wait=False):
+        self._gripper_position = position
+        return 0
+
+    def get_gripper_position(self):
+        return 0, self._gripper_position
+
+    def reset_counters(self):
+        with self._lock:
+            self.n_servo_cmds = 0
+            self.first_servo_time = None
+
+
+class XArmMockServer(xarm_server.XArmServer):
+
+    def __init__(self, njnts=7, servo_interval=0):
+        """
+        :param servo_interval: seconds between two servo commands, 0 measures the pure rpc throughput
+        """
+        xarm_rpc.XArmServicer.__init__(self)
+        self._servo_interval = servo_interval
+        self._xai_x = FakeXArmAPI(njnts=njnts)
+        self._speed = 5000
+
+    @property
+    def arm(self):
+        return self._xai_x
+
+
+def serve(host="localhost:18300", njnts=7, servo_interval=0):
+    """
+    start a mock server without blocking
+    :return: grpc server, XArmMockServer
+    """
+    options = [('grpc.max_message_length', 100 * 1024 * 1024),
+               ('grpc.max_receive_message_length', 100 * 1024 * 1024)]
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=10), options=options)
+    mock_server = XArmMockServer(njnts=njnts, servo_interval=servo_interval)
+    xarm_rpc.add_XArmServicer_to_server(mock_server, server)
+    server.add_insecure_port(host)
+    server.start()
+    return server, mock_server
+
+
+if __name__ == "__main__":
+    import robot_con.xarm_shuidi_grpc.xarm.xarm_client as xarm_client
+
+    host = "localhost:18301"
+    server, mock_server = serve(host=host)
+    rbt_x = xarm_client.XArm7(host=host)
+    rbt_x.stub = xarm_rpc.XArmStub(grpc.insecure_channel(host, options=[
+        ('grpc.max_send_message_length', 100 * 1024 * 1024)]))
+    for npoints in [1000, 10000, 100000]:
+        path = np.random.rand(npoints, 7)
+        # unary, float64, whole path in one message
+        mock_server.arm.reset_counters()
+        tic = time.time()
+        rbt_x.stub.move_jspace_path(xarm_msg.Path(length=npoints, njnts=7, data=path.tobytes()))
+        toc = time.time()
+        print(f"unary  {npoints:>6} confs: total {toc - tic:.4f}s, "
+              f"first execution after {mock_server.arm.first_servo_time - tic:.4f}s")
+        # client streaming, float32 chunks
+        mock_server.arm.reset_counters()
+        tic = time.time()
+        rbt_x.stream_interpolated_path(path, chunk_size=100)
+        toc = time.time()
+        print(f"stream {npoints:>6} confs: total {toc - tic:.4f}s, "
+              f"first execution after {mock_server.arm.first_servo_time - tic:.4f}s")
+    for rate in [100, 500]:
+        subscription = rbt_x.subscribe_jnt_values(rate=rate)
+        latencies = []
+        tic = time.time()
+        for seq, timestamp, jnt_values in subscription:
+            latencies.append(time.time() - timestamp)
+            if time.time() - tic > 2:
+                subscription.cancel()
+                break
+        print(f"subscribe at {rate}Hz: received {len(latencies) / (time.time() - tic):.1f}Hz, "
+              f"mean latency {np.mean(latencies) * 1000:.3f}ms, max latency {np.max(latencies) * 1000:.3f}ms")
+    server.stop(0)
@@ -1,6 +1,6 @@
 # -*- coding: utf-8 -*-
 # Generated by the protocol buffer compiler.  DO NOT EDIT!
-# source: xarm_shuidi_grpc.proto
+# source: xarm.proto
 """Generated protocol buffer code."""
 from google.protobuf import descriptor as _descriptor
 from google.protobuf import message as _message
@@ -14,12 +14,12 @@ _sym_db = _symbol_database.Default()
 
 
 DESCRIPTOR = _descriptor.FileDescriptor(
-  name='xarm_shuidi_grpc.proto',
+  name='xarm.proto',
   package='',
   syntax='proto3',
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_pb=b'\n\nxarm_shuidi_grpc.proto\"\x07\n\x05\x45mpty\"P\n\x06Status\x12\"\n\x05value\x18\x01 \x01(\x0e\x32\x13.Status.StatusValue\"\"\n\x0bStatusValue\x12\t\n\x05\x45RROR\x10\x00\x12\x08\n\x04\x44ONE\x10\x01\"\x19\n\tJntValues\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\"3\n\x04Path\x12\x0e\n\x06length\x18\x01 \x01(\x05\x12\r\n\x05njnts\x18\x02 \x01(\x05\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\"0\n\rGripperStatus\x12\r\n\x05speed\x18\x01 \x01(\x05\x12\x10\n\x08position\x18\x02 \x01(\x05\x32\xa9\x01\n\x04XArm\x12$\n\x10move_jspace_path\x12\x05.Path\x1a\x07.Status\"\x00\x12&\n\x0eget_jnt_values\x12\x06.Empty\x1a\n.JntValues\"\x00\x12#\n\x06jaw_to\x12\x0e.GripperStatus\x1a\x07.Status\"\x00\x12.\n\x12get_gripper_status\x12\x06.Empty\x1a\x0e.GripperStatus\"\x00\x62\x06proto3'
+  serialized_pb=b'\n\nxarm.proto\"\x07\n\x05\x45mpty\"P\n\x06Status\x12\"\n\x05value\x18\x01 \x01(\x0e\x32\x13.Status.StatusValue\"\"\n\x0bStatusValue\x12\t\n\x05\x45RROR\x10\x00\x12\x08\n\x04\x44ONE\x10\x01\"\x19\n\tJntValues\x12\x0c\n\x04\x64\x61ta\x18\x01 \x01(\x0c\"3\n\x04Path\x12\x0e\n\x06length\x18\x01 \x01(\x05\x12\r\n\x05njnts\x18\x02 \x01(\x05\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\"8\n\tPathChunk\x12\x0e\n\x06length\x18\x01 \x01(\x05\x12\r\n\x05njnts\x18\x02 \x01(\x05\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\"\x1f\n\x0fJntStateRequest\x12\x0c\n\x04rate\x18\x01 \x01(\x02\"8\n\x08JntState\x12\x0b\n\x03seq\x18\x01 \x01(\x04\x12\x11\n\ttimestamp\x18\x02 \x01(\x01\x12\x0c\n\x04\x64\x61ta\x18\x03 \x01(\x0c\"0\n\rGripperStatus\x12\r\n\x05speed\x18\x01 \x01(\x05\x12\x10\n\x08position\x18\x02 \x01(\x05\x32\x91\x02\n\x04XArm\x12$\n\x10move_jspace_path\x12\x05.Path\x1a\x07.Status\"\x00\x12&\n\x0eget_jnt_values\x12\x06.Empty\x1a\n.JntValues\"\x00\x12#\n\x06jaw_to\x12\x0e.GripperStatus\x1a\x07.Status\"\x00\x12.\n\x12get_gripper_status\x12\x06.Empty\x1a\x0e.GripperStatus\"\x00\x12-\n\x12stream_jspace_path\x12\n.PathChunk\x1a\x07.Status\"\x00(\x01\x12\x37\n\x14subscribe_jnt_values\x12\x10.JntStateRequest\x1a\t.JntState\"\x00\x30\x01\x62\x06proto3'
 )
 
 
@@ -149,14 +149,14 @@ _PATH = _descriptor.Descriptor(
   create_key=_descriptor._internal_create_key,
   fields=[
     _descriptor.FieldDescriptor(
-      name='axis_length', full_name='Path.axis_length', index=0,
+      name='length', full_name='Path.length', index=0,
       number=1, type=5, cpp_type=1, label=1,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
       is_extension=False, extension_scope=None,
       serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
     _descriptor.FieldDescriptor(
-      name='n_jnts', full_name='Path.n_jnts', index=1,
+      name='njnts', full_name='Path.njnts', index=1,
       number=2, type=5, cpp_type=1, label=1,
       has_default_value=False, default_value=0,
       message_type=None, enum_type=None, containing_type=None,
@@ -186,6 +186,130 @@ _PATH = _descriptor.Descriptor(
 )
 
 
+_PATHCHUNK = _descriptor.Descriptor(
+  name='PathChunk',
+  full_name='PathChunk',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='length', full_name='PathChunk.length', index=0,
+      number=1, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='njnts', full_name='PathChunk.njnts', index=1,
+      number=2, type=5, cpp_type=1, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='data', full_name='PathChunk.data', index=2,
+      number=3, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=185,
+  serialized_end=241,
+)
+
+
+_JNTSTATEREQUEST = _descriptor.Descriptor(
+  name='JntStateRequest',
+  full_name='JntStateRequest',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='rate', full_name='JntStateRequest.rate', index=0,
+      number=1, type=2, cpp_type=6, label=1,
+      has_default_value=False, default_value=float(0),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=243,
+  serialized_end=274,
+)
+
+
+_JNTSTATE = _descriptor.Descriptor(
+  name='JntState',
+  full_name='JntState',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='seq', full_name='JntState.seq', index=0,
+      number=1, type=4, cpp_type=4, label=1,
+      has_default_value=False, default_value=0,
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='timestamp', full_name='JntState.timestamp', index=1,
+      number=2, type=1, cpp_type=5, label=1,
+      has_default_value=False, default_value=float(0),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='data', full_name='JntState.data', index=2,
+      number=3, type=12, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"",
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=276,
+  serialized_end=332,
+)
+
+
 _GRIPPERSTATUS = _descriptor.Descriptor(
   name='GripperStatus',
   full_name='GripperStatus',
@@ -220,8 +344,8 @@ _GRIPPERSTATUS = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=185,
-  serialized_end=233,
+  serialized_start=334,
+  serialized_end=382,
 )
 
 _STATUS.fields_by_name['value'].enum_type = _STATUS_STATUSVALUE
@@ -230,6 +354,9 @@ DESCRIPTOR.message_types_by_name['Empty'] = _EMPTY
 DESCRIPTOR.message_types_by_name['Status'] = _STATUS
 DESCRIPTOR.message_types_by_name['JntValues'] = _JNTVALUES
 DESCRIPTOR.message_types_by_name['Path'] = _PATH
+DESCRIPTOR.message_types_by_name['PathChunk'] = _PATHCHUNK
+DESCRIPTOR.message_types_by_name['JntStateRequest'] = _JNTSTATEREQUEST
+DESCRIPTOR.message_types_by_name['JntState'] = _JNTSTATE
 DESCRIPTOR.message_types_by_name['GripperStatus'] = _GRIPPERSTATUS
 _sym_db.RegisterFileDescriptor(DESCRIPTOR)
 
@@ -261,6 +388,27 @@ Path = _reflection.GeneratedProtocolMessageType('Path', (_message.Message,), {
   })
 _sym_db.RegisterMessage(Path)
 
+PathChunk = _reflection.GeneratedProtocolMessageType('PathChunk', (_message.Message,), {
+  'DESCRIPTOR' : _PATHCHUNK,
+  '__module__' : 'xarm_pb2'
+  # @@protoc_insertion_point(class_scope:PathChunk)
+  })
+_sym_db.RegisterMessage(PathChunk)
+
+JntStateRequest = _reflection.GeneratedProtocolMessageType('JntStateRequest', (_message.Message,), {
+  'DESCRIPTOR' : _JNTSTATEREQUEST,
+  '__module__' : 'xarm_pb2'
+  # @@protoc_insertion_point(class_scope:JntStateRequest)
+  })
+_sym_db.RegisterMessage(JntStateRequest)
+
+JntState = _reflection.GeneratedProtocolMessageType('JntState', (_message.Message,), {
+  'DESCRIPTOR' : _JNTSTATE,
+  '__module__' : 'xarm_pb2'
+  # @@protoc_insertion_point(class_scope:JntState)
+  })
+_sym_db.RegisterMessage(JntState)
+
 GripperStatus = _reflection.GeneratedProtocolMessageType('GripperStatus', (_message.Message,), {
   'DESCRIPTOR' : _GRIPPERSTATUS,
   '__module__' : 'xarm_pb2'
@@ -277,8 +425,8 @@ _XARM = _descriptor.ServiceDescriptor(
   index=0,
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_start=236,
-  serialized_end=405,
+  serialized_start=385,
+  serialized_end=658,
   methods=[
   _descriptor.MethodDescriptor(
     name='move_jspace_path',
@@ -320,6 +468,26 @@ _XARM = _descriptor.ServiceDescriptor(
     serialized_options=None,
     create_key=_descriptor._internal_create_key,
   ),
+  _descriptor.MethodDescriptor(
+    name='stream_jspace_path',
+    full_name='XArm.stream_jspace_path',
+    index=4,
+    containing_service=None,
+    input_type=_PATHCHUNK,
+    output_type=_STATUS,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
+  _descriptor.MethodDescriptor(
+    name='subscribe_jnt_values',
+    full_name='XArm.subscribe_jnt_values',
+    index=5,
+    containing_service=None,
+    input_type=_JNTSTATEREQUEST,
+    output_type=_JNTSTATE,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
 ])
 _sym_db.RegisterServiceDescriptor(_XARM)
 
@@ -34,6 +34,16 @@ class XArmStub(object):
                 request_serializer=xarm__pb2.Empty.SerializeToString,
                 response_deserializer=xarm__pb2.GripperStatus.FromString,
                 )
+        self.stream_jspace_path = channel.stream_unary(
+                '/XArm/stream_jspace_path',
+                request_serializer=xarm__pb2.PathChunk.SerializeToString,
+                response_deserializer=xarm__pb2.Status.FromString,
+                )
+        self.subscribe_jnt_values = channel.unary_stream(
+                '/XArm/subscribe_jnt_values',
+                request_serializer=xarm__pb2.JntStateRequest.SerializeToString,
+                response_deserializer=xarm__pb2.JntState.FromString,
+                )
 
 
 class XArmServicer(object):
@@ -63,6 +73,20 @@ class XArmServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def stream_jspace_path(self, request_iterator, context):
+        """the server starts executing as soon as the first chunk arrives
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
+    def subscribe_jnt_values(self, request, context):
+        """the server pushes joint values at the requested rate until the client cancels
+        """
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_XArmServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -72,12 +96,12 @@ def add_XArmServicer_to_server(servicer, server):
                     response_serializer=xarm__pb2.Status.SerializeToString,
             ),
             'get_jnt_values': grpc.unary_unary_rpc_method_handler(
-                    servicer.get_joint_values,
+                    servicer.get_jnt_values,
                     request_deserializer=xarm__pb2.Empty.FromString,
                     response_serializer=xarm__pb2.JntValues.SerializeToString,
             ),
             'jaw_to': grpc.unary_unary_rpc_method_handler(
-                    servicer.change_jaw_width,
+                    servicer.jaw_to,
                     request_deserializer=xarm__pb2.GripperStatus.FromString,
                     response_serializer=xarm__pb2.Status.SerializeToString,
             ),
@@ -86,6 +110,16 @@ def add_XArmServicer_to_server(servicer, server):
                     request_deserializer=xarm__pb2.Empty.FromString,
                     response_serializer=xarm__pb2.GripperStatus.SerializeToString,
             ),
+            'stream_jspace_path': grpc.stream_unary_rpc_method_handler(
+                    servicer.stream_jspace_path,
+                    request_deserializer=xarm__pb2.PathChunk.FromString,
+                    response_serializer=xarm__pb2.Status.SerializeToString,
+            ),
+            'subscribe_jnt_values': grpc.unary_stream_rpc_method_handler(
+                    servicer.subscribe_jnt_values,
+                    request_deserializer=xarm__pb2.JntStateRequest.FromString,
+                    response_serializer=xarm__pb2.JntState.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'XArm', rpc_method_handlers)
@@ -163,3 +197,37 @@ class XArm(object):
             xarm__pb2.GripperStatus.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def stream_jspace_path(request_iterator,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.stream_unary(request_iterator, target, '/XArm/stream_jspace_path',
+            xarm__pb2.PathChunk.SerializeToString,
+            xarm__pb2.Status.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def subscribe_jnt_values(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_stream(request, target, '/XArm/subscribe_jnt_values',
+            xarm__pb2.JntStateRequest.SerializeToString,
+            xarm__pb2.JntState.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
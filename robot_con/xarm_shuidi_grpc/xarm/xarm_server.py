@@ -9,12 +9,14 @@ import numpy as np
 
 class XArmServer(xarm_rpc.XArmServicer):
 
-    def __init__(self, arm_ip):
+    def __init__(self, arm_ip, servo_interval=.01):
         """
         :param _arm_x: an instancde of arm.XArmAPI
+        :param servo_interval: seconds between two servo commands of a path
         :return:
         """
         super().__init__()
+        self._servo_interval = servo_interval
         self._xai_x = xai.XArmAPI(port=arm_ip)
         if self._xai_x.has_err_warn:
             if self._xai_x.get_err_warn_code()[1][0] == 1:
@@ -29,8 +31,8 @@ class XArmServer(xarm_rpc.XArmServicer):
         self._xai_x.clean_gripper_error()
         self._xai_x.set_gripper_enable(1)
         self._xai_x.set_gripper_mode(0)
-        self.__speed = 5000
-        self._xai_x.set_gripper_speed(self.__speed) # 1000-5000
+        self._speed = 5000
+        self._xai_x.set_gripper_speed(self._speed) # 1000-5000
         self._xai_x.set_gripper_position(850) # 1000-5000
 
     def get_jnt_values(self, request, context):
@@ -46,17 +48,47 @@ class XArmServer(xarm_rpc.XArmServicer):
         path = flat_path_data.reshape((nrow, ncol))
         for jnt_values in path.tolist():
             self._xai_x.set_servo_angle_j(jnt_values, is_radian=True)
-            time.sleep(.01)
+            time.sleep(self._servo_interval)
         return xarm_msg.Status(value=xarm_msg.Status.DONE)
 
+    def stream_jspace_path(self, request_iterator, context):
+        """
+        execute chunks as they arrive, the first chunk is executed while the rest are still being sent
+        chunk data is little-endian float32
+        """
+        for chunk in request_iterator:
+            path = np.frombuffer(chunk.data, dtype='<f4').reshape((chunk.length, chunk.njnts))
+            for jnt_values in path.tolist():
+                self._xai_x.set_servo_angle_j(jnt_values, is_radian=True)
+                time.sleep(self._servo_interval)
+        return xarm_msg.Status(value=xarm_msg.Status.DONE)
+
+    def subscribe_jnt_values(self, request, context):
+        """
+        push joint values at request.rate Hz until the client cancels
+        """
+        interval = 1.0 / request.rate if request.rate > 0 else .01
+        seq = 0
+        next_time = time.time()
+        while context.is_active():
+            code, jnt_values = self._xai_x.get_servo_angle(is_radian=True)
+            if code != 0:
+                context.abort(grpc.StatusCode.INTERNAL, f"The returned code of get_servo_angle is wrong! Code: {code}")
+            yield xarm_msg.JntState(seq=seq,
+                                    timestamp=time.time(),
+                                    data=np.asarray(jnt_values, dtype='<f4').tobytes())
+            seq += 1
+            next_time += interval
+            time.sleep(max(next_time - time.time(), 0))
+
     def jaw_to(self, request, context):
-        self.__speed = request.speed
-        self._xai_x.set_gripper_speed(self.__speed)
+        self._speed = request.speed
+        self._xai_x.set_gripper_speed(self._speed)
         self._xai_x.set_gripper_position(request.position, wait=True)
         return xarm_msg.Status(value=xarm_msg.Status.DONE)
 
     def get_gripper_status(self, request, context):
-        speed = self.__speed
+        speed = self._speed
         code, position = self._xai_x.get_gripper_position()
         if code != 0:
             raise Exception(f"The returned code of get_gripper_position is wrong! Code: {code}")
@@ -0,0 +1,227 @@
+"""
+Smooth robot-obstacle clearance through signed distance fields
+every link of a JLChain is approximated by a few spheres fixed in its local frame, every static obstacle by the
+signed distance field of its mesh (basis/trimesh/sdf.py, cached per mesh), the clearance of a link is the minimum of
+sdf(center) - radius over its spheres and it is differentiated w.r.t. the joint values through the joint axes
+all queries are batched over configurations, they are meant for the constraints of optimizers and the costs of
+planners; is_collided remains the exact check
+"""
+import numpy as np
+import basis.trimesh.sample as trm_sample
+import robot_sim._kinematics.constant as rkc
+
+
+def gen_lnk_spheres(cmodel, n_spheres=8, n_samples=2000, seed=0):
+    """
+    spheres enclosing the surface of a link mesh
+    the centers are spread by farthest point sampling over surface samples, every sample is assigned to its
+    nearest center and the radius of a sphere reaches its farthest assigned sample
+    :param cmodel: CollisionModel, its mesh is in the local frame of the link
+    :param n_spheres:
+    :param n_samples: surface samples
+    :param seed:
+    :return: centers (n_spheres x 3, local frame), radii (n_spheres,)
+    """
+    trm_mesh = cmodel.trm_mesh
+    # area weighted samples on the faces, with the vertices so that sharp corners are covered
+    points = np.vstack((trm_sample.sample_surface(trm_mesh, n_samples, seed=seed)[0], trm_mesh.vertices))
+    n_spheres = min(n_spheres, len(points))
+    center_ids = [int(np.argmin(np.linalg.norm(points - points.mean(axis=0), axis=1)))]
+    min_dists = np.linalg.norm(points - points[center_ids[0]], axis=1)
+    for _ in range(n_spheres - 1):
+        center_ids.append(int(np.argmax(min_dists)))
+        min_dists = np.minimum(min_dists, np.linalg.norm(points - points[center_ids[-1]], axis=1))
+    centers = points[center_ids]
+    dists = np.linalg.norm(points[:, None, :] - centers[None, :, :], axis=2)
+    nearest = np.argmin(dists, axis=1)
+    radii = np.zeros(n_spheres)
+    np.maximum.at(radii, nearest, dists[np.arange(len(points)), nearest])
+    return centers, radii
+
+
+class SDFScene(object):
+    """
+    static obstacles as signed distance fields, the fields are built in the mesh frames (cached by the meshes)
+    and the query points are moved into them
+    """
+
+    def __init__(self, obstacle_list, pitch=.005, pad=2):
+        """
+        :param obstacle_list: list of CollisionModel, their poses are read once
+        :param pitch: voxel size of the fields
+        :param pad: voxels around the bounds of every mesh
+        """
+        self.sdfs = []
+        self.rotmats = []
+        self.poss = []
+        for obstacle in obstacle_list:
+            self.sdfs.append(obstacle.trm_mesh.sdf(pitch, pad=pad))
+            self.rotmats.append(np.array(obstacle.rotmat))
+            self.poss.append(np.array(obstacle.pos))
+
+    def distance_gradient(self, points):
+        """
+        :param points: nx3 nparray in the world frame
+        :return: distances (n,) to the closest obstacle, gradients (nx3) in the world frame
+        """
+        points = np.asarray(points, dtype=float).reshape((-1, 3))
+        distances = np.full(len(points), np.inf)
+        gradients = np.zeros((len(points), 3))
+        for sdf, pos, rotmat in zip(self.sdfs, self.poss, self.rotmats):
+            loc_distances, loc_gradients = sdf.distance_gradient((points - pos) @ rotmat)
+            closer = loc_distances < distances
+            distances[closer] = loc_distances[closer]
+            gradients[closer] = loc_gradients[closer] @ rotmat.T
+        return distances, gradients
+
+
+class JLCClearance(object):
+    """
+    per-link clearance of a JLChain against an SDFScene
+    """
+
+    def __init__(self, jlc, scene, n_spheres=8, lnk_spheres=None):
+        """
+        :param jlc: JLChain
+        :param scene: SDFScene
+        :param n_spheres: spheres per link when they are generated
+        :param lnk_spheres: list of (centers, radii) or None per link in the order of JLChain.gen_lnk_homomats
+                            (anchor.lnk, jnts[0].lnk, ...), None generates them with gen_lnk_spheres
+        """
+        self.jlc = jlc
+        self.scene = scene
+        lnks = [jlc.anchor.lnk] + [jnt.lnk for jnt in jlc.jnts]
+        if lnk_spheres is None:
+            lnk_spheres = [None if lnk is None or lnk.cmodel is None else gen_lnk_spheres(lnk.cmodel,
+                                                                                        n_spheres=n_spheres)
+                           for lnk in lnks]
+        self.n_lnks = len(lnks)
+        centers, radii, lnk_ids = [], [], []
+        for lnk_id, spheres in enumerate(lnk_spheres):
+            if spheres is None:
+                continue
+            centers.append(spheres[0])
+            radii.append(spheres[1])
+            lnk_ids.append(np.full(len(spheres[1]), lnk_id))
+        self.sphere_centers = np.vstack(centers) if centers else np.zeros((0, 3))
+        self.sphere_radii = np.concatenate(radii) if radii else np.zeros(0)
+        self.sphere_lnk_ids = np.concatenate(lnk_ids) if lnk_ids else np.zeros(0, dtype=int)
+
+    def _batch_frames(self, jnt_vals_batch):
+        """
+        :return: link homomats (k x n_lnks x 4 x 4), global joint positions and unit axes (k x n_dof x 3)
+        """
+        n_confs = len(jnt_vals_batch)
+        n_dof = self.jlc.n_dof
+        lnk_homomats = np.empty((n_confs, self.n_lnks, 4, 4))
+        jnt_poss = np.empty((n_confs, n_dof, 3))
+        jnt_axes = np.empty((n_confs, n_dof, 3))
+        homomat = np.tile(self.jlc.anchor.homomat, (n_confs, 1, 1))
+        lnk = self.jlc.anchor.lnk
+        lnk_homomats[:, 0] = homomat if lnk is None else homomat @ lnk.loc_homomat
+        for i, jnt in enumerate(self.jlc.jnts):
+            jnt_homomat_0 = homomat @ jnt.loc_homomat
+            jnt_poss[:, i] = jnt_homomat_0[:, :3, 3]
+            jnt_axes[:, i] = jnt_homomat_0[:, :3, :3] @ (jnt.loc_motion_ax / np.linalg.norm(jnt.loc_motion_ax))
+            homomat = homomat @ jnt.get_motion_homomats(motion_vals=jnt_vals_batch[:, i])
+            lnk_homomats[:, i + 1] = homomat if jnt.lnk is None else homomat @ jnt.lnk.loc_homomat
+        return lnk_homomats, jnt_poss, jnt_axes
+
+    def clearance(self, jnt_vals_batch, toggle_grad=True):
+        """
+        :param jnt_vals_batch: kxn_dof nparray, or a single configuration
+        :param toggle_grad:
+        :return: lnk_clearances (k x n_lnks, np.inf for links without spheres),
+                 lnk_grads (k x n_lnks x n_dof, d clearance / d joint values) if toggle_grad
+        """
+        jnt_vals_batch = np.asarray(jnt_vals_batch, dtype=float).reshape((-1, self.jlc.n_dof))
+        n_confs = len(jnt_vals_batch)
+        lnk_homomats, jnt_poss, jnt_axes = self._batch_frames(jnt_vals_batch)
+        # k x n_spheres x 3
+        sphere_homomats = lnk_homomats[:, self.sphere_lnk_ids]
+        centers = np.einsum('ksij,sj->ksi', sphere_homomats[:, :, :3, :3], self.sphere_centers) + \
+                  sphere_homomats[:, :, :3, 3]
+        distances, gradients = self.scene.distance_gradient(centers.reshape((-1, 3)))
+        distances = distances.reshape((n_confs, -1)) - self.sphere_radii
+        # per link minimum and the sphere that reaches it
+        lnk_clearances = np.full((n_confs, self.n_lnks), np.inf)
+        closest = np.full((n_confs, self.n_lnks), -1)
+        for lnk_id in np.unique(self.sphere_lnk_ids):
+            sphere_ids = np.flatnonzero(self.sphere_lnk_ids == lnk_id)
+            arg = np.argmin(distances[:, sphere_ids], axis=1)
+            closest[:, lnk_id] = sphere_ids[arg]
+            lnk_clearances[:, lnk_id] = distances[np.arange(n_confs), sphere_ids[arg]]
+        if not toggle_grad:
+            return lnk_clearances
+        gradients = gradients.reshape((n_confs, -1, 3))
+        lnk_grads = np.zeros((n_confs, self.n_lnks, self.jlc.n_dof))
+        has_spheres = closest[0] >= 0
+        sphere_ids = closest[:, has_spheres]
+        conf_ids = np.arange(n_confs)[:, None]
+        # k x n_lnks' x 3
+        closest_centers = centers[conf_ids, sphere_ids]
+        closest_grads = gradients[conf_ids, sphere_ids]
+        for i, jnt in enumerate(self.jlc.jnts):
+            # joint i moves the links after it
+            moved = np.arange(self.n_lnks)[has_spheres] > i
+            if not moved.any():
+                continue
+            if jnt.type == rkc.JntType.REVOLUTE:
+                center_vels = np.cross(jnt_axes[:, i][:, None, :], closest_centers - jnt_poss[:, i][:, None, :])
+            else:
+                center_vels = np.broadcast_to(jnt_axes[:, i][:, None, :], closest_centers.shape)
+            dots = np.einsum('kli,kli->kl', closest_grads, center_vels)
+            lnk_grads[:, np.flatnonzero(has_spheres)[moved], i] = dots[:, moved]
+        return lnk_clearances, lnk_grads
+
+    def min_clearance(self, jnt_vals, toggle_grad=True):
+        """
+        the smallest clearance of a single configuration, for optimizer constraints
+        :param jnt_vals: 1xn_dof nparray
+        :return: clearance, gradient (n_dof,) if toggle_grad
+        """
+        if not toggle_grad:
+            return float(self.clearance(jnt_vals, toggle_grad=False)[0].min())
+        lnk_clearances, lnk_grads = self.clearance(jnt_vals, toggle_grad=True)
+        lnk_id = int(np.argmin(lnk_clearances[0]))
+        return float(lnk_clearances[0, lnk_id]), lnk_grads[0, lnk_id]
+
+
+if __name__ == '__main__':
+    import time
+    import basis.trimesh_factory as trf
+    import modeling.collision_model as mcm
+    import robot_sim._kinematics.jlchain as rkjlc
+
+    jlc = rkjlc.JLChain(n_dof=6)
+    for i in range(jlc.n_dof):
+        jlc.jnts[i].loc_pos = np.array([0, 0, .1]) if i > 0 else np.zeros(3)
+        jlc.jnts[i].loc_motion_ax = np.array([0, 1, 0]) if i % 2 else np.array([0, 0, 1])
+        jlc.jnts[i].motion_rng = np.array([-np.pi, np.pi])
+        jlc.jnts[i].lnk.cmodel = mcm.CollisionModel(trf.gen_box(xyz_lengths=np.array([.03, .03, .1]),
+                                                                pos=np.array([0, 0, .05])))
+    jlc.finalize(ik_solver=None)
+    obstacle = mcm.CollisionModel(trf.gen_box(xyz_lengths=np.array([.2, .2, .2])))
+    obstacle.pos = np.array([.3, 0, .3])
+    tic = time.time()
+    clearance = JLCClearance(jlc, SDFScene([obstacle], pitch=.005))
+    print(f"spheres and sdf: {time.time() - tic:.3f}s")
+    jnt_vals_batch = np.random.default_rng(0).uniform(-np.pi, np.pi, (2000, jlc.n_dof))
+    tic = time.time()
+    lnk_clearances, lnk_grads = clearance.clearance(jnt_vals_batch)
+    toc = time.time() - tic
+    print(f"clearance + joint gradients of {len(jnt_vals_batch)} configurations: {toc:.3f}s")
+    # exact mesh checks, one configuration at a time
+    n_check = 200
+    tic = time.time()
+    mesh_collided = []
+    for jnt_vals in jnt_vals_batch[:n_check]:
+        jlc.forward_kinematics(jnt_vals, toggle_jac=False, update=True)
+        mesh_collided.append(any(jnt.lnk.cmodel.is_mcdwith([obstacle]) for jnt in jlc.jnts))
+    toc_mesh = time.time() - tic
+    print(f"mesh collision checks: {toc_mesh / n_check * 1e3:.3f}ms per configuration, "
+          f"clearance: {toc / len(jnt_vals_batch) * 1e3:.3f}ms per configuration")
+    sphere_collided = lnk_clearances[:n_check].min(axis=1) < 0
+    print(f"mesh collisions: {sum(mesh_collided)}, covered by the spheres: "
+          f"{np.sum(sphere_collided[np.array(mesh_collided)])}, sphere-only (conservative): "
+          f"{np.sum(sphere_collided & ~np.array(mesh_collided))}")
@@ -3,6 +3,7 @@ Data driven ik solver
 author: weiwei
 date: 20231107
 """
+import copy
 import warnings
 
 import numpy as np
@@ -62,6 +63,23 @@ class DDIKSolver(object):
                 self.persist_data(path=self.path)
                 self.evolve_data(n_times=100000)
 
+    def __deepcopy__(self, memo):
+        """
+        the kd tree and the joint values are only replaced or appended by evolve_data, thus shared by the copies
+        :param memo:
+        :return:
+        """
+        clone = self.__class__.__new__(self.__class__)
+        memo[id(self)] = clone
+        for key, value in self.__dict__.items():
+            if key == "querry_tree":
+                clone.__dict__[key] = value
+            elif key == "jnt_data":
+                clone.__dict__[key] = list(value)
+            else:
+                clone.__dict__[key] = copy.deepcopy(value, memo)
+        return clone
+
     def _rotmat_to_vec(self, rotmat, method='q'):
         """
         convert a rotmat to vectors
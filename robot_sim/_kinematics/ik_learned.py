@@ -0,0 +1,395 @@
+"""
+Learned-seed ik solver
+a fully connected network maps tcp poses to joint values, its predictions are used as seeds of pinv_wc
+the network is exported to a npz file (see MLPSeedModel.save and neuro/ik/cobotta_fitting.py) and evaluated with
+numpy matmuls, so that many targets are inferred at once on the cpu without torch
+"""
+import os
+import time
+import warnings
+import numpy as np
+from scipy.spatial.transform import Rotation
+from tqdm import tqdm
+import robot_sim._kinematics.ik_num as rkn
+
+DEFAULT_MODEL_FILE = 'ik_seed_mlp.npz'
+
+
+def encode_tcp(tgt_poss, tgt_rotmats, input_type='xyz6d'):
+    """
+    :param tgt_poss: kx3 nparray
+    :param tgt_rotmats: kx3x3 nparray
+    :param input_type: 'xyzrpy': position + rm.rotmat_to_euler (the inputs of neuro/ik/cobotta_fitting.py);
+                       'xyz6d': position + the first two columns of the rotmat, continuous over SO(3)
+    :return: kx6 or kx9 nparray
+    """
+    tgt_poss = np.asarray(tgt_poss, dtype=float).reshape((-1, 3))
+    tgt_rotmats = np.asarray(tgt_rotmats, dtype=float).reshape((-1, 3, 3))
+    if input_type == 'xyzrpy':
+        # 'sxyz' of rm.rotmat_to_euler is the extrinsic 'xyz' of scipy, gimbal locks are resolved the same way
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)
+            return np.hstack((tgt_poss, Rotation.from_matrix(tgt_rotmats).as_euler('xyz')))
+    if input_type == 'xyz6d':
+        return np.hstack((tgt_poss, tgt_rotmats[:, :, :2].transpose(0, 2, 1).reshape((-1, 6))))
+    raise ValueError(f"Unknown input_type {input_type}.")
+
+
+class MLPSeedModel(object):
+    """
+    fully connected network with leaky relu activations, the last layer is linear
+    the input normalization (x-in_min)/(in_max-in_min) and the output denormalization
+    y*out_scale+out_offset are folded into the first and the last layers, so that inference is only fused matmuls
+    """
+
+    def __init__(self,
+                 weights,
+                 biases,
+                 in_min=None,
+                 in_max=None,
+                 out_scale=None,
+                 out_offset=None,
+                 input_type='xyzrpy',
+                 leaky_slope=.01):
+        """
+        :param weights: list of in_features x out_features nparrays (the transposes of torch.nn.Linear.weight)
+        :param biases: list of 1 x out_features nparrays
+        :param in_min, in_max: input normalization, None means no normalization
+        :param out_scale, out_offset: output denormalization, None means no denormalization
+        :param input_type: see encode_tcp
+        :param leaky_slope: negative slope of the leaky relu
+        """
+        self.weights = [np.array(w, dtype=np.float64) for w in weights]
+        self.biases = [np.array(b, dtype=np.float64).ravel() for b in biases]
+        self.input_type = input_type
+        self.leaky_slope = leaky_slope
+        self.in_min = None if in_min is None else np.asarray(in_min, dtype=np.float64)
+        self.in_max = None if in_max is None else np.asarray(in_max, dtype=np.float64)
+        self.out_scale = None if out_scale is None else np.asarray(out_scale, dtype=np.float64)
+        self.out_offset = None if out_offset is None else np.asarray(out_offset, dtype=np.float64)
+        # folded float32 copies for inference
+        self._weights = [w.copy() for w in self.weights]
+        self._biases = [b.copy() for b in self.biases]
+        if self.in_min is not None:
+            in_rng = self.in_max - self.in_min
+            in_rng[np.abs(in_rng) < 1e-12] = 1.0
+            self._biases[0] = self._biases[0] - (self.in_min / in_rng) @ self._weights[0]
+            self._weights[0] = self._weights[0] / in_rng[:, None]
+        if self.out_scale is not None:
+            self._weights[-1] = self._weights[-1] * self.out_scale
+            self._biases[-1] = self._biases[-1] * self.out_scale + self.out_offset
+        self._weights = [w.astype(np.float32) for w in self._weights]
+        self._biases = [b.astype(np.float32) for b in self._biases]
+
+    @property
+    def n_in(self):
+        return self.weights[0].shape[0]
+
+    @property
+    def n_out(self):
+        return self.weights[-1].shape[1]
+
+    def forward(self, x):
+        """
+        :param x: k x n_in nparray of raw (not normalized) inputs
+        :return: k x n_out nparray
+        """
+        x = np.asarray(x, dtype=np.float32).reshape((-1, self.n_in))
+        for w, b in zip(self._weights[:-1], self._biases[:-1]):
+            x = x @ w
+            x += b
+            np.maximum(x, self.leaky_slope * x, out=x)
+        return (x @ self._weights[-1] + self._biases[-1]).astype(np.float64)
+
+    def predict(self, tgt_poss, tgt_rotmats):
+        """
+        :param tgt_poss: kx3 nparray
+        :param tgt_rotmats: kx3x3 nparray
+        :return: k x n_dof nparray of joint values
+        """
+        return self.forward(encode_tcp(tgt_poss, tgt_rotmats, input_type=self.input_type))
+
+    def save(self, file):
+        data = {'n_layers': len(self.weights), 'input_type': self.input_type, 'leaky_slope': self.leaky_slope}
+        for i, (w, b) in enumerate(zip(self.weights, self.biases)):
+            data[f'w{i}'] = w
+            data[f'b{i}'] = b
+        for key in ['in_min', 'in_max', 'out_scale', 'out_offset']:
+            if getattr(self, key) is not None:
+                data[key] = getattr(self, key)
+        np.savez(file, **data)
+
+    @classmethod
+    def load(cls, file):
+        with np.load(file) as data:
+            n_layers = int(data['n_layers'])
+            optional = {key: data[key] for key in ['in_min', 'in_max', 'out_scale', 'out_offset'] if key in data}
+            return cls(weights=[data[f'w{i}'] for i in range(n_layers)],
+                       biases=[data[f'b{i}'] for i in range(n_layers)],
+                       input_type=str(data['input_type']),
+                       leaky_slope=float(data['leaky_slope']),
+                       **optional)
+
+
+def fit_seed_model(jlc,
+                   n_samples=200000,
+                   n_hidden=(256, 128),
+                   n_epochs=30,
+                   batch_size=256,
+                   learning_rate=1e-3,
+                   input_type='xyz6d',
+                   leaky_slope=.01,
+                   seed=None,
+                   toggle_dbg=True):
+    """
+    train a MLPSeedModel with adam on uniformly sampled joint values, numpy only
+    neuro/ik/cobotta_fitting.py trains the same kind of network with torch
+    :param jlc:
+    :param n_samples: number of (tcp, joint values) pairs
+    :param n_hidden: sizes of the hidden layers
+    :return: MLPSeedModel
+    """
+    rng = np.random.default_rng(seed)
+    jnt_rngs = np.asarray(jlc.jnt_rngs, dtype=np.float64)
+    jnt_data = rng.uniform(jnt_rngs[:, 0], jnt_rngs[:, 1], size=(n_samples, jlc.n_dof))
+    tcp_data = encode_tcp(*jlc.batch_forward_kinematics(jnt_data), input_type=input_type)
+    in_min, in_max = tcp_data.min(axis=0), tcp_data.max(axis=0)
+    in_rng = np.where(in_max - in_min < 1e-12, 1.0, in_max - in_min)
+    out_offset = jnt_rngs.mean(axis=1)
+    out_scale = (jnt_rngs[:, 1] - jnt_rngs[:, 0]) / 2
+    x_data = ((tcp_data - in_min) / in_rng).astype(np.float32)
+    y_data = ((jnt_data - out_offset) / out_scale).astype(np.float32)
+    sizes = [x_data.shape[1], *n_hidden, jlc.n_dof]
+    params = []
+    for n_in, n_out in zip(sizes[:-1], sizes[1:]):
+        # he initialization for the leaky relus
+        params.append(rng.normal(0, np.sqrt(2 / n_in), size=(n_in, n_out)).astype(np.float32))
+        params.append(np.zeros(n_out, dtype=np.float32))
+    moments = [np.zeros_like(p) for p in params]
+    velocities = [np.zeros_like(p) for p in params]
+    beta1, beta2, eps = .9, .999, 1e-8
+    n_layers = len(sizes) - 1
+    step = 0
+    for epoch in range(n_epochs):
+        order = rng.permutation(n_samples)
+        epoch_loss = 0.0
+        for start in range(0, n_samples, batch_size):
+            batch = order[start:start + batch_size]
+            x, y = x_data[batch], y_data[batch]
+            # forward, keep the pre-activations for backpropagation
+            activations = [x]
+            pre_activations = []
+            for i in range(n_layers):
+                z = activations[-1] @ params[2 * i] + params[2 * i + 1]
+                pre_activations.append(z)
+                activations.append(np.where(z > 0, z, leaky_slope * z) if i < n_layers - 1 else z)
+            diff = activations[-1] - y
+            epoch_loss += float(np.mean(diff ** 2)) * len(batch)
+            # backward of the mse loss
+            grad = 2 * diff / diff.size
+            grads = [None] * len(params)
+            for i in reversed(range(n_layers)):
+                grads[2 * i] = activations[i].T @ grad
+                grads[2 * i + 1] = grad.sum(axis=0)
+                if i > 0:
+                    grad = grad @ params[2 * i].T
+                    grad *= np.where(pre_activations[i - 1] > 0, 1, leaky_slope).astype(np.float32)
+            step += 1
+            lr_t = learning_rate * np.sqrt(1 - beta2 ** step) / (1 - beta1 ** step)
+            for p, g, m, v in zip(params, grads, moments, velocities):
+                m *= beta1
+                m += (1 - beta1) * g
+                v *= beta2
+                v += (1 - beta2) * g * g
+                p -= (lr_t * m / (np.sqrt(v) + eps)).astype(np.float32)
+        if toggle_dbg:
+            print(f"epoch {epoch + 1}/{n_epochs}, loss: {epoch_loss / n_samples:.6f}")
+    return MLPSeedModel(weights=params[0::2],
+                        biases=params[1::2],
+                        in_min=in_min,
+                        in_max=in_max,
+                        out_scale=out_scale,
+                        out_offset=out_offset,
+                        input_type=input_type,
+                        leaky_slope=leaky_slope)
+
+
+def train_seed_model(jlc, path, model_file=DEFAULT_MODEL_FILE, **kwargs):
+    """
+    fit a seed model for jlc and save it as path/model_file, this is the only place where the model is trained
+    the file is meant to be kept next to the robot file, e.g. path=os.path.dirname(__file__) of the robot
+    :param jlc:
+    :param path:
+    :param model_file:
+    :param kwargs: passed to fit_seed_model
+    :return: the path of the saved file
+    """
+    model_path = os.path.join(path, model_file)
+    print("Training the seed model of the learned ik solver. It is costly.")
+    fit_seed_model(jlc, **kwargs).save(model_path)
+    print(f"learned ik model file saved to {model_path}.")
+    return model_path
+
+
+class LearnedIKSolver(object):
+    def __init__(self,
+                 jlc,
+                 path,
+                 model_file=DEFAULT_MODEL_FILE,
+                 max_n_iter=10,
+                 n_extra_seeds=3):
+        """
+        :param jlc:
+        :param path: the directory of the model file, usually the directory of the robot file
+        :param model_file: an exported MLPSeedModel, see train_seed_model and neuro/ik/cobotta_fitting.py
+        :param max_n_iter: max_n_iter of pinv_wc
+        :param n_extra_seeds: number of jittered seeds tried when the predicted seed fails
+        """
+        self.jlc = jlc
+        self.path = path
+        self.model_file = model_file
+        self._max_n_iter = max_n_iter
+        self._n_extra_seeds = n_extra_seeds
+        self._jnt_rngs = np.asarray(self.jlc.jnt_rngs, dtype=np.float64)
+        self._rng = np.random.default_rng()
+        self._backbone_solver = rkn.NumIKSolver(self.jlc)
+        self._backbone_solver_func = self._backbone_solver.pinv_wc
+        model_path = os.path.join(self.path, self.model_file)
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"The seed model {model_path} of the learned ik solver does not exist. "
+                                    f"Train it with robot_sim._kinematics.ik_learned.train_seed_model "
+                                    f"or export one with neuro/ik/cobotta_fitting.py.")
+        self.model = MLPSeedModel.load(model_path)
+        if self.model.n_out != self.jlc.n_dof:
+            raise ValueError(f"The model predicts {self.model.n_out} joints but the chain has {self.jlc.n_dof}.")
+
+    def predict_seeds(self, tgt_poss, tgt_rotmats):
+        """
+        batched inference, the predictions are clipped to the joint ranges
+        :param tgt_poss: kx3 nparray
+        :param tgt_rotmats: kx3x3 nparray
+        :return: k x n_dof nparray
+        """
+        seeds = self.model.predict(tgt_poss, tgt_rotmats)
+        return np.clip(seeds, self._jnt_rngs[:, 0], self._jnt_rngs[:, 1])
+
+    def _refine(self, tgt_pos, tgt_rotmat, seed_jnt_vals):
+        result = self._backbone_solver_func(tgt_pos=tgt_pos,
+                                            tgt_rotmat=tgt_rotmat,
+                                            seed_jnt_vals=seed_jnt_vals,
+                                            max_n_iter=self._max_n_iter)
+        if result is not None:
+            return result
+        # jitter around the prediction, the network averages over ik branches and may land between them
+        jitter = (self._jnt_rngs[:, 1] - self._jnt_rngs[:, 0]) * .1
+        for _ in range(self._n_extra_seeds):
+            jittered = np.clip(seed_jnt_vals + self._rng.normal(0, 1, len(jitter)) * jitter,
+                               self._jnt_rngs[:, 0], self._jnt_rngs[:, 1])
+            result = self._backbone_solver_func(tgt_pos=tgt_pos,
+                                                tgt_rotmat=tgt_rotmat,
+                                                seed_jnt_vals=jittered,
+                                                max_n_iter=self._max_n_iter)
+            if result is not None:
+                return result
+        return None
+
+    def ik(self,
+           tgt_pos,
+           tgt_rotmat,
+           seed_jnt_vals=None,
+           toggle_dbg=False):
+        """
+        :param tgt_pos:
+        :param tgt_rotmat:
+        :param seed_jnt_vals: used instead of the prediction if given
+        :param toggle_dbg: ignored
+        :return:
+        """
+        if seed_jnt_vals is not None:
+            return self._backbone_solver_func(tgt_pos=tgt_pos,
+                                              tgt_rotmat=tgt_rotmat,
+                                              seed_jnt_vals=seed_jnt_vals,
+                                              max_n_iter=self._max_n_iter)
+        return self._refine(tgt_pos, tgt_rotmat, self.predict_seeds(tgt_pos, tgt_rotmat)[0])
+
+    def ik_batch(self, tgt_poss, tgt_rotmats):
+        """
+        solve many targets, the seeds are predicted with one forward pass
+        :param tgt_poss: kx3 nparray
+        :param tgt_rotmats: kx3x3 nparray
+        :return: list of k joint values, None for the failed targets
+        """
+        tgt_poss = np.asarray(tgt_poss, dtype=float).reshape((-1, 3))
+        tgt_rotmats = np.asarray(tgt_rotmats, dtype=float).reshape((-1, 3, 3))
+        seeds = self.predict_seeds(tgt_poss, tgt_rotmats)
+        return [self._refine(tgt_pos, tgt_rotmat, seed) for tgt_pos, tgt_rotmat, seed in
+                zip(tgt_poss, tgt_rotmats, seeds)]
+
+    def test_success_rate(self, n_times=100):
+        jnt_vals = self._rng.uniform(self._jnt_rngs[:, 0], self._jnt_rngs[:, 1], size=(n_times, self.jlc.n_dof))
+        tgt_poss, tgt_rotmats = self.jlc.batch_forward_kinematics(jnt_vals)
+        tic = time.time()
+        results = self.ik_batch(tgt_poss, tgt_rotmats)
+        toc = time.time()
+        success_rate = sum(result is not None for result in results) / n_times
+        print("------------------testing results------------------")
+        print(f"The current success rate is: {success_rate * 100}%")
+        print('average time cost', (toc - tic) / n_times)
+        return success_rate
+
+
+if __name__ == '__main__':
+    import robot_sim._kinematics.jlchain as rskj
+    import tempfile
+    import robot_sim._kinematics.ik_dd as rkd
+
+    jlc = rskj.JLChain(n_dof=6)
+    jlc.jnts[0].loc_pos = np.array([0, 0, 0])
+    jlc.jnts[0].loc_motion_ax = np.array([0, 0, 1])
+    jlc.jnts[0].motion_rng = np.array([-np.pi / 2, np.pi / 2])
+    jlc.jnts[1].loc_pos = np.array([0, 0, .05])
+    jlc.jnts[1].loc_motion_ax = np.array([0, 1, 0])
+    jlc.jnts[1].motion_rng = np.array([-np.pi / 2, np.pi / 2])
+    jlc.jnts[2].loc_pos = np.array([0, 0, .2])
+    jlc.jnts[2].loc_motion_ax = np.array([0, 1, 0])
+    jlc.jnts[2].motion_rng = np.array([-np.pi, np.pi])
+    jlc.jnts[3].loc_pos = np.array([0, 0, .2])
+    jlc.jnts[3].loc_motion_ax = np.array([0, 0, 1])
+    jlc.jnts[3].motion_rng = np.array([-np.pi / 2, np.pi / 2])
+    jlc.jnts[4].loc_pos = np.array([0, 0, .1])
+    jlc.jnts[4].loc_motion_ax = np.array([0, 1, 0])
+    jlc.jnts[4].motion_rng = np.array([-np.pi / 2, np.pi / 2])
+    jlc.jnts[5].loc_pos = np.array([0, 0, .05])
+    jlc.jnts[5].loc_motion_ax = np.array([0, 0, 1])
+    jlc.jnts[5].motion_rng = np.array([-np.pi / 2, np.pi / 2])
+    jlc.tcp_loc_pos = np.array([0, 0, .01])
+    jlc.finalize()
+
+    # the same targets for both solvers
+    n_targets = 500
+    rng = np.random.default_rng(0)
+    jnt_rngs = np.asarray(jlc.jnt_rngs)
+    tgt_poss, tgt_rotmats = jlc.batch_forward_kinematics(
+        rng.uniform(jnt_rngs[:, 0], jnt_rngs[:, 1], size=(n_targets, jlc.n_dof)))
+    # the chain of this example has no robot file, its model is kept in the temporary directory
+    model_path = os.path.join(tempfile.gettempdir(), DEFAULT_MODEL_FILE)
+    if not os.path.exists(model_path):
+        train_seed_model(jlc, path=tempfile.gettempdir())
+    learned_solver = LearnedIKSolver(jlc, path=tempfile.gettempdir())
+    tic = time.time()
+    learned_solver.predict_seeds(tgt_poss, tgt_rotmats)
+    print(f"batched seed inference: {(time.time() - tic) / n_targets * 1e6:.1f}us per target")
+    for name, solver in [("learned", learned_solver), ("ddik", rkd.DDIKSolver(jlc, path=os.getcwd() + '/'))]:
+        time_list = []
+        success = 0
+        for tgt_pos, tgt_rotmat in tqdm(zip(tgt_poss, tgt_rotmats), total=n_targets, desc=name):
+            tic = time.time()
+            result = solver.ik(tgt_pos, tgt_rotmat)
+            time_list.append(time.time() - tic)
+            success += result is not None
+        print(f"{name}: success rate {success / n_targets * 100:.1f}%, "
+              f"average time cost {np.mean(time_list) * 1000:.2f}ms, max {np.max(time_list) * 1000:.2f}ms")
+    tic = time.time()
+    results = learned_solver.ik_batch(tgt_poss, tgt_rotmats)
+    print(f"learned ik_batch: success rate {sum(r is not None for r in results) / n_targets * 100:.1f}%, "
+          f"average time cost {(time.time() - tic) / n_targets * 1000:.2f}ms")
@@ -83,7 +83,13 @@ class OptIKSolver(object):
             tgt_rotmat,
             seed_jnt_vals=None,
             max_n_iter=100,
+            clearance=None,
+            min_clearance=.0,
             toggle_debug=False):
+        """
+        :param clearance: clearance.JLCClearance, None means no collision constraint
+        :param min_clearance: smallest allowed link-obstacle clearance when clearance is given
+        """
         def _objective(x):
             q_diff = seed_jnt_vals - x
             return q_diff.dot(q_diff)
@@ -98,8 +104,19 @@ class OptIKSolver(object):
                                                                                    tgt_rotmat=tgt_rotmat)
             return 1e-6 - tcp_err_vec.dot(tcp_err_vec)
 
-        constraints = {'type': 'ineq',
-                       'fun': _con_tcp}
+        def _con_clearance(x):
+            return clearance.min_clearance(x, toggle_grad=False) - min_clearance
+
+        def _con_clearance_jac(x):
+            return clearance.min_clearance(x, toggle_grad=True)[1]
+
+        constraints = [{'type': 'ineq',
+                        'fun': _con_tcp}]
+        if clearance is not None:
+            # smooth and with an analytic jacobian, unlike a boolean collision check
+            constraints.append({'type': 'ineq',
+                                'fun': _con_clearance,
+                                'jac': _con_clearance_jac})
         options = {'ftol': 1e-6,
                    'eps': 1e-12,
                    'maxiter': max_n_iter,
@@ -53,6 +53,10 @@ class Link(object):
         self._loc_rotmat = rotmat
         self.update_globals(pos=self.gl_pos, rotmat=self.gl_rotmat)
 
+    @property
+    def loc_homomat(self):
+        return rm.homomat_from_posrot(pos=self._loc_pos, rotmat=self._loc_rotmat)
+
     @property
     def gl_pos(self):
         return self._gl_pos
@@ -250,6 +254,24 @@ class Joint(object):
             pos_by_motion = self.loc_motion_ax * motion_val
             return self.loc_homomat @ rm.homomat_from_posrot(pos=pos_by_motion, rotmat=np.eye(3))
 
+    def get_motion_homomats(self, motion_vals):
+        """
+        vectorized get_motion_homomat
+        :param motion_vals: 1xn nparray
+        :return: nx4x4 nparray
+        """
+        motion_vals = np.asarray(motion_vals, dtype=float)
+        motion_homomats = np.tile(np.eye(4), (len(motion_vals), 1, 1))
+        if self.type == rkc.JntType.REVOLUTE:
+            ax = rm.unit_vector(self.loc_motion_ax)
+            skew_ax = rm.skew_symmetric(ax)
+            sin_vals = np.sin(motion_vals)[:, None, None]
+            cos_vals = np.cos(motion_vals)[:, None, None]
+            motion_homomats[:, :3, :3] = np.eye(3) + sin_vals * skew_ax + (1 - cos_vals) * (skew_ax @ skew_ax)
+        elif self.type == rkc.JntType.PRISMATIC:
+            motion_homomats[:, :3, 3] = motion_vals[:, None] * self.loc_motion_ax
+        return self.loc_homomat @ motion_homomats
+
 
 if __name__ == '__main__':
     import visualization.panda.world as wd
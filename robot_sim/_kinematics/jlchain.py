@@ -13,6 +13,7 @@ import robot_sim._kinematics.jl as rkjl
 import robot_sim._kinematics.ik_num as rkn
 import robot_sim._kinematics.ik_opt as rko
 import robot_sim._kinematics.ik_dd as rkd
+import robot_sim._kinematics.ik_learned as rkl
 import robot_sim._kinematics.ik_trac as rkt
 import basis.constant as cst
 
@@ -154,6 +155,43 @@ class JLChain(object):
             else:
                 return tcp_gl_pos, tcp_gl_rotmat
 
+    def _gen_batch_jnt_homomats(self, jnt_vals_batch, n_jnts):
+        """
+        batched forward kinematics of the joint frames, the chain itself is not updated
+        :param jnt_vals_batch: a kxn_dof nparray
+        :param n_jnts: the frames of jnts[0], ..., jnts[n_jnts-1] are generated
+        :return: a generator of kx4x4 nparrays, the anchor frame first
+        """
+        homomat = np.tile(self.anchor.homomat, (len(jnt_vals_batch), 1, 1))
+        yield homomat
+        for i in range(n_jnts):
+            homomat = homomat @ self.jnts[i].get_motion_homomats(motion_vals=jnt_vals_batch[:, i])
+            yield homomat
+
+    def gen_lnk_homomats(self, jnt_vals_path):
+        """
+        batched forward kinematics of the links, the chain itself is not updated
+        :param jnt_vals_path: a kxn_dof nparray or a list of 1xn_dof nparrays
+        :return: a kx(n_dof+1)x4x4 nparray, global homomats of anchor.lnk and jnts[0].lnk, ..., jnts[n_dof-1].lnk
+        """
+        jnt_vals_path = np.asarray(jnt_vals_path, dtype=float).reshape((-1, self.n_dof))
+        lnk_homomats = np.empty((len(jnt_vals_path), self.n_dof + 1, 4, 4))
+        lnks = [self.anchor.lnk] + [jnt.lnk for jnt in self.jnts]
+        for i, (homomat, lnk) in enumerate(zip(self._gen_batch_jnt_homomats(jnt_vals_path, self.n_dof), lnks)):
+            lnk_homomats[:, i] = homomat if lnk is None else homomat @ lnk.loc_homomat
+        return lnk_homomats
+
+    def batch_forward_kinematics(self, jnt_vals_batch):
+        """
+        vectorized forward_kinematics(update=False, toggle_jac=False)
+        :param jnt_vals_batch: a kxn_dof nparray
+        :return: tcp_gl_pos (kx3), tcp_gl_rotmat (kx3x3)
+        """
+        jnt_vals_batch = np.asarray(jnt_vals_batch, dtype=float).reshape((-1, self.n_dof))
+        *_, homomat = self._gen_batch_jnt_homomats(jnt_vals_batch, self.tcp_jnt_id + 1)
+        tcp_gl_homomat = homomat @ self.tcp_loc_homomat
+        return tcp_gl_homomat[:, :3, 3], tcp_gl_homomat[:, :3, :3]
+
     def jacobian(self, joint_values=None):
         """
         compute the jacobian matrix; use internal values if jnt_vals is None
@@ -221,8 +259,11 @@ class JLChain(object):
         tracik is also fast and reliable, but it is a bit slower and energe-intensive.
         pinv_wc is fast but has low success rate. it is used as a backbone for ddik.
         sqpss has high success rate but is very slow.
-        :param ik_solver: 'd' for ddik; 'n' for numik.pinv_wc; 'o' for optik.sqpss; 't' for tracik; default: None
-        :**kwargs: path for DDIKSolver
+        ik_learned predicts seeds with an exported network and refines them with pinv_wc, it needs a model file
+        (see ik_learned.train_seed_model), which is not trained on the fly.
+        :param ik_solver: 'd' for ddik; 'l' for learned-seed ik; 'n' for numik.pinv_wc; 'o' for optik.sqpss;
+                          't' for tracik; default: None
+        :**kwargs: path for DDIKSolver and LearnedIKSolver (required by the latter), model_file for LearnedIKSolver
         :return:
         author: weiwei
         date: 20201126, 20231111
@@ -232,6 +273,13 @@ class JLChain(object):
         if ik_solver == 'd':
             path = kwargs.get('path', os.getcwd())
             self._ik_solver = rkd.DDIKSolver(self, path)
+        elif ik_solver == 'l':
+            if 'path' not in kwargs:
+                raise ValueError("The learned ik solver needs the path of its model file, "
+                                 "usually the directory of the robot file.")
+            path = kwargs['path']
+            model_file = kwargs.get('model_file', rkl.DEFAULT_MODEL_FILE)
+            self._ik_solver = rkl.LearnedIKSolver(self, path=path, model_file=model_file)
 
     def set_tcp(self, tcp_joint_id=None, tcp_loc_pos=None, tcp_loc_rotmat=None):
         if tcp_joint_id is not None:
@@ -3,9 +3,12 @@ import numpy as np
 import modeling.model_collection as mmc
 import modeling.collision_model as mcm
 import robot_sim._kinematics.jlchain as rkjl
-import robot_sim._kinematics.collision_checker as rkcc
 import modeling.geometric_model as mgm
 import modeling.constant as mc
+import basis.headless as bhl
+
+# Panda3D is loaded when the collision checker is enabled
+rkcc = bhl.lazy_import("robot_sim._kinematics.collision_checker")
 
 
 class EEInterface(object):
@@ -8,10 +8,12 @@ import math
 import numpy as np
 import modeling.model_collection as mc
 import modeling.collision_model as cm
-from panda3d.core import CollisionNode, CollisionBox, Point3
 import robot_sim._kinematics.jlchain as jl
 import basis.robot_math as rm
 import robot_sim.end_effectors.gripper.gripper_interface as gp
+import basis.headless as bhl
+
+pdc = bhl.lazy_import("panda3d.core")
 
 
 class Lite6WRSGripper(gp.GripperInterface):
@@ -63,33 +65,33 @@ class Lite6WRSGripper(gp.GripperInterface):
 
     @staticmethod
     def _finger_cdnp(name, radius):
-        collision_node = CollisionNode(name)
-        collision_primitive_c0 = CollisionBox(Point3(-.005, 0.004, .025),
-                                              x=.005 + radius, y=0.004 + radius, z=.025 + radius)
+        collision_node = pdc.CollisionNode(name)
+        collision_primitive_c0 = pdc.CollisionBox(pdc.Point3(-.005, 0.004, .025),
+                                                  x=.005 + radius, y=0.004 + radius, z=.025 + radius)
         collision_node.addSolid(collision_primitive_c0)
-        collision_primitive_c1 = CollisionBox(Point3(.008, 0.028 - .002, -.011),
-                                              x=.018 + radius, y=0.008 + radius, z=.011 + radius)
+        collision_primitive_c1 = pdc.CollisionBox(pdc.Point3(.008, 0.028 - .002, -.011),
+                                                  x=.018 + radius, y=0.008 + radius, z=.011 + radius)
         collision_node.addSolid(collision_primitive_c1)
-        collision_primitive_c2 = CollisionBox(Point3(-.005, 0.012 - .002, -.002 + .0025),
-                                              x=.005 + radius, y=0.008 + radius, z=.002 + .0025 + radius)
+        collision_primitive_c2 = pdc.CollisionBox(pdc.Point3(-.005, 0.012 - .002, -.002 + .0025),
+                                                  x=.005 + radius, y=0.008 + radius, z=.002 + .0025 + radius)
         collision_node.addSolid(collision_primitive_c2)
         return collision_node
 
     @staticmethod
     def _hnd_base_cdnp(name, radius):
-        collision_node = CollisionNode(name)
-        collision_primitive_c0 = CollisionBox(Point3(0, 0, .031),
-                                              x=.036 + radius, y=0.038 + radius, z=.031 + radius)
+        collision_node = pdc.CollisionNode(name)
+        collision_primitive_c0 = pdc.CollisionBox(pdc.Point3(0, 0, .031),
+                                                  x=.036 + radius, y=0.038 + radius, z=.031 + radius)
         collision_node.addSolid(collision_primitive_c0)  # 0.62
-        collision_primitive_c1 = CollisionBox(Point3(0, 0, .067),
-                                              x=.036 + radius, y=0.027 + radius, z=.003 + radius)
+        collision_primitive_c1 = pdc.CollisionBox(pdc.Point3(0, 0, .067),
+                                                  x=.036 + radius, y=0.027 + radius, z=.003 + radius)
         collision_node.addSolid(collision_primitive_c1)  # 0.06700000
         #
-        collision_primitive_c2 = CollisionBox(Point3(.006, .049, .0485),
-                                              x=.02 + radius, y=.02 + radius, z=.015 + radius)
+        collision_primitive_c2 = pdc.CollisionBox(pdc.Point3(.006, .049, .0485),
+                                                  x=.02 + radius, y=.02 + radius, z=.015 + radius)
         collision_node.addSolid(collision_primitive_c2)
-        collision_primitive_c3 = CollisionBox(Point3(0, 0, .08),
-                                              x=.013 + radius, y=0.013 + radius, z=.005 + radius)
+        collision_primitive_c3 = pdc.CollisionBox(pdc.Point3(0, 0, .08),
+                                                  x=.013 + radius, y=0.013 + radius, z=.005 + radius)
         collision_node.addSolid(collision_primitive_c3)
 
         return collision_node
@@ -8,10 +8,12 @@ import math
 import numpy as np
 import modeling.model_collection as mc
 import modeling.collision_model as cm
-from panda3d.core import CollisionNode, CollisionBox, Point3
 import robot_sim._kinematics.jlchain as jl
 import basis.robot_math as rm
 import robot_sim.end_effectors.gripper.gripper_interface as gp
+import basis.headless as bhl
+
+pdc = bhl.lazy_import("panda3d.core")
 
 
 class Lite6WRSGripper2(gp.GripperInterface):
@@ -74,9 +76,9 @@ class Lite6WRSGripper2(gp.GripperInterface):
 
     @staticmethod
     def _finger_cdnp(name, radius):
-        collision_node = CollisionNode(name)
-        collision_primitive_c0 = CollisionBox(Point3(.015, .01, .078),
-                                              x=.005 + radius, y=.005 + radius, z=.055 + radius)
+        collision_node = pdc.CollisionNode(name)
+        collision_primitive_c0 = pdc.CollisionBox(pdc.Point3(.015, .01, .078),
+                                                  x=.005 + radius, y=.005 + radius, z=.055 + radius)
         collision_node.addSolid(collision_primitive_c0)
         return collision_node
 
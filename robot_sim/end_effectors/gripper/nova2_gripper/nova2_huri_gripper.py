@@ -7,10 +7,12 @@ import math
 import numpy as np
 import modeling.model_collection as mc
 import modeling.collision_model as cm
-from panda3d.core import CollisionNode, CollisionBox, Point3
 import robot_sim._kinematics.jlchain as jl
 import basis.robot_math as rm
 import robot_sim.end_effectors.gripper.gripper_interface as gp
+import basis.headless as bhl
+
+pdc = bhl.lazy_import("panda3d.core")
 
 
 class Nova2HuriGripper(gp.GripperInterface):
@@ -92,26 +94,26 @@ class Nova2HuriGripper(gp.GripperInterface):
 
     @staticmethod
     def _finger_cdnp(name, radius):
-        collision_node = CollisionNode(name)
-        collision_primitive_c0 = CollisionBox(Point3(0.021 - 0.03, 0.002 + 0.0125, -.02),
-                                              x=0.03 + radius, y=0.0125 + radius, z=.02 + radius)
+        collision_node = pdc.CollisionNode(name)
+        collision_primitive_c0 = pdc.CollisionBox(pdc.Point3(0.021 - 0.03, 0.002 + 0.0125, -.02),
+                                                  x=0.03 + radius, y=0.0125 + radius, z=.02 + radius)
         collision_node.addSolid(collision_primitive_c0)
-        collision_primitive_c1 = CollisionBox(Point3(0.0125, 0, 0.0125),
-                                              x=0.0125 + radius, y=0.025 + radius, z=0.0125 + radius)
+        collision_primitive_c1 = pdc.CollisionBox(pdc.Point3(0.0125, 0, 0.0125),
+                                                  x=0.0125 + radius, y=0.025 + radius, z=0.0125 + radius)
         collision_node.addSolid(collision_primitive_c1)
-        collision_primitive_c2 = CollisionBox(Point3(0.011, 0, 0.0755),
-                                              x=0.011 + radius, y=0.015 + radius, z=0.0725 + radius)
+        collision_primitive_c2 = pdc.CollisionBox(pdc.Point3(0.011, 0, 0.0755),
+                                                  x=0.011 + radius, y=0.015 + radius, z=0.0725 + radius)
         collision_node.addSolid(collision_primitive_c2)
         return collision_node
 
     @staticmethod
     def _base_cdnp(name, radius):
-        collision_node = CollisionNode(name)
-        collision_primitive_c0 = CollisionBox(Point3(0, 0, 0.04325),
-                                              x=0.04 + radius, y=0.0272 + radius, z=0.04325 + radius)
+        collision_node = pdc.CollisionNode(name)
+        collision_primitive_c0 = pdc.CollisionBox(pdc.Point3(0, 0, 0.04325),
+                                                  x=0.04 + radius, y=0.0272 + radius, z=0.04325 + radius)
         collision_node.addSolid(collision_primitive_c0)
-        collision_primitive_c1 = CollisionBox(Point3(0, -0.006 - 0.026, 0.108),
-                                              x=0.026 + radius, y=0.026 + radius, z=0.0115+ radius)
+        collision_primitive_c1 = pdc.CollisionBox(pdc.Point3(0, -0.006 - 0.026, 0.108),
+                                                  x=0.026 + radius, y=0.026 + radius, z=0.0115+ radius)
         collision_node.addSolid(collision_primitive_c1)
 
         return collision_node
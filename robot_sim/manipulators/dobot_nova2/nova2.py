@@ -8,12 +8,12 @@ TODO:
 import os
 import math
 import numpy as np
-from panda3d.core import (CollisionNode,
-                          CollisionBox,
-                          Point3)
 import modeling.collision_model as cm
 import robot_sim._kinematics.jlchain as jl
 import robot_sim.manipulators.manipulator_interface as mi
+import basis.headless as bhl
+
+pdc = bhl.lazy_import("panda3d.core")
 
 
 class Nova2(mi.ManipulatorInterface):
@@ -107,12 +107,12 @@ class Nova2(mi.ManipulatorInterface):
     # self-defined collison model for the base link
     @staticmethod
     def _base_cdnp(name, radius):
-        collision_node = CollisionNode(name)
-        collision_primitive_c0 = CollisionBox(Point3(-0.008, 0, 0.0375),
-                                              x=.07 + radius, y=.065 + radius, z=0.0375 + radius)
+        collision_node = pdc.CollisionNode(name)
+        collision_primitive_c0 = pdc.CollisionBox(pdc.Point3(-0.008, 0, 0.0375),
+                                                  x=.07 + radius, y=.065 + radius, z=0.0375 + radius)
         collision_node.addSolid(collision_primitive_c0)
-        collision_primitive_c1 = CollisionBox(Point3(0, 0, .124),
-                                              x=.043 + radius, y=.043 + radius, z=.049 + radius)
+        collision_primitive_c1 = pdc.CollisionBox(pdc.Point3(0, 0, .124),
+                                                  x=.043 + radius, y=.043 + radius, z=.049 + radius)
         collision_node.addSolid(collision_primitive_c1)
         return collision_node
 
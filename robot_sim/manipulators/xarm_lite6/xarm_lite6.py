@@ -8,14 +8,14 @@ import os
 import math
 
 import numpy as np
-from panda3d.core import (CollisionNode,
-                          CollisionBox,
-                          Point3)
 
 import basis.robot_math as rm
 import modeling.collision_model as cm
 import robot_sim._kinematics.jlchain as jl
 import robot_sim.manipulators.manipulator_interface as mi
+import basis.headless as bhl
+
+pdc = bhl.lazy_import("panda3d.core")
 
 
 class XArmLite6(mi.ManipulatorInterface):
@@ -118,37 +118,37 @@ class XArmLite6(mi.ManipulatorInterface):
     # self-defined collison model for the base link
     @staticmethod
     def _base_cdnp(name, radius):
-        collision_node = CollisionNode(name)
-        collision_primitive_c0 = CollisionBox(Point3(-0.008, 0, 0.0375),
-                                              x=.07 + radius, y=.065 + radius, z=0.0375 + radius)
+        collision_node = pdc.CollisionNode(name)
+        collision_primitive_c0 = pdc.CollisionBox(pdc.Point3(-0.008, 0, 0.0375),
+                                                  x=.07 + radius, y=.065 + radius, z=0.0375 + radius)
         collision_node.addSolid(collision_primitive_c0)
-        collision_primitive_c1 = CollisionBox(Point3(0, 0, .124),
-                                              x=.043 + radius, y=.043 + radius, z=.049 + radius)
+        collision_primitive_c1 = pdc.CollisionBox(pdc.Point3(0, 0, .124),
+                                                  x=.043 + radius, y=.043 + radius, z=.049 + radius)
         collision_node.addSolid(collision_primitive_c1)
         return collision_node
 
     @staticmethod
     def _link4_cdnp(name, radius):
-        collision_node = CollisionNode(name)
-        collision_primitive_c0 = CollisionBox(Point3(0, 0, -0.124009),
-                                              x=.041 + radius, y=.042 + radius, z=0.0682075 + radius)
+        collision_node = pdc.CollisionNode(name)
+        collision_primitive_c0 = pdc.CollisionBox(pdc.Point3(0, 0, -0.124009),
+                                                  x=.041 + radius, y=.042 + radius, z=0.0682075 + radius)
         collision_node.addSolid(collision_primitive_c0)
-        collision_primitive_c1 = CollisionBox(Point3(0, -0.063315, -0.0503),
-                                              x=.041 + radius, y=.021315 + radius, z=.087825 + radius)
+        collision_primitive_c1 = pdc.CollisionBox(pdc.Point3(0, -0.063315, -0.0503),
+                                                  x=.041 + radius, y=.021315 + radius, z=.087825 + radius)
         collision_node.addSolid(collision_primitive_c1)
         return collision_node
 
     @staticmethod
     def _link2_cdnp(name, radius):
-        collision_node = CollisionNode(name)
-        collision_primitive_c0 = CollisionBox(Point3(0, 0, 0.1065),
-                                              x=.041 + radius, y=.042 + radius, z=0.0315 + radius)
+        collision_node = pdc.CollisionNode(name)
+        collision_primitive_c0 = pdc.CollisionBox(pdc.Point3(0, 0, 0.1065),
+                                                  x=.041 + radius, y=.042 + radius, z=0.0315 + radius)
         collision_node.addSolid(collision_primitive_c0)
-        collision_primitive_c1 = CollisionBox(Point3(0.100, 0, 0.1065),
-                                              x=.059 + radius, y=.042 + radius, z=0.0315 + radius)
+        collision_primitive_c1 = pdc.CollisionBox(pdc.Point3(0.100, 0, 0.1065),
+                                                  x=.059 + radius, y=.042 + radius, z=0.0315 + radius)
         collision_node.addSolid(collision_primitive_c1)
-        collision_primitive_c2 = CollisionBox(Point3(.2, 0, 0.0915),
-                                              x=.041 + radius, y=.042 + radius, z=0.0465 + radius)
+        collision_primitive_c2 = pdc.CollisionBox(pdc.Point3(.2, 0, 0.0915),
+                                                  x=.041 + radius, y=.042 + radius, z=0.0465 + radius)
         collision_node.addSolid(collision_primitive_c2)
         return collision_node
 
@@ -4,27 +4,29 @@ Author: Chen Hao (chen960216@gmail.com), 20231017, osaka
 """
 import os
 import numpy as np
-from panda3d.core import CollisionNode, CollisionBox, Point3
 import modeling.collision_model as cm
 import modeling.model_collection as mc
 import robot_sim._kinematics.jlchain as jl
 from robot_sim.manipulators.dobot_nova2 import Nova2
 from robot_sim.end_effectors.gripper.nova2_gripper import Nova2HuriGripper
 import robot_sim.robots.robot_interface as ri
+import basis.headless as bhl
+
+pdc = bhl.lazy_import("panda3d.core")
 
 
 class Nova2WRS(ri.RobotInterface):
     @staticmethod
     def _table_cdnp(name, radius):
-        collision_node = CollisionNode(name)
-        collision_primitive_r0 = CollisionBox(Point3(.27, 0, -.355),
-                                              x=.36 + radius, y=.6 + radius, z=.355 + radius)
+        collision_node = pdc.CollisionNode(name)
+        collision_primitive_r0 = pdc.CollisionBox(pdc.Point3(.27, 0, -.355),
+                                                  x=.36 + radius, y=.6 + radius, z=.355 + radius)
         collision_node.addSolid(collision_primitive_r0)
-        collision_primitive_r1 = CollisionBox(Point3(-.06, -0.007, .325),
-                                              x=.03 + radius, y=.03 + radius, z=.325 + radius)
+        collision_primitive_r1 = pdc.CollisionBox(pdc.Point3(-.06, -0.007, .325),
+                                                  x=.03 + radius, y=.03 + radius, z=.325 + radius)
         collision_node.addSolid(collision_primitive_r1)
-        collision_primitive_r2 = CollisionBox(Point3(-.06, -0.15, .325),
-                                              x=.03 + radius, y=.03 + radius, z=.325 + radius)
+        collision_primitive_r2 = pdc.CollisionBox(pdc.Point3(-.06, -0.15, .325),
+                                                  x=.03 + radius, y=.03 + radius, z=.325 + radius)
         collision_node.addSolid(collision_primitive_r2)
         return collision_node
 
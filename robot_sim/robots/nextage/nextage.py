@@ -7,9 +7,11 @@ import modeling.model_collection as mc
 import modeling.collision_model as cm
 import robot_sim.manipulators.manipulator_interface as mi
 import robot_sim.robots.robot_interface as ai
-from panda3d.core import CollisionNode, CollisionBox, Point3
 import robot_sim.robots.system_interface as ri
 import robot_sim._kinematics.jlchain as jl
+import basis.headless as bhl
+
+pdc = bhl.lazy_import("panda3d.core")
 
 
 class Left_Manipulator(mi.ManipulatorInterface):
@@ -1,6 +1,9 @@
 import copy
 import numpy as np
-import robot_sim._kinematics.TBD_collision_checker as cc
+import basis.headless as bhl
+
+# Panda3D is loaded when the collision checker is enabled
+cc = bhl.lazy_import("robot_sim._kinematics.TBD_collision_checker")
 
 
 class RobotInterface(object):
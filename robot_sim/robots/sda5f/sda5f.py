@@ -7,8 +7,10 @@ import modeling.collision_model as cm
 import robot_sim._kinematics.jlchain as jl
 import robot_sim.manipulators.sia5.sia5 as sia
 import robot_sim.end_effectors.gripper.robotiq85.robotiq85 as rtq
-from panda3d.core import CollisionNode, CollisionBox, Point3
 import robot_sim.robots.system_interface as ri
+import basis.headless as bhl
+
+pdc = bhl.lazy_import("panda3d.core")
 
 
 class SDA5F(ri.RobotInterface):
@@ -104,20 +106,20 @@ class SDA5F(ri.RobotInterface):
 
     @staticmethod
     def _base_combined_cdnp(name, radius):
-        collision_node = CollisionNode(name)
-        collision_primitive_c0 = CollisionBox(Point3(.0, 0.0, 0.225),
-                                              x=.14 + radius, y=.14 + radius, z=.225 + radius)
+        collision_node = pdc.CollisionNode(name)
+        collision_primitive_c0 = pdc.CollisionBox(pdc.Point3(.0, 0.0, 0.225),
+                                                  x=.14 + radius, y=.14 + radius, z=.225 + radius)
         collision_node.addSolid(collision_primitive_c0)
-        collision_primitive_c1 = CollisionBox(Point3(0.031, 0.0, 0.73),
-                                              x=.0855 + radius, y=.0855 + radius, z=.27 + radius)
+        collision_primitive_c1 = pdc.CollisionBox(pdc.Point3(0.031, 0.0, 0.73),
+                                                  x=.0855 + radius, y=.0855 + radius, z=.27 + radius)
         collision_node.addSolid(collision_primitive_c1)
         return collision_node
 
     @staticmethod
     def _torso_combined_cdnp(name, radius):
-        collision_node = CollisionNode(name)
-        collision_primitive_c2 = CollisionBox(Point3(0.195, 0.0, 0.1704),
-                                              x=.085 + radius, y=.101 + radius, z=.09 + radius)
+        collision_node = pdc.CollisionNode(name)
+        collision_primitive_c2 = pdc.CollisionBox(pdc.Point3(0.195, 0.0, 0.1704),
+                                                  x=.085 + radius, y=.101 + radius, z=.09 + radius)
         collision_node.addSolid(collision_primitive_c2)
         return collision_node
 
@@ -9,8 +9,10 @@ import robot_sim.manipulators.ur3.ur3 as ur
 import robot_sim.end_effectors.gripper.robotiq85.robotiq85 as rtq
 import robot_sim.end_effectors.gripper.robotiq85_gelsight.robotiq85_gelsight as rtq_gs
 # import robot_sim.end_effectors.gripper.robotiq85_gelsight.robotiq85_gelsight_pusher as rtq_gs
-from panda3d.core import CollisionNode, CollisionBox, Point3
 import robot_sim.robots.system_interface as ri
+import basis.headless as bhl
+
+pdc = bhl.lazy_import("panda3d.core")
 
 
 class UR3Dual(ri.RobotInterface):
@@ -214,24 +216,24 @@ class UR3Dual(ri.RobotInterface):
 
     @staticmethod
     def _base_combined_cdnp(name, radius):
-        collision_node = CollisionNode(name)
-        collision_primitive_c0 = CollisionBox(Point3(0.18, 0.0, 0.105),
-                                              x=.61 + radius, y=.41 + radius, z=.105 + radius)
+        collision_node = pdc.CollisionNode(name)
+        collision_primitive_c0 = pdc.CollisionBox(pdc.Point3(0.18, 0.0, 0.105),
+                                                  x=.61 + radius, y=.41 + radius, z=.105 + radius)
         collision_node.addSolid(collision_primitive_c0)
-        collision_primitive_c1 = CollisionBox(Point3(0.0, 0.0, 0.4445),
-                                              x=.321 + radius, y=.321 + radius, z=.2345 + radius)
+        collision_primitive_c1 = pdc.CollisionBox(pdc.Point3(0.0, 0.0, 0.4445),
+                                                  x=.321 + radius, y=.321 + radius, z=.2345 + radius)
         collision_node.addSolid(collision_primitive_c1)
-        collision_primitive_c2 = CollisionBox(Point3(0.0, 0.0, 0.8895),
-                                              x=.05 + radius, y=.05 + radius, z=.6795 + radius)
+        collision_primitive_c2 = pdc.CollisionBox(pdc.Point3(0.0, 0.0, 0.8895),
+                                                  x=.05 + radius, y=.05 + radius, z=.6795 + radius)
         collision_node.addSolid(collision_primitive_c2)
-        collision_primitive_c3 = CollisionBox(Point3(0.0, 0.0, 1.619),
-                                              x=.1 + radius, y=.275 + radius, z=.05 + radius)
+        collision_primitive_c3 = pdc.CollisionBox(pdc.Point3(0.0, 0.0, 1.619),
+                                                  x=.1 + radius, y=.275 + radius, z=.05 + radius)
         collision_node.addSolid(collision_primitive_c3)
-        collision_primitive_l0 = CollisionBox(Point3(0.0, 0.300, 1.669),
-                                              x=.1 + radius, y=.029 + radius, z=.021 + radius)
+        collision_primitive_l0 = pdc.CollisionBox(pdc.Point3(0.0, 0.300, 1.669),
+                                                  x=.1 + radius, y=.029 + radius, z=.021 + radius)
         collision_node.addSolid(collision_primitive_l0)
-        collision_primitive_r0 = CollisionBox(Point3(0.0, -0.300, 1.669),
-                                              x=.1 + radius, y=.029 + radius, z=.021 + radius)
+        collision_primitive_r0 = pdc.CollisionBox(pdc.Point3(0.0, -0.300, 1.669),
+                                                  x=.1 + radius, y=.029 + radius, z=.021 + radius)
         collision_node.addSolid(collision_primitive_r0)
         return collision_node
 
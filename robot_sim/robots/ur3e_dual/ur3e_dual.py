@@ -7,8 +7,10 @@ import modeling.collision_model as cm
 import robot_sim._kinematics.jlchain as jl
 import robot_sim.manipulators.ur3e.ur3e as ur
 import robot_sim.end_effectors.gripper.robotiqhe.robotiqhe as rtq
-from panda3d.core import CollisionNode, CollisionBox, Point3
 import robot_sim.robots.system_interface as ri
+import basis.headless as bhl
+
+pdc = bhl.lazy_import("panda3d.core")
 
 
 class UR3EDual(ri.RobotInterface):
@@ -93,27 +95,27 @@ class UR3EDual(ri.RobotInterface):
 
     @staticmethod
     def _base_combined_cdnp(name, radius):
-        collision_node = CollisionNode(name)
-        collision_primitive_c0 = CollisionBox(Point3(0.54, 0.0, 0.39),
-                                              x=.54 + radius, y=.6 + radius, z=.39 + radius)
+        collision_node = pdc.CollisionNode(name)
+        collision_primitive_c0 = pdc.CollisionBox(pdc.Point3(0.54, 0.0, 0.39),
+                                                  x=.54 + radius, y=.6 + radius, z=.39 + radius)
         collision_node.addSolid(collision_primitive_c0)
-        collision_primitive_c1 = CollisionBox(Point3(0.06, 0.0, 0.9),
-                                              x=.06 + radius, y=.375 + radius, z=.9 + radius)
+        collision_primitive_c1 = pdc.CollisionBox(pdc.Point3(0.06, 0.0, 0.9),
+                                                  x=.06 + radius, y=.375 + radius, z=.9 + radius)
         collision_node.addSolid(collision_primitive_c1)
-        collision_primitive_c2 = CollisionBox(Point3(0.18, 0.0, 1.77),
-                                              x=.18 + radius, y=.21 + radius, z=.03 + radius)
+        collision_primitive_c2 = pdc.CollisionBox(pdc.Point3(0.18, 0.0, 1.77),
+                                                  x=.18 + radius, y=.21 + radius, z=.03 + radius)
         collision_node.addSolid(collision_primitive_c2)
-        collision_primitive_l0 = CollisionBox(Point3(0.2425, 0.345, 1.33),
-                                              x=.1225 + radius, y=.06 + radius, z=.06 + radius)
+        collision_primitive_l0 = pdc.CollisionBox(pdc.Point3(0.2425, 0.345, 1.33),
+                                                  x=.1225 + radius, y=.06 + radius, z=.06 + radius)
         collision_node.addSolid(collision_primitive_l0)
-        collision_primitive_r0 = CollisionBox(Point3(0.2425, -0.345, 1.33),
-                                              x=.1225 + radius, y=.06 + radius, z=.06 + radius)
+        collision_primitive_r0 = pdc.CollisionBox(pdc.Point3(0.2425, -0.345, 1.33),
+                                                  x=.1225 + radius, y=.06 + radius, z=.06 + radius)
         collision_node.addSolid(collision_primitive_r0)
-        collision_primitive_l1 = CollisionBox(Point3(0.21, 0.405, 1.07),
-                                              x=.03 + radius, y=.06 + radius, z=.29 + radius)
+        collision_primitive_l1 = pdc.CollisionBox(pdc.Point3(0.21, 0.405, 1.07),
+                                                  x=.03 + radius, y=.06 + radius, z=.29 + radius)
         collision_node.addSolid(collision_primitive_l1)
-        collision_primitive_r1 = CollisionBox(Point3(0.21, -0.405, 1.07),
-                                              x=.03 + radius, y=.06 + radius, z=.29 + radius)
+        collision_primitive_r1 = pdc.CollisionBox(pdc.Point3(0.21, -0.405, 1.07),
+                                                  x=.03 + radius, y=.06 + radius, z=.29 + radius)
         collision_node.addSolid(collision_primitive_r1)
         return collision_node
 
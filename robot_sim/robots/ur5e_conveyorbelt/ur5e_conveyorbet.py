@@ -7,7 +7,9 @@ import robot_sim._kinematics.jlchain as jl
 import robot_sim.manipulators.ur5e.ur5e as rbt
 import robot_sim.end_effectors.gripper.robotiq140.robotiq140 as hnd
 import robot_sim.robots.system_interface as ri
-from panda3d.core import CollisionNode, CollisionBox, Point3
+import basis.headless as bhl
+
+pdc = bhl.lazy_import("panda3d.core")
 
 
 class UR5EConveyorBelt(ri.RobotInterface):
@@ -68,12 +70,12 @@ class UR5EConveyorBelt(ri.RobotInterface):
 
     @staticmethod
     def _base_combined_cdnp(name, radius):
-        collision_node = CollisionNode(name)
-        collision_primitive_c0 = CollisionBox(Point3(-0.1, 0.0, 0.14 - 0.82),
-                                              x=.35 + radius, y=.3 + radius, z=.14 + radius)
+        collision_node = pdc.CollisionNode(name)
+        collision_primitive_c0 = pdc.CollisionBox(pdc.Point3(-0.1, 0.0, 0.14 - 0.82),
+                                                  x=.35 + radius, y=.3 + radius, z=.14 + radius)
         collision_node.addSolid(collision_primitive_c0)
-        collision_primitive_c1 = CollisionBox(Point3(0.0, 0.0, -.3),
-                                              x=.112 + radius, y=.112 + radius, z=.3 + radius)
+        collision_primitive_c1 = pdc.CollisionBox(pdc.Point3(0.0, 0.0, -.3),
+                                                  x=.112 + radius, y=.112 + radius, z=.3 + radius)
         collision_node.addSolid(collision_primitive_c1)
         return collision_node
 
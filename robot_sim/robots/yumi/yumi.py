@@ -7,8 +7,10 @@ import modeling.collision_model as cm
 import robot_sim._kinematics.jlchain as jl
 import robot_sim.manipulators.irb14050.irb14050 as ya
 import robot_sim.end_effectors.gripper.yumi_gripper.yumi_gripper as yg
-from panda3d.core import CollisionNode, CollisionBox, Point3
 import robot_sim.robots.system_interface as ri
+import basis.headless as bhl
+
+pdc = bhl.lazy_import("panda3d.core")
 
 
 class Yumi(ri.RobotInterface):
@@ -117,21 +119,21 @@ class Yumi(ri.RobotInterface):
 
     @staticmethod
     def _base_combined_cdnp(name, radius):
-        collision_node = CollisionNode(name)
-        collision_primitive_c0 = CollisionBox(Point3(-.2, 0, 0.04),
-                                              x=.16 + radius, y=.2 + radius, z=.04 + radius)
+        collision_node = pdc.CollisionNode(name)
+        collision_primitive_c0 = pdc.CollisionBox(pdc.Point3(-.2, 0, 0.04),
+                                                  x=.16 + radius, y=.2 + radius, z=.04 + radius)
         collision_node.addSolid(collision_primitive_c0)
-        collision_primitive_c1 = CollisionBox(Point3(-.24, 0, 0.24),
-                                              x=.12 + radius, y=.125 + radius, z=.24 + radius)
+        collision_primitive_c1 = pdc.CollisionBox(pdc.Point3(-.24, 0, 0.24),
+                                                  x=.12 + radius, y=.125 + radius, z=.24 + radius)
         collision_node.addSolid(collision_primitive_c1)
-        collision_primitive_c2 = CollisionBox(Point3(-.07, 0, 0.4),
-                                              x=.075 + radius, y=.125 + radius, z=.06 + radius)
+        collision_primitive_c2 = pdc.CollisionBox(pdc.Point3(-.07, 0, 0.4),
+                                                  x=.075 + radius, y=.125 + radius, z=.06 + radius)
         collision_node.addSolid(collision_primitive_c2)
-        collision_primitive_l0 = CollisionBox(Point3(0, 0.145, 0.03),
-                                              x=.135 + radius, y=.055 + radius, z=.03 + radius)
+        collision_primitive_l0 = pdc.CollisionBox(pdc.Point3(0, 0.145, 0.03),
+                                                  x=.135 + radius, y=.055 + radius, z=.03 + radius)
         collision_node.addSolid(collision_primitive_l0)
-        collision_primitive_r0 = CollisionBox(Point3(0, -0.145, 0.03),
-                                              x=.135 + radius, y=.055 + radius, z=.03 + radius)
+        collision_primitive_r0 = pdc.CollisionBox(pdc.Point3(0, -0.145, 0.03),
+                                                  x=.135 + radius, y=.055 + radius, z=.03 + radius)
         collision_node.addSolid(collision_primitive_r0)
         return collision_node
 
@@ -0,0 +1,453 @@
+"""
+Point cloud preprocessing and registration on numpy arrays, without round trips through Open3D objects
+The features of a template (downsampled points, normals, fpfh, kd-trees) are computed once and cached by template id;
+scene clouds are cropped, voxel-hash downsampled, and cleaned with vectorized numpy on float32 arrays.
+See util_functions.registration_ptpt / remove_outlier for the Open3D versions.
+The default parameters assume millimeters, like util_functions.remove_outlier.
+"""
+
+import time
+import numpy as np
+from scipy.spatial import cKDTree
+
+
+def crop(points, xrng=None, yrng=None, zrng=None):
+    """
+    :param points: nx3 nparray
+    :param xrng, yrng, zrng: [min, max], None means no limit
+    :return: the points inside the box
+    """
+    mask = np.ones(len(points), dtype=bool)
+    for axis, rng in enumerate([xrng, yrng, zrng]):
+        if rng is not None:
+            mask &= (points[:, axis] >= rng[0]) & (points[:, axis] <= rng[1])
+    return points[mask]
+
+
+def voxel_downsample(points, voxel_size):
+    """
+    replace the points in each voxel by their centroid, the voxels are found by hashing integer coordinates
+    :param points: nx3 nparray
+    :param voxel_size:
+    :return: mx3 float32 nparray
+    """
+    points = np.asarray(points, dtype=np.float32).reshape((-1, 3))
+    if len(points) == 0:
+        return points
+    keys = np.floor((points - points.min(axis=0)) / voxel_size).astype(np.int64)
+    dims = keys.max(axis=0) + 1
+    hashes = (keys[:, 0] * dims[1] + keys[:, 1]) * dims[2] + keys[:, 2]
+    _, inverse, counts = np.unique(hashes, return_inverse=True, return_counts=True)
+    inverse = inverse.ravel()
+    centroids = np.empty((len(counts), 3), dtype=np.float32)
+    for axis in range(3):
+        centroids[:, axis] = np.bincount(inverse, weights=points[:, axis], minlength=len(counts)) / counts
+    return centroids
+
+
+def radius_outlier_mask(points, nb_points=7, radius=3, kdtree=None):
+    """
+    same criterion as open3d remove_radius_outlier: keep points with more than nb_points points
+    (including themselves) within radius
+    :return: 1xn bool nparray
+    """
+    if kdtree is None:
+        kdtree = cKDTree(points)
+    counts = kdtree.query_ball_point(points, r=radius, return_length=True, workers=-1)
+    return counts > nb_points
+
+
+def _knn_hybrid(kdtree, points, radius, max_nn):
+    """
+    at most max_nn neighbors within radius, like open3d.geometry.KDTreeSearchParamHybrid
+    :return: indices (nxmax_nn, missing neighbors are len(kdtree.data)), squared distances (nxmax_nn, inf if missing)
+    """
+    max_nn = min(max_nn, len(kdtree.data))
+    dists, indices = kdtree.query(points, k=max_nn, distance_upper_bound=radius, workers=-1)
+    if max_nn == 1:
+        dists, indices = dists[:, None], indices[:, None]
+    return indices, dists ** 2
+
+
+def estimate_normals(points, kdtree=None, radius=6, max_nn=30, viewpoint=None):
+    """
+    normals as the eigenvectors of the smallest eigenvalues of the neighborhood covariances
+    :param viewpoint: if given, the normals are flipped toward it, e.g. np.zeros(3) for the camera origin
+    :return: nx3 float32 nparray
+    """
+    if kdtree is None:
+        kdtree = cKDTree(points)
+    indices, _ = _knn_hybrid(kdtree, points, radius, max_nn)
+    valid = indices < len(points)
+    padded = np.vstack([points, np.zeros((1, 3), dtype=points.dtype)]).astype(np.float64)
+    nbrs = padded[indices]
+    counts = np.maximum(valid.sum(axis=1), 1)[:, None]
+    means = nbrs.sum(axis=1) / counts
+    centered = (nbrs - means[:, None, :]) * valid[:, :, None]
+    covs = np.einsum('nki,nkj->nij', centered, centered) / counts[:, :, None]
+    _, eigvecs = np.linalg.eigh(covs)
+    normals = eigvecs[:, :, 0]
+    normals[valid.sum(axis=1) < 3] = np.array([0, 0, 1])
+    if viewpoint is not None:
+        flip = np.einsum('ij,ij->i', normals, np.asarray(viewpoint) - points) < 0
+        normals[flip] *= -1
+    return normals.astype(np.float32)
+
+
+def _pair_features(p1, n1, p2, n2):
+    """
+    vectorized open3d ComputePairFeatures
+    :return: nx3 features (alpha-like angle, phi, theta) and a validity mask
+    """
+    dp2p1 = p2 - p1
+    f4 = np.linalg.norm(dp2p1, axis=-1)
+    f4_safe = np.where(f4 > 0, f4, 1)
+    angle1 = np.einsum('...i,...i->...', n1, dp2p1) / f4_safe
+    angle2 = np.einsum('...i,...i->...', n2, dp2p1) / f4_safe
+    swap = np.arccos(np.clip(np.abs(angle1), -1, 1)) > np.arccos(np.clip(np.abs(angle2), -1, 1))
+    n1_copy = np.where(swap[..., None], n2, n1)
+    n2_copy = np.where(swap[..., None], n1, n2)
+    dp2p1 = np.where(swap[..., None], -dp2p1, dp2p1)
+    f2 = np.where(swap, -angle2, angle1)
+    v = np.cross(dp2p1, n1_copy)
+    v_norm = np.linalg.norm(v, axis=-1)
+    v = v / np.where(v_norm > 0, v_norm, 1)[..., None]
+    w = np.cross(n1_copy, v)
+    f1 = np.einsum('...i,...i->...', v, n2_copy)
+    f0 = np.arctan2(np.einsum('...i,...i->...', w, n2_copy), np.einsum('...i,...i->...', n1_copy, n2_copy))
+    return np.stack([f0, f1, f2], axis=-1), (f4 > 0) & (v_norm > 0)
+
+
+def compute_fpfh(points, normals, kdtree=None, radius=10, max_nn=100, chunk_size=4096):
+    """
+    fast point feature histograms with the binning and weighting of open3d compute_fpfh_feature
+    :return: nx33 float32 nparray
+    """
+    if kdtree is None:
+        kdtree = cKDTree(points)
+    n_points = len(points)
+    indices, sq_dists = _knn_hybrid(kdtree, points, radius, max_nn)
+    padded_points = np.vstack([points, np.zeros((1, 3))]).astype(np.float64)
+    padded_normals = np.vstack([normals, np.zeros((1, 3))]).astype(np.float64)
+    spfh = np.zeros((n_points + 1, 33))
+    for start in range(0, n_points, chunk_size):
+        idx = indices[start:start + chunk_size]
+        features, valid = _pair_features(padded_points[start:start + len(idx), None, :],
+                                         padded_normals[start:start + len(idx), None, :],
+                                         padded_points[idx], padded_normals[idx])
+        valid &= idx < n_points
+        n_nbrs = (idx < n_points).sum(axis=1)
+        hist_incr = 100.0 / np.maximum(n_nbrs - 1, 1)
+        bins = np.stack([np.floor(11 * (features[..., 0] + np.pi) / (2 * np.pi)),
+                         np.floor(11 * (features[..., 1] + 1) * .5) + 11,
+                         np.floor(11 * (features[..., 2] + 1) * .5) + 22], axis=-1)
+        bins = np.clip(bins, [0, 11, 22], [10, 21, 32]).astype(np.int64)
+        flat_bins = (np.arange(len(idx))[:, None, None] * 33 + bins).ravel()
+        weights = np.broadcast_to((hist_incr[:, None] * valid)[:, :, None], bins.shape).ravel()
+        spfh[start:start + len(idx)] = np.bincount(flat_bins, weights=weights,
+                                                   minlength=len(idx) * 33).reshape((-1, 33))
+    fpfh = np.empty((n_points, 33), dtype=np.float32)
+    for start in range(0, n_points, chunk_size):
+        idx = indices[start:start + chunk_size]
+        sq_dist = sq_dists[start:start + chunk_size]
+        inv_dist = np.where((idx < n_points) & (sq_dist > 0), 1 / np.where(sq_dist > 0, sq_dist, 1), 0)
+        weighted = np.einsum('nk,nkj->nj', inv_dist, spfh[idx])
+        block_sums = weighted.reshape((-1, 3, 11)).sum(axis=2)
+        scales = np.where(block_sums > 0, 100 / np.where(block_sums > 0, block_sums, 1), 0)
+        fpfh[start:start + len(idx)] = (weighted.reshape((-1, 3, 11)) * scales[:, :, None]).reshape((-1, 33)) + \
+                                       spfh[start:start + len(idx)]
+    return fpfh
+
+
+def kabsch(src, tgt):
+    """
+    least squares rigid transform from src to tgt, batched
+    :param src, tgt: ...xnx3 nparrays
+    :return: ...x4x4 homomats
+    """
+    src_mean = src.mean(axis=-2, keepdims=True)
+    tgt_mean = tgt.mean(axis=-2, keepdims=True)
+    h = np.swapaxes(src - src_mean, -1, -2) @ (tgt - tgt_mean)
+    u, _, vt = np.linalg.svd(h)
+    d = np.sign(np.linalg.det(np.swapaxes(vt, -1, -2) @ np.swapaxes(u, -1, -2)))
+    dmat = np.broadcast_to(np.eye(3), h.shape).copy()
+    dmat[..., 2, 2] = d
+    rotmat = np.swapaxes(vt, -1, -2) @ dmat @ np.swapaxes(u, -1, -2)
+    homomat = np.broadcast_to(np.eye(4), h.shape[:-2] + (4, 4)).copy()
+    homomat[..., :3, :3] = rotmat
+    homomat[..., :3, 3] = tgt_mean[..., 0, :] - (rotmat @ np.swapaxes(src_mean, -1, -2))[..., 0]
+    return homomat
+
+
+def transform_points(homomat, points):
+    return points @ homomat[:3, :3].T + homomat[:3, 3]
+
+
+class TemplateFeatures(object):
+    """
+    cached preprocessing results of a template
+    """
+
+    def __init__(self, points, normals, fpfh):
+        self.points = points
+        self.normals = normals
+        self.fpfh = fpfh
+        self.kdtree = cKDTree(points)
+        self.fpfh_sqnorms = np.einsum('ij,ij->i', fpfh, fpfh)
+
+
+class PointCloudPipeline(object):
+    """
+    bin-picking registration loop: templates are preprocessed once, scenes every frame
+    the seconds spent in each stage of the last call are in self.timings
+    """
+
+    def __init__(self,
+                 voxel_size=2,
+                 nb_points=7,
+                 outlier_radius=3,
+                 normal_radius_ratio=3,
+                 fpfh_radius_ratio=5,
+                 viewpoint=None):
+        """
+        :param voxel_size: downsampling voxel size, the normal and fpfh radii are multiples of it
+        :param nb_points, outlier_radius: see radius_outlier_mask, nb_points=0 disables outlier removal
+        :param viewpoint: normals are oriented toward it if given
+        """
+        self.voxel_size = voxel_size
+        self.nb_points = nb_points
+        self.outlier_radius = outlier_radius
+        self.normal_radius = voxel_size * normal_radius_ratio
+        self.fpfh_radius = voxel_size * fpfh_radius_ratio
+        self.viewpoint = viewpoint
+        self.timings = {}
+        self._templates = {}
+
+    def _tic(self):
+        self._last_tic = time.perf_counter()
+
+    def _toc(self, stage):
+        toc = time.perf_counter()
+        self.timings[stage] = toc - self._last_tic
+        self._last_tic = toc
+
+    def preprocess(self, points, xrng=None, yrng=None, zrng=None, remove_outliers=True):
+        """
+        crop, downsample, and remove outliers
+        :param points: nx3 nparray, converted to float32
+        :return: mx3 float32 nparray
+        """
+        self._tic()
+        points = np.asarray(points, dtype=np.float32).reshape((-1, 3))
+        if xrng is not None or yrng is not None or zrng is not None:
+            points = crop(points, xrng, yrng, zrng)
+        self._toc('crop')
+        points = voxel_downsample(points, self.voxel_size)
+        self._toc('downsample')
+        if remove_outliers and self.nb_points > 0:
+            points = points[radius_outlier_mask(points, self.nb_points, self.outlier_radius)]
+        self._toc('outlier')
+        return points
+
+    def compute_features(self, points):
+        """
+        :param points: preprocessed points
+        :return: TemplateFeatures
+        """
+        self._tic()
+        kdtree = cKDTree(points)
+        normals = estimate_normals(points, kdtree, radius=self.normal_radius, viewpoint=self.viewpoint)
+        self._toc('normals')
+        fpfh = compute_fpfh(points, normals, kdtree, radius=self.fpfh_radius)
+        self._toc('fpfh')
+        return TemplateFeatures(points, normals, fpfh)
+
+    def add_template(self, template_id, points, remove_outliers=False):
+        """
+        preprocess a template and cache its features
+        :param template_id: any hashable
+        :param points: nx3 nparray, e.g. sampled from the object model
+        :return: TemplateFeatures
+        """
+        self._templates[template_id] = self.compute_features(self.preprocess(points, remove_outliers=remove_outliers))
+        return self._templates[template_id]
+
+    def get_template(self, template_id):
+        return self._templates[template_id]
+
+    def has_template(self, template_id):
+        return template_id in self._templates
+
+    def remove_template(self, template_id):
+        self._templates.pop(template_id, None)
+
+    def match_features(self, scene_features, template_features, mutual=True, chunk_size=2048):
+        """
+        nearest neighbors in the fpfh space, by chunked float32 matrix products
+        (kd-trees are slow in 33 dimensions)
+        :return: kx2 nparray of (scene index, template index)
+        """
+        self._tic()
+        n_scene = len(scene_features.points)
+        template_ids = np.empty(n_scene, dtype=np.int64)
+        back_sqdists = np.full(len(template_features.points), np.inf, dtype=np.float32)
+        back_ids = np.zeros(len(template_features.points), dtype=np.int64)
+        for start in range(0, n_scene, chunk_size):
+            scene_fpfh = scene_features.fpfh[start:start + chunk_size]
+            sqdists = template_features.fpfh_sqnorms[None, :] - 2 * scene_fpfh @ template_features.fpfh.T
+            template_ids[start:start + chunk_size] = np.argmin(sqdists, axis=1)
+            # the scene norms are constant per row, they only matter for the template-to-scene direction
+            sqdists += np.einsum('ij,ij->i', scene_fpfh, scene_fpfh)[:, None]
+            chunk_back_ids = np.argmin(sqdists, axis=0)
+            chunk_back_sqdists = sqdists[chunk_back_ids, np.arange(sqdists.shape[1])]
+            closer = chunk_back_sqdists < back_sqdists
+            back_sqdists[closer] = chunk_back_sqdists[closer]
+            back_ids[closer] = chunk_back_ids[closer] + start
+        scene_ids = np.arange(n_scene)
+        if mutual:
+            keep = back_ids[template_ids] == scene_ids
+            scene_ids, template_ids = scene_ids[keep], template_ids[keep]
+        self._toc('matching')
+        return np.column_stack([scene_ids, template_ids])
+
+    def ransac(self, scene_points, template_points, correspondences, distance_threshold, max_iteration=4000,
+               batch_size=500, edge_length_ratio=.9, confidence=.999, rng=None):
+        """
+        ransac over feature correspondences, hypotheses are estimated and scored in batches
+        :return: [number of inliers, homomat from scene to template]
+        """
+        self._tic()
+        rng = np.random.default_rng() if rng is None else rng
+        src = scene_points[correspondences[:, 0]].astype(np.float64)
+        tgt = template_points[correspondences[:, 1]].astype(np.float64)
+        best_n_inliers, best_homomat = 0, np.eye(4)
+        n_iterations = 0
+        if len(correspondences) < 3:
+            self._toc('ransac')
+            return [best_n_inliers, best_homomat]
+        while n_iterations < max_iteration:
+            samples = rng.integers(0, len(correspondences), size=(batch_size, 3))
+            src_samples, tgt_samples = src[samples], tgt[samples]
+            # edge length checker, rigid transforms preserve the triangle edges
+            src_edges = np.linalg.norm(src_samples - np.roll(src_samples, 1, axis=1), axis=2)
+            tgt_edges = np.linalg.norm(tgt_samples - np.roll(tgt_samples, 1, axis=1), axis=2)
+            ok = np.all((src_edges > tgt_edges * edge_length_ratio) & (tgt_edges > src_edges * edge_length_ratio),
+                        axis=1)
+            n_iterations += batch_size
+            if not np.any(ok):
+                continue
+            homomats = kabsch(src_samples[ok], tgt_samples[ok])
+            moved = np.einsum('bij,nj->bni', homomats[:, :3, :3], src) + homomats[:, None, :3, 3]
+            n_inliers = (np.sum((moved - tgt) ** 2, axis=2) < distance_threshold ** 2).sum(axis=1)
+            best = np.argmax(n_inliers)
+            if n_inliers[best] > best_n_inliers:
+                best_n_inliers, best_homomat = n_inliers[best], homomats[best]
+                inlier_ratio = best_n_inliers / len(correspondences)
+                if inlier_ratio >= 1:
+                    break
+                needed = np.log(1 - confidence) / np.log(1 - inlier_ratio ** 3)
+                max_iteration = min(max_iteration, needed)
+        if best_n_inliers >= 3:
+            moved = transform_points(best_homomat, src)
+            inliers = np.sum((moved - tgt) ** 2, axis=1) < distance_threshold ** 2
+            best_homomat = kabsch(src[inliers], tgt[inliers])
+        self._toc('ransac')
+        return [best_n_inliers, best_homomat]
+
+    def icp(self, scene_points, template_features, init_homomat=np.eye(4), max_corr_dist=2, max_iteration=200,
+            relative_fitness=1e-6, relative_rmse=1e-6, should_stop=None):
+        """
+        point to point icp that moves the scene onto the template, using the cached kd-tree of the template
+        :param should_stop: optional function(iteration, rmse, fitness) -> bool, checked every iteration to abort early
+        :return: [rmse of matched points, fitness (ratio of matched scene points), homomat from scene to template]
+        """
+        self._tic()
+        src = scene_points.astype(np.float64)
+        homomat = np.array(init_homomat, dtype=np.float64)
+        fitness, rmse = 0, 0
+        for iteration in range(max_iteration):
+            dists, ids = template_features.kdtree.query(transform_points(homomat, src), k=1,
+                                                        distance_upper_bound=max_corr_dist, workers=-1)
+            matched = ids < len(template_features.points)
+            prev_fitness, prev_rmse = fitness, rmse
+            fitness = matched.sum() / max(len(src), 1)
+            rmse = np.sqrt(np.mean(dists[matched] ** 2)) if matched.sum() > 0 else 0
+            if matched.sum() < 3:
+                break
+            if should_stop is not None and should_stop(iteration, rmse, fitness):
+                break
+            # relative changes, as open3d ICPConvergenceCriteria
+            if abs(fitness - prev_fitness) <= relative_fitness * fitness and \
+                    abs(rmse - prev_rmse) <= relative_rmse * rmse:
+                break
+            homomat = kabsch(src[matched], template_features.points[ids[matched]].astype(np.float64))
+        self._toc('icp')
+        return [rmse, fitness, homomat]
+
+    def register(self, template_id, scene_points, xrng=None, yrng=None, zrng=None, max_corr_dist=None, rng=None):
+        """
+        global registration (fpfh + ransac) followed by point to point icp
+        the template features come from the cache, only the scene is processed
+        :param template_id: see add_template
+        :param scene_points: nx3 nparray
+        :return: [rmse, fitness, homomat], homomat is the pose of the template in the scene,
+                 same layout as util_functions.registration_ptpt
+        """
+        tic = time.perf_counter()
+        template_features = self._templates[template_id]
+        scene_down = self.preprocess(scene_points, xrng, yrng, zrng)
+        timings = dict(self.timings)
+        scene_features = self.compute_features(scene_down)
+        timings.update(self.timings)
+        correspondences = self.match_features(scene_features, template_features)
+        timings.update(self.timings)
+        _, init_homomat = self.ransac(scene_down, template_features.points, correspondences,
+                                      distance_threshold=self.voxel_size * 1.5, rng=rng)
+        timings.update(self.timings)
+        rmse, fitness, homomat = self.icp(scene_down, template_features, init_homomat,
+                                          max_corr_dist=self.voxel_size if max_corr_dist is None
+                                          else max_corr_dist)
+        timings.update(self.timings)
+        timings['total'] = time.perf_counter() - tic
+        self.timings = timings
+        return [rmse, fitness, np.linalg.inv(homomat)]
+
+
+if __name__ == '__main__':
+    # a synthetic bin: a few copies of a box-and-cylinder object in mm, with noise and stray points
+    rng = np.random.default_rng(0)
+
+    def sample_object(n):
+        box = rng.uniform([-30, -20, 0], [30, 20, 15], size=(n, 3))
+        box[np.arange(n) % 3 == 0, 2] = 15
+        box[np.arange(n) % 3 == 1, 0] = rng.choice([-30, 30], size=np.sum(np.arange(n) % 3 == 1))
+        angles = rng.uniform(0, 2 * np.pi, n // 2)
+        cylinder = np.column_stack([20 + 8 * np.cos(angles), 8 * np.sin(angles), rng.uniform(15, 45, n // 2)])
+        return np.vstack([box, cylinder]).astype(np.float32)
+
+    def random_homomat():
+        axis = rng.normal(size=3)
+        axis /= np.linalg.norm(axis)
+        angle = rng.uniform(-np.pi, np.pi)
+        k = np.array([[0, -axis[2], axis[1]], [axis[2], 0, -axis[0]], [-axis[1], axis[0], 0]])
+        homomat = np.eye(4)
+        homomat[:3, :3] = np.eye(3) + np.sin(angle) * k + (1 - np.cos(angle)) * k @ k
+        homomat[:3, 3] = rng.uniform([-150, -150, 500], [150, 150, 600])
+        return homomat
+
+    template = sample_object(20000)
+    pipeline = PointCloudPipeline(voxel_size=2, viewpoint=None)
+    tic = time.perf_counter()
+    pipeline.add_template('part_a', template)
+    print("template preprocessing {:.3f}s, {} points".format(time.perf_counter() - tic,
+                                                             len(pipeline.get_template('part_a').points)))
+    gt_homomat = random_homomat()
+    scene = np.vstack([transform_points(gt_homomat, sample_object(60000)) + rng.normal(0, .2, (90000, 3)),
+                       rng.uniform([-200, -200, 450], [200, 200, 650], size=(2000, 3))]).astype(np.float32)
+    for frame in range(3):
+        rmse, fitness, homomat = pipeline.register('part_a', scene, zrng=[400, 700])
+        print("frame {}: rmse {:.3f}, fitness {:.3f}, rotation error {:.4f}rad, translation error {:.3f}mm".format(
+            frame, rmse, fitness,
+            np.arccos(np.clip((np.trace(homomat[:3, :3].T @ gt_homomat[:3, :3]) - 1) / 2, -1, 1)),
+            np.linalg.norm(homomat[:3, 3] - gt_homomat[:3, 3])))
+        print("   " + ", ".join("{} {:.1f}ms".format(k, v * 1000) for k, v in pipeline.timings.items()))
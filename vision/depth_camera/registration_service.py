@@ -0,0 +1,355 @@
+"""
+Register one scene against many templates and pose hypotheses in a process pool
+The scene is preprocessed once in the calling process and its points, normals, and fpfh are put into shared memory;
+every worker attaches to them without copying and builds the scene kd-tree once per scene
+(a cKDTree cannot live in shared memory, rebuilding it from the shared points takes a few milliseconds).
+Templates are shared the same way when they are added, and cached by the workers.
+Each hypothesis is either a global registration (fpfh + ransac) or a given initial pose, refined by icp that moves
+the template onto the scene; fitness is the ratio of template points matched in the scene.
+The best fitness found so far is shared by the workers, and hypotheses whose icp fitness falls clearly below it are
+stopped early.
+The hypotheses run in the calling process by default. In the demo below, 4 workers take about as long as the
+serial path: ICP of a few hypotheses is too short to pay for the dispatch. Use max_workers > 0 only when there are
+many templates and hypotheses per scene and several free cores.
+See pcd_pipeline.PointCloudPipeline.register for the serial version.
+"""
+
+import time
+import multiprocessing as mp
+from multiprocessing import shared_memory
+from concurrent import futures
+import numpy as np
+import vision.depth_camera.pcd_pipeline as ppl
+
+
+class SharedArrays(object):
+    """
+    named arrays packed into one shared memory block
+    """
+
+    def __init__(self, arrays):
+        """
+        :param arrays: dict of name: nparray
+        """
+        self.layout = {}
+        offset = 0
+        for name, array in arrays.items():
+            array = np.ascontiguousarray(array)
+            self.layout[name] = (offset, array.shape, array.dtype.str)
+            offset += (array.nbytes + 63) // 64 * 64
+        self.shm = shared_memory.SharedMemory(create=True, size=max(offset, 1))
+        for name, array in arrays.items():
+            SharedArrays._view(self.shm, self.layout[name])[:] = array
+
+    @staticmethod
+    def _view(shm, entry):
+        offset, shape, dtype = entry
+        return np.ndarray(shape, dtype=dtype, buffer=shm.buf, offset=offset)
+
+    @property
+    def descriptor(self):
+        """
+        picklable, see attach
+        """
+        return self.shm.name, self.layout
+
+    @staticmethod
+    def attach(descriptor):
+        """
+        :return: shared memory (keep it alive while the arrays are used), dict of name: read-only nparray
+        """
+        name, layout = descriptor
+        shm = shared_memory.SharedMemory(name=name)
+        arrays = {}
+        for key, entry in layout.items():
+            arrays[key] = SharedArrays._view(shm, entry)
+            arrays[key].flags.writeable = False
+        return shm, arrays
+
+    def unlink(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+class RegistrationResult(object):
+
+    def __init__(self, template_id, hypothesis_id, rmse, fitness, homomat, pruned, seconds):
+        """
+        :param hypothesis_id: index among the hypotheses of the template, global ones first
+        :param homomat: pose of the template in the scene
+        :param pruned: True if icp was stopped because the fitness was clearly worse than the best one
+        """
+        self.template_id = template_id
+        self.hypothesis_id = hypothesis_id
+        self.rmse = rmse
+        self.fitness = fitness
+        self.homomat = homomat
+        self.pruned = pruned
+        self.seconds = seconds
+
+    def __repr__(self):
+        return "RegistrationResult(template_id={!r}, hypothesis_id={}, rmse={:.4f}, fitness={:.4f}, " \
+               "pruned={}, seconds={:.4f})".format(self.template_id, self.hypothesis_id, self.rmse, self.fitness,
+                                                   self.pruned, self.seconds)
+
+
+# per-process state of the workers
+_best_fitness = None
+_scene = {}
+_templates = {}
+
+
+def _init_worker(best_fitness):
+    global _best_fitness
+    _best_fitness = best_fitness
+
+
+def _get_scene(token, descriptor):
+    if _scene.get('token') != token:
+        if 'shm' in _scene:
+            _scene['shm'].close()
+        _scene.clear()
+        shm, arrays = SharedArrays.attach(descriptor)
+        _scene.update(token=token, shm=shm,
+                      features=ppl.TemplateFeatures(arrays['points'], arrays['normals'], arrays['fpfh']))
+    return _scene['features']
+
+
+def _get_template(key, descriptor, live_keys):
+    for stale_key in [k for k in _templates if k not in live_keys]:
+        _templates.pop(stale_key)[0].close()
+    if key not in _templates:
+        shm, arrays = SharedArrays.attach(descriptor)
+        _templates[key] = (shm, ppl.TemplateFeatures(arrays['points'], arrays['normals'], arrays['fpfh']))
+    return _templates[key][1]
+
+
+def _register_hypothesis(job):
+    """
+    global registration (if job['init_homomat'] is None) and icp of one template hypothesis
+    :return: RegistrationResult
+    """
+    tic = time.perf_counter()
+    scene_features = _get_scene(job['scene_token'], job['scene'])
+    template_features = _get_template(job['template_key'], job['template'], job['live_template_keys'])
+    pipeline = ppl.PointCloudPipeline(voxel_size=job['voxel_size'])
+    init_homomat = job['init_homomat']
+    if init_homomat is None:
+        correspondences = pipeline.match_features(scene_features, template_features)
+        _, scene_to_template = pipeline.ransac(scene_features.points, template_features.points, correspondences,
+                                               distance_threshold=job['distance_threshold'],
+                                               rng=np.random.default_rng(job['seed']))
+        init_homomat = np.linalg.inv(scene_to_template)
+    pruned = []
+
+    def should_stop(iteration, rmse, fitness):
+        if iteration >= job['min_iterations'] and fitness < _best_fitness.value * job['prune_ratio']:
+            pruned.append(iteration)
+            return True
+        return False
+
+    rmse, fitness, homomat = pipeline.icp(template_features.points, scene_features, init_homomat,
+                                          max_corr_dist=job['max_corr_dist'], should_stop=should_stop)
+    if not pruned:
+        with _best_fitness.get_lock():
+            if fitness > _best_fitness.value:
+                _best_fitness.value = fitness
+    return RegistrationResult(job['template_id'], job['hypothesis_id'], rmse, fitness, homomat, len(pruned) > 0,
+                              time.perf_counter() - tic)
+
+
+class RegistrationService(object):
+    """
+    one scene, many templates and hypotheses
+    usage: add templates once, then call register for every scene; close (or use a with block) to free the pool
+    and the shared memory
+    """
+
+    def __init__(self, pipeline=None, max_workers=0, prune_ratio=.5, min_iterations=3):
+        """
+        :param pipeline: PointCloudPipeline that preprocesses the scene and the templates, a default one if None
+        :param max_workers: number of processes, None means the number of cpus, 0 (default) runs the hypotheses in
+                            this process
+        :param prune_ratio: a hypothesis is stopped if its icp fitness is below prune_ratio * the best finished fitness
+        :param min_iterations: icp iterations before a hypothesis can be stopped
+        """
+        self.pipeline = ppl.PointCloudPipeline() if pipeline is None else pipeline
+        self.prune_ratio = prune_ratio
+        self.min_iterations = min_iterations
+        self.timings = {}
+        self._template_arrays = {}
+        self._template_keys = {}
+        self._n_keys = 0
+        self._n_scenes = 0
+        ctx = mp.get_context()
+        self._best_fitness = ctx.Value('d', 0.0)
+        if max_workers == 0:
+            self._executor = None
+            _init_worker(self._best_fitness)
+        else:
+            self._executor = futures.ProcessPoolExecutor(max_workers=max_workers, mp_context=ctx,
+                                                         initializer=_init_worker,
+                                                         initargs=(self._best_fitness,))
+
+    def add_template(self, template_id, points, remove_outliers=False):
+        """
+        preprocess a template and share its features with the workers, replaces an existing one with the same id
+        :param template_id: any hashable and picklable
+        :param points: nx3 nparray
+        :return: TemplateFeatures
+        """
+        features = self.pipeline.add_template(template_id, points, remove_outliers=remove_outliers)
+        self._release_template(template_id)
+        self._template_arrays[template_id] = SharedArrays(dict(points=features.points,
+                                                               normals=features.normals,
+                                                               fpfh=features.fpfh))
+        self._template_keys[template_id] = self._n_keys
+        self._n_keys += 1
+        return features
+
+    def has_template(self, template_id):
+        return template_id in self._template_arrays
+
+    def remove_template(self, template_id):
+        self.pipeline.remove_template(template_id)
+        self._release_template(template_id)
+
+    def _release_template(self, template_id):
+        if template_id in self._template_arrays:
+            self._template_arrays.pop(template_id).unlink()
+            self._template_keys.pop(template_id)
+
+    def register(self, scene_points, template_ids=None, n_global=1, init_homomats=None,
+                 xrng=None, yrng=None, zrng=None, max_corr_dist=None, rng=None):
+        """
+        :param scene_points: nx3 nparray
+        :param template_ids: list of template ids, None means all the added templates
+        :param n_global: number of global registration hypotheses (ransac seeds) per template
+        :param init_homomats: optional dict of template_id: list of initial template poses in the scene,
+                              e.g. an obb pose and its flipped version
+        :param max_corr_dist: icp correspondence distance, the voxel size of the pipeline if None
+        :param rng: np.random.Generator for the ransac seeds
+        :return: list of RegistrationResult, ranked by fitness (descending) and rmse (ascending),
+                 pruned hypotheses at the end
+        """
+        tic = time.perf_counter()
+        rng = np.random.default_rng() if rng is None else rng
+        template_ids = list(self._template_arrays) if template_ids is None else template_ids
+        init_homomats = {} if init_homomats is None else init_homomats
+        scene_down = self.pipeline.preprocess(scene_points, xrng, yrng, zrng)
+        scene_features = self.pipeline.compute_features(scene_down)
+        self.timings = {'scene': time.perf_counter() - tic}
+        scene_arrays = SharedArrays(dict(points=scene_features.points,
+                                         normals=scene_features.normals,
+                                         fpfh=scene_features.fpfh))
+        self._n_scenes += 1
+        self._best_fitness.value = 0
+        try:
+            live_template_keys = frozenset(self._template_keys.values())
+            jobs = []
+            for template_id in template_ids:
+                hypotheses = [None] * n_global + [np.asarray(homomat, dtype=np.float64)
+                                                  for homomat in init_homomats.get(template_id, [])]
+                for hypothesis_id, init_homomat in enumerate(hypotheses):
+                    jobs.append(dict(scene_token=(id(self), self._n_scenes),
+                                     scene=scene_arrays.descriptor,
+                                     template_id=template_id,
+                                     template_key=self._template_keys[template_id],
+                                     template=self._template_arrays[template_id].descriptor,
+                                     live_template_keys=live_template_keys,
+                                     hypothesis_id=hypothesis_id,
+                                     init_homomat=init_homomat,
+                                     seed=int(rng.integers(1 << 32)),
+                                     voxel_size=self.pipeline.voxel_size,
+                                     distance_threshold=self.pipeline.voxel_size * 1.5,
+                                     max_corr_dist=self.pipeline.voxel_size if max_corr_dist is None
+                                     else max_corr_dist,
+                                     prune_ratio=self.prune_ratio,
+                                     min_iterations=self.min_iterations))
+            # the given initial poses are usually good, run them first so that they set the bar for pruning
+            jobs.sort(key=lambda job: job['init_homomat'] is None)
+            if self._executor is None:
+                results = [_register_hypothesis(job) for job in jobs]
+            else:
+                results = list(self._executor.map(_register_hypothesis, jobs))
+        finally:
+            scene_arrays.unlink()
+        results.sort(key=lambda result: (result.pruned, -result.fitness, result.rmse))
+        self.timings['total'] = time.perf_counter() - tic
+        return results
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+        for template_id in list(self._template_arrays):
+            self._release_template(template_id)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+if __name__ == '__main__':
+    rng = np.random.default_rng(0)
+
+    def sample_box_cylinder(n):
+        box = rng.uniform([-30, -20, 0], [30, 20, 15], size=(n, 3))
+        box[np.arange(n) % 3 == 0, 2] = 15
+        box[np.arange(n) % 3 == 1, 0] = rng.choice([-30, 30], size=np.sum(np.arange(n) % 3 == 1))
+        angles = rng.uniform(0, 2 * np.pi, n // 2)
+        cylinder = np.column_stack([20 + 8 * np.cos(angles), 8 * np.sin(angles), rng.uniform(15, 45, n // 2)])
+        return np.vstack([box, cylinder]).astype(np.float32)
+
+    def sample_plate(n, length):
+        plate = rng.uniform([-length / 2, -25, 0], [length / 2, 25, 5], size=(n, 3))
+        plate[np.arange(n) % 2 == 0, 2] = 5
+        return plate.astype(np.float32)
+
+    def random_homomat():
+        axis = rng.normal(size=3)
+        axis /= np.linalg.norm(axis)
+        angle = rng.uniform(-np.pi, np.pi)
+        k = np.array([[0, -axis[2], axis[1]], [axis[2], 0, -axis[0]], [-axis[1], axis[0], 0]])
+        homomat = np.eye(4)
+        homomat[:3, :3] = np.eye(3) + np.sin(angle) * k + (1 - np.cos(angle)) * k @ k
+        homomat[:3, 3] = rng.uniform([-150, -150, 500], [150, 150, 600])
+        return homomat
+
+    templates = {'box_cylinder': sample_box_cylinder(20000),
+                 'plate_80': sample_plate(20000, 80),
+                 'plate_120': sample_plate(20000, 120)}
+    gt_homomat = random_homomat()
+    scene = np.vstack([ppl.transform_points(gt_homomat, sample_box_cylinder(60000)) + rng.normal(0, .2, (90000, 3)),
+                       rng.uniform([-200, -200, 450], [200, 200, 650], size=(2000, 3))]).astype(np.float32)
+    # a coarse initial guess, like an obb pose, and its flipped version
+    init_homomat = gt_homomat.copy()
+    init_homomat[:3, 3] += [3, -2, 2]
+    flipped_homomat = init_homomat.copy()
+    flipped_homomat[:3, :2] = -flipped_homomat[:3, :2]
+    init_homomats = {'box_cylinder': [init_homomat, flipped_homomat]}
+    # serial baseline: one register call per template, as the locators do
+    pipeline = ppl.PointCloudPipeline(voxel_size=2)
+    for template_id, points in templates.items():
+        pipeline.add_template(template_id, points)
+    tic = time.perf_counter()
+    serial_results = [(template_id, pipeline.register(template_id, scene, zrng=[400, 700], rng=rng))
+                      for template_id in templates for _ in range(2)]
+    print("serial, {} registrations: {:.3f}s".format(len(serial_results), time.perf_counter() - tic))
+    for max_workers in [0, 4]:
+        with RegistrationService(ppl.PointCloudPipeline(voxel_size=2), max_workers=max_workers) as service:
+            for template_id, points in templates.items():
+                service.add_template(template_id, points)
+            for frame in range(2):
+                results = service.register(scene, n_global=2, init_homomats=init_homomats, zrng=[400, 700], rng=rng)
+                best = results[0]
+                print("max_workers {}, frame {}: {:.3f}s for {} hypotheses (scene {:.3f}s), {} pruned, "
+                      "best {} rotation error {:.4f}rad, translation error {:.3f}mm".format(
+                    max_workers, frame, service.timings['total'], len(results), service.timings['scene'],
+                    sum(result.pruned for result in results), best.template_id,
+                    np.arccos(np.clip((np.trace(best.homomat[:3, :3].T @ gt_homomat[:3, :3]) - 1) / 2, -1, 1)),
+                    np.linalg.norm(best.homomat[:3, 3] - gt_homomat[:3, 3])))
+            for result in results:
+                print("   ", result)
@@ -1,25 +1,104 @@
+import threading
+import numpy as np
+import basis.robot_math as rm
+import basis.data_adapter as da
+import robot_sim._kinematics.jlchain as rkjlc
+from panda3d.core import NodePath
+
+
+def find_jlcs(instance):
+    """
+    the JLChains of a robot, found by walking the robot_sim objects, lists, and dicts held by instance
+    :param instance:
+    :return: list of robot_sim._kinematics.jlchain.JLChain
+    """
+    jlcs = []
+    visited = set()
+    stack = [instance]
+    while stack:
+        obj = stack.pop()
+        if id(obj) in visited:
+            continue
+        visited.add(id(obj))
+        if isinstance(obj, rkjlc.JLChain):
+            jlcs.append(obj)
+        elif isinstance(obj, dict):
+            stack.extend(obj.values())
+        elif isinstance(obj, (list, tuple)):
+            stack.extend(obj)
+        elif (obj is instance or type(obj).__module__.startswith("robot_sim")) and hasattr(obj, "__dict__"):
+            stack.extend(vars(obj).values())
+    return jlcs
+
+
 class RobotInfo(object):
+    """
+    path animation of a robot that copies the link meshes of all its JLChains once and only changes their
+    transforms per frame, the robot is moved by robot_s.fk, which also moves the chains it couples (e.g. hands)
+    a path of a bare JLChain is animated faster by JLCInfo, which uses batched forward kinematics
+    """
 
     def __init__(self):
         self.robot_s = None
         self.robot_component_name = None
-        self.robot_meshmodel = None
         self.robot_meshmodel_parameters = None
         self.robot_path = None
         self.robot_path_counter = None
+        self.root_nodepath = None
+        self.jlc_nodepaths = None
+
+    @staticmethod
+    def gen_jlc_nodepaths(robot_s, root_nodepath):
+        """
+        :param robot_s:
+        :param root_nodepath:
+        :return: list of (jlc, lnk NodePaths, inverse reference homomats), see JLCInfo.gen_lnk_nodepaths
+        """
+        jlc_nodepaths = []
+        for jlc in find_jlcs(robot_s):
+            lnk_nodepaths, inv_ref_homomats = JLCInfo.gen_lnk_nodepaths(jlc, root_nodepath)
+            jlc_nodepaths.append((jlc, lnk_nodepaths, inv_ref_homomats))
+        return jlc_nodepaths
+
+    @staticmethod
+    def update_jlc_nodepaths(jlc_nodepaths):
+        """
+        set the transforms of the copied link meshes to the current link poses
+        :param jlc_nodepaths: see gen_jlc_nodepaths
+        :return:
+        """
+        for jlc, lnk_nodepaths, inv_ref_homomats in jlc_nodepaths:
+            for lnk, lnk_nodepath, inv_ref_homomat in zip([jlc.anchor.lnk] + [jnt.lnk for jnt in jlc.jnts],
+                                                          lnk_nodepaths, inv_ref_homomats):
+                if lnk is not None:
+                    lnk_homomat = rm.homomat_from_posrot(lnk.gl_pos, lnk.gl_rotmat)
+                    lnk_nodepath.setMat(da.npmat4_to_pdmat4(lnk_homomat @ inv_ref_homomat))
 
     @staticmethod
     def create_anime_info(robot_s,
                           robot_component_name,
                           robot_meshmodel_parameters,
                           robot_path):
+        """
+        :param robot_s: robot_sim.robots.system_interface.SystemInterface
+        :param robot_component_name:
+        :param robot_meshmodel_parameters: [tcp_jnt_id, tcp_loc_pos, tcp_loc_rotmat, toggle_tcpcs, toggle_jntscs,
+                                            rgba, name], only rgba and name are used since the meshes are copied
+        :param robot_path: a list of joint values of robot_component_name
+        :return:
+        """
         anime_info = RobotInfo()
         anime_info.robot_s = robot_s
         anime_info.robot_component_name = robot_component_name
-        anime_info.robot_meshmodel = robot_s.gen_mesh_model(robot_meshmodel_parameters)
         anime_info.robot_meshmodel_parameters = robot_meshmodel_parameters
         anime_info.robot_path = robot_path
         anime_info.robot_path_counter = 0
+        rgba = robot_meshmodel_parameters[5] if len(robot_meshmodel_parameters) > 5 else None
+        name = robot_meshmodel_parameters[6] if len(robot_meshmodel_parameters) > 6 else "robot_anime"
+        anime_info.root_nodepath = NodePath(name)
+        anime_info.jlc_nodepaths = RobotInfo.gen_jlc_nodepaths(robot_s, anime_info.root_nodepath)
+        if rgba is not None:
+            anime_info.root_nodepath.setColor(rgba[0], rgba[1], rgba[2], rgba[3])
         return anime_info
 
 
@@ -42,3 +121,74 @@ class ObjInfo(object):
             anime_info.obj_path = obj_path
         anime_info.obj_path_counter = 0
         return anime_info
+
+
+class JLCInfo(object):
+    """
+    path animation of a JLChain that builds the link meshes once and only changes their transforms per frame
+    the link poses of the whole path are computed by batched forward kinematics in a background thread;
+    the animation starts as soon as the first chunk is available
+    """
+
+    def __init__(self):
+        self.jlc = None
+        self.jnt_vals_path = None
+        self.lnk_nodepaths = None
+        self.delta_homomats = None
+        self.n_ready = 0
+        self.path_counter = None
+        self.root_nodepath = None
+        self.worker = None
+
+    @staticmethod
+    def gen_lnk_nodepaths(jlc, root_nodepath):
+        """
+        copy the mesh of every link of jlc once under its own holder NodePath
+        the copied mesh keeps the pose of the link at creation time, the transform of its holder is the delta from
+        that pose, i.e. lnk_homomat @ inv_ref_homomat
+        :param jlc: robot_sim._kinematics.jlchain.JLChain
+        :param root_nodepath: the holders are attached to it
+        :return: list of holder NodePaths, (n_dof+1)x4x4 nparray of the inverse link homomats at creation time,
+                 both in the order of JLChain.gen_lnk_homomats
+        """
+        lnk_nodepaths = []
+        ref_homomats = []
+        for lnk in [jlc.anchor.lnk] + [jnt.lnk for jnt in jlc.jnts]:
+            lnk_nodepath = root_nodepath.attachNewNode("lnk")
+            if lnk is not None and lnk.cmodel is not None:
+                lnk.cmodel.attach_copy_to(lnk_nodepath)
+                ref_homomats.append(rm.homomat_from_posrot(lnk.gl_pos, lnk.gl_rotmat))
+            else:
+                ref_homomats.append(np.eye(4))
+            lnk_nodepaths.append(lnk_nodepath)
+        return lnk_nodepaths, np.array([rm.homomat_inverse(homomat) for homomat in ref_homomats])
+
+    @staticmethod
+    def create_anime_info(jlc, jnt_vals_path, rgba=None, chunk_size=256):
+        """
+        :param jlc: robot_sim._kinematics.jlchain.JLChain
+        :param jnt_vals_path: a list of 1xn_dof nparrays
+        :param rgba:
+        :param chunk_size: number of configurations per batched forward kinematics call
+        :return:
+        """
+        anime_info = JLCInfo()
+        anime_info.jlc = jlc
+        anime_info.jnt_vals_path = np.asarray(jnt_vals_path, dtype=float).reshape((-1, jlc.n_dof))
+        anime_info.root_nodepath = NodePath("jlc_anime")
+        anime_info.lnk_nodepaths, inv_ref_homomats = JLCInfo.gen_lnk_nodepaths(jlc, anime_info.root_nodepath)
+        if rgba is not None:
+            anime_info.root_nodepath.setColor(rgba[0], rgba[1], rgba[2], rgba[3])
+        anime_info.delta_homomats = np.empty((len(anime_info.jnt_vals_path), jlc.n_dof + 1, 4, 4))
+        anime_info.path_counter = 0
+
+        def compute_delta_homomats():
+            for start in range(0, len(anime_info.jnt_vals_path), chunk_size):
+                end = start + chunk_size
+                lnk_homomats = jlc.gen_lnk_homomats(anime_info.jnt_vals_path[start:end])
+                anime_info.delta_homomats[start:end] = lnk_homomats @ inv_ref_homomats
+                anime_info.n_ready = min(end, len(anime_info.jnt_vals_path))
+
+        anime_info.worker = threading.Thread(target=compute_delta_homomats, name="jlc_anime_fk", daemon=True)
+        anime_info.worker.start()
+        return anime_info
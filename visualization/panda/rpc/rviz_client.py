@@ -83,7 +83,7 @@ class RVizClient(object):
     def copy_to_remote(self, loc_instance, given_rmt_robot_s_name=None):
         if given_rmt_robot_s_name is None:
             given_rmt_robot_s_name = self._gen_random_name(prefix='rmt_robot_s_')
-        if isinstance(loc_instance, ri.RobotInterface):
+        if isinstance(loc_instance, ri.SystemInterface):
             loc_instance.disable_cc()
             self.stub.create_instance(rv_msg.CreateInstanceRequest(name=given_rmt_robot_s_name,
                                                                    data=pickle.dumps(loc_instance)))
@@ -93,21 +93,66 @@ class RVizClient(object):
                                                                    data=pickle.dumps(loc_instance)))
         return given_rmt_robot_s_name
 
-    def update_remote(self, rmt_instance, loc_instance):
-        if isinstance(loc_instance, ri.RobotInterface):
-            code = ("%s.fk(jnt_vals=np.array(%s), hnd_name='all')\n" %
-                    (rmt_instance, np.array2string(loc_instance.get_jntvalues(jlc_name='all'), separator=',')))
+    def _add_to_batch(self, batch, rmt_instance, loc_instance, component_name='all'):
+        if isinstance(loc_instance, ri.SystemInterface):
+            batch.jnt_values.add(name=rmt_instance,
+                                 component_name=component_name,
+                                 jnt_values=loc_instance.get_jnt_values(component_name=component_name))
         elif isinstance(loc_instance, gm.GeometricModel):
-            code = ("%s.set_pos(np.array(%s))\n" % (
-            rmt_instance, np.array2string(loc_instance.get_pos(), separator=',')) +
-                    "%s.set_rotmat(np.array(%s))\n" % (
-                    rmt_instance, np.array2string(loc_instance.get_rotmat(), separator=',')) +
-                    "%s.set_rgba([%s])\n" % (rmt_instance, ','.join(map(str, loc_instance.get_rgba()))))
+            batch.poses.add(name=rmt_instance, pos=loc_instance.pos, rotmat=loc_instance.rotmat.ravel())
+            batch.rgbas.add(name=rmt_instance, rgba=loc_instance.rgba)
         elif isinstance(loc_instance, gm.StaticGeometricModel):
-            code = "%s.set_rgba([%s])\n" % (rmt_instance, ','.join(map(str, loc_instance.get_rgba())))
+            batch.rgbas.add(name=rmt_instance, rgba=loc_instance.rgba)
         else:
-            raise ValueError
-        self.run_code(code)
+            raise ValueError("Unsupported instance type: {}".format(type(loc_instance)))
+
+    def _send_batch(self, batch):
+        return_val = self.stub.update_batch(batch).value
+        if return_val == rv_msg.Status.ERROR:
+            print("Something went wrong with the server!! Try again!")
+            raise Exception()
+
+    def update_remote(self, rmt_instance, loc_instance, component_name='all'):
+        """
+        copy the joint values of a local robot_s, or the pose and color of a local model, to its remote copy
+        :param rmt_instance: str, name returned by copy_to_remote
+        :param loc_instance: robot_s, GeometricModel, or StaticGeometricModel
+        :param component_name: the component of a robot_s to update
+        :return:
+        """
+        self.update_remote_batch([(rmt_instance, loc_instance)], component_name=component_name)
+
+    def update_remote_batch(self, rmt_loc_pairs, component_name='all'):
+        """
+        update many remote instances with one rpc, e.g. once per frame
+        :param rmt_loc_pairs: a list of (rmt_instance, loc_instance), see update_remote
+        :param component_name:
+        :return:
+        """
+        batch = rv_msg.UpdateBatch()
+        for rmt_instance, loc_instance in rmt_loc_pairs:
+            self._add_to_batch(batch, rmt_instance, loc_instance, component_name=component_name)
+        self._send_batch(batch)
+
+    def send_updates(self, jnt_values=None, poses=None, rgbas=None):
+        """
+        update remote instances from raw values, without local instances
+        :param jnt_values: {rmt_robot_s: (component_name, 1xn nparray)}
+        :param poses: {rmt_obj: (npvec3, npmat3)}
+        :param rgbas: {rmt_obj: 1x4 list/nparray}
+        :return:
+        """
+        batch = rv_msg.UpdateBatch()
+        if jnt_values is not None:
+            for rmt_instance, (component_name, values) in jnt_values.items():
+                batch.jnt_values.add(name=rmt_instance, component_name=component_name, jnt_values=values)
+        if poses is not None:
+            for rmt_instance, (pos, rotmat) in poses.items():
+                batch.poses.add(name=rmt_instance, pos=pos, rotmat=np.asarray(rotmat).ravel())
+        if rgbas is not None:
+            for rmt_instance, rgba in rgbas.items():
+                batch.rgbas.add(name=rmt_instance, rgba=rgba)
+        self._send_batch(batch)
 
     def show_model(self, rmt_mesh):
         code = "base.attach_noupdate_model(%s)\n" % rmt_mesh
@@ -121,6 +166,15 @@ class RVizClient(object):
         # self.rmt_mesh_list.remove(rmt_mesh)
         self.run_code(code)
 
+    def show_robot(self, rmt_robot_s):
+        """
+        draw a robot_s copied by copy_to_remote, it is otherwise drawn at its first joint update
+        """
+        self.run_code("rviz_registry.show('%s')\n" % rmt_robot_s)
+
+    def unshow_robot(self, rmt_robot_s):
+        self.run_code("rviz_registry.unshow('%s')\n" % rmt_robot_s)
+
     def showmodel_to_remote(self, loc_mesh, given_rmt_mesh_name=None):
         """
         helper function that merges copy_to_remote, show_instance, and unshow_instance
@@ -19,7 +19,7 @@ DESCRIPTOR = _descriptor.FileDescriptor(
   syntax='proto3',
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_pb=b'\n\nrviz.proto\"\x07\n\x05\x45mpty\"\x1b\n\x0b\x43odeRequest\x12\x0c\n\x04\x63ode\x18\x01 \x01(\x0c\"3\n\x15\x43reateInstanceRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x02 \x01(\x0c\"P\n\x06Status\x12\"\n\x05value\x18\x01 \x01(\x0e\x32\x13.Status.StatusValue\"\"\n\x0bStatusValue\x12\t\n\x05\x45RROR\x10\x00\x12\x08\n\x04\x44ONE\x10\x01\x32\x61\n\x04RViz\x12#\n\x08run_code\x12\x0c.CodeRequest\x1a\x07.Status\"\x00\x12\x34\n\x0f\x63reate_instance\x12\x16.CreateInstanceRequest\x1a\x07.Status\"\x00\x62\x06proto3'
+  serialized_pb=b'\n\nrviz.proto\"\x07\n\x05\x45mpty\"\x1b\n\x0b\x43odeRequest\x12\x0c\n\x04\x63ode\x18\x01 \x01(\x0c\"3\n\x15\x43reateInstanceRequest\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0c\n\x04\x64\x61ta\x18\x02 \x01(\x0c\"J\n\x0eSetJointValues\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x16\n\x0e\x63omponent_name\x18\x02 \x01(\t\x12\x12\n\njnt_values\x18\x03 \x03(\x02\"4\n\x07SetPose\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0b\n\x03pos\x18\x02 \x03(\x02\x12\x0e\n\x06rotmat\x18\x03 \x03(\x02\"%\n\x07SetRGBA\x12\x0c\n\x04name\x18\x01 \x01(\t\x12\x0c\n\x04rgba\x18\x02 \x03(\x02\"d\n\x0bUpdateBatch\x12#\n\njnt_values\x18\x01 \x03(\x0b\x32\x0f.SetJointValues\x12\x17\n\x05poses\x18\x02 \x03(\x0b\x32\x08.SetPose\x12\x17\n\x05rgbas\x18\x03 \x03(\x0b\x32\x08.SetRGBA\"P\n\x06Status\x12\"\n\x05value\x18\x01 \x01(\x0e\x32\x13.Status.StatusValue\"\"\n\x0bStatusValue\x12\t\n\x05\x45RROR\x10\x00\x12\x08\n\x04\x44ONE\x10\x01\x32\x8a\x01\n\x04RViz\x12#\n\x08run_code\x12\x0c.CodeRequest\x1a\x07.Status\"\x00\x12\x34\n\x0f\x63reate_instance\x12\x16.CreateInstanceRequest\x1a\x07.Status\"\x00\x12\'\n\x0cupdate_batch\x12\x0c.UpdateBatch\x1a\x07.Status\"\x00\x62\x06proto3'
 )
 
 
@@ -44,8 +44,8 @@ _STATUS_STATUSVALUE = _descriptor.EnumDescriptor(
   ],
   containing_type=None,
   serialized_options=None,
-  serialized_start=151,
-  serialized_end=185,
+  serialized_start=422,
+  serialized_end=456,
 )
 _sym_db.RegisterEnumDescriptor(_STATUS_STATUSVALUE)
 
@@ -146,6 +146,183 @@ _CREATEINSTANCEREQUEST = _descriptor.Descriptor(
 )
 
 
+_SETJOINTVALUES = _descriptor.Descriptor(
+  name='SetJointValues',
+  full_name='SetJointValues',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='name', full_name='SetJointValues.name', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='component_name', full_name='SetJointValues.component_name', index=1,
+      number=2, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='jnt_values', full_name='SetJointValues.jnt_values', index=2,
+      number=3, type=2, cpp_type=6, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=105,
+  serialized_end=179,
+)
+
+
+_SETPOSE = _descriptor.Descriptor(
+  name='SetPose',
+  full_name='SetPose',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='name', full_name='SetPose.name', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='pos', full_name='SetPose.pos', index=1,
+      number=2, type=2, cpp_type=6, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='rotmat', full_name='SetPose.rotmat', index=2,
+      number=3, type=2, cpp_type=6, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=181,
+  serialized_end=233,
+)
+
+
+_SETRGBA = _descriptor.Descriptor(
+  name='SetRGBA',
+  full_name='SetRGBA',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='name', full_name='SetRGBA.name', index=0,
+      number=1, type=9, cpp_type=9, label=1,
+      has_default_value=False, default_value=b"".decode('utf-8'),
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='rgba', full_name='SetRGBA.rgba', index=1,
+      number=2, type=2, cpp_type=6, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=235,
+  serialized_end=272,
+)
+
+
+_UPDATEBATCH = _descriptor.Descriptor(
+  name='UpdateBatch',
+  full_name='UpdateBatch',
+  filename=None,
+  file=DESCRIPTOR,
+  containing_type=None,
+  create_key=_descriptor._internal_create_key,
+  fields=[
+    _descriptor.FieldDescriptor(
+      name='jnt_values', full_name='UpdateBatch.jnt_values', index=0,
+      number=1, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='poses', full_name='UpdateBatch.poses', index=1,
+      number=2, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+    _descriptor.FieldDescriptor(
+      name='rgbas', full_name='UpdateBatch.rgbas', index=2,
+      number=3, type=11, cpp_type=10, label=3,
+      has_default_value=False, default_value=[],
+      message_type=None, enum_type=None, containing_type=None,
+      is_extension=False, extension_scope=None,
+      serialized_options=None, file=DESCRIPTOR,  create_key=_descriptor._internal_create_key),
+  ],
+  extensions=[
+  ],
+  nested_types=[],
+  enum_types=[
+  ],
+  serialized_options=None,
+  is_extendable=False,
+  syntax='proto3',
+  extension_ranges=[],
+  oneofs=[
+  ],
+  serialized_start=274,
+  serialized_end=374,
+)
+
+
 _STATUS = _descriptor.Descriptor(
   name='Status',
   full_name='Status',
@@ -174,15 +351,22 @@ _STATUS = _descriptor.Descriptor(
   extension_ranges=[],
   oneofs=[
   ],
-  serialized_start=105,
-  serialized_end=185,
+  serialized_start=376,
+  serialized_end=456,
 )
 
+_UPDATEBATCH.fields_by_name['jnt_values'].message_type = _SETJOINTVALUES
+_UPDATEBATCH.fields_by_name['poses'].message_type = _SETPOSE
+_UPDATEBATCH.fields_by_name['rgbas'].message_type = _SETRGBA
 _STATUS.fields_by_name['value'].enum_type = _STATUS_STATUSVALUE
 _STATUS_STATUSVALUE.containing_type = _STATUS
 DESCRIPTOR.message_types_by_name['Empty'] = _EMPTY
 DESCRIPTOR.message_types_by_name['CodeRequest'] = _CODEREQUEST
 DESCRIPTOR.message_types_by_name['CreateInstanceRequest'] = _CREATEINSTANCEREQUEST
+DESCRIPTOR.message_types_by_name['SetJointValues'] = _SETJOINTVALUES
+DESCRIPTOR.message_types_by_name['SetPose'] = _SETPOSE
+DESCRIPTOR.message_types_by_name['SetRGBA'] = _SETRGBA
+DESCRIPTOR.message_types_by_name['UpdateBatch'] = _UPDATEBATCH
 DESCRIPTOR.message_types_by_name['Status'] = _STATUS
 _sym_db.RegisterFileDescriptor(DESCRIPTOR)
 
@@ -207,6 +391,34 @@ CreateInstanceRequest = _reflection.GeneratedProtocolMessageType('CreateInstance
   })
 _sym_db.RegisterMessage(CreateInstanceRequest)
 
+SetJointValues = _reflection.GeneratedProtocolMessageType('SetJointValues', (_message.Message,), {
+  'DESCRIPTOR' : _SETJOINTVALUES,
+  '__module__' : 'rviz_pb2'
+  # @@protoc_insertion_point(class_scope:SetJointValues)
+  })
+_sym_db.RegisterMessage(SetJointValues)
+
+SetPose = _reflection.GeneratedProtocolMessageType('SetPose', (_message.Message,), {
+  'DESCRIPTOR' : _SETPOSE,
+  '__module__' : 'rviz_pb2'
+  # @@protoc_insertion_point(class_scope:SetPose)
+  })
+_sym_db.RegisterMessage(SetPose)
+
+SetRGBA = _reflection.GeneratedProtocolMessageType('SetRGBA', (_message.Message,), {
+  'DESCRIPTOR' : _SETRGBA,
+  '__module__' : 'rviz_pb2'
+  # @@protoc_insertion_point(class_scope:SetRGBA)
+  })
+_sym_db.RegisterMessage(SetRGBA)
+
+UpdateBatch = _reflection.GeneratedProtocolMessageType('UpdateBatch', (_message.Message,), {
+  'DESCRIPTOR' : _UPDATEBATCH,
+  '__module__' : 'rviz_pb2'
+  # @@protoc_insertion_point(class_scope:UpdateBatch)
+  })
+_sym_db.RegisterMessage(UpdateBatch)
+
 Status = _reflection.GeneratedProtocolMessageType('Status', (_message.Message,), {
   'DESCRIPTOR' : _STATUS,
   '__module__' : 'rviz_pb2'
@@ -223,8 +435,8 @@ _RVIZ = _descriptor.ServiceDescriptor(
   index=0,
   serialized_options=None,
   create_key=_descriptor._internal_create_key,
-  serialized_start=187,
-  serialized_end=284,
+  serialized_start=459,
+  serialized_end=597,
   methods=[
   _descriptor.MethodDescriptor(
     name='run_code',
@@ -246,6 +458,16 @@ _RVIZ = _descriptor.ServiceDescriptor(
     serialized_options=None,
     create_key=_descriptor._internal_create_key,
   ),
+  _descriptor.MethodDescriptor(
+    name='update_batch',
+    full_name='RViz.update_batch',
+    index=2,
+    containing_service=None,
+    input_type=_UPDATEBATCH,
+    output_type=_STATUS,
+    serialized_options=None,
+    create_key=_descriptor._internal_create_key,
+  ),
 ])
 _sym_db.RegisterServiceDescriptor(_RVIZ)
 
@@ -24,6 +24,11 @@ class RVizStub(object):
                 request_serializer=rviz__pb2.CreateInstanceRequest.SerializeToString,
                 response_deserializer=rviz__pb2.Status.FromString,
                 )
+        self.update_batch = channel.unary_unary(
+                '/RViz/update_batch',
+                request_serializer=rviz__pb2.UpdateBatch.SerializeToString,
+                response_deserializer=rviz__pb2.Status.FromString,
+                )
 
 
 class RVizServicer(object):
@@ -41,6 +46,12 @@ class RVizServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def update_batch(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_RVizServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -54,6 +65,11 @@ def add_RVizServicer_to_server(servicer, server):
                     request_deserializer=rviz__pb2.CreateInstanceRequest.FromString,
                     response_serializer=rviz__pb2.Status.SerializeToString,
             ),
+            'update_batch': grpc.unary_unary_rpc_method_handler(
+                    servicer.update_batch,
+                    request_deserializer=rviz__pb2.UpdateBatch.FromString,
+                    response_serializer=rviz__pb2.Status.SerializeToString,
+            ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
             'RViz', rpc_method_handlers)
@@ -97,3 +113,20 @@ class RViz(object):
             rviz__pb2.Status.FromString,
             options, channel_credentials,
             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def update_batch(request,
+            target,
+            options=(),
+            channel_credentials=None,
+            call_credentials=None,
+            insecure=False,
+            compression=None,
+            wait_for_ready=None,
+            timeout=None,
+            metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/RViz/update_batch',
+            rviz__pb2.UpdateBatch.SerializeToString,
+            rviz__pb2.Status.FromString,
+            options, channel_credentials,
+            insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
@@ -1,19 +1,185 @@
 import grpc
 import time
 import pickle
+import builtins
+import threading
 import numpy as np
 import basis.trimesh as trm # for creating obj
 from concurrent import futures
+from panda3d.core import NodePath
 import modeling.geometric_model as gm
 import modeling.model_collection as mc
 import visualization.panda.rpc.rviz_pb2 as rv_msg
 import visualization.panda.rpc.rviz_pb2_grpc as rv_rpc
 import visualization.panda.world as wd
+import visualization.panda.anime_info as ai
 import robot_sim.robots.system_interface as ri
 
 
+class InstanceRegistry(object):
+    """
+    named remote instances that are updated with typed messages instead of exec
+    updates received by the rpc threads are buffered and applied once per frame by a panda3d task;
+    an update replaces the pending update of the same kind for the same instance, so a client
+    sending faster than the frame rate never builds a backlog
+    the link meshes of a registered robot are copied once, a joint update only changes their transforms (see
+    anime_info.JLCInfo.gen_lnk_nodepaths); they are attached to the scene by show or by the first joint update,
+    so a robot that is only copied to the server, e.g. to be animated by add_anime_robot, is not drawn
+    """
+
+    def __init__(self, base, namespace=None):
+        """
+        :param base: visualization.panda.world.World
+        :param namespace: dict used to look up instances that are not registered, e.g. the ones created by run_code
+        """
+        self._base = base
+        self._namespace = globals() if namespace is None else namespace
+        self._instances = {}
+        # name: (root NodePath, [(jlc, lnk NodePaths, inverse reference homomats), ...])
+        self._robot_lnk_nodepaths = {}
+        # robots that were shown once, the first joint update only shows the others
+        self._shown_robot_names = set()
+        self._lock = threading.Lock()
+        self._pending_jnt_values = {}
+        self._pending_poses = {}
+        self._pending_rgbas = {}
+        base.taskMgr.add(self._apply_pending, "rviz_registry_update", appendTask=True)
+
+    def register(self, name, instance):
+        self.unregister(name)
+        self._instances[name] = instance
+        if isinstance(instance, ri.SystemInterface):
+            root_nodepath = NodePath(name)
+            self._robot_lnk_nodepaths[name] = (root_nodepath, ai.RobotInfo.gen_jlc_nodepaths(instance, root_nodepath))
+
+    def unregister(self, name):
+        self._instances.pop(name, None)
+        self._shown_robot_names.discard(name)
+        robot_lnk_nodepaths = self._robot_lnk_nodepaths.pop(name, None)
+        if robot_lnk_nodepaths is not None:
+            robot_lnk_nodepaths[0].removeNode()
+
+    def show(self, name):
+        """
+        draw the link meshes of a registered robot
+        """
+        self._robot_lnk_nodepaths[name][0].reparentTo(self._base.render)
+        self._shown_robot_names.add(name)
+
+    def unshow(self, name):
+        self._robot_lnk_nodepaths[name][0].detachNode()
+
+    def get(self, name):
+        if name in self._instances:
+            return self._instances[name]
+        return self._namespace[name]
+
+    def has(self, name):
+        return name in self._instances or name in self._namespace
+
+    def _check_jnt_values(self, msg):
+        if msg.name not in self._robot_lnk_nodepaths:
+            return f"{msg.name}: joint values are only accepted by registered robots"
+        try:
+            n_jnts = len(self.get(msg.name).get_jnt_values(msg.component_name))
+        except Exception as e:
+            return f"{msg.name}: unknown component {msg.component_name} ({type(e).__name__}: {e})"
+        if n_jnts != len(msg.jnt_values):
+            return f"{msg.name}: {msg.component_name} has {n_jnts} joints, {len(msg.jnt_values)} values are given"
+        return None
+
+    def _check_pose(self, msg):
+        if not isinstance(self.get(msg.name), gm.GeometricModel):
+            return f"{msg.name}: poses are only accepted by geometric or collision models"
+        if len(msg.pos) != 3 or len(msg.rotmat) != 9:
+            return f"{msg.name}: a pose needs 3 position and 9 rotation matrix values"
+        return None
+
+    def _check_rgba(self, msg):
+        if not isinstance(self.get(msg.name), (gm.GeometricModel, mc.ModelCollection)):
+            return f"{msg.name}: colors are only accepted by models and model collections"
+        if len(msg.rgba) != 4:
+            return f"{msg.name}: an rgba needs 4 values"
+        return None
+
+    def push(self, batch):
+        """
+        check and buffer the updates of a rv_msg.UpdateBatch
+        :param batch:
+        :return: list of error messages, the batch is rejected as a whole if it is not empty
+        """
+        errors = []
+        for msgs, check in ((batch.jnt_values, self._check_jnt_values),
+                            (batch.poses, self._check_pose),
+                            (batch.rgbas, self._check_rgba)):
+            for msg in msgs:
+                if not self.has(msg.name):
+                    errors.append(f"{msg.name}: unknown instance")
+                    continue
+                error = check(msg)
+                if error is not None:
+                    errors.append(error)
+        if len(errors) > 0:
+            return errors
+        with self._lock:
+            for msg in batch.jnt_values:
+                self._pending_jnt_values[msg.name] = (msg.component_name, np.array(msg.jnt_values))
+            for msg in batch.poses:
+                self._pending_poses[msg.name] = (np.array(msg.pos), np.array(msg.rotmat).reshape((3, 3)))
+            for msg in batch.rgbas:
+                self._pending_rgbas[msg.name] = np.array(msg.rgba)
+        return errors
+
+    def _apply_pending(self, task):
+        """
+        a failing update is reported and skipped, the task keeps running for the following ones
+        """
+        with self._lock:
+            pending_jnt_values, self._pending_jnt_values = self._pending_jnt_values, {}
+            pending_poses, self._pending_poses = self._pending_poses, {}
+            pending_rgbas, self._pending_rgbas = self._pending_rgbas, {}
+        updates = [(self._apply_jnt_values, name, value) for name, value in pending_jnt_values.items()] + \
+                  [(self._apply_pose, name, value) for name, value in pending_poses.items()] + \
+                  [(self._apply_rgba, name, value) for name, value in pending_rgbas.items()]
+        for apply_fn, name, value in updates:
+            try:
+                apply_fn(name, value)
+            except Exception as e:
+                print(f"Failed to update {name}: ", e, type(e))
+        return task.cont
+
+    def _apply_jnt_values(self, name, value):
+        """
+        move the remote robot_s and set the transforms of its link meshes
+        """
+        component_name, jnt_values = value
+        self.get(name).fk(component_name=component_name, jnt_values=jnt_values)
+        if name not in self._shown_robot_names:
+            self.show(name)
+        ai.RobotInfo.update_jlc_nodepaths(self._robot_lnk_nodepaths[name][1])
+
+    def _apply_pose(self, name, value):
+        self.get(name).pose = value
+
+    def _apply_rgba(self, name, rgba):
+        instance = self.get(name)
+        if isinstance(instance, mc.ModelCollection):
+            instance.set_rgba(rgba)
+        else:
+            instance.rgba = rgba
+
+
 class RVizServer(rv_rpc.RVizServicer):
 
+    def __init__(self, base=None):
+        """
+        :param base: visualization.panda.world.World, the global base is used if None
+        """
+        super().__init__()
+        self.registry = InstanceRegistry(builtins.base if base is None else base)
+        # reachable by run_code, e.g. rviz_registry.show(name), see RVizClient.show_robot
+        globals()["rviz_registry"] = self.registry
+
     def run_code(self, request, context):
         """
         author: weiwei
@@ -41,6 +207,7 @@ class RVizServer(rv_rpc.RVizServicer):
             name = request.name
             data = request.data
             globals()[name] = pickle.loads(data)
+            self.registry.register(name, globals()[name])
             # fix the unserializable Shaders and CollisionTraversers
             # https://discourse.panda3d.org/t/serializing-pandanode-shaders-collisiontraverser-etc/26945/5
             # https://github.com/panda3d/panda3d/issues/1090
@@ -49,23 +216,37 @@ class RVizServer(rv_rpc.RVizServicer):
             elif isinstance(globals()[name], mc.ModelCollection):
                 for cm in globals()[name].cm_list:
                     cm.pdndp_core.setShaderAuto()
-                for gm in globals()[name].gm_list:
-                    if isinstance(gm, gm.GeometricModel):
-                        gm.pdndp_core.setShaderAuto()
-            elif isinstance(globals()[name], ri.RobotInterface):
+                for each_gm in globals()[name].gm_list:
+                    if isinstance(each_gm, gm.GeometricModel):
+                        each_gm.pdndp_core.setShaderAuto()
+            elif isinstance(globals()[name], ri.SystemInterface):
                 globals()[name].enable_cc()
             return rv_msg.Status(value=rv_msg.Status.DONE)
         except Exception as e:
             print(e, type(e))
             return rv_msg.Status(value=rv_msg.Status.ERROR)
 
+    def update_batch(self, request, context):
+        """
+        buffer typed joint, pose, and color updates of registered instances, see InstanceRegistry
+        :param request: rv_msg.UpdateBatch
+        :param context:
+        :return:
+        """
+        errors = self.registry.push(request)
+        if len(errors) > 0:
+            print("Rejected update batch: ", errors)
+            return rv_msg.Status(value=rv_msg.Status.ERROR)
+        return rv_msg.Status(value=rv_msg.Status.DONE)
+
+
 def serve(host="localhost:18300"):
     base = wd.World(cam_pos=[1, 1, 1], lookat_pos=[0, 0, 0])
     _ONE_DAY_IN_SECONDS = 60 * 60 * 24
     options = [('grpc.max_send_message_length', 100 * 1024 * 1024),
                ('grpc.max_receive_message_length', 100 * 1024 * 1024)]
     server = grpc.server(futures.ThreadPoolExecutor(max_workers=10), options=options)
-    rvs = RVizServer()
+    rvs = RVizServer(base)
     rv_rpc.add_RVizServicer_to_server(rvs, server)
     server.add_insecure_port(host)
     server.start()
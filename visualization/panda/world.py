@@ -130,6 +130,7 @@ class World(ShowBase, object):
         # for remote visualization
         self._external_update_objinfo_list = []  # see anime_info.py
         self._external_update_robotinfo_list = []
+        self._external_update_jlcinfo_list = []
         taskMgr.add(self._external_update, "external_update", appendTask=True)
         # for stationary models
         self._noupdate_model_list = []
@@ -177,23 +178,11 @@ class World(ShowBase, object):
 
     def _external_update(self, task):
         for _external_update_robotinfo in self._external_update_robotinfo_list:
-            robot_s = _external_update_robotinfo.robot_s
-            robot_component_name = _external_update_robotinfo.robot_component_name
-            robot_meshmodel = _external_update_robotinfo.robot_meshmodel
-            robot_meshmodel_parameter = _external_update_robotinfo.robot_meshmodel_parameters
+            # the link meshes are never rebuilt, only their transforms change
             robot_path = _external_update_robotinfo.robot_path
-            robot_path_counter = _external_update_robotinfo.robot_path_counter
-            robot_meshmodel.detach()
-            robot_s.fk(component_name=robot_component_name, joint_values=robot_path[robot_path_counter])
-            _external_update_robotinfo.robot_meshmodel = robot_s.gen_mesh_model(
-                tcp_jntid=robot_meshmodel_parameter[0],
-                tcp_loc_pos=robot_meshmodel_parameter[1],
-                tcp_loc_rotmat=robot_meshmodel_parameter[2],
-                toggle_tcpcs=robot_meshmodel_parameter[3],
-                toggle_jntscs=robot_meshmodel_parameter[4],
-                rgba=robot_meshmodel_parameter[5],
-                name=robot_meshmodel_parameter[6])
-            _external_update_robotinfo.robot_meshmodel.attach_to(self)
+            _external_update_robotinfo.robot_s.fk(component_name=_external_update_robotinfo.robot_component_name,
+                                                  jnt_values=robot_path[_external_update_robotinfo.robot_path_counter])
+            ani.RobotInfo.update_jlc_nodepaths(_external_update_robotinfo.jlc_nodepaths)
             _external_update_robotinfo.robot_path_counter += 1
             if _external_update_robotinfo.robot_path_counter >= len(robot_path):
                 _external_update_robotinfo.robot_path_counter = 0
@@ -210,6 +199,17 @@ class World(ShowBase, object):
             _external_update_objinfo.obj_path_counter += 1
             if _external_update_objinfo.obj_path_counter >= len(obj_path):
                 _external_update_objinfo.obj_path_counter = 0
+        for _external_update_jlcinfo in self._external_update_jlcinfo_list:
+            # the link meshes are never rebuilt, only their transforms change
+            path_counter = _external_update_jlcinfo.path_counter
+            if path_counter >= _external_update_jlcinfo.n_ready:
+                continue  # the batched fk thread has not reached this configuration yet
+            for lnk_nodepath, delta_homomat in zip(_external_update_jlcinfo.lnk_nodepaths,
+                                                   _external_update_jlcinfo.delta_homomats[path_counter]):
+                lnk_nodepath.setMat(p3dh.npmat4_to_pdmat4(delta_homomat))
+            _external_update_jlcinfo.path_counter += 1
+            if _external_update_jlcinfo.path_counter >= len(_external_update_jlcinfo.jnt_vals_path):
+                _external_update_jlcinfo.path_counter = 0
         return task.cont
 
     def change_debug_status(self, toggledebug):
@@ -271,16 +271,33 @@ class World(ShowBase, object):
         :param robotinfo: anime_info.RobotInfo
         :return:
         """
+        robotinfo.root_nodepath.reparentTo(self.render)
         self._external_update_robotinfo_list.append(robotinfo)
 
     def detach_external_update_robot(self, robot_info):
         self._external_update_robotinfo_list.remove(robot_info)
-        robot_info.robot_meshmodel.detach()
+        robot_info.root_nodepath.detachNode()
 
     def clear_external_update_robot(self):
-        for robot in self._external_update_robotinfo_list:
+        for robot in self._external_update_robotinfo_list.copy():
             self.detach_external_update_robot(robot)
 
+    def attach_external_update_jlc(self, jlcinfo):
+        """
+        :param jlcinfo: anime_info.JLCInfo
+        :return:
+        """
+        jlcinfo.root_nodepath.reparentTo(self.render)
+        self._external_update_jlcinfo_list.append(jlcinfo)
+
+    def detach_external_update_jlc(self, jlcinfo):
+        self._external_update_jlcinfo_list.remove(jlcinfo)
+        jlcinfo.root_nodepath.detachNode()
+
+    def clear_external_update_jlc(self):
+        for jlcinfo in self._external_update_jlcinfo_list.copy():
+            self.detach_external_update_jlc(jlcinfo)
+
     def attach_noupdate_model(self, model):
         model.attach_to(self)
         self._noupdate_model_list.append(model)